@@ -0,0 +1,55 @@
+"""
+Concurrency benchmark for async task functions.
+
+Runs a burst of I/O-bound tasks (each waits 100 ms) through TaskAutomation
+as sync functions on the default worker pool, as sync functions on a
+pool with a worker per task, and as async functions on the event loop,
+reporting wall time and the most threads started for it.
+
+Usage:
+    python benchmarks/bench_async_tasks.py [num_tasks]   (default: 2000)
+"""
+import os
+import sys
+import time
+import asyncio
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.task_automation import TaskAutomation
+
+def run(total, function, workers=8):
+    """Seconds to complete the burst, and the most threads it added."""
+    automation = TaskAutomation(executor_config={"workers": workers, "queue_size": total, "reserved": 0})
+    automation.add_task("io", "I/O-bound task", ["value"], function)
+
+    baseline = threading.active_count()
+    start = time.perf_counter()
+    handles = [automation.execute_task("io", {"value": i})["handle"] for i in range(total)]
+    peak = threading.active_count()
+    while not all(handle.done() for handle in handles):
+        peak = max(peak, threading.active_count())
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    automation.close()
+    return elapsed, peak - baseline
+
+def sync_io(value):
+    time.sleep(0.1)
+    return value
+
+async def async_io(value):
+    await asyncio.sleep(0.1)
+    return value
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print(f"{total} tasks, 100 ms of waiting each")
+    for label, function, workers in (("sync, 8 workers", sync_io, 8),
+                                     (f"sync, {total} workers", sync_io, total),
+                                     ("async, event loop", async_io, 8)):
+        elapsed, peak = run(total, function, workers)
+        print(f"{label:<24}{elapsed:>8.2f} s{peak:>8} threads")
+
+if __name__ == "__main__":
+    main()
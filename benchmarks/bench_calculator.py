@@ -0,0 +1,72 @@
+"""
+Throughput benchmark for the calculator source.
+
+Compares the previous regex-and-eval implementation with the Calculator
+engine on a corpus of spoken and written calculations, cold (every
+expression unique) and warm (repeated expressions served from the cache).
+
+Usage:
+    python benchmarks/bench_calculator.py [num_queries]
+"""
+import os
+import re
+import sys
+import time
+import random
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.calculator import Calculator
+
+TEMPLATES = [
+    "calculate {a} * {b} + {c}",
+    "what is {a} plus {b}",
+    "{a} divided by {b}",
+    "({a} + {b}) * {c}",
+    "what is {a} times {b} minus {c}"
+]
+
+def legacy_calculate(query):
+    """The regex extraction and eval() used before the Calculator engine."""
+    query = query.lower()
+    query = query.replace("plus", "+")
+    query = query.replace("minus", "-")
+    query = query.replace("times", "*")
+    query = query.replace("multiplied by", "*")
+    query = query.replace("divided by", "/")
+    expression = re.findall(r'[\d\+\-\*\/\(\)\.\s]+', query)
+    if not expression:
+        return None
+    expression = re.sub(r'\s+', '', ''.join(expression).strip())
+    try:
+        return eval(expression)
+    except Exception:
+        return None
+
+def build_corpus(size, distinct, seed=3):
+    """Generate queries drawn from a pool of `distinct` expressions."""
+    rng = random.Random(seed)
+    pool = [
+        rng.choice(TEMPLATES).format(a=rng.randint(1, 9999), b=rng.randint(1, 999), c=rng.randint(1, 99))
+        for _ in range(distinct)
+    ]
+    return [rng.choice(pool) for _ in range(size)]
+
+def run(name, func, corpus):
+    """Time one implementation over the corpus."""
+    start = time.perf_counter()
+    func(corpus)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<34} {elapsed:8.3f} s  {len(corpus) / elapsed:12,.0f} queries/s")
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    for label, distinct in [("unique expressions", size), ("1,000 distinct expressions", 1_000)]:
+        corpus = build_corpus(size, distinct)
+        print(f"\n{size:,} queries, {label}")
+        run("legacy regex + eval", lambda queries: [legacy_calculate(q) for q in queries], corpus)
+        calculator = Calculator(cache_size=4096)
+        run("Calculator.calculate_many", calculator.calculate_many, corpus)
+
+if __name__ == "__main__":
+    main()
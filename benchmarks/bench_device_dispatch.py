@@ -0,0 +1,107 @@
+"""
+Throughput and latency benchmark for device rate limiting and batching.
+
+Sends a burst of light commands through TaskAutomation to a fake local hub
+that takes 20 ms per request plus 1 ms per command, and rejects requests
+beyond 10 per second, like a smart home hub's API. Compares calling the
+hub once per command without a rate limit, once per command within its
+rate limit, and in batches within its rate limit. The rate limit is set
+a little below the hub's so timer jitter doesn't push a request over it.
+
+Usage:
+    python benchmarks/bench_device_dispatch.py [num_commands]   (default: 200)
+"""
+import os
+import sys
+import time
+import threading
+from collections import deque
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.task_automation import TaskAutomation
+
+class FakeHub:
+    """A hub API with per-request latency and a requests-per-second limit."""
+
+    def __init__(self, limit=10, request_latency=0.02, command_latency=0.001):
+        self.limit = limit
+        self.request_latency = request_latency
+        self.command_latency = command_latency
+        self.requests = 0
+        self.rejected = 0
+        self._recent = deque()
+        self._lock = threading.Lock()
+
+    def _admit(self):
+        now = time.monotonic()
+        with self._lock:
+            self.requests += 1
+            while self._recent and now - self._recent[0] >= 1.0:
+                self._recent.popleft()
+            if len(self._recent) >= self.limit:
+                self.rejected += 1
+                raise RuntimeError("429 Too Many Requests")
+            self._recent.append(now)
+
+    def send(self, room):
+        self._admit()
+        time.sleep(self.request_latency + self.command_latency)
+        return {"success": True, "room": room}
+
+    def send_batch(self, commands):
+        self._admit()
+        time.sleep(self.request_latency + self.command_latency * len(commands))
+        return [{"success": True, "room": command["params"]["room"]} for command in commands]
+
+def run(total, rate=None, batched=False):
+    """Send a burst of commands; returns throughput, latencies and hub counters."""
+    hub = FakeHub()
+    automation = TaskAutomation(executor_config={"queue_size": total, "reserved": 0})
+    automation.add_device("fake_hub", rate=rate, burst=1,
+                          batch_handler=hub.send_batch if batched else None, batch_window=0.05)
+    automation.add_task("light", "Light", ["room"], hub.send, device="fake_hub")
+
+    latencies = []
+    lock = threading.Lock()
+
+    def done(sent):
+        def callback(handle):
+            with lock:
+                latencies.append(time.perf_counter() - sent)
+        return callback
+
+    start = time.perf_counter()
+    handles = []
+    for i in range(total):
+        handle = automation.execute_task("light", {"room": f"room {i}"})["handle"]
+        handle.add_done_callback(done(time.perf_counter()))
+        handles.append(handle)
+    failed = 0
+    for handle in handles:
+        handle.wait()
+        failed += handle.status() != "completed"
+    elapsed = time.perf_counter() - start
+    automation.close()
+
+    latencies.sort()
+    return {
+        "throughput": (total - failed) / elapsed,
+        "p50": latencies[len(latencies) // 2] * 1000,
+        "p95": latencies[int(len(latencies) * 0.95)] * 1000,
+        "failed": failed,
+        "requests": hub.requests
+    }
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print(f"{total} commands, hub limit 10 requests/s, 20 ms + 1 ms/command per request")
+    print(f"{'mode':<28}{'ok/s':>8}{'p50 ms':>10}{'p95 ms':>10}{'failed':>8}{'requests':>10}")
+    for label, rate, batched in (("per command, no limit", None, False),
+                                 ("per command, 8/s", 8, False),
+                                 ("batched, 8/s", 8, True)):
+        stats = run(total, rate, batched)
+        print(f"{label:<28}{stats['throughput']:>8.1f}{stats['p50']:>10.0f}{stats['p95']:>10.0f}"
+              f"{stats['failed']:>8}{stats['requests']:>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Throughput benchmark for location extraction.
+
+Compares the word-after-"in" heuristic InformationRetrieval used before
+with the gazetteer, both on the bundled gazetteer and on one padded with
+synthetic places (as a full GeoNames export would be). The gazetteer is
+measured cold (scan cache cleared before each query) and warm.
+
+Usage:
+    python benchmarks/bench_gazetteer.py [num_queries] [synthetic_places]
+"""
+import os
+import sys
+import time
+import random
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from core.gazetteer import Gazetteer
+
+TEMPLATES = [
+    "what time is it in {place}",
+    "what's the weather like in {place} today",
+    "will it rain tomorrow in {place}",
+    "{place} forecast for the weekend",
+    "show me the latest news about {topic}",
+    "how far is {place} from {other}",
+    "tell me about {topic}"
+]
+PLACES = ["New York", "Tokyo", "Paris", "London", "Sao Paulo", "Los Angeles", "Springfield",
+          "Hong Kong", "Salt Lake City", "Rio de Janeiro", "Gotham"]
+TOPICS = ["robotics", "voice recognition", "electric cars", "space travel"]
+
+def legacy_extract_location(query):
+    """The word-after-indicator heuristic used before the gazetteer."""
+    words = query.lower().split()
+    for i, word in enumerate(words):
+        if word in ["in", "at", "for", "near"] and i < len(words) - 1:
+            return words[i + 1].capitalize()
+    return None
+
+def build_queries(count, seed=7):
+    """Generate a reproducible mix of location and non-location queries."""
+    rng = random.Random(seed)
+    return [
+        rng.choice(TEMPLATES).format(place=rng.choice(PLACES), other=rng.choice(PLACES), topic=rng.choice(TOPICS))
+        for _ in range(count)
+    ]
+
+def pad(gazetteer, count, seed=7):
+    """Add synthetic one- to three-word places."""
+    rng = random.Random(seed)
+    syllables = ["ka", "lo", "mi", "ra", "tan", "ber", "vil", "port", "ston", "ford", "ham", "dale"]
+    for _ in range(count):
+        name = " ".join(
+            "".join(rng.choice(syllables) for _ in range(rng.randint(2, 3))).capitalize()
+            for _ in range(rng.choice([1, 1, 1, 2, 3]))
+        )
+        gazetteer.add(name, "XX", rng.randint(100, 100000), "UTC")
+
+def measure(label, function, queries):
+    start = time.perf_counter()
+    for query in queries:
+        function(query)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {len(queries) / elapsed:>12,.0f} queries/s")
+
+def main():
+    num_queries = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    synthetic = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    queries = build_queries(num_queries)
+    path = os.path.join(ROOT, "data", "gazetteer.tsv")
+
+    for label, extra in [("bundled", 0), (f"+{synthetic:,} synthetic", synthetic)]:
+        gazetteer = Gazetteer(path)
+        start = time.perf_counter()
+        pad(gazetteer, extra)
+        print(f"\n{label}: {len(gazetteer):,} places (padding built in {time.perf_counter() - start:.2f} s)")
+
+        def cold(query):
+            gazetteer._scan.cache_clear()
+            return gazetteer.extract(query)
+
+        measure("legacy heuristic", legacy_extract_location, queries)
+        measure("gazetteer (cold)", cold, queries)
+        measure("gazetteer (warm cache)", gazetteer.extract, queries)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Throughput benchmark for query routing.
+
+Compares the compiled IntentMatcher with the keyword-scan chain that
+InformationRetrieval._determine_sources used previously, first with the
+default tables and then with a large table (as loaded from config) where
+the scan cost grows with the number of keywords.
+
+Usage:
+    python benchmarks/bench_intent_matcher.py [num_queries]
+"""
+import os
+import sys
+import time
+import random
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.intent_matcher import IntentMatcher, DEFAULT_SOURCE_INTENTS
+
+TEMPLATES = [
+    "what time is it in {place}",
+    "what's the weather like in {place} today",
+    "will it rain tomorrow in {place}",
+    "what is the date",
+    "calculate {a} plus {b}",
+    "{a} * {b} - {a}",
+    "show me the latest news about {topic}",
+    "who is {person}",
+    "tell me about {topic} and what's the forecast for {place}",
+    "how does {topic} work"
+]
+PLACES = ["new york", "tokyo", "paris", "london", "sydney", "berlin"]
+TOPICS = ["robotics", "voice recognition", "electric cars", "space travel", "the stock market"]
+PEOPLE = ["albert einstein", "ada lovelace", "alan turing", "grace hopper"]
+
+def legacy_determine_sources(query):
+    """The substring-scan routing used before the intent matcher."""
+    query = query.lower()
+    if any(word in query for word in ["time", "hour", "clock"]):
+        return ["time"]
+    if any(word in query for word in ["weather", "temperature", "forecast", "rain", "snow", "sunny"]):
+        return ["weather"]
+    if any(word in query for word in ["date", "day", "today", "tomorrow", "month", "year"]):
+        return ["date"]
+    if any(word in query for word in ["calculate", "compute", "math", "plus", "minus", "times", "divided"]) or \
+       any(symbol in query for symbol in ["+", "-", "*", "/", "="]):
+        return ["calculator"]
+    if any(word in query for word in ["news", "latest", "headlines", "article"]):
+        return ["news"]
+    return ["web", "knowledge_base"]
+
+def legacy_table_scan(table):
+    """Build a generic substring scan over a keyword table."""
+    def determine(query):
+        query = query.lower()
+        for entry in table:
+            if any(word in query for word in entry["keywords"]):
+                return [entry["intent"]]
+        return []
+    return determine
+
+def build_large_table(num_intents, keywords_per_intent=20):
+    """Generate a keyword table much larger than the defaults."""
+    table = [
+        {"intent": f"intent_{i}", "keywords": [f"kw{i}x{k}" for k in range(keywords_per_intent)]}
+        for i in range(num_intents)
+    ]
+    return table + DEFAULT_SOURCE_INTENTS
+
+def build_corpus(size, seed=42):
+    """Generate a reproducible corpus of queries."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        template = rng.choice(TEMPLATES)
+        corpus.append(template.format(
+            place=rng.choice(PLACES),
+            topic=rng.choice(TOPICS),
+            person=rng.choice(PEOPLE),
+            a=rng.randint(1, 999),
+            b=rng.randint(1, 999)
+        ))
+    return corpus
+
+def run(name, func, corpus):
+    """Time one routing function over the corpus."""
+    start = time.perf_counter()
+    for query in corpus:
+        func(query)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<24} {elapsed:8.3f} s  {len(corpus) / elapsed:12,.0f} queries/s")
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    corpus = build_corpus(size)
+    matcher = IntentMatcher(DEFAULT_SOURCE_INTENTS)
+
+    print(f"Routing {size:,} queries with the default tables")
+    run("legacy keyword scan", legacy_determine_sources, corpus)
+    run("IntentMatcher.classify", matcher.classify, corpus)
+    run("IntentMatcher.first", matcher.first, corpus)
+
+    table = build_large_table(100)
+    keywords = sum(len(entry["keywords"]) for entry in table)
+    subset = corpus[:max(1, size // 10)]
+    print(f"\nRouting {len(subset):,} queries with {keywords:,} keywords")
+    run("legacy keyword scan", legacy_table_scan(table), subset)
+    run("IntentMatcher.classify", IntentMatcher(table).classify, subset)
+
+if __name__ == "__main__":
+    main()
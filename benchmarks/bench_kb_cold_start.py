@@ -0,0 +1,90 @@
+"""
+Cold-start benchmark for the persisted knowledge base index.
+
+Writes the same corpus as a memory-mapped index and as a pickled in-memory
+index, then opens each one in a fresh interpreter and reports startup
+time, time to the first query and resident memory.
+
+Usage:
+    python benchmarks/bench_kb_cold_start.py [size]   (default: 100000)
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+def rss_mb():
+    """Current resident set size of this process in MB."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    # ru_maxrss is the peak, in KB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def child(path, query):
+    """Open an index and report timings as JSON (runs in a subprocess)."""
+    from core.knowledge_base import KnowledgeBase
+
+    before = rss_mb()
+    start = time.perf_counter()
+    kb = KnowledgeBase(index_path=path)
+    opened = time.perf_counter() - start
+    kb.search(query)
+    first_query = time.perf_counter() - start
+    print(json.dumps({
+        "open": opened,
+        "first_query": first_query,
+        "rss": rss_mb() - before,
+        "documents": len(kb)
+    }))
+
+def measure(path, query):
+    """Run the child in a fresh interpreter."""
+    output = subprocess.check_output([sys.executable, __file__, "--child", path, query], cwd=ROOT)
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    from core.knowledge_base import KnowledgeBase
+    from bench_knowledge_base import build_vocabulary, build_documents
+
+    directory = tempfile.mkdtemp()
+    try:
+        vocabulary = build_vocabulary()
+        query = " ".join(vocabulary[:3])
+        kb = KnowledgeBase()
+        for doc_id, title, content in build_documents(size, vocabulary):
+            kb.add_document(doc_id, title, content)
+
+        pickle_path = os.path.join(directory, "kb.pickle")
+        mapped_path = os.path.join(directory, "kb.mapped")
+        kb._save_pickle(pickle_path)
+        kb.save(mapped_path)
+
+        print(f"{size:,} documents")
+        print(f"{'format':<12} {'size MB':>8} {'open s':>8} {'1st query s':>12} {'RSS MB':>8}")
+        for name, path in [("in-memory", pickle_path), ("mmap", mapped_path)]:
+            result = measure(path, query)
+            print(f"{name:<12} {os.path.getsize(path) / 1e6:8.1f} {result['open']:8.3f} "
+                  f"{result['first_query']:12.3f} {result['rss']:8.1f}")
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    if len(sys.argv) > 3 and sys.argv[1] == "--child":
+        child(sys.argv[2], sys.argv[3])
+    else:
+        main()
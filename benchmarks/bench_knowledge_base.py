@@ -0,0 +1,101 @@
+"""
+Benchmark for the BM25 knowledge base.
+
+Builds synthetic corpora, then measures index build time, persisted-index
+load time, query latency and the linear substring scan the knowledge base
+source used previously.
+
+Usage:
+    python benchmarks/bench_knowledge_base.py [size ...]   (default: 10000 100000)
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.knowledge_base import KnowledgeBase
+
+VOCABULARY_SIZE = 50_000
+WORDS_PER_DOC = 120
+NUM_QUERIES = 1_000
+
+def build_vocabulary():
+    """Generate pseudo-words."""
+    rng = random.Random(7)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(3, 10))) for _ in range(VOCABULARY_SIZE)]
+
+def build_documents(size, vocabulary, seed=42):
+    """Generate documents whose word frequencies follow a Zipf-like curve."""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    documents = []
+    for i in range(size):
+        words = rng.choices(vocabulary, weights=weights, k=WORDS_PER_DOC)
+        documents.append((f"doc-{i}", " ".join(words[:5]), " ".join(words[5:])))
+    return documents
+
+def percentile(samples, pct):
+    """Get a percentile from a list of samples."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def bench(size, vocabulary):
+    """Run every measurement for one corpus size."""
+    print(f"\n== {size:,} documents ==")
+    documents = build_documents(size, vocabulary)
+    rng = random.Random(1)
+    queries = [" ".join(rng.choices(vocabulary[:5000], k=3)) for _ in range(NUM_QUERIES)]
+
+    directory = tempfile.mkdtemp()
+    index_path = os.path.join(directory, "kb.index")
+    try:
+        kb = KnowledgeBase()
+        start = time.perf_counter()
+        for doc_id, title, content in documents:
+            kb.add_document(doc_id, title, content)
+        print(f"build index           {time.perf_counter() - start:8.2f} s")
+
+        start = time.perf_counter()
+        kb.save(index_path)
+        print(f"save index            {time.perf_counter() - start:8.2f} s  ({os.path.getsize(index_path) / 1e6:.1f} MB)")
+
+        start = time.perf_counter()
+        KnowledgeBase(index_path=index_path)
+        print(f"load persisted index  {time.perf_counter() - start:8.2f} s")
+
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            kb.search(query, top_k=5)
+            latencies.append(time.perf_counter() - start)
+        print(f"BM25 top-5 query      p50 {percentile(latencies, 50) * 1e3:7.2f} ms  "
+              f"p95 {percentile(latencies, 95) * 1e3:7.2f} ms")
+
+        # Linear scan over every document, as the old substring lookup did
+        sample = queries[:20]
+        start = time.perf_counter()
+        for query in sample:
+            for _, title, content in documents:
+                if query in title or query in content:
+                    break
+        print(f"linear scan query     avg {(time.perf_counter() - start) / len(sample) * 1e3:7.2f} ms")
+
+        start = time.perf_counter()
+        for doc_id, _, _ in documents[:1000]:
+            kb.remove_document(doc_id)
+        print(f"remove 1,000 docs     {time.perf_counter() - start:8.2f} s")
+    finally:
+        shutil.rmtree(directory)
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    vocabulary = build_vocabulary()
+    for size in sizes:
+        bench(size, vocabulary)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark for the process lane.
+
+1. CPU-bound tasks: runs a batch of pure-Python tasks on the thread lane and
+   on the process lane, reporting wall time and how late a 10 ms heartbeat
+   thread wakes up meanwhile (GIL contention).
+2. Large payloads: passes a bytes parameter to a process-lane task through
+   shared memory and through pickling, reporting time per task.
+
+Usage:
+    python benchmarks/bench_process_lane.py [num_tasks] [payload_mb]   (default: 16 16)
+"""
+import os
+import sys
+import time
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.task_automation import TaskAutomation
+
+def crunch(n):
+    """Pure-Python CPU work."""
+    total = 0
+    for i in range(n):
+        total = (total * 31 + i) % 1000003
+    return {"success": True, "total": total}
+
+def measure(data):
+    """Touch a large payload."""
+    return {"success": True, "size": len(data), "sample": data[::1 << 16]}
+
+def heartbeat(stop, lateness):
+    while not stop.is_set():
+        start = time.perf_counter()
+        time.sleep(0.01)
+        lateness.append(time.perf_counter() - start - 0.01)
+
+def run_cpu(total, lane):
+    """Seconds to run the batch, and the heartbeat's p99 lateness in ms."""
+    automation = TaskAutomation(executor_config={"reserved": 0})
+    automation.add_task("crunch", "Crunch", ["n"], crunch, lane=lane)
+    automation.execute_task("crunch", {"n": 1})["handle"].wait()     # Warm up
+
+    stop, lateness = threading.Event(), []
+    beat = threading.Thread(target=heartbeat, args=(stop, lateness))
+    beat.start()
+    start = time.perf_counter()
+    handles = [automation.execute_task("crunch", {"n": 2_000_000})["handle"] for _ in range(total)]
+    for handle in handles:
+        handle.result()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    beat.join()
+    automation.close()
+
+    lateness.sort()
+    return elapsed, lateness[int(len(lateness) * 0.99)] * 1000
+
+def run_payload(total, size, shm_threshold):
+    """Milliseconds per task passing a payload of the given size."""
+    automation = TaskAutomation(process_config={"shm_threshold": shm_threshold})
+    automation.add_task("measure", "Measure", ["data"], measure, lane="process")
+    data = os.urandom(size)
+    automation.execute_task("measure", {"data": data})["handle"].result()    # Warm up
+
+    start = time.perf_counter()
+    handles = [automation.execute_task("measure", {"data": data})["handle"] for _ in range(total)]
+    for handle in handles:
+        handle.result()
+    elapsed = time.perf_counter() - start
+    automation.close()
+    return elapsed * 1000 / total
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    payload_mb = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+
+    print(f"{total} CPU-bound tasks ({os.cpu_count()} CPUs)")
+    for lane in ("thread", "process"):
+        elapsed, late = run_cpu(total, lane)
+        print(f"  {lane:<10}{elapsed:>8.2f} s   heartbeat p99 {late:>6.1f} ms late")
+
+    size = payload_mb * 1024 * 1024
+    print(f"{total} tasks with a {payload_mb} MB payload")
+    print(f"  shared memory {run_payload(total, size, 1 << 20):>8.1f} ms per task")
+    print(f"  pickled       {run_payload(total, size, size + 1):>8.1f} ms per task")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Benchmark for dependency-aware routines.
+
+Builds a layered routine (every step depends on all steps of the layer
+before it) out of sleep tasks and compares the RoutineEngine's wall time
+with running the same steps one after another, as execute_routine used to.
+
+Usage:
+    python benchmarks/bench_routine_engine.py [layers] [width] [step_ms]   (default: 4 4 50)
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.task_automation import TaskAutomation
+
+def layered_steps(layers, width):
+    steps = []
+    previous = []
+    for layer in range(layers):
+        current = [f"s{layer}_{i}" for i in range(width)]
+        for step_id in current:
+            steps.append({"id": step_id, "task": "sleep", "depends_on": previous})
+        previous = current
+    return steps
+
+def main():
+    layers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    width = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    step_seconds = (float(sys.argv[3]) if len(sys.argv) > 3 else 50) / 1000
+
+    automation = TaskAutomation()
+    automation.add_task("sleep", "Sleep", [], lambda: time.sleep(step_seconds) or {"success": True})
+    steps = layered_steps(layers, width)
+    automation.add_routine("bench", "Layered sleep routine", steps)
+
+    start = time.perf_counter()
+    for step in steps:
+        automation.execute_task("sleep", {})["handle"].wait()
+    sequential = time.perf_counter() - start
+
+    report = automation.execute_routine("bench")
+
+    print(f"{layers} layers x {width} steps of {step_seconds * 1000:g} ms")
+    print(f"{'sequential':<16} {sequential:>8.3f} s")
+    print(f"{'routine engine':<16} {report['duration']:>8.3f} s "
+          f"(critical path {report['critical_path_duration']:.3f} s, {len(report['critical_path'])} steps)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Scale benchmark for the job scheduler.
+
+Schedules a large number of one-shot reminders, cancels half of them and
+fires the rest on a fake clock, reporting the cost of each operation with
+and without the persistent job log.
+
+Usage:
+    python benchmarks/bench_scheduler.py [num_jobs]   (default: 100000)
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.scheduler import Scheduler
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+def timed(label, count, function):
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<10} {count / elapsed:>12,.0f} ops/s {elapsed * 1e6 / count:>8.2f} us/op")
+
+def run(total, path=None):
+    clock = FakeClock()
+    fired = []
+    scheduler = Scheduler(lambda job: fired.append(job["id"]), path, clock=clock)
+    dues = [random.uniform(1, 86400) for _ in range(total)]
+    ids = []
+
+    timed("schedule", total, lambda: ids.extend(
+        scheduler.schedule("task", "remind", {"message": "x"}, at=due)["id"] for due in dues))
+    cancelled = random.sample(ids, total // 2)
+    timed("cancel", len(cancelled), lambda: [scheduler.cancel(job_id) for job_id in cancelled])
+
+    def fire():
+        for hour in range(1, 25):
+            clock.now = hour * 3600
+            scheduler.run_pending()
+    timed("fire", total - len(cancelled), fire)
+
+    assert len(fired) == total - len(cancelled)
+    if path is not None:
+        start = time.perf_counter()
+        scheduler.close()
+        Scheduler(lambda job: None, path, clock=clock).close()
+        print(f"  {'reload':<10} {(time.perf_counter() - start) * 1000:>12.1f} ms")
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    random.seed(1)
+
+    print(f"{total:,} jobs, in memory")
+    run(total)
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        print(f"{total:,} jobs, with job log")
+        run(total, os.path.join(temp_dir, "schedule.jsonl"))
+    finally:
+        shutil.rmtree(temp_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark for batch searching.
+
+Simulates a scheduled briefing: weather for several locations, news topics
+and knowledge lookups, with repeats. Compares a loop of search() with a
+single search_many() call. Network sources are replaced with stubs of fixed
+latency so the numbers are reproducible.
+
+Usage:
+    python benchmarks/bench_search_many.py [latency_ms]
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.information_retrieval import InformationRetrieval
+
+LOCATIONS = ["London", "Paris", "Tokyo", "Sydney", "Boston", "Berlin"]
+TOPICS = ["technology", "science", "markets", "sports", "politics"]
+
+def build_briefing():
+    """A briefing's worth of queries, including duplicates."""
+    queries = []
+    for location in LOCATIONS:
+        queries.append(f"weather forecast in {location}")
+    for topic in TOPICS:
+        queries.append(f"latest news about {topic}")
+    queries += ["what is ai", "who created jarvis", "how does voice recognition work"]
+    queries += ["calculate 25 * 4", "what is 20 percent of 150"]
+    # Several briefing sections ask for the same things
+    queries += [f"weather forecast in {location}" for location in LOCATIONS[:3]]
+    queries += ["latest news about technology", "what is ai"]
+    return queries
+
+def stub_source(latency):
+    """A network-bound source with fixed latency."""
+    def source(query):
+        time.sleep(latency)
+        return {"query": query}
+    return source
+
+def main():
+    latency = (float(sys.argv[1]) if len(sys.argv) > 1 else 100) / 1000
+    queries = build_briefing()
+
+    info_retrieval = InformationRetrieval()
+    for name in ["web", "news", "weather"]:
+        info_retrieval.sources[name] = stub_source(latency)
+
+    print(f"{len(queries)} queries, {latency * 1000:.0f} ms per network lookup, "
+          f"{info_retrieval.max_workers} workers")
+
+    start = time.perf_counter()
+    for query in queries:
+        info_retrieval.search(query)
+    print(f"loop of search()   {time.perf_counter() - start:7.3f} s")
+
+    start = time.perf_counter()
+    info_retrieval.search_many(queries)
+    print(f"search_many()      {time.perf_counter() - start:7.3f} s")
+
+    info_retrieval.close()
+
+if __name__ == "__main__":
+    main()
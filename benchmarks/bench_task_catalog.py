@@ -0,0 +1,90 @@
+"""
+Startup benchmark for the task catalog.
+
+Writes a catalog of generated tasks (plus a routine per 10 tasks) split
+across several files, then measures TaskAutomation startup without a
+catalog, with a cold catalog (parsed and compiled), and with a warm one
+(taken from the compiled cache), for JSON and YAML files. Functions are
+only imported when a task first runs; the cost of that first execution is
+reported too.
+
+Usage:
+    python benchmarks/bench_task_catalog.py [num_tasks] [num_files]   (default: 1000 10)
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.task_automation import TaskAutomation
+from core import task_catalog
+
+def write_catalog(directory, total, files, extension):
+    """Write total tasks across the given number of files."""
+    per_file = total // files
+    for number in range(files):
+        tasks, routines = {}, {}
+        for i in range(number * per_file, (number + 1) * per_file):
+            tasks[f"task_{i}"] = {
+                "description": f"Generated task {i}",
+                "parameters": ["value"],
+                "function": "json:dumps",
+                "timeout": 30,
+                "idempotent": i % 2 == 0
+            }
+            if i % 10 == 9:
+                routines[f"routine_{i}"] = {"tasks": [{"task": f"task_{j}", "params": {"value": j}}
+                                                      for j in range(i - 9, i + 1)]}
+        catalog = {"tasks": tasks, "routines": routines}
+        path = os.path.join(directory, f"catalog_{number}{extension}")
+        with open(path, "w") as f:
+            if extension == ".json":
+                json.dump(catalog, f, indent=2)
+            else:
+                task_catalog.yaml.safe_dump(catalog, f)
+
+def startup(catalog_dir=None):
+    """Milliseconds to construct TaskAutomation."""
+    start = time.perf_counter()
+    automation = TaskAutomation(catalog_path=catalog_dir, catalog_reload=None)
+    elapsed = (time.perf_counter() - start) * 1000
+    return elapsed, automation
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    files = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    temp_dir = tempfile.mkdtemp()
+    try:
+        baseline, automation = startup()
+        automation.close()
+        print(f"{total} tasks in {files} files")
+        print(f"  no catalog          {baseline:>8.1f} ms")
+
+        extensions = [".json"] + ([".yaml"] if task_catalog.yaml is not None else [])
+        for extension in extensions:
+            directory = os.path.join(temp_dir, extension[1:])
+            os.makedirs(directory)
+            write_catalog(directory, total, files, extension)
+
+            cold, automation = startup(directory)
+            automation.close()
+            warm, automation = startup(directory)
+            print(f"  {extension[1:]:<5} cold          {cold:>8.1f} ms")
+            print(f"  {extension[1:]:<5} warm (cache)  {warm:>8.1f} ms")
+
+            start = time.perf_counter()
+            automation.execute_task("task_0", {"value": 1})["handle"].wait()
+            first = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            automation.execute_task("task_0", {"value": 2})["handle"].wait()
+            again = (time.perf_counter() - start) * 1000
+            print(f"  {extension[1:]:<5} first run     {first:>8.2f} ms (then {again:.2f} ms)")
+            automation.close()
+    finally:
+        shutil.rmtree(temp_dir)
+
+if __name__ == "__main__":
+    main()
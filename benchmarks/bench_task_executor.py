@@ -0,0 +1,92 @@
+"""
+Load benchmark for task execution.
+
+Submits a burst of short tasks through a thread per task (how
+TaskAutomation.execute_task used to run them) and through the bounded
+TaskExecutor, reporting throughput, peak thread count and memory growth
+with the whole burst queued.
+
+Usage:
+    python benchmarks/bench_task_executor.py [num_tasks] [task_ms]   (default: 10000 50)
+"""
+import os
+import sys
+import time
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.task_executor import TaskExecutor
+
+def rss_mb():
+    """Current resident set size of this process in MB (Linux)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+class Run:
+    """Counts finished tasks and samples thread count and memory."""
+
+    def __init__(self, total, task_seconds):
+        self.total = total
+        self.task_seconds = task_seconds
+        self.done = 0
+        self.lock = threading.Lock()
+        self.finished = threading.Event()
+        self.peak_threads = threading.active_count()
+        self.peak_rss = rss_mb()
+
+    def task(self):
+        time.sleep(self.task_seconds)
+        with self.lock:
+            self.done += 1
+            if self.done == self.total:
+                self.finished.set()
+
+    def sample(self):
+        self.peak_threads = max(self.peak_threads, threading.active_count())
+        self.peak_rss = max(self.peak_rss, rss_mb())
+
+def thread_per_task(run):
+    for i in range(run.total):
+        thread = threading.Thread(target=run.task)
+        thread.daemon = True
+        thread.start()
+        if i % 100 == 0:
+            run.sample()
+
+def executor(run, workers):
+    pool = TaskExecutor(workers=workers, queue_size=run.total, policy="block")
+    for i in range(run.total):
+        pool.submit(i, run.task)
+    run.sample()
+    return pool
+
+def measure(label, total, task_seconds, submit):
+    run = Run(total, task_seconds)
+    before = rss_mb()
+    start = time.perf_counter()
+    pool = submit(run)
+    while not run.finished.wait(0.01):
+        run.sample()
+    elapsed = time.perf_counter() - start
+    if pool is not None:
+        pool.shutdown()
+    print(f"{label:<22} {total / elapsed:>10,.0f} tasks/s {run.peak_threads:>8} threads "
+          f"{run.peak_rss - before:>8.1f} MB peak growth")
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    task_seconds = (float(sys.argv[2]) if len(sys.argv) > 2 else 50) / 1000
+
+    print(f"{total:,} tasks of {task_seconds * 1000:g} ms")
+    measure("thread per task", total, task_seconds, thread_per_task)
+    for workers in (8, 64):
+        measure(f"executor ({workers} workers)", total, task_seconds, lambda run: executor(run, workers))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Overhead benchmark for the task journal.
+
+Measures what journaling adds to each task: the cost of recording a
+task's enqueue, start and finish events on the calling threads, and the end-to-end time of
+running trivial tasks through TaskAutomation with and without a journal.
+The target is under 50 microseconds per task.
+
+Usage:
+    python benchmarks/bench_task_journal.py [num_tasks]   (default: 20000)
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.task_automation import TaskAutomation
+from core.task_journal import TaskJournal
+
+def record_cost(path, total):
+    """Microseconds per task spent in TaskJournal.record() for its three events."""
+    journal = TaskJournal(path)
+    params = {"room": "living room"}
+    result = {"success": True, "message": "Turned on lights in living room"}
+
+    start = time.perf_counter()
+    for i in range(total):
+        task_id = f"turn_on_lights_{i}"
+        journal.record(task_id, "enqueue", {"name": "turn_on_lights", "params": params, "priority": "normal"})
+        journal.record(task_id, "start")
+        journal.record(task_id, "finish", {"result": result, "duration": 0.001})
+    elapsed = time.perf_counter() - start
+    journal.flush()
+    flushed = time.perf_counter() - start
+
+    stats = journal.get_stats()
+    journal.close()
+    return elapsed * 1e6 / total, flushed * 1e6 / total, stats
+
+def run_tasks(total, journal_path=None):
+    """Microseconds per task to execute and complete trivial tasks."""
+    automation = TaskAutomation(
+        executor_config={"policy": "block", "queue_size": 10_000, "block_timeout": None},
+        journal_path=journal_path
+    )
+    automation.add_task("echo", "Echo", ["value"], lambda value: {"success": True})
+
+    start = time.perf_counter()
+    handles = [automation.execute_task("echo", {"value": i})["handle"] for i in range(total)]
+    for handle in handles:
+        handle.wait()
+    if automation.journal is not None:
+        automation.journal.flush()
+    elapsed = time.perf_counter() - start
+    automation.close()
+    return elapsed * 1e6 / total
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    temp_dir = tempfile.mkdtemp()
+    try:
+        recording, flushed, stats = record_cost(os.path.join(temp_dir, "record.db"), total)
+        print(f"record() per task (3 events):     {recording:>7.1f} us "
+              f"({flushed:.1f} us including commit, {stats['mean_batch']:.0f} events per commit)")
+
+        baseline = run_tasks(total)
+        journaled = run_tasks(total, os.path.join(temp_dir, "tasks.db"))
+        print(f"execute_task without journal:     {baseline:>7.1f} us per task")
+        print(f"execute_task with journal:        {journaled:>7.1f} us per task")
+        print(f"journal overhead:                 {journaled - baseline:>7.1f} us per task (target < 50 us)")
+    finally:
+        shutil.rmtree(temp_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Memory benchmark for task retention.
+
+Executes a large number of trivial tasks through TaskAutomation and
+samples resident memory as they complete; with the retention policy in
+place RSS should level off once running_tasks is full. Also compares the
+size of a finished task kept as a TaskRecord with the nested dict it
+replaces.
+
+Usage:
+    python benchmarks/bench_task_retention.py [num_tasks]   (default: 1000000)
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.task_automation import TaskAutomation
+from core.task_registry import TaskRecord
+
+def rss_mb():
+    """Current resident set size of this process in MB (Linux)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+def entry_size(make, count=10_000):
+    """Average bytes allocated per entry built by make(i)."""
+    tracemalloc.start()
+    entries = [make(i) for i in range(count)]
+    size = tracemalloc.get_traced_memory()[0] / count
+    tracemalloc.stop()
+    del entries
+    return size
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    result = {"success": True, "message": "done"}
+    params = {"value": 1}
+
+    # Both share the params and result; only the per-task container is measured
+    def as_dict(i):
+        return {"name": "echo", "params": params, "status": "completed", "priority": "normal", "result": result}
+
+    def as_record(i):
+        record = TaskRecord("echo", "echo", params, created=0.0)
+        record.status, record.result = "completed", result
+        return record
+
+    print(f"finished task as dict:       {entry_size(as_dict):>6.0f} bytes")
+    print(f"finished task as TaskRecord: {entry_size(as_record):>6.0f} bytes (plus its finish time)")
+
+    automation = TaskAutomation(executor_config={"policy": "block", "queue_size": 10_000, "block_timeout": None})
+    automation.add_task("echo", "Echo", ["value"], lambda value: result)
+
+    print(f"\n{'tasks':>10} {'RSS MB':>8} {'kept':>6} {'tasks/s':>10}")
+    start = time.perf_counter()
+    step = max(1, total // 10)
+    for i in range(1, total + 1):
+        automation.execute_task("echo", {"value": i})
+        if i % step == 0:
+            print(f"{i:>10,} {rss_mb():>8.1f} {len(automation.running_tasks):>6} "
+                  f"{i / (time.perf_counter() - start):>10,.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import asyncio
+import threading
+
+class AsyncRuntime:
+    """
+    Event loop for Jarvis AI Assistant's async task functions.
+    Runs coroutines on a single asyncio loop in a dedicated thread, started
+    on first use, so any number of I/O-bound tasks can wait concurrently
+    without a worker thread each. At most max_concurrent coroutines run at
+    once; the rest wait their turn on the loop. Coroutines are tracked by
+    key so a queued or running one can be cancelled from any thread, which
+    interrupts it at its next await.
+    """
+
+    def __init__(self, name="task-async", max_concurrent=10000):
+        """
+        Initialize the runtime.
+
+        Args:
+            name (str): Name of the event loop thread
+            max_concurrent (int): Most coroutines running at once
+        """
+        self.name = name
+        self.max_concurrent = max_concurrent
+
+        self.loop = None
+        self._thread = None
+        self._slots = None              # asyncio.Semaphore, created on the loop
+        self._active = {}               # key -> asyncio.Task, or None until it is created
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "cancelled": 0,
+            "errors": 0,
+            "running": 0,
+            "max_running": 0
+        }
+
+    def submit(self, key, coroutine):
+        """
+        Schedule a coroutine on the event loop.
+
+        Args:
+            key: Identifies the coroutine to cancel()
+            coroutine: The coroutine object to run; exceptions it raises
+                are printed, so it should handle its own errors
+
+        Raises:
+            RuntimeError: If the runtime has been shut down
+        """
+        with self._lock:
+            if self._closed:
+                coroutine.close()
+                raise RuntimeError(f"{self.name} has been shut down")
+            if self.loop is None:
+                self._start_loop()
+            self._active[key] = None
+            self.stats["submitted"] += 1
+        self.loop.call_soon_threadsafe(self._create_task, key, coroutine)
+
+    def cancel(self, key):
+        """
+        Cancel a queued or running coroutine.
+
+        Returns:
+            bool: False if it isn't known (never submitted, or already finished)
+        """
+        with self._lock:
+            if key not in self._active:
+                return False
+            task = self._active.pop(key)
+        if task is not None:
+            self.loop.call_soon_threadsafe(task.cancel)
+        return True
+
+    def shutdown(self, timeout=None):
+        """
+        Stop the event loop and its thread; new coroutines are refused.
+
+        Args:
+            timeout (float): Seconds to let running and waiting coroutines
+                finish before the rest are cancelled (None: no limit)
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            loop, thread = self.loop, self._thread
+        if loop is None:
+            return
+
+        asyncio.run_coroutine_threadsafe(self._drain(timeout), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    def get_stats(self):
+        """
+        Get event loop metrics.
+
+        Returns:
+            dict: Coroutines submitted, running, waiting for a slot and finished
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["active"] = len(self._active)
+            stats["waiting"] = max(0, stats["active"] - stats["running"])
+            return stats
+
+    def _start_loop(self):
+        """Create the event loop and its thread. Caller holds the lock."""
+        self.loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+            self.loop.call_soon(ready.set)
+            self.loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name=self.name)
+        self._thread.daemon = True
+        self._thread.start()
+        ready.wait()
+
+    async def _drain(self, timeout):
+        """Wait for the active coroutines, cancelling any left at the timeout. Runs on the loop."""
+        with self._lock:
+            tasks = [task for task in self._active.values() if task is not None]
+        if not tasks:
+            return
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+
+    def _create_task(self, key, coroutine):
+        """Start a submitted coroutine, unless it was cancelled first. Runs on the loop."""
+        with self._lock:
+            if key not in self._active:
+                coroutine.close()
+                self.stats["cancelled"] += 1
+                return
+            self._active[key] = self.loop.create_task(self._run(key, coroutine))
+
+    async def _run(self, key, coroutine):
+        """Run a coroutine once a slot is free."""
+        try:
+            async with self._slots:
+                with self._lock:
+                    self.stats["running"] += 1
+                    self.stats["max_running"] = max(self.stats["max_running"], self.stats["running"])
+                try:
+                    await coroutine
+                finally:
+                    with self._lock:
+                        self.stats["running"] -= 1
+            with self._lock:
+                self.stats["completed"] += 1
+        except asyncio.CancelledError:
+            coroutine.close()
+            with self._lock:
+                self.stats["cancelled"] += 1
+        except Exception as e:
+            print(f"Error in {self.name}: {e}")
+            with self._lock:
+                self.stats["errors"] += 1
+        finally:
+            with self._lock:
+                if self._active.get(key) is asyncio.current_task():
+                    del self._active[key]
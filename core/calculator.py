@@ -0,0 +1,368 @@
+import re
+import ast
+import math
+import operator
+from functools import lru_cache
+
+# One regular expression tokenizes the whole query in a single pass
+_TOKEN_RE = re.compile(r"""
+    (?P<number>\d+(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?|\.\d+)
+  | (?P<phrase>multiplied\s+by|divided\s+by|to\s+the\s+power\s+of|raised\s+to|square\s+root\s+of|percent\s+of)
+  | (?P<word>[a-z]+)
+  | (?P<op>\*\*|//|[-+*/^%()×÷])
+""", re.VERBOSE)
+
+# Spoken operators and their symbols
+_WORDS = {
+    "plus": "+",
+    "add": "+",
+    "minus": "-",
+    "subtract": "-",
+    "times": "*",
+    "x": "*",
+    "multiplied by": "*",
+    "divided by": "/",
+    "over": "/",
+    "mod": "%",
+    "modulo": "%",
+    "to the power of": "**",
+    "raised to": "**",
+    "power": "**",
+    "squared": "**2",
+    "cubed": "**3",
+    "×": "*",
+    "÷": "/",
+    "^": "**"
+}
+
+_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow
+}
+
+_UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg
+}
+
+_FUNCTIONS = {
+    "sqrt": math.sqrt,
+    "abs": abs
+}
+
+# Globals for compiled expressions: no builtins, only whitelisted functions
+_NAMESPACE = dict(_FUNCTIONS, __builtins__={})
+
+# Powers at most this large may run as plain bytecode without checks
+_SIMPLE_POWER_BITS = 64
+
+class CalculationError(ValueError):
+    """Raised when an expression is invalid or exceeds the evaluation limits."""
+
+class Calculator:
+    """
+    Safe arithmetic engine for Jarvis AI Assistant.
+    Turns spoken arithmetic ("5 plus 3 squared", "20 percent of 50") into an
+    expression, validates its syntax tree against a whitelist of operators
+    and compiles it into cached closures whose operations are size-checked,
+    so expressions like 9**9**9 are rejected instead of stalling the caller.
+    """
+
+    def __init__(self, max_length=200, max_nodes=100, max_exponent=1000, max_bits=4096, cache_size=1024):
+        """
+        Initialize the calculator.
+
+        Args:
+            max_length (int): Maximum expression length in characters
+            max_nodes (int): Maximum number of syntax tree nodes
+            max_exponent (int): Largest absolute exponent allowed
+            max_bits (int): Largest integer result size allowed, in bits
+            cache_size (int): Number of compiled expressions to keep
+        """
+        self.max_length = max_length
+        self.max_nodes = max_nodes
+        self.max_exponent = max_exponent
+        self.max_bits = max_bits
+
+        self._compile = lru_cache(maxsize=cache_size)(self._compile_expression)
+        self.extract_expression = lru_cache(maxsize=cache_size)(self._extract_expression)
+
+    def calculate(self, query):
+        """
+        Evaluate the arithmetic in a query.
+
+        Args:
+            query (str): The calculation query
+
+        Returns:
+            dict: Calculation result
+        """
+        expression = self.extract_expression(query)
+
+        if not expression:
+            return {
+                "success": False,
+                "message": "No valid mathematical expression found"
+            }
+
+        try:
+            result = self._compile(expression)()
+            if type(result) not in (int, float):
+                raise CalculationError("Expression did not produce a number")
+        except (CalculationError, ArithmeticError, ValueError, TypeError) as e:
+            return {
+                "success": False,
+                "expression": expression,
+                "error": str(e)
+            }
+
+        if isinstance(result, float) and result.is_integer() and abs(result) < 2 ** 53:
+            result = int(result)
+
+        return {
+            "success": True,
+            "expression": expression,
+            "result": result,
+            "formatted_result": f"{result:,}"
+        }
+
+    def calculate_many(self, queries):
+        """
+        Evaluate a batch of queries.
+
+        Args:
+            queries (list): Calculation queries
+
+        Returns:
+            list: One result dict per query, in input order
+        """
+        return [self.calculate(query) for query in queries]
+
+    def _extract_expression(self, query):
+        """
+        Turn a spoken or written calculation into an arithmetic expression.
+
+        Words that aren't numbers or operators ("what", "is", "calculate")
+        are skipped, except that a word written directly against "(" is kept
+        as a function call: whitelisted functions ("sqrt(16)") are evaluated
+        and any other name makes the expression invalid. Percentages become
+        divisions by 100; a "%" followed by an operand is a modulo.
+
+        Args:
+            query (str): The query containing a math expression
+
+        Returns:
+            str: Extracted math expression or None
+        """
+        parts = []
+        open_roots = 0
+
+        tokens = list(_TOKEN_RE.finditer(query.lower()))
+
+        for position, m in enumerate(tokens):
+            kind = m.lastgroup
+            text = m.group(kind)
+            following = tokens[position + 1] if position + 1 < len(tokens) else None
+
+            if kind == "number":
+                parts.append(text.replace(",", ""))
+                while open_roots:
+                    parts.append(")")
+                    open_roots -= 1
+                continue
+
+            if kind == "phrase":
+                text = " ".join(text.split())
+                if text == "square root of":
+                    parts.append("sqrt(")
+                    open_roots += 1
+                    continue
+                if text == "percent of":
+                    self._percent(parts)
+                    parts.append("*")
+                    continue
+            elif (kind == "word" and text == "percent") or \
+                    (text == "%" and self._after_number(parts) and not self._is_operand(following)):
+                self._percent(parts)
+                continue
+            elif text == "of" and parts and parts[-1].endswith("/100)"):
+                parts.append("*")
+                continue
+            elif kind == "word" and following is not None and following.group() == "(":
+                if text in _FUNCTIONS:
+                    parts.append(text)
+                    continue
+                if text not in _WORDS and following.start() == m.end():
+                    # An unknown function, e.g. "log(8)"; kept so validation rejects it
+                    parts.append(text)
+                    continue
+
+            symbol = _WORDS.get(text, text if kind == "op" else None)
+            if symbol is not None:
+                parts.append(symbol)
+
+        parts.extend(")" * open_roots)
+        expression = "".join(parts)
+
+        if not any(char.isdigit() for char in expression):
+            return None
+        return expression
+
+    @staticmethod
+    def _after_number(parts):
+        """Check whether the last emitted part is a number."""
+        return bool(parts) and parts[-1][-1:].isdigit()
+
+    @staticmethod
+    def _is_operand(token):
+        """Check whether a token starts an operand, making a preceding "%" a modulo."""
+        if token is None:
+            return False
+        text = token.group()
+        return (token.lastgroup == "number" or text == "(" or text in _FUNCTIONS
+                or " ".join(text.split()) == "square root of")
+
+    @staticmethod
+    def _percent(parts):
+        """Rewrite the preceding number as a fraction of 100."""
+        if parts and parts[-1][-1:].isdigit():
+            parts[-1] = f"({parts[-1]}/100)"
+
+    def _compile_expression(self, expression):
+        """
+        Validate an expression and compile it.
+
+        Every expression is parsed and its syntax tree checked against the
+        whitelist, so it can only hold numbers, arithmetic and whitelisted
+        calls. Only powers can blow up in size (products of literals can't
+        outgrow the digits they were written with), so expressions without
+        powers, or whose powers are all small literals, are compiled to
+        bytecode. Anything else is compiled into closures that check each
+        power and product before computing it.
+
+        Args:
+            expression (str): Arithmetic expression
+
+        Returns:
+            callable: Zero-argument function computing the value
+
+        Raises:
+            CalculationError: If the expression is invalid or too large
+        """
+        if len(expression) > self.max_length:
+            raise CalculationError("Expression is too long")
+
+        try:
+            tree = ast.parse(expression, mode="eval")
+        except (SyntaxError, ValueError):
+            raise CalculationError("Invalid mathematical expression")
+
+        if self._validate(tree.body):
+            # Same source, same tree; compiling the text skips converting the AST back
+            code = compile(expression, "<calculator>", "eval")
+            return lambda: eval(code, _NAMESPACE)
+
+        return self._compile_node(tree.body)
+
+    def _validate(self, root):
+        """
+        Check a syntax tree against the whitelist.
+
+        Returns:
+            bool: True if every power in the tree is a small literal power
+
+        Raises:
+            CalculationError: If the tree has disallowed or too many nodes
+        """
+        simple = True
+        count = 0
+
+        for node in ast.walk(root):
+            count += 1
+            if count > self.max_nodes:
+                raise CalculationError("Expression is too complex")
+
+            if isinstance(node, ast.BinOp):
+                if type(node.op) not in _BINARY_OPERATORS:
+                    raise CalculationError(f"Unsupported operator: {type(node.op).__name__}")
+                if isinstance(node.op, ast.Pow) and simple:
+                    simple = self._is_small_power(node)
+            elif isinstance(node, ast.UnaryOp):
+                if type(node.op) not in _UNARY_OPERATORS:
+                    raise CalculationError(f"Unsupported operator: {type(node.op).__name__}")
+            elif isinstance(node, ast.Call):
+                if not (isinstance(node.func, ast.Name) and node.func.id in _FUNCTIONS
+                        and len(node.args) == 1 and not node.keywords):
+                    raise CalculationError("Unsupported function call")
+            elif isinstance(node, ast.Constant):
+                if type(node.value) not in (int, float):
+                    raise CalculationError("Unsupported value")
+            elif not isinstance(node, (ast.Name, ast.Load, ast.operator, ast.unaryop)):
+                raise CalculationError(f"Unsupported expression element: {type(node).__name__}")
+            elif isinstance(node, ast.Name) and node.id not in _FUNCTIONS:
+                raise CalculationError(f"Unknown name: {node.id}")
+
+        return simple
+
+    @staticmethod
+    def _is_small_power(node):
+        """Check whether a power has literal operands and a small result."""
+        base, exponent = node.left, node.right
+        if not (isinstance(base, ast.Constant) and isinstance(exponent, ast.Constant)):
+            return False
+        if abs(exponent.value) > _SIMPLE_POWER_BITS:
+            return False
+        if isinstance(base.value, int) and isinstance(exponent.value, int):
+            return abs(base.value).bit_length() * exponent.value <= _SIMPLE_POWER_BITS
+        return True
+
+    def _compile_node(self, node):
+        """Compile one whitelisted syntax tree node."""
+        if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+            value = node.value
+            return lambda: value
+
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+            left = self._compile_node(node.left)
+            right = self._compile_node(node.right)
+            op = _BINARY_OPERATORS[type(node.op)]
+            check = self._check_power if op is operator.pow else self._check_product if op is operator.mul else None
+
+            def evaluate():
+                a, b = left(), right()
+                if check:
+                    check(a, b)
+                return op(a, b)
+            return evaluate
+
+        if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+            operand = self._compile_node(node.operand)
+            op = _UNARY_OPERATORS[type(node.op)]
+            return lambda: op(operand())
+
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in _FUNCTIONS
+                and len(node.args) == 1 and not node.keywords):
+            function = _FUNCTIONS[node.func.id]
+            argument = self._compile_node(node.args[0])
+            return lambda: function(argument())
+
+        raise CalculationError(f"Unsupported expression element: {type(node).__name__}")
+
+    def _check_power(self, base, exponent):
+        """Reject powers whose exponent or result would be too large."""
+        if abs(exponent) > self.max_exponent:
+            raise CalculationError("Exponent is too large")
+        if isinstance(base, int) and isinstance(exponent, int) and exponent > 0:
+            if (abs(base).bit_length() - 1) * exponent > self.max_bits:
+                raise CalculationError("Result is too large")
+
+    def _check_product(self, a, b):
+        """Reject integer products that would be too large."""
+        if isinstance(a, int) and isinstance(b, int):
+            if abs(a).bit_length() + abs(b).bit_length() > self.max_bits:
+                raise CalculationError("Result is too large")
@@ -0,0 +1,162 @@
+import time
+import heapq
+import inspect
+import threading
+import itertools
+
+class TaskCancelledError(RuntimeError):
+    """Raised by CancellationToken.raise_if_cancelled() once a task is cancelled."""
+
+class TaskTimeoutError(TimeoutError):
+    """Set on a task's handle when it runs past its timeout."""
+
+class CancellationToken:
+    """
+    Cooperative cancellation flag handed to task functions that accept a
+    "cancel_token" parameter. Long-running tasks should check it between
+    steps (or sleep with wait()) and return early once it is set.
+    """
+
+    __slots__ = ("_event", "reason")
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason = None
+
+    def __repr__(self):
+        return f"<CancellationToken {'cancelled: ' + self.reason if self.cancelled else 'active'}>"
+
+    @property
+    def cancelled(self):
+        """Whether cancellation was requested."""
+        return self._event.is_set()
+
+    def cancel(self, reason="cancelled"):
+        """Request cancellation; the first reason given is kept."""
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    def wait(self, timeout=None):
+        """
+        Sleep until cancelled or the timeout elapses.
+
+        Args:
+            timeout (float): Maximum seconds to wait (None: no limit)
+
+        Returns:
+            bool: True if the task was cancelled
+        """
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self):
+        """
+        Raises:
+            TaskCancelledError: If cancellation was requested
+        """
+        if self._event.is_set():
+            raise TaskCancelledError(self.reason)
+
+def accepts_token(function):
+    """Check whether a task function takes a "cancel_token" argument."""
+    try:
+        parameters = inspect.signature(function).parameters
+    except (TypeError, ValueError):
+        return False
+    return "cancel_token" in parameters
+
+class Watchdog:
+    """
+    Deadline timer for task and routine timeouts.
+    Keeps deadlines in a heap served by a single thread, started on first
+    use, instead of a timer thread per task. Cancelled deadlines are
+    skipped when they reach the top of the heap.
+    """
+
+    def __init__(self, name="watchdog", clock=time.monotonic):
+        """
+        Initialize the watchdog.
+
+        Args:
+            name (str): Name of the timer thread
+            clock (callable): Monotonic time source
+        """
+        self.name = name
+        self.clock = clock
+
+        self._heap = []                 # [deadline, sequence, function]; function is None once cancelled
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._thread = None
+        self._closed = False
+
+    def call_later(self, delay, function):
+        """
+        Call a function after a delay, on the watchdog thread.
+
+        Args:
+            delay (float): Seconds to wait
+            function (callable): Called without arguments; should return quickly
+
+        Returns:
+            list: Entry to pass to cancel(); after close() the call never runs
+        """
+        entry = [self.clock() + delay, next(self._sequence), function]
+        with self._lock:
+            if self._closed:
+                return entry
+            heapq.heappush(self._heap, entry)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name)
+                self._thread.daemon = True
+                self._thread.start()
+            self._wakeup.notify()
+        return entry
+
+    @staticmethod
+    def cancel(entry):
+        """Cancel a pending call (no effect once it has run)."""
+        if entry is not None:
+            entry[2] = None
+
+    def close(self, timeout=5):
+        """
+        Stop the timer thread; pending calls are dropped.
+
+        Args:
+            timeout (float): Maximum seconds to wait for the thread
+        """
+        with self._lock:
+            self._closed = True
+            self._heap.clear()
+            self._wakeup.notify()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def _run(self):
+        """Call functions as their deadlines pass, until closed."""
+        while True:
+            with self._lock:
+                if self._closed:
+                    return
+                while self._heap and self._heap[0][2] is None:
+                    heapq.heappop(self._heap)
+                if not self._heap:
+                    self._wakeup.wait()
+                    continue
+                delay = self._heap[0][0] - self.clock()
+                if delay > 0:
+                    self._wakeup.wait(delay)
+                    continue
+                entry = heapq.heappop(self._heap)
+
+            function = entry[2]
+            entry[2] = None
+            if function is None:
+                continue
+            try:
+                function()
+            except Exception as e:
+                print(f"Error in {self.name}: {e}")
@@ -0,0 +1,120 @@
+import json
+import time
+import threading
+from collections import OrderedDict
+
+class CommandCoalescer:
+    """
+    Duplicate command suppression for Jarvis AI Assistant's task automation.
+    Remembers device commands by (task name, parameters) while they are in
+    flight and for a short window after they succeed, so a repeated
+    command (a voice misfire, or two routines turning on the same light)
+    shares the handle of the first one instead of calling the device
+    again. Commands that failed are forgotten at once so they can be retried.
+    """
+
+    def __init__(self, window=1.0, clock=time.monotonic):
+        """
+        Initialize the coalescer.
+
+        Args:
+            window (float): Seconds a successful command keeps absorbing repeats
+            clock (callable): Time source, injectable for tests
+        """
+        self.window = window
+        self.clock = clock
+
+        self._entries = OrderedDict()   # key -> [task id, handle, finished time or None]
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "commands": 0,
+            "coalesced": 0,
+            "superseded": 0
+        }
+
+    @staticmethod
+    def key(task_name, params):
+        """Build the key identifying a command."""
+        return task_name, json.dumps(params, sort_keys=True, default=str)
+
+    def claim(self, task_name, params, task_id, handle):
+        """
+        Register a command unless an identical one is in flight or recently succeeded.
+
+        Args:
+            task_name (str): The task name
+            params (dict): The task parameters
+            task_id (str): ID the command will run under if it is new
+            handle (TaskHandle): Handle it will run under if it is new
+
+        Returns:
+            tuple: (task id, handle) of the identical command to share, or
+                None if this command was registered and should run
+        """
+        key = self.key(task_name, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[2] is None or self.clock() - entry[2] <= self.window):
+                self.stats["coalesced"] += 1
+                return entry[0], entry[1]
+
+            entry = self._entries[key] = [task_id, handle, None]
+            self._entries.move_to_end(key)
+            self.stats["commands"] += 1
+            self._prune()
+
+        handle.add_done_callback(lambda done: self._on_done(key, entry, done))
+        return None
+
+    def forget(self, task_name, params):
+        """
+        Stop sharing a command, e.g. because an opposite command follows it.
+
+        Returns:
+            str: Its task ID if it hadn't finished yet, otherwise None
+        """
+        with self._lock:
+            entry = self._entries.pop(self.key(task_name, params), None)
+            return entry[0] if entry is not None and entry[2] is None else None
+
+    def note_superseded(self):
+        """Count a command cancelled by an opposite one."""
+        with self._lock:
+            self.stats["superseded"] += 1
+
+    def get_stats(self):
+        """
+        Get coalescing metrics.
+
+        Returns:
+            dict: Commands run, repeats absorbed, commands superseded and commands remembered
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["tracked"] = len(self._entries)
+            return stats
+
+    def _on_done(self, key, entry, handle):
+        """Start a succeeded command's window, or forget a failed one."""
+        succeeded = handle.status() == "completed"
+        if succeeded:
+            result = handle.result()
+            succeeded = not (isinstance(result, dict) and not result.get("success", True))
+
+        with self._lock:
+            if self._entries.get(key) is not entry:
+                return
+            if succeeded:
+                entry[2] = self.clock()
+            else:
+                del self._entries[key]
+
+    def _prune(self):
+        """Forget the oldest commands whose window has passed. Caller holds the lock."""
+        now = self.clock()
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry[2] is None or now - entry[2] <= self.window:
+                break
+            del self._entries[key]
@@ -0,0 +1,256 @@
+import time
+import threading
+from collections import deque
+
+class TokenBucket:
+    """
+    Token bucket rate limiter: allows bursts of up to "burst" calls, refilled
+    at "rate" calls per second. Callers reserve tokens and are told how long
+    to wait, so waiting callers are served in the order they arrived.
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic):
+        """
+        Initialize the bucket, full.
+
+        Args:
+            rate (float): Tokens added per second
+            burst (float): Bucket capacity (default: one second's worth, at least 1)
+            clock (callable): Time source, injectable for tests
+        """
+        if rate <= 0:
+            raise ValueError("Rate must be positive")
+
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self.clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens=1):
+        """
+        Take tokens, borrowing against future refills if the bucket is short.
+
+        Returns:
+            float: Seconds the caller must wait before using the tokens
+        """
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self, tokens=1):
+        """
+        Wait until tokens are available and take them.
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+class DeviceBackend:
+    """A device or hub API with an optional rate limit and batch handler."""
+
+    def __init__(self, name, bucket=None, batch_handler=None, batch_window=0.05, max_batch=50):
+        self.name = name
+        self.bucket = bucket
+        self.batch_handler = batch_handler
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+
+        self.pending = deque()          # (key, task name, params, on_start, on_done, queued time)
+        self.condition = threading.Condition()
+        self.thread = None
+
+        self.stats = {
+            "calls": 0,
+            "commands": 0,
+            "throttled": 0,
+            "throttle_wait": 0.0,
+            "max_batch": 0,
+            "errors": 0
+        }
+
+class DeviceDispatcher:
+    """
+    Device call scheduling for Jarvis AI Assistant's task automation.
+    Tasks that name a device backend are rate limited by that backend's
+    token bucket. Backends with a batch handler also get their commands
+    collected: the first pending command opens a short window, and
+    everything queued for the backend by the end of it (up to max_batch)
+    is sent in a single handler call, on the backend's own dispatch
+    thread rather than a task worker.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            clock (callable): Time source for rate limits, injectable for tests
+        """
+        self.clock = clock
+        self.backends = {}
+        self._lock = threading.Lock()
+
+    def add_backend(self, name, rate=None, burst=None, batch_handler=None, batch_window=0.05, max_batch=50):
+        """
+        Register a device backend.
+
+        Args:
+            name (str): The backend name tasks refer to
+            rate (float): Calls per second the backend accepts (None: unlimited)
+            burst (float): Calls allowed in a burst (default: one second's worth)
+            batch_handler (callable): Called with a list of commands
+                ({"task", "params"}); returns one result per command in order
+            batch_window (float): Seconds to collect commands before sending a batch
+            max_batch (int): Most commands sent in one batch
+        """
+        bucket = TokenBucket(rate, burst, self.clock) if rate else None
+        with self._lock:
+            self.backends[name] = DeviceBackend(name, bucket, batch_handler, batch_window, max_batch)
+
+    def is_batched(self, name):
+        """Check whether a backend collects commands into batches."""
+        backend = self.backends.get(name)
+        return backend is not None and backend.batch_handler is not None
+
+    def throttle(self, name, wait=True):
+        """
+        Wait for the backend's rate limit before a single device call.
+
+        Args:
+            name (str): The backend name
+            wait (bool): Sleep here; otherwise the caller must wait out the
+                returned delay itself (e.g. with asyncio.sleep)
+
+        Returns:
+            float: Seconds waited, or to wait
+        """
+        backend = self.backends.get(name)
+        if backend is None:
+            return 0.0
+        return self._throttle(backend, 1, wait)
+
+    def submit(self, name, key, task_name, params, on_start, on_done):
+        """
+        Queue a command for the backend's next batch.
+
+        Args:
+            name (str): The backend name
+            key: Identifies the command to discard()
+            task_name (str): The task name
+            params (dict): The task parameters
+            on_start (callable): Called when the batch is sent; returning
+                False leaves the command out (e.g. it was cancelled)
+            on_done (callable): Called with (result, error, seconds) once the batch returns
+
+        Raises:
+            KeyError: If the backend is unknown
+        """
+        backend = self.backends[name]
+        with backend.condition:
+            backend.pending.append((key, task_name, params, on_start, on_done, time.monotonic()))
+            if backend.thread is None:
+                backend.thread = threading.Thread(target=self._dispatch_loop, args=(backend,), name=f"device-{name}")
+                backend.thread.daemon = True
+                backend.thread.start()
+            if len(backend.pending) == 1 or len(backend.pending) >= backend.max_batch:
+                backend.condition.notify()
+
+    def discard(self, key):
+        """
+        Remove a command that hasn't been sent yet.
+
+        Returns:
+            bool: True if the command was still pending
+        """
+        for backend in list(self.backends.values()):
+            with backend.condition:
+                for position, command in enumerate(backend.pending):
+                    if command[0] is key:
+                        del backend.pending[position]
+                        return True
+        return False
+
+    def get_stats(self):
+        """
+        Get per-backend metrics.
+
+        Returns:
+            dict: backend name -> device calls, commands, commands per call,
+                throttling and pending commands
+        """
+        stats = {}
+        for name, backend in list(self.backends.items()):
+            with backend.condition:
+                entry = dict(backend.stats)
+                entry["pending"] = len(backend.pending)
+            entry["commands_per_call"] = entry["commands"] / entry["calls"] if entry["calls"] else 0.0
+            stats[name] = entry
+        return stats
+
+    def _throttle(self, backend, calls, wait=True):
+        """Take a token from the backend's rate limit and count the call."""
+        waited = 0.0
+        if backend.bucket is not None:
+            waited = backend.bucket.acquire() if wait else backend.bucket.reserve()
+        with backend.condition:
+            backend.stats["calls"] += 1
+            backend.stats["commands"] += calls
+            if waited > 0:
+                backend.stats["throttled"] += 1
+                backend.stats["throttle_wait"] += waited
+        return waited
+
+    def _next_batch(self, backend):
+        """Wait for commands and collect a batch."""
+        with backend.condition:
+            while not backend.pending:
+                backend.condition.wait()
+
+            deadline = backend.pending[0][5] + backend.batch_window
+            while len(backend.pending) < backend.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                backend.condition.wait(remaining)
+
+            count = min(len(backend.pending), backend.max_batch)
+            return [backend.pending.popleft() for _ in range(count)]
+
+    def _dispatch_loop(self, backend):
+        """Send batches for one backend."""
+        while True:
+            batch = [command for command in self._next_batch(backend) if command[3]()]
+            if not batch:
+                continue
+
+            self._throttle(backend, len(batch))
+            with backend.condition:
+                backend.stats["max_batch"] = max(backend.stats["max_batch"], len(batch))
+
+            start = time.perf_counter()
+            try:
+                results = backend.batch_handler([{"task": command[1], "params": command[2]} for command in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"Batch handler returned {len(results)} results for {len(batch)} commands")
+                error = None
+            except Exception as e:
+                print(f"Error in {backend.name} batch: {e}")
+                with backend.condition:
+                    backend.stats["errors"] += 1
+                results, error = [None] * len(batch), e
+            duration = time.perf_counter() - start
+
+            for command, result in zip(batch, results):
+                try:
+                    command[4](result, error, duration)
+                except Exception as e:
+                    print(f"Error completing {backend.name} command: {e}")
@@ -0,0 +1,253 @@
+import re
+import math
+import threading
+import unicodedata
+from collections import Counter, deque, namedtuple
+from functools import lru_cache
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Words that introduce a location ("weather in Paris", "time at Tokyo")
+LOCATION_INDICATORS = frozenset(["in", "at", "for", "near"])
+
+Place = namedtuple("Place", ["name", "country", "population", "timezone"])
+
+def _fold(text):
+    """Strip accents so "São Paulo" and "Sao Paulo" match the same entry."""
+    if text.isascii():
+        return text
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+
+class Gazetteer:
+    """
+    Place-name index for Jarvis AI Assistant.
+    Names and their alternates are compiled into a token trie, so every
+    place mentioned in a query is found in a single left-to-right pass,
+    preferring the longest name at each position ("New York City" over
+    "New York"). Names shared by several places are resolved by population
+    and by how often each place was asked about recently.
+    """
+
+    def __init__(self, path=None, cache_size=4096, recency_weight=2.0, recent_size=100):
+        """
+        Initialize the gazetteer.
+
+        Args:
+            path (str): Tab-separated gazetteer file to load (see load())
+            cache_size (int): Number of scanned queries to keep
+            recency_weight (float): Weight of one recent use relative to a
+                tenfold difference in population
+            recent_size (int): Number of recent resolutions remembered
+        """
+        self.places = []
+        self.recency_weight = recency_weight
+
+        # Token -> child node; a node's None key holds the indexes of the
+        # places whose name ends there
+        self._trie = {}
+        self._names = {}
+        self._indexes = {}
+
+        self._recent = deque(maxlen=recent_size)
+        self._recent_counts = Counter()
+        self._lock = threading.Lock()
+
+        self._scan = lru_cache(maxsize=cache_size)(self._scan_query)
+
+        if path:
+            self.load(path)
+
+    def __len__(self):
+        return len(self.places)
+
+    def load(self, path):
+        """
+        Load places from a tab-separated file.
+
+        Each line holds a name, comma-separated alternate names, a country
+        code, the population and an IANA time zone. Lines starting with "#"
+        are comments.
+
+        Args:
+            path (str): Path to the gazetteer file
+
+        Returns:
+            int: Number of places loaded
+        """
+        count = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip() or line.startswith("#"):
+                    continue
+                name, aliases, country, population, timezone = line.rstrip("\n").split("\t")
+                aliases = [alias.strip() for alias in aliases.split(",") if alias.strip()]
+                self.add(name, country, int(population or 0), timezone, aliases)
+                count += 1
+
+        return count
+
+    def add(self, name, country, population, timezone, aliases=()):
+        """
+        Add a place.
+
+        Args:
+            name (str): Display name
+            country (str): ISO country code
+            population (int): Population, used to rank places sharing a name
+            timezone (str): IANA time zone name
+            aliases (list): Alternate names
+
+        Returns:
+            Place: The new place
+        """
+        place = Place(name, country, population, timezone)
+        index = len(self.places)
+        self.places.append(place)
+        self._indexes.setdefault(place, index)
+
+        for alias in [name] + list(aliases):
+            tokens = self._tokens(alias)
+            if not tokens:
+                continue
+            node = self._trie
+            for token in tokens:
+                node = node.setdefault(token, {})
+            node.setdefault(None, []).append(index)
+            self._names.setdefault(" ".join(tokens), []).append(index)
+
+        self._scan.cache_clear()
+        return place
+
+    def lookup(self, name):
+        """
+        Find the places with a name.
+
+        Args:
+            name (str): Place name or alternate name
+
+        Returns:
+            list: Matching places, most likely first
+        """
+        indexes = self._names.get(" ".join(self._tokens(name)), [])
+        return [self.places[index] for index in self._rank(indexes)]
+
+    def find(self, query):
+        """
+        Find every place name mentioned in a query.
+
+        Args:
+            query (str): The query to scan
+
+        Returns:
+            list: (matched text, places) pairs in query order, places most likely first
+        """
+        return [
+            (text, [self.places[index] for index in self._rank(indexes)])
+            for text, indexes, _, _ in self._scan(query)
+        ]
+
+    def extract(self, query, record=True):
+        """
+        Extract the location a query is about.
+
+        Names introduced by "in", "at", "for" or "near" win over names that
+        are merely capitalized; names that are neither ("nice weather") are
+        ignored. Among the remaining candidates the longest name wins. The
+        chosen place counts as a recent use for later disambiguation unless
+        record is False.
+
+        Args:
+            query (str): The query containing a location
+            record (bool): Whether to count the place as a recent use; off
+                for lookups nobody asked for, such as background refreshes
+
+        Returns:
+            Place: The most likely place, or None
+        """
+        best = None
+        for text, indexes, introduced, capitalized in self._scan(query):
+            if not (introduced or capitalized):
+                continue
+            key = (introduced, len(text))
+            if best is None or key > best[0]:
+                best = (key, indexes)
+
+        if best is None:
+            return None
+
+        place = self.places[self._rank(best[1])[0]]
+        if record:
+            self.note_use(place)
+        return place
+
+    def note_use(self, place):
+        """
+        Record that a place was asked about, e.g. a confirmed or home location.
+        Recently used places win over same-named places of similar size.
+
+        Args:
+            place (Place): The place that was used
+        """
+        index = self._indexes[place]
+        with self._lock:
+            if len(self._recent) == self._recent.maxlen:
+                self._recent_counts[self._recent[0]] -= 1
+            self._recent.append(index)
+            self._recent_counts[index] += 1
+
+    @staticmethod
+    def _tokens(text):
+        """Split text into lowercase, accent-free tokens."""
+        return _TOKEN_RE.findall(_fold(text).lower())
+
+    def _rank(self, indexes):
+        """Order places sharing a name by population and recent use."""
+        if len(indexes) < 2:
+            return list(indexes)
+
+        with self._lock:
+            recent = {index: self._recent_counts[index] for index in indexes}
+
+        return sorted(
+            indexes,
+            key=lambda index: math.log10(self.places[index].population + 10) + self.recency_weight * recent[index],
+            reverse=True
+        )
+
+    def _scan_query(self, query):
+        """
+        Walk the query tokens once, taking the longest name at each position.
+
+        Returns:
+            tuple: (matched text, place indexes, introduced by an indicator,
+                capitalized in the query) per match
+        """
+        words = _TOKEN_RE.findall(_fold(query))
+        tokens = [word.lower() for word in words]
+        trie = self._trie
+        matches = []
+        i = 0
+
+        while i < len(tokens):
+            node = trie.get(tokens[i])
+            end = None
+            j = i
+            while node is not None:
+                j += 1
+                if None in node:
+                    end, indexes = j, node[None]
+                node = node.get(tokens[j]) if j < len(tokens) else None
+
+            if end is None:
+                i += 1
+                continue
+
+            matches.append((
+                " ".join(words[i:end]),
+                tuple(indexes),
+                i > 0 and tokens[i - 1] in LOCATION_INDICATORS,
+                words[i][0].isupper()
+            ))
+            i = end
+
+        return tuple(matches)
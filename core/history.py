@@ -0,0 +1,276 @@
+import os
+import json
+import time
+import threading
+from collections import Counter, deque
+
+class History:
+    """
+    Bounded activity history for Jarvis AI Assistant.
+    Keeps the most recent entries in a ring buffer and, optionally, in an
+    append-only JSON-lines log so they survive restarts. Aggregates (how
+    often each key was seen, per-key timings and entries per hour) are
+    updated as entries arrive, so analytics never scan the history or the
+    log. The log is compacted into a snapshot of the aggregates plus the
+    ring buffer once it grows too long, which keeps startup replay bounded.
+    """
+
+    def __init__(self, max_entries=100, log_path=None, keys=None, timings=None,
+                 max_keys=10000, max_hours=168, max_log_entries=10000):
+        """
+        Initialize the history.
+
+        Args:
+            max_entries (int): Number of recent entries kept in memory
+            log_path (str): Append-only log file (default: memory only)
+            keys (dict): Aggregate name -> function(entry) returning the keys
+                the entry counts towards
+            timings (dict): Aggregate name -> function(entry) returning
+                (key, seconds) pairs to track
+            max_keys (int): Distinct keys kept per aggregate; the least
+                frequent half is dropped when the limit is exceeded
+            max_hours (int): Number of hourly entry counts kept
+            max_log_entries (int): Log length that triggers compaction
+        """
+        self.max_entries = max_entries
+        self.log_path = log_path
+        self.keys = dict(keys or {})
+        self.timings = dict(timings or {})
+        self.max_keys = max_keys
+        self.max_log_entries = max_log_entries
+
+        self._entries = deque(maxlen=max_entries)
+        self._counts = {name: Counter() for name in self.keys}
+        self._latest = {name: {} for name in self.keys}
+        self._timing_totals = {name: {} for name in self.timings}  # key -> [count, total, max]
+        self._hours = deque(maxlen=max_hours)  # [hour start, count]
+
+        self._lock = threading.Lock()
+        self._log = None
+        self._log_entries = 0
+
+        if log_path:
+            self._replay()
+            self._log = open(log_path, "a", encoding="utf-8")
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(self.recent(self.max_entries))
+
+    def append(self, entry):
+        """
+        Add an entry.
+
+        Args:
+            entry (dict): The entry; a "timestamp" is added if missing
+        """
+        entry.setdefault("timestamp", time.time())
+
+        with self._lock:
+            self._add(entry)
+
+            if self._log is not None:
+                self._log.write(json.dumps(entry, default=str) + "\n")
+                self._log.flush()
+                self._log_entries += 1
+                if self._log_entries > self.max_log_entries:
+                    self._compact()
+
+    def recent(self, limit=10):
+        """
+        Get the most recent entries.
+
+        Args:
+            limit (int): Maximum number of entries to return
+
+        Returns:
+            list: Entries, oldest first
+        """
+        with self._lock:
+            if limit >= len(self._entries):
+                return list(self._entries)
+            return list(self._entries)[-limit:] if limit > 0 else []
+
+    def top(self, name, n=10):
+        """
+        Get the most frequent keys of an aggregate.
+
+        Args:
+            name (str): The aggregate name
+            n (int): Number of keys to return (None for all)
+
+        Returns:
+            list: (key, count) pairs, most frequent first
+        """
+        with self._lock:
+            return self._counts[name].most_common(n)
+
+    def count(self, name, key):
+        """Get how often a key of an aggregate was seen."""
+        with self._lock:
+            return self._counts[name][key]
+
+    def latest(self, name, key):
+        """
+        Get the most recent entry that counted towards a key.
+
+        Returns:
+            dict: The entry, or None
+        """
+        with self._lock:
+            return self._latest[name].get(key)
+
+    def latency(self, name):
+        """
+        Get timing statistics of an aggregate.
+
+        Args:
+            name (str): The timing aggregate name
+
+        Returns:
+            dict: key -> {"count", "mean", "max"} in seconds
+        """
+        with self._lock:
+            return {
+                key: {"count": count, "mean": total / count, "max": peak}
+                for key, (count, total, peak) in self._timing_totals[name].items()
+            }
+
+    def per_hour(self, hours=24, now=None):
+        """
+        Get the number of entries in each of the last hours.
+
+        Args:
+            hours (int): Number of hours to report
+            now (float): Current time (default: time.time())
+
+        Returns:
+            list: (hour start timestamp, count) pairs, oldest first
+        """
+        current = self._hour(time.time() if now is None else now)
+        with self._lock:
+            counts = dict((hour, count) for hour, count in self._hours)
+
+        return [
+            (hour, counts.get(hour, 0))
+            for hour in range(current - (hours - 1) * 3600, current + 1, 3600)
+        ]
+
+    def close(self):
+        """Close the log file."""
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    @staticmethod
+    def _hour(timestamp):
+        return int(timestamp // 3600) * 3600
+
+    def _add(self, entry):
+        """Add an entry to the ring buffer and the aggregates. Caller holds the lock."""
+        self._entries.append(entry)
+
+        for name, keys_of in self.keys.items():
+            counts = self._counts[name]
+            latest = self._latest[name]
+            for key in keys_of(entry):
+                counts[key] += 1
+                latest[key] = entry
+            if len(counts) > self.max_keys:
+                self._prune(name)
+
+        for name, timings_of in self.timings.items():
+            totals = self._timing_totals[name]
+            for key, seconds in timings_of(entry):
+                stats = totals.get(key)
+                if stats is None:
+                    totals[key] = [1, seconds, seconds]
+                else:
+                    stats[0] += 1
+                    stats[1] += seconds
+                    stats[2] = max(stats[2], seconds)
+
+        hour = self._hour(entry["timestamp"])
+        if self._hours and self._hours[-1][0] == hour:
+            self._hours[-1][1] += 1
+        elif not self._hours or self._hours[-1][0] < hour:
+            self._hours.append([hour, 1])
+        else:
+            # Out-of-order entry; rare, so a scan of the hourly buckets is fine
+            for bucket in self._hours:
+                if bucket[0] == hour:
+                    bucket[1] += 1
+                    break
+
+    def _prune(self, name):
+        """Drop the less frequent half of an aggregate's keys."""
+        counts = self._counts[name]
+        keep = dict(counts.most_common(self.max_keys // 2))
+        self._counts[name] = Counter(keep)
+        self._latest[name] = {key: entry for key, entry in self._latest[name].items() if key in keep}
+
+    def _snapshot(self):
+        """Serialize the aggregates."""
+        return {
+            "counts": {name: [[key, count] for key, count in counts.items()] for name, counts in self._counts.items()},
+            "latest": {name: [[key, entry] for key, entry in latest.items()] for name, latest in self._latest.items()},
+            "timings": {name: [[key] + stats for key, stats in totals.items()] for name, totals in self._timing_totals.items()},
+            "hours": [list(bucket) for bucket in self._hours]
+        }
+
+    def _restore(self, snapshot):
+        """Load aggregates from a snapshot, dropping any entries replayed so far."""
+        def as_key(key):
+            return tuple(key) if isinstance(key, list) else key
+
+        self._entries.clear()
+        for name in self.keys:
+            pairs = snapshot.get("counts", {}).get(name, [])
+            self._counts[name] = Counter({as_key(key): count for key, count in pairs})
+            rows = snapshot.get("latest", {}).get(name, [])
+            self._latest[name] = {as_key(key): entry for key, entry in rows}
+        for name in self.timings:
+            rows = snapshot.get("timings", {}).get(name, [])
+            self._timing_totals[name] = {as_key(row[0]): list(row[1:]) for row in rows}
+        self._hours.clear()
+        self._hours.extend([hour, count] for hour, count in snapshot.get("hours", []))
+
+    def _replay(self):
+        """Rebuild the ring buffer and aggregates from the log."""
+        if not os.path.exists(self.log_path):
+            return
+
+        with open(self.log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn final line from an interrupted write
+                    continue
+                self._log_entries += 1
+
+                if "__snapshot__" in record:
+                    self._restore(record["__snapshot__"])
+                    # Entries stored with the snapshot restore the ring buffer
+                    # without counting towards the aggregates a second time
+                    self._entries.extend(record.get("entries", []))
+                    for entry in self._entries:
+                        for name, keys_of in self.keys.items():
+                            for key in keys_of(entry):
+                                self._latest[name][key] = entry
+                else:
+                    self._add(record)
+
+    def _compact(self):
+        """Rewrite the log as one snapshot line. Caller holds the lock."""
+        temp_path = self.log_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"__snapshot__": self._snapshot(), "entries": list(self._entries)}, default=str) + "\n")
+
+        self._log.close()
+        os.replace(temp_path, self.log_path)
+        self._log = open(self.log_path, "a", encoding="utf-8")
+        self._log_entries = 1
@@ -0,0 +1,184 @@
+import time
+import random
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+class HttpClient:
+    """
+    Shared HTTP client for Jarvis AI Assistant.
+    Keeps pooled keep-alive connections per host, limits how many requests
+    may be in flight to a single host and retries transient failures with
+    jittered exponential backoff.
+    """
+
+    def __init__(self, config=None):
+        """
+        Initialize the HTTP client.
+
+        Args:
+            config (dict): Optional overrides for the default configuration
+        """
+        self.config = {
+            "pool_connections": 10,     # Number of host pools kept alive
+            "pool_maxsize": 10,         # Connections kept alive per host
+            "max_per_host": 4,          # Concurrent requests allowed per host
+            "connect_timeout": 3.05,    # Seconds to establish a connection
+            "read_timeout": 10,         # Seconds to wait for response data
+            "max_retries": 3,           # Retries after the first attempt
+            "backoff_base": 0.2,        # Base backoff delay (seconds)
+            "backoff_max": 5.0,         # Upper bound for a single backoff delay
+            "retry_statuses": [429, 500, 502, 503, 504],
+            "retry_methods": ["GET", "HEAD", "OPTIONS", "PUT", "DELETE"],
+            "user_agent": "Jarvis/1.0"
+        }
+
+        if config:
+            self.config.update(config)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.config["pool_connections"],
+            pool_maxsize=self.config["pool_maxsize"],
+            max_retries=0  # Retries are handled here so they can be jittered
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = self.config["user_agent"]
+
+        self._host_limits = {}
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "failures": 0
+        }
+
+    def request(self, method, url, timeout=None, **kwargs):
+        """
+        Send an HTTP request through the pooled session.
+
+        Args:
+            method (str): HTTP method
+            url (str): Target URL
+            timeout (float or tuple): Optional (connect, read) timeout override
+            **kwargs: Extra arguments passed to requests
+
+        Returns:
+            requests.Response: The final response
+
+        Raises:
+            requests.RequestException: If every attempt failed
+        """
+        method = method.upper()
+        if timeout is None:
+            timeout = (self.config["connect_timeout"], self.config["read_timeout"])
+
+        retryable = method in self.config["retry_methods"]
+        attempts = self.config["max_retries"] + 1 if retryable else 1
+        semaphore = self._host_semaphore(url)
+
+        for attempt in range(attempts):
+            last_attempt = attempt == attempts - 1
+            retry_after = None
+
+            with semaphore:
+                self._count("requests")
+                try:
+                    response = self.session.request(method, url, timeout=timeout, **kwargs)
+                except (requests.ConnectionError, requests.Timeout):
+                    if last_attempt:
+                        self._count("failures")
+                        raise
+                else:
+                    if response.status_code not in self.config["retry_statuses"] or last_attempt:
+                        if response.status_code >= 400:
+                            self._count("failures")
+                        return response
+                    retry_after = response.headers.get("Retry-After")
+                    # Release the connection back to the pool before sleeping
+                    response.close()
+
+            self._count("retries")
+            time.sleep(self._backoff_delay(attempt, retry_after))
+
+    def get(self, url, params=None, **kwargs):
+        """
+        Send a GET request.
+
+        Args:
+            url (str): Target URL
+            params (dict): Query string parameters
+
+        Returns:
+            requests.Response: The final response
+        """
+        return self.request("GET", url, params=params, **kwargs)
+
+    def get_json(self, url, params=None, **kwargs):
+        """
+        Send a GET request and decode the JSON body.
+
+        Args:
+            url (str): Target URL
+            params (dict): Query string parameters
+
+        Returns:
+            dict: Decoded response body
+
+        Raises:
+            requests.HTTPError: If the final response has an error status
+        """
+        response = self.get(url, params=params, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    def get_stats(self):
+        """
+        Get request statistics.
+
+        Returns:
+            dict: Counts of requests, retries and failures
+        """
+        with self._lock:
+            return dict(self.stats)
+
+    def close(self):
+        """Close all pooled connections."""
+        self.session.close()
+
+    def _host_semaphore(self, url):
+        """Get the concurrency limiter for the host of a URL."""
+        host = urlsplit(url).netloc.lower()
+
+        with self._lock:
+            semaphore = self._host_limits.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.config["max_per_host"])
+                self._host_limits[host] = semaphore
+            return semaphore
+
+    def _backoff_delay(self, attempt, retry_after=None):
+        """
+        Compute the delay before the next attempt.
+
+        Uses "full jitter": a random delay between zero and the exponential
+        backoff cap, so clients retrying together don't stay in lockstep.
+        A numeric Retry-After header from the server takes precedence.
+        """
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), self.config["backoff_max"])
+            except ValueError:
+                pass
+
+        cap = min(self.config["backoff_max"], self.config["backoff_base"] * (2 ** attempt))
+        return random.uniform(0, cap)
+
+    def _count(self, key):
+        """Increment a statistics counter."""
+        with self._lock:
+            self.stats[key] += 1
@@ -1,9 +1,28 @@
 import os
 import json
 import time
-import threading
 import requests
+from functools import partial
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from core.http_client import HttpClient
+from core.intent_matcher import IntentMatcher, DEFAULT_SOURCE_INTENTS
+from core.knowledge_base import KnowledgeBase, score_confidence
+from core.calculator import Calculator
+from core.result_cache import ResultCache
+from core.prefetch import PrefetchScheduler
+from core.source_health import SourceHealth, SourceUnavailableError
+from core.gazetteer import Gazetteer, LOCATION_INDICATORS
+from core.result_ranking import ResultRanker
+from core.history import History
+
+try:
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+except ImportError:
+    ZoneInfo = None
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
 
 class InformationRetrieval:
     """
@@ -11,8 +30,26 @@ class InformationRetrieval:
     Handles searching for and retrieving information from various sources.
     """
     
-    def __init__(self):
-        """Initialize the information retrieval module."""
+    def __init__(self, endpoints=None, http_config=None, intent_config=None,
+                 knowledge_base_dir=None, knowledge_base_index=None, max_workers=8,
+                 cache_ttls=None, prefetch_config=None, health_config=None,
+                 gazetteer_path=None, history_path=None):
+        """
+        Initialize the information retrieval module.
+        
+        Args:
+            endpoints (dict): Optional backend URLs for the web, news and weather sources
+            http_config (dict): Optional overrides for the shared HTTP client
+            intent_config (str): Optional JSON file with a "sources" keyword table
+            knowledge_base_dir (str): Directory of knowledge base documents
+            knowledge_base_index (str): File the knowledge base index is persisted to
+            max_workers (int): Number of source lookups that may run at once
+            cache_ttls (dict): Optional overrides for how long each source's results are cached
+            prefetch_config (dict): Optional overrides for the background prefetcher
+            health_config (dict): Optional overrides for source health tracking and hedging
+            gazetteer_path (str): Place-name file used to recognize locations
+            history_path (str): Optional log file that keeps the search history across restarts
+        """
         self.sources = {
             "web": self._search_web,
             "knowledge_base": self._search_knowledge_base,
@@ -23,8 +60,46 @@ class InformationRetrieval:
             "calculator": self._calculate
         }
         
-        self.search_history = []
+        # Sources that can answer many queries in one call. Each function
+        # takes a list of queries and returns one result per query.
+        self.batch_sources = {
+            "knowledge_base": self._search_knowledge_base_many,
+            "calculator": self.calculate_many
+        }
+        
+        # Sources that take a max_results argument. They are cached at the
+        # default size; larger requests bypass the cache.
+        self.sized_sources = {"web", "news", "knowledge_base"}
+        self.default_max_results = 5
+        
+        # Merges results from all sources into one ranked list
+        self.ranker = ResultRanker()
+        
+        # Shared worker pool; bounds concurrent source lookups across all searches
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="retrieval")
+        self.source_timeout = 10
+        
+        # Hedged attempts run on their own pool so they never wait behind
+        # the lookups that started them
+        self.hedge_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        
+        # Latency and error tracking with a circuit breaker per source; a
+        # probe that outlives the source timeout frees the slot for another
+        self.health = SourceHealth(dict({"probe_timeout": self.source_timeout}, **(health_config or {})))
+        
+        # Recent searches plus running counts per query and per-source
+        # latency, which the prefetcher uses to pick what to keep warm
         self.max_history = 100
+        normalize = ResultCache.normalize
+        self.search_history = History(
+            self.max_history, history_path,
+            keys={
+                "query": lambda entry: [normalize(entry["query"])],
+                "source_query": lambda entry: [(source, normalize(entry["query"])) for source in entry["sources"]]
+            },
+            timings={"source": lambda entry: entry.get("latency", {}).items()}
+        )
         
         # API keys would be loaded from a secure source in a real implementation
         self.api_keys = {
@@ -32,69 +107,297 @@ class InformationRetrieval:
             "weather_api": "PLACEHOLDER_API_KEY"
         }
         
+        # Backend URLs for sources that talk to external services. Sources
+        # without an endpoint fall back to simulated results.
+        self.endpoints = {
+            "web": None,
+            "news": None,
+            "weather": None
+        }
+        if endpoints:
+            self.endpoints.update(endpoints)
+        
+        # Shared pooled HTTP client so sources reuse keep-alive connections
+        self.http_client = HttpClient(http_config)
+        
+        # Compiled keyword tables used to route queries to sources
+        if intent_config:
+            self.intent_matcher = IntentMatcher.from_file(intent_config, "sources")
+        else:
+            self.intent_matcher = IntentMatcher(DEFAULT_SOURCE_INTENTS)
+        
+        # Local document index for the knowledge base source
+        if knowledge_base_dir is None:
+            knowledge_base_dir = os.path.join(DATA_DIR, "knowledge_base")
+            if knowledge_base_index is None:
+                knowledge_base_index = os.path.join(DATA_DIR, "knowledge_base.index")
+        self.knowledge_base = KnowledgeBase(knowledge_base_dir, knowledge_base_index)
+        self.knowledge_base_min_score = 0.5
+        
+        # Place names and time zones for location-aware sources
+        if gazetteer_path is None:
+            gazetteer_path = os.path.join(DATA_DIR, "gazetteer.tsv")
+        self.gazetteer = Gazetteer(gazetteer_path if os.path.exists(gazetteer_path) else None)
+        self.location_sources = {"weather", "time"}
+        
+        # Safe arithmetic engine for the calculator source
+        self.calculator = Calculator()
+        
+        # Cache for slow sources, kept warm by the prefetcher. Sources
+        # without a TTL (time, date, local lookups) are never cached.
+        ttls = {
+            "web": 900,
+            "news": 300,
+            "weather": 600
+        }
+        if cache_ttls:
+            ttls.update(cache_ttls)
+        self.cache = ResultCache(ttls)
+        self.prefetcher = PrefetchScheduler(self, prefetch_config)
+        
         print("Information Retrieval module initialized")
     
     def search(self, query, sources=None, max_results=5):
         """
         Search for information based on the query.
         
+        Results from all sources are merged into a single ranked list of at
+        most max_results answers. Sources still running once none of them
+        could change that list are not waited for; they finish in the
+        background and leave their results in the cache.
+        
         Args:
             query (str): The search query
             sources (list): List of sources to search (default: all sources)
             max_results (int): Maximum number of results to return
             
         Returns:
-            dict: Search results
+            dict: Search results, with per-source results under "results" and
+                the merged answers, best first, under "ranked"
         """
         if sources is None:
             # Determine appropriate sources based on query
             sources = self._determine_sources(query)
         
+        sources = [source for source in sources if source in self.sources]
+        futures = {
+            self.executor.submit(self._run_source, source, query, max_results): source
+            for source in sources
+        }
+        
+        # Collect sources as they finish, dropping any that time out
         results = {}
-        threads = []
-        
-        # Create a thread for each source
-        for source in sources:
-            if source in self.sources:
-                thread = threading.Thread(
-                    target=self._search_thread,
-                    args=(source, query, results)
-                )
-                thread.daemon = True
-                threads.append(thread)
-        
-        # Start all threads
-        for thread in threads:
-            thread.start()
-        
-        # Wait for all threads to complete
-        for thread in threads:
-            thread.join(timeout=10)  # Timeout after 10 seconds
-        
-        # Add to search history
-        self.search_history.append({
-            "query": query,
-            "sources": sources,
-            "timestamp": time.time()
-        })
+        latency = {}
+        ranked = []
+        pending = set(futures)
+        started = time.monotonic()
+        deadline = started + self.source_timeout
+        
+        while pending:
+            done, pending = wait(pending, timeout=max(0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            
+            for future in done:
+                source = futures[future]
+                results[source] = self.ranker.trim(future.result(), max_results)
+                latency[source] = time.monotonic() - started
+            
+            ranked = self.ranker.rank(results, max_results)
+            if pending and len(ranked) == max_results and \
+                    ranked[-1]["score"] >= max(self.ranker.prior(futures[future]) for future in pending):
+                break
         
-        # Trim history if needed
-        if len(self.search_history) > self.max_history:
-            self.search_history = self.search_history[-self.max_history:]
+        self._record_search(query, sources, latency)
         
         return {
             "query": query,
             "results": results,
+            "ranked": ranked,
             "timestamp": time.time()
         }
     
-    def _search_thread(self, source, query, results):
-        """Execute a search in a separate thread."""
+    def search_many(self, queries, sources=None, max_results=5):
+        """
+        Search for many queries at once.
+        
+        Identical (source, query) pairs are looked up only once, sources that
+        support batching receive all of their queries in a single call, and
+        all lookups share the module's worker pool.
+        
+        Args:
+            queries (list): The search queries
+            sources (list): Sources to search for every query (default: determined per query)
+            max_results (int): Maximum number of results to return per query
+            
+        Returns:
+            list: One search result per query, in input order, shaped like
+                search()'s; each query gets its own result dicts, even when
+                duplicates shared a lookup
+        """
+        plans = []
+        pending = {}  # source -> unique queries, in first-seen order
+        
+        for query in queries:
+            query_sources = sources if sources is not None else self._determine_sources(query)
+            query_sources = [source for source in query_sources if source in self.sources]
+            plans.append(query_sources)
+            for source in query_sources:
+                pending.setdefault(source, {})[query] = None
+        
+        futures = {}
+        for source, source_queries in pending.items():
+            source_queries = list(source_queries)
+            if source in self.batch_sources:
+                futures[self.executor.submit(self._run_batch, source, source_queries)] = (source, source_queries)
+            else:
+                for query in source_queries:
+                    future = self.executor.submit(self._run_source, source, query, max_results)
+                    futures[future] = (source, [query])
+        
+        done, _ = wait(futures, timeout=self.source_timeout)
+        
+        answers = {}
+        for future in done:
+            source, source_queries = futures[future]
+            batch = future.result() if source in self.batch_sources else [future.result()]
+            for query, result in zip(source_queries, batch):
+                answers[(source, query)] = result
+        
+        results = []
+        for query, query_sources in zip(queries, plans):
+            self._record_search(query, query_sources)
+            query_results = {}
+            for source in query_sources:
+                if (source, query) in answers:
+                    result = self.ranker.trim(answers[(source, query)], max_results)
+                    query_results[source] = dict(result) if isinstance(result, dict) else result
+            results.append({
+                "query": query,
+                "results": query_results,
+                "ranked": self.ranker.rank(query_results, max_results),
+                "timestamp": time.time()
+            })
+        
+        return results
+    
+    def query_source(self, source, query, max_results=None):
+        """
+        Query a single source, bypassing the cache.
+        
+        The request is skipped while the source's circuit breaker is open.
+        Hedged sources get a second attempt once the first one has taken
+        longer than the source's usual (p95) latency; whichever answers
+        first wins.
+        
+        Args:
+            source (str): The source to query
+            query (str): The query
+            max_results (int): Result limit for sized sources (default: the source's own)
+            
+        Returns:
+            The source's result
+            
+        Raises:
+            SourceUnavailableError: If the source's circuit breaker is open
+        """
+        if not self.health.allow(source):
+            raise SourceUnavailableError(f"{source} is temporarily unavailable")
+        
+        function = self.sources[source]
+        if max_results is not None and source in self.sized_sources:
+            function = partial(function, max_results=max_results)
+        
+        delay = self.health.hedge_delay(source)
+        if delay is None:
+            return self._timed_call(source, function, query)
+        
+        return self._hedged_call(source, function, query, delay)
+    
+    def _timed_call(self, source, function, argument):
+        """Call a source function, recording its latency and outcome."""
+        start = time.perf_counter()
+        try:
+            result = function(argument)
+        except Exception:
+            self.health.record(source, time.perf_counter() - start, False)
+            raise
+        
+        self.health.record(source, time.perf_counter() - start, True)
+        return result
+    
+    def _hedged_call(self, source, function, query, delay):
+        """Query a source, sending a second attempt if the first is slower than delay."""
+        first = self.hedge_executor.submit(self._timed_call, source, function, query)
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return first.result()
+        
+        hedge = self.hedge_executor.submit(self._timed_call, source, function, query)
+        pending = {first, hedge}
+        error = None
+        
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    self.health.record_hedge(source, future is hedge)
+                    return future.result()
+                error = error or future.exception()
+        
+        self.health.record_hedge(source, False)
+        raise error
+    
+    def _run_source(self, source, query, max_results=None):
+        """Query a single source through the cache, turning failures into an error result."""
+        oversized = (max_results is not None and max_results > self.default_max_results
+                     and source in self.sized_sources)
+        
+        if not oversized:
+            cached = self.cache.get(source, query)
+            if cached is not None:
+                return cached
+        
+        try:
+            result = self.query_source(source, query, max_results if oversized else None)
+        except SourceUnavailableError as e:
+            return {"error": str(e), "skipped": True}
+        except Exception as e:
+            return {"error": str(e)}
+        
+        if not oversized:
+            self.cache.put(source, query, result)
+        return result
+    
+    def _run_batch(self, source, queries):
+        """Query a batching source, turning failures into error results."""
+        if not self.health.allow(source):
+            return [{"error": f"{source} is temporarily unavailable", "skipped": True} for _ in queries]
+        
         try:
-            source_results = self.sources[source](query)
-            results[source] = source_results
+            return self._timed_call(source, self.batch_sources[source], queries)
         except Exception as e:
-            results[source] = {"error": str(e)}
+            return [{"error": str(e)} for _ in queries]
+    
+    def _record_search(self, query, sources, latency=None):
+        """
+        Add a search to the history.
+        
+        Places asked about count as recent uses in the gazetteer here rather
+        than in the sources, so answers served from the cache count and
+        background refreshes don't.
+        """
+        if self.location_sources.intersection(sources):
+            self.gazetteer.extract(query)
+        
+        entry = {
+            "query": query,
+            "sources": sources,
+            "timestamp": time.time()
+        }
+        if latency:
+            entry["latency"] = latency
+        self.search_history.append(entry)
     
     def _determine_sources(self, query):
         """
@@ -104,30 +407,11 @@ class InformationRetrieval:
             query (str): The search query
             
         Returns:
-            list: List of sources to search
+            list: List of sources to search, one per request in the query
         """
-        query = query.lower()
-        
-        # Check for time-related queries
-        if any(word in query for word in ["time", "hour", "clock"]):
-            return ["time"]
-        
-        # Check for weather-related queries
-        if any(word in query for word in ["weather", "temperature", "forecast", "rain", "snow", "sunny"]):
-            return ["weather"]
-            
-        # Check for date-related queries
-        if any(word in query for word in ["date", "day", "today", "tomorrow", "month", "year"]):
-            return ["date"]
-        
-        # Check for calculation queries
-        if any(word in query for word in ["calculate", "compute", "math", "plus", "minus", "times", "divided"]) or \
-           any(symbol in query for symbol in ["+", "-", "*", "/", "="]):
-            return ["calculator"]
-        
-        # Check for news-related queries
-        if any(word in query for word in ["news", "latest", "headlines", "article"]):
-            return ["news"]
+        sources = self.intent_matcher.classify(query)
+        if sources:
+            return sources
         
         # Default to web and knowledge base
         return ["web", "knowledge_base"]
@@ -142,20 +426,71 @@ class InformationRetrieval:
         Returns:
             list: List of search history items
         """
-        return self.search_history[-limit:]
+        return self.search_history.recent(limit)
+    
+    def get_search_analytics(self, top=10, hours=24):
+        """
+        Get aggregate statistics over all recorded searches.
+        
+        Args:
+            top (int): Number of most frequent queries to report
+            hours (int): Number of hours of query counts to report
+            
+        Returns:
+            dict: Most frequent (normalized) queries, per-source latency and
+                queries per hour
+        """
+        return {
+            "top_queries": self.search_history.top("query", top),
+            "source_latency": self.search_history.latency("source"),
+            "queries_per_hour": self.search_history.per_hour(hours)
+        }
+    
+    def start_prefetch(self):
+        """Start refreshing frequently asked queries in the background."""
+        self.prefetcher.start()
+    
+    def stop_prefetch(self):
+        """Stop the background prefetcher."""
+        self.prefetcher.stop()
+    
+    def close(self):
+        """Stop background work and release the worker pool and network connections."""
+        self.prefetcher.stop()
+        self.executor.shutdown(wait=False)
+        self.hedge_executor.shutdown(wait=False)
+        self.http_client.close()
+        self.search_history.close()
+    
+    def _fetch_json(self, source, params):
+        """
+        Query the configured backend for a source.
+        
+        Args:
+            source (str): The source whose endpoint should be queried
+            params (dict): Query string parameters
+            
+        Returns:
+            dict: Decoded JSON response
+        """
+        return self.http_client.get_json(self.endpoints[source], params=params)
     
     # Source-specific search methods
-    def _search_web(self, query):
+    def _search_web(self, query, max_results=5):
         """
         Search the web for information.
         This is a placeholder for actual web search implementation.
         
         Args:
             query (str): The search query
+            max_results (int): Maximum number of results to return
             
         Returns:
             dict: Search results
         """
+        if self.endpoints.get("web"):
+            return self._fetch_json("web", {"q": query, "count": max_results})
+        
         # Simulate web search delay
         time.sleep(2)
         
@@ -177,66 +512,65 @@ class InformationRetrieval:
                     "url": f"https://example.com/result3?q={query}",
                     "snippet": f"A third sample result that might be useful for '{query}'. Contains additional details..."
                 }
-            ],
+            ][:max_results],
             "total_results": 3
         }
     
-    def _search_knowledge_base(self, query):
+    def _search_knowledge_base(self, query, max_results=5):
         """
         Search the local knowledge base for information.
-        This is a placeholder for actual knowledge base search implementation.
         
         Args:
             query (str): The search query
+            max_results (int): Maximum number of ranked documents to return
             
         Returns:
             dict: Search results
         """
-        # Simulate knowledge base search delay
-        time.sleep(1)
+        matches = self.knowledge_base.search(query, top_k=max_results)
         
-        # Simulate knowledge base results
-        knowledge = {
-            "what is ai": {
-                "title": "Artificial Intelligence",
-                "content": "Artificial Intelligence (AI) refers to the simulation of human intelligence in machines that are programmed to think like humans and mimic their actions. The term may also be applied to any machine that exhibits traits associated with a human mind such as learning and problem-solving."
-            },
-            "who created jarvis": {
-                "title": "Jarvis Creation",
-                "content": "Jarvis was created as an AI assistant project. The name Jarvis was inspired by the fictional AI assistant in the Iron Man movies."
-            },
-            "how does voice recognition work": {
-                "title": "Voice Recognition Technology",
-                "content": "Voice recognition works by analyzing the sounds a person makes when speaking and converting them into digital data that can be processed by a computer. This involves complex algorithms that identify phonemes, words, and sentences."
+        if matches and matches[0]["score"] >= self.knowledge_base_min_score:
+            best = matches[0]
+            return {
+                "found": True,
+                "title": best["title"],
+                "content": best["content"],
+                "confidence": round(score_confidence(best["score"]), 3),
+                "results": matches
             }
-        }
-        
-        # Check if query matches any knowledge base entries
-        for key, info in knowledge.items():
-            if query.lower() in key or key in query.lower():
-                return {
-                    "found": True,
-                    "title": info["title"],
-                    "content": info["content"],
-                    "confidence": 0.9
-                }
         
         return {
             "found": False,
             "message": "No information found in knowledge base"
         }
     
-    def _search_news(self, query):
+    def _search_knowledge_base_many(self, queries):
+        """
+        Search the local knowledge base for many queries.
+        
+        Args:
+            queries (list): The search queries
+            
+        Returns:
+            list: One knowledge base result per query
+        """
+        return [self._search_knowledge_base(query) for query in queries]
+    
+    def _search_news(self, query, max_results=5):
         """
         Search for news articles.
         This is a placeholder for actual news API implementation.
         
         Args:
             query (str): The search query
+            max_results (int): Maximum number of articles to return
             
         Returns:
             dict: News search results
         """
+        if self.endpoints.get("news"):
+            return self._fetch_json("news", {"q": query, "pageSize": max_results, "apiKey": self.api_keys["news_api"]})
+        
         # Simulate news API delay
         time.sleep(1.5)
         
@@ -259,7 +593,7 @@ class InformationRetrieval:
                     "url": f"https://news-example.com/article2?topic={query}",
                     "snippet": f"An in-depth analysis of how {query} is affecting various sectors..."
                 }
-            ],
+            ][:max_results],
             "total_results": 2
         }
     
@@ -277,6 +611,9 @@ class InformationRetrieval:
         # Extract location from query
         location = self._extract_location(query) or "current location"
         
+        if self.endpoints.get("weather"):
+            return self._fetch_json("weather", {"q": location, "appid": self.api_keys["weather_api"]})
+        
         # Simulate weather API delay
         time.sleep(1)
         
@@ -317,7 +654,8 @@ class InformationRetrieval:
     def _extract_location(self, query):
         """
         Extract location from a query.
-        This is a simple placeholder for more sophisticated NLP.
+        Known places are looked up in the gazetteer; otherwise the word after
+        a location indicator ("in", "at", ...) is used.
         
         Args:
             query (str): The query containing location
@@ -325,13 +663,14 @@ class InformationRetrieval:
         Returns:
             str: Extracted location or None
         """
-        # List of common location indicators
-        indicators = ["in", "at", "for", "near"]
+        place = self.gazetteer.extract(query, record=False)
+        if place is not None:
+            return place.name
         
         query_words = query.lower().split()
         
         for i, word in enumerate(query_words):
-            if word in indicators and i < len(query_words) - 1:
+            if word in LOCATION_INDICATORS and i < len(query_words) - 1:
                 # Return the word after the indicator
                 return query_words[i + 1].capitalize()
         
@@ -347,7 +686,23 @@ class InformationRetrieval:
         Returns:
             dict: Time information
         """
-        # Extract location for time zone (simplified)
+        # Known places carry their time zone, so no lookup service is needed
+        place = self.gazetteer.extract(query, record=False)
+        if place is not None and ZoneInfo is not None:
+            try:
+                now = datetime.now(ZoneInfo(place.timezone))
+            except (ZoneInfoNotFoundError, ValueError):
+                now = None
+            
+            if now is not None:
+                return {
+                    "current_time": now.strftime("%H:%M:%S"),
+                    "current_time_12h": now.strftime("%I:%M:%S %p"),
+                    "location": place.name,
+                    "timezone": place.timezone,
+                    "utc_offset": now.strftime("%z")
+                }
+        
         location = self._extract_location(query)
         
         # Get current time
@@ -388,7 +743,6 @@ class InformationRetrieval:
     def _calculate(self, query):
         """
         Perform calculations based on the query.
-        This is a simple calculator implementation.
         
         Args:
             query (str): The calculation query
@@ -396,64 +750,19 @@ class InformationRetrieval:
         Returns:
             dict: Calculation result
         """
-        # Extract the mathematical expression
-        expression = self._extract_math_expression(query)
-        
-        if not expression:
-            return {
-                "success": False,
-                "message": "No valid mathematical expression found"
-            }
-        
-        try:
-            # Safely evaluate the expression
-            # Note: In a real implementation, use a safer method than eval
-            result = eval(expression)
-            
-            return {
-                "success": True,
-                "expression": expression,
-                "result": result,
-                "formatted_result": f"{result:,}"
-            }
-        except Exception as e:
-            return {
-                "success": False,
-                "expression": expression,
-                "error": str(e)
-            }
+        return self.calculator.calculate(query)
     
-    def _extract_math_expression(self, query):
+    def calculate_many(self, queries):
         """
-        Extract a mathematical expression from a query.
-        This is a simple implementation for basic arithmetic.
+        Perform a batch of calculations.
         
         Args:
-            query (str): The query containing a math expression
+            queries (list): Calculation queries
             
         Returns:
-            str: Extracted math expression or None
-        """
-        # Replace word operators with symbols
-        query = query.lower()
-        query = query.replace("plus", "+")
-        query = query.replace("minus", "-")
-        query = query.replace("times", "*")
-        query = query.replace("multiplied by", "*")
-        query = query.replace("divided by", "/")
-        
-        # Extract digits and operators
-        import re
-        expression = re.findall(r'[\d\+\-\*\/\(\)\.\s]+', query)
-        
-        if expression:
-            # Join and clean up the expression
-            expression = ''.join(expression).strip()
-            # Remove extra spaces
-            expression = re.sub(r'\s+', '', expression)
-            return expression
-        
-        return None
+            list: One calculation result per query, in input order
+        """
+        return self.calculator.calculate_many(queries)
 
 
 # Example usage
@@ -467,4 +776,4 @@ if __name__ == "__main__":
     
     # Try a calculation
     calc_result = info_retrieval.search("calculate 25 * 4 + 10")
-    print(f"Calculation resul<response clipped><NOTE>To save on context only part of this file has been shown to you. You should retry this tool after you have searched inside the file with `grep -n` in order to find the line numbers of what you are looking for.</NOTE>
\ No newline at end of file
+    print(f"Calculation result: {json.dumps(calc_result, indent=2)}")
@@ -6,6 +6,7 @@ from core.voice_recognition import VoiceRecognition
 from core.task_automation import TaskAutomation
 from core.information_retrieval import InformationRetrieval
 from core.memory_system import MemorySystem
+from core.intent_matcher import IntentMatcher, DEFAULT_COMMAND_INTENTS
 
 class JarvisCore:
     """
@@ -13,16 +14,31 @@ class JarvisCore:
     Connects all core modules and handles their interaction.
     """
     
-    def __init__(self):
-        """Initialize the Jarvis core system."""
+    def __init__(self, intent_config=None):
+        """
+        Initialize the Jarvis core system.
+        
+        Args:
+            intent_config (str): Optional JSON file with "sources" and "commands" keyword tables
+        """
         print("Initializing Jarvis Core System...")
         
         # Initialize all core modules
         self.voice_recognition = VoiceRecognition(wake_word="jarvis")
         self.task_automation = TaskAutomation()
-        self.info_retrieval = InformationRetrieval()
+        self.info_retrieval = InformationRetrieval(intent_config=intent_config)
         self.memory_system = MemorySystem()
         
+        # Compiled keyword table used to route commands
+        if intent_config:
+            self.command_matcher = IntentMatcher.from_file(intent_config, "commands")
+        else:
+            self.command_matcher = IntentMatcher(DEFAULT_COMMAND_INTENTS)
+        
+        # How long a task command waits for the task's outcome before
+        # answering that it is still in progress (seconds)
+        self.task_response_timeout = 5
+        
         # Set up event callbacks
         self._setup_callbacks()
         
@@ -66,6 +82,9 @@ class JarvisCore:
         # Start voice recognition
         self.voice_recognition.start()
         
+        # Keep frequently asked information warm in the cache
+        self.info_retrieval.start_prefetch()
+        
         # Log system start
         self.memory_system.log_event("system_start", "Jarvis system started")
         
@@ -86,6 +105,9 @@ class JarvisCore:
         # Stop voice recognition
         self.voice_recognition.stop()
         
+        # Stop background prefetching
+        self.info_retrieval.stop_prefetch()
+        
         # Log system stop
         self.memory_system.log_event("system_stop", "Jarvis system stopped")
         
@@ -145,13 +167,14 @@ class JarvisCore:
             str: Response to the command
         """
         command = command.lower()
+        intent = self.command_matcher.first(command)
         
         # Check if it's a task command
-        if any(task in command for task in ["turn on", "turn off", "set", "play"]):
+        if intent == "task":
             return self._handle_task_command(command)
         
         # Check if it's an information query
-        elif any(query in command for query in ["what", "who", "when", "where", "how", "why"]):
+        elif intent == "info":
             return self._handle_info_query(command)
         
         # Default response
@@ -169,24 +192,55 @@ class JarvisCore:
         """
         # Simple task mapping (in a real implementation, this would be more sophisticated)
         if "turn on lights" in command:
-            result = self.task_automation.execute_task("turn_on_lights", {"room": "living room"})
-            return f"I've turned on the lights in the living room."
+            result = self.task_automation.execute_task("turn_on_lights", {"room": "living room"}, priority="interactive")
+            return self._task_response(result, "I've turned on the lights in the living room.")
         
         elif "turn off lights" in command:
-            result = self.task_automation.execute_task("turn_off_lights", {"room": "living room"})
-            return f"I've turned off the lights in the living room."
+            result = self.task_automation.execute_task("turn_off_lights", {"room": "living room"}, priority="interactive")
+            return self._task_response(result, "I've turned off the lights in the living room.")
         
         elif "set reminder" in command:
-            result = self.task_automation.execute_task("set_reminder", {"message": "User reminder", "time": "18:00"})
-            return f"I've set a reminder for 6:00 PM."
+            result = self.task_automation.execute_task("set_reminder", {"message": "User reminder", "time": "18:00"}, priority="interactive")
+            return self._task_response(result, "I've set a reminder for 6:00 PM.")
         
         elif "play music" in command:
-            result = self.task_automation.execute_task("play_music", {"genre": "relaxing", "source": "spotify"})
-            return f"Playing some relaxing music from Spotify."
+            result = self.task_automation.execute_task("play_music", {"genre": "relaxing", "source": "spotify"}, priority="interactive")
+            return self._task_response(result, "Playing some relaxing music from Spotify.")
         
         # If no specific task matched
         return "I'm not sure which task you want me to perform."
     
+    def _task_response(self, result, confirmation):
+        """
+        Wait for a task's outcome and describe it.
+        
+        Args:
+            result (dict): Return value of TaskAutomation.execute_task
+            confirmation (str): Response if the task succeeded
+            
+        Returns:
+            str: Response to the command
+        """
+        if not result.get("success", False):
+            return f"I couldn't do that: {result.get('message', 'unknown error')}"
+        
+        handle = result.get("handle")
+        if handle is None:
+            return confirmation
+        
+        if not handle.wait(self.task_response_timeout):
+            return "I'm on it, but it's taking a little longer than usual."
+        
+        try:
+            outcome = handle.result()
+        except Exception as e:
+            return f"Sorry, that didn't work: {e}"
+        
+        if isinstance(outcome, dict) and not outcome.get("success", True):
+            return f"Sorry, that didn't work: {outcome.get('message', 'unknown error')}"
+        
+        return confirmation
+    
     def _handle_info_query(self, query):
         """
         Handle an information query.
@@ -197,56 +251,16 @@ class JarvisCore:
         Returns:
             str: Response to the query
         """
-        # Use the information retrieval module to get an answer
+        # Use the information retrieval module to get an answer; the best
+        # ranked candidate across all sources is the response
         search_result = self.info_retrieval.search(query)
         
-        # Process the search results
-        if "weather" in search_result["results"]:
-            weather_data = search_result["results"]["weather"]
-            location = weather_data.get("location", "your location")
-            current = weather_data.get("current", {})
-            condition = current.get("condition", "unknown")
-            temperature = current.get("temperature", "unknown")
-            
-            return f"The weather in {location} is currently {condition} with a temperature of {temperature}."
+        ranked = search_result.get("ranked")
+        if ranked:
+            return ranked[0]["answer"]
         
-        elif "time" in search_result["results"]:
-            time_data = search_result["results"]["time"]
-            current_time = time_data.get("current_time_12h", "unknown")
-            
-            return f"The current time is {current_time}."
-        
-        elif "date" in search_result["results"]:
-            date_data = search_result["results"]["date"]
-            formatted_date = date_data.get("formatted_date", "unknown")
-            day_of_week = date_data.get("day_of_week", "")
-            
-            return f"Today is {day_of_week}, {formatted_date}."
-        
-        elif "calculator" in search_result["results"]:
-            calc_data = search_result["results"]["calculator"]
-            if calc_data.get("success", False):
-                expression = calc_data.get("expression", "")
-                result = calc_data.get("result", "")
-                
-                return f"The result of {expression} is {result}."
-            else:
-                return "I couldn't calculate that. Please try again."
-        
-        elif "web" in search_result["results"]:
-            web_data = search_result["results"]["web"]
-            if web_data.get("results", []):
-                first_result = web_data["results"][0]
-                return f"I found this on the web: {first_result['title']} - {first_result['snippet']}"
-            else:
-                return "I couldn't find any information about that on the web."
-        
-        elif "knowledge_base" in search_result["results"]:
-            kb_data = search_result["results"]["knowledge_base"]
-            if kb_data.get("found", False):
-                return kb_data.get("content", "No information found.")
-            else:
-                return "I don't have that information in my knowledge base."
+        if "knowledge_base" in search_result["results"]:
+            return "I don't have that information in my knowledge base."
         
         # Default response if no specific source had results
         return "I'm searching for information on that, but I don't have a specific answer yet."
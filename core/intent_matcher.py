@@ -0,0 +1,231 @@
+import re
+import json
+
+# Keyword tables are ordered by priority: when several intents match the same
+# clause, the one listed first wins. Keywords may span several words
+# ("turn on") or be operator symbols ("+"); symbols only count when they have
+# a number on both sides (or, for a postfix "%", before them), so "x-ray" and
+# "covid-19" are not mistaken for subtractions.
+DEFAULT_SOURCE_INTENTS = [
+    {"intent": "time", "keywords": ["time", "hour", "hours", "clock"]},
+    {"intent": "weather", "keywords": ["weather", "temperature", "forecast", "rain", "raining", "snow", "snowing", "sunny"]},
+    {"intent": "date", "keywords": ["date", "day", "today", "tomorrow", "month", "year"]},
+    {
+        "intent": "calculator",
+        "keywords": ["calculate", "compute", "math", "plus", "minus", "times", "divided", "multiplied",
+                     "squared", "cubed", "power", "percent", "square root",
+                     "+", "-", "*", "/", "=", "^", "%"]
+    },
+    {"intent": "news", "keywords": ["news", "latest", "headlines", "headline", "article", "articles"]}
+]
+
+DEFAULT_COMMAND_INTENTS = [
+    {"intent": "task", "keywords": ["turn on", "turn off", "set", "play"]},
+    {"intent": "info", "keywords": ["what", "who", "when", "where", "how", "why"]}
+]
+
+# Words and punctuation that separate independent requests in one utterance,
+# e.g. "what time is it and what's the weather in Tokyo".
+DEFAULT_CLAUSE_SEPARATORS = ["and", "also", "then", ",", ";"]
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+_SPLIT = -1
+
+# Operator symbols that only need a number before them ("20 % of 50")
+_POSTFIX_SYMBOLS = {"%"}
+
+class IntentMatcher:
+    """
+    Table-driven intent matcher.
+    Compiles keyword tables into a token trie, so a query is classified with
+    a single tokenizer pass followed by one dictionary lookup per token.
+    """
+
+    def __init__(self, table, separators=None):
+        """
+        Initialize the matcher from a keyword table.
+
+        Args:
+            table (list): Intent definitions in priority order, each a dict with
+                "intent" and "keywords"
+            separators (list): Clause separators for multi-intent queries
+                (default: DEFAULT_CLAUSE_SEPARATORS)
+        """
+        if separators is None:
+            separators = DEFAULT_CLAUSE_SEPARATORS
+
+        self.intents = []
+        self._priority = {}
+
+        # First token -> list of (remaining tokens, intent priority), longest first
+        self._trie = {}
+        self._symbols = set()
+
+        for entry in table:
+            intent = entry["intent"]
+            if intent not in self._priority:
+                self._priority[intent] = len(self.intents)
+                self.intents.append(intent)
+            priority = self._priority[intent]
+
+            for keyword in entry.get("keywords", []):
+                tokens = _TOKEN_RE.findall(keyword.lower())
+                if not tokens:
+                    continue
+                if len(tokens) == 1 and not tokens[0][0].isalnum():
+                    self._symbols.add(tokens[0])
+                self._add(tokens, priority)
+
+        for separator in separators:
+            tokens = _TOKEN_RE.findall(separator.lower())
+            if tokens:
+                self._add(tokens, _SPLIT)
+
+        for candidates in self._trie.values():
+            candidates.sort(key=lambda candidate: len(candidate[0]), reverse=True)
+
+        self._first_tokens = frozenset(self._trie)
+
+    @classmethod
+    def from_file(cls, path, section):
+        """
+        Create a matcher from a JSON config file.
+
+        The file holds one or more named tables, e.g.
+        {"sources": [...], "commands": [...], "separators": [...]}.
+
+        Args:
+            path (str): Path to the JSON file
+            section (str): Name of the table to load
+
+        Returns:
+            IntentMatcher: The compiled matcher
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+
+        return cls(config[section], config.get("separators"))
+
+    def match(self, text):
+        """
+        Find every keyword hit in the text.
+
+        Args:
+            text (str): The text to scan
+
+        Returns:
+            list: (intent, matched_text, clause_index) tuples in text order
+        """
+        return [
+            (self.intents[priority], " ".join(tokens), clause)
+            for priority, tokens, clause in self._scan(text)
+        ]
+
+    def classify(self, text):
+        """
+        Classify a possibly multi-part query.
+
+        Each clause contributes its highest-priority intent, so "what's the
+        weather like today" is a weather query, while "what time is it and
+        what's the weather" asks for both time and weather.
+
+        Args:
+            text (str): The query to classify
+
+        Returns:
+            list: Intents in the order they were asked for (no duplicates)
+        """
+        best = {}
+        for priority, _, clause in self._scan(text):
+            if priority < best.get(clause, len(self.intents)):
+                best[clause] = priority
+
+        intents = []
+        for clause in sorted(best):
+            intent = self.intents[best[clause]]
+            if intent not in intents:
+                intents.append(intent)
+
+        return intents
+
+    def first(self, text, default=None):
+        """
+        Get the single highest-priority intent in the text, ignoring clauses.
+
+        Args:
+            text (str): The text to classify
+            default: Value returned when nothing matches
+
+        Returns:
+            str: The winning intent or default
+        """
+        best = len(self.intents)
+        for priority, _, _ in self._scan(text):
+            if priority < best:
+                best = priority
+
+        return self.intents[best] if best < len(self.intents) else default
+
+    def _add(self, tokens, priority):
+        """Insert a tokenized keyword into the trie."""
+        self._trie.setdefault(tokens[0], []).append((tuple(tokens[1:]), priority))
+
+    def _scan(self, text):
+        """
+        Walk the query tokens once, yielding keyword hits.
+
+        Yields:
+            tuple: (intent priority, matched tokens, clause index)
+        """
+        tokens = _TOKEN_RE.findall(text.lower())
+
+        # Most queries share few tokens with the tables; skip the walk entirely
+        if self._first_tokens.isdisjoint(tokens):
+            return
+
+        trie = self._trie
+        clause = 0
+        count = len(tokens)
+        i = 0
+
+        while i < count:
+            candidates = trie.get(tokens[i])
+            if candidates is None:
+                i += 1
+                continue
+
+            for rest, priority in candidates:
+                end = i + 1 + len(rest)
+                if rest and tuple(tokens[i + 1:end]) != rest:
+                    continue
+                if priority != _SPLIT and tokens[i] in self._symbols and not self._between_numbers(tokens, i):
+                    continue
+
+                if priority == _SPLIT:
+                    clause += 1
+                else:
+                    yield priority, tokens[i:end], clause
+                i = end
+                break
+            else:
+                i += 1
+
+    @staticmethod
+    def _between_numbers(tokens, i):
+        """
+        Check whether the operator at i has numeric operands: a number or a
+        closing parenthesis before it and, unless it is postfix, a number,
+        an opening parenthesis or a signed number after it.
+        """
+        if i == 0 or not (tokens[i - 1].isdigit() or tokens[i - 1] == ")"):
+            return False
+        if tokens[i] in _POSTFIX_SYMBOLS:
+            return True
+
+        following = tokens[i + 1:i + 3]
+        if not following:
+            return False
+        if following[0].isdigit() or following[0] == "(":
+            return True
+        return following[0] in ("+", "-") and len(following) == 2 and following[1].isdigit()
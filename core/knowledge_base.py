@@ -0,0 +1,539 @@
+import os
+import re
+import json
+import math
+import heapq
+import pickle
+import threading
+
+from core import mapped_index
+from core.mapped_index import MappedIndex
+
+_TOKEN_RE = re.compile(r"\w+")
+
+STOPWORDS = frozenset([
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for",
+    "from", "how", "i", "in", "is", "it", "me", "of", "on", "or", "that", "the",
+    "this", "to", "was", "what", "when", "where", "which", "who", "why", "with", "you"
+])
+
+INDEX_VERSION = 1
+
+def tokenize(text):
+    """
+    Split text into lowercase index terms.
+
+    Args:
+        text (str): Text to tokenize
+
+    Returns:
+        list: Terms with stopwords removed
+    """
+    return [term for term in _TOKEN_RE.findall(text.lower()) if term not in STOPWORDS]
+
+def score_confidence(score):
+    """
+    Map an unbounded BM25 score onto a confidence in (0, 1).
+
+    Args:
+        score (float): BM25 score of a match
+
+    Returns:
+        float: Confidence, approaching 1 as the score grows
+    """
+    return 1 - math.exp(-score / 4)
+
+class KnowledgeBase:
+    """
+    Local knowledge base for Jarvis AI Assistant.
+    Keeps an inverted index over documents loaded from disk and ranks
+    matches with BM25. The index is persisted so unchanged files are not
+    re-tokenized on startup.
+
+    When numpy is available the persisted index is a memory-mapped file
+    (see core.mapped_index) that is queried in place. Documents added or
+    removed after loading live in an in-memory delta on top of it until
+    the next save() merges both into a new file.
+    """
+
+    def __init__(self, directory=None, index_path=None, k1=1.5, b=0.75, field_boost=2):
+        """
+        Initialize the knowledge base.
+
+        Args:
+            directory (str): Directory of .txt, .md and .json documents to index
+            index_path (str): File the index is persisted to (default: no persistence)
+            k1 (float): BM25 term-frequency saturation
+            b (float): BM25 document-length normalization
+            field_boost (int): Weight of title and keyword terms relative to body terms
+        """
+        self.directory = directory
+        self.index_path = index_path
+        self.k1 = k1
+        self.b = b
+        self.field_boost = field_boost
+
+        self.documents = {}     # doc_id -> {"title", "content", "keywords", "source"}
+        self.postings = {}      # term -> {doc_id: term frequency}
+        self.doc_lengths = {}   # doc_id -> number of terms
+        self.total_length = 0
+        self.files = {}         # path -> {"mtime", "size", "doc_ids"}
+
+        # Memory-mapped base index and the document numbers deleted from it
+        self._segment = None
+        self._tombstones = set()
+        self._tombstone_length = 0
+
+        self._lock = threading.RLock()
+        self._dirty = False
+
+        if index_path and os.path.exists(index_path):
+            self.load(index_path)
+
+        if directory:
+            self.sync_directory(directory)
+
+        if self._dirty and index_path:
+            self.save(index_path)
+
+    def __len__(self):
+        if self._segment is None:
+            return len(self.documents)
+        return len(self.documents) + self._segment.num_docs - len(self._tombstones)
+
+    def add_document(self, doc_id, title, content, keywords=None, source=None):
+        """
+        Add a document to the index, replacing any document with the same ID.
+
+        Args:
+            doc_id (str): Unique document ID
+            title (str): Document title
+            content (str): Document body
+            keywords (list): Optional phrases the document should be found by
+            source (str): Optional file the document came from
+        """
+        with self._lock:
+            self.remove_document(doc_id)
+
+            keywords = list(keywords or [])
+            terms = self._document_terms(title, content, keywords)
+            frequencies = {}
+            for term in terms:
+                frequencies[term] = frequencies.get(term, 0) + 1
+
+            for term, count in frequencies.items():
+                self.postings.setdefault(term, {})[doc_id] = count
+
+            self.documents[doc_id] = {"title": title, "content": content, "keywords": keywords, "source": source}
+            self.doc_lengths[doc_id] = len(terms)
+            self.total_length += len(terms)
+            self._dirty = True
+
+    def remove_document(self, doc_id):
+        """
+        Remove a document from the index.
+
+        Args:
+            doc_id (str): ID of the document to remove
+
+        Returns:
+            bool: True if the document existed
+        """
+        with self._lock:
+            document = self.documents.pop(doc_id, None)
+            if document is None:
+                return self._remove_from_segment(doc_id)
+
+            for term in set(self._document_terms(document["title"], document["content"], document["keywords"])):
+                postings = self.postings.get(term)
+                if postings is not None:
+                    postings.pop(doc_id, None)
+                    if not postings:
+                        del self.postings[term]
+
+            self.total_length -= self.doc_lengths.pop(doc_id)
+            self._dirty = True
+            return True
+
+    def search(self, query, top_k=5):
+        """
+        Rank documents against a query with BM25.
+
+        Args:
+            query (str): The search query
+            top_k (int): Maximum number of results to return
+
+        Returns:
+            list: Result dicts with doc_id, title, content and score, best first
+        """
+        with self._lock:
+            count = len(self)
+            if count == 0:
+                return []
+
+            total_length = self.total_length
+            if self._segment is not None:
+                total_length += self._segment.total_length - self._tombstone_length
+            average_length = total_length / count
+
+            scores = {}
+            segment_hits = []
+
+            for term in set(tokenize(query)):
+                postings = self.postings.get(term)
+                segment_postings = self._segment.postings(term) if self._segment is not None else None
+
+                df = len(postings or ()) + (len(segment_postings[0]) if segment_postings else 0)
+                if df == 0:
+                    continue
+                idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+
+                if postings:
+                    for doc_id, tf in postings.items():
+                        norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / average_length)
+                        scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+                if segment_postings:
+                    segment_hits.append((segment_postings, idf))
+
+            best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+            results = [
+                {
+                    "doc_id": doc_id,
+                    "title": self.documents[doc_id]["title"],
+                    "content": self.documents[doc_id]["content"],
+                    "score": score
+                }
+                for doc_id, score in best
+            ]
+
+            if segment_hits:
+                results.extend(self._search_segment(segment_hits, average_length, top_k))
+                results = heapq.nlargest(top_k, results, key=lambda result: result["score"])
+
+            return results
+
+    def _search_segment(self, hits, average_length, top_k):
+        """
+        Score the memory-mapped index with vectorized BM25.
+
+        Args:
+            hits (list): ((document numbers, term frequencies), idf) per query term
+            average_length (float): Average document length across the whole index
+            top_k (int): Number of candidates to return
+
+        Returns:
+            list: Up to top_k result dicts
+        """
+        np = mapped_index.np
+        segment = self._segment
+
+        numbers = []
+        partial_scores = []
+        for (docs, tfs), idf in hits:
+            tfs = tfs.astype(np.float64)
+            lengths = segment.doc_lengths[docs]
+            norm = self.k1 * (1 - self.b + self.b * lengths / average_length)
+            numbers.append(docs)
+            partial_scores.append(idf * tfs * (self.k1 + 1) / (tfs + norm))
+
+        numbers = np.concatenate(numbers)
+        partial_scores = np.concatenate(partial_scores)
+
+        if self._tombstones:
+            keep = ~np.isin(numbers, np.fromiter(self._tombstones, dtype=np.int64))
+            numbers = numbers[keep]
+            partial_scores = partial_scores[keep]
+
+        # Sum the per-term scores of each document
+        candidates, inverse = np.unique(numbers, return_inverse=True)
+        totals = np.bincount(inverse, weights=partial_scores)
+
+        if len(totals) > top_k:
+            chosen = np.argpartition(-totals, top_k)[:top_k]
+        else:
+            chosen = np.arange(len(totals))
+
+        results = []
+        for i in chosen:
+            document = segment.document(int(candidates[i]))
+            results.append({
+                "doc_id": document["doc_id"],
+                "title": document["title"],
+                "content": document["content"],
+                "score": float(totals[i])
+            })
+        return results
+
+    def sync_directory(self, directory):
+        """
+        Bring the index up to date with the files in a directory.
+
+        Only new or modified files are tokenized; documents from deleted
+        files are removed.
+
+        Args:
+            directory (str): Directory to scan
+
+        Returns:
+            int: Number of files that were (re)indexed
+        """
+        with self._lock:
+            seen = set()
+            indexed = 0
+
+            for root, _, names in os.walk(directory):
+                for name in sorted(names):
+                    if not name.endswith((".txt", ".md", ".json")):
+                        continue
+
+                    path = os.path.join(root, name)
+                    stat = os.stat(path)
+                    seen.add(path)
+
+                    known = self.files.get(path)
+                    if known and known["mtime"] == stat.st_mtime and known["size"] == stat.st_size:
+                        continue
+
+                    self._remove_file(path)
+                    doc_ids = []
+                    for doc_id, title, content, keywords in self._read_file(path, directory):
+                        self.add_document(doc_id, title, content, keywords, source=path)
+                        doc_ids.append(doc_id)
+
+                    self.files[path] = {"mtime": stat.st_mtime, "size": stat.st_size, "doc_ids": doc_ids}
+                    indexed += 1
+
+            for path in list(self.files):
+                if path not in seen:
+                    self._remove_file(path)
+
+            return indexed
+
+    def save(self, path=None):
+        """
+        Persist the index to disk.
+
+        Uses the memory-mapped format when numpy is available and falls back
+        to pickling the in-memory index otherwise.
+
+        Args:
+            path (str): Destination file (default: index_path)
+        """
+        path = path or self.index_path
+        with self._lock:
+            if mapped_index.available():
+                self._save_mapped(path)
+            else:
+                self._save_pickle(path)
+            self._dirty = False
+
+    def load(self, path=None):
+        """
+        Load a persisted index.
+
+        Args:
+            path (str): Source file (default: index_path)
+
+        Returns:
+            bool: True if the index was loaded
+        """
+        path = path or self.index_path
+
+        if mapped_index.is_mapped_index(path):
+            if not mapped_index.available():
+                return False
+            try:
+                segment = MappedIndex(path)
+            except (OSError, ValueError) as e:
+                print(f"Error loading knowledge base index: {e}")
+                return False
+
+            with self._lock:
+                self._reset()
+                self._segment = segment
+                self.files = segment.meta.get("files", {})
+            return True
+
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            print(f"Error loading knowledge base index: {e}")
+            return False
+
+        if state.get("version") != INDEX_VERSION:
+            return False
+
+        with self._lock:
+            self._reset()
+            self.documents = state["documents"]
+            self.postings = state["postings"]
+            self.doc_lengths = state["doc_lengths"]
+            self.total_length = state["total_length"]
+            self.files = state["files"]
+        return True
+
+    def close(self):
+        """Release the memory-mapped index, if any."""
+        with self._lock:
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+
+    def _reset(self):
+        """Drop all index state."""
+        self.close()
+        self.documents = {}
+        self.postings = {}
+        self.doc_lengths = {}
+        self.total_length = 0
+        self.files = {}
+        self._tombstones = set()
+        self._tombstone_length = 0
+        self._dirty = False
+
+    def _save_pickle(self, path):
+        """Persist the in-memory index with pickle."""
+        state = {
+            "version": INDEX_VERSION,
+            "documents": self.documents,
+            "postings": self.postings,
+            "doc_lengths": self.doc_lengths,
+            "total_length": self.total_length,
+            "files": self.files
+        }
+
+        # Write to a temporary file first so a crash never leaves a torn index
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+
+    def _save_mapped(self, path):
+        """
+        Merge the mapped index and the in-memory delta into a new mapped file,
+        then reopen it as the base index.
+        """
+        np = mapped_index.np
+        segment = self._segment
+        documents, postings = self._copy_segment(segment) if segment is not None else ([], {})
+
+        numbers = {}
+        for doc_id, document in self.documents.items():
+            numbers[doc_id] = len(documents)
+            documents.append((doc_id, document["title"], document["content"],
+                              document["keywords"], document["source"], self.doc_lengths[doc_id]))
+
+        for term, term_postings in self.postings.items():
+            entry = postings.setdefault(term, ([], []))
+            entry[0].append(np.fromiter((numbers[doc_id] for doc_id in term_postings), dtype=np.int64))
+            entry[1].append(np.fromiter(term_postings.values(), dtype=np.int64))
+
+        postings = {
+            term: (np.concatenate(docs), np.concatenate(tfs))
+            for term, (docs, tfs) in postings.items()
+        }
+
+        files = self.files
+        live = segment is not None and os.path.abspath(segment.path) == os.path.abspath(path)
+        try:
+            mapped_index.write_index(path, documents, postings, {"files": files},
+                                     before_replace=segment.close if live else None)
+        except OSError:
+            if live:
+                # The replace failed, so the old file is still in place
+                self._segment = MappedIndex(path)
+            raise
+
+        self._reset()
+        self._segment = MappedIndex(path)
+        self.files = files
+
+    def _copy_segment(self, segment):
+        """
+        Copy the mapped index's surviving documents and postings out of the
+        mapping, so it can be closed while they are written out.
+
+        Returns:
+            tuple: (document tuples as taken by write_index, term -> ([docs], [tfs]))
+        """
+        np = mapped_index.np
+        documents = []
+        postings = {}
+
+        # Renumber surviving documents densely, dropping tombstones
+        remap = np.full(segment.num_docs, -1, dtype=np.int64)
+        for number in range(segment.num_docs):
+            if number in self._tombstones:
+                continue
+            remap[number] = len(documents)
+            document = segment.document(number)
+            documents.append((document["doc_id"], document["title"], document["content"],
+                              document["keywords"], document["source"], int(segment.doc_lengths[number])))
+
+        for term, docs, tfs in segment.iter_postings():
+            renumbered = remap[docs]
+            keep = renumbered >= 0
+            if keep.any():
+                postings[term] = ([renumbered[keep]], [tfs[keep]])
+
+        return documents, postings
+
+    def _remove_from_segment(self, doc_id):
+        """Mark a document of the mapped index as deleted."""
+        if self._segment is None:
+            return False
+
+        number = self._segment.find_document(doc_id)
+        if number is None or number in self._tombstones:
+            return False
+
+        self._tombstones.add(number)
+        self._tombstone_length += int(self._segment.doc_lengths[number])
+        self._dirty = True
+        return True
+
+    def _document_terms(self, title, content, keywords):
+        """Tokenize a document, repeating title and keyword terms by field_boost."""
+        return tokenize(" ".join([title] + keywords)) * self.field_boost + tokenize(content)
+
+    def _remove_file(self, path):
+        """Remove every document that came from a file."""
+        known = self.files.pop(path, None)
+        if known:
+            for doc_id in known["doc_ids"]:
+                self.remove_document(doc_id)
+            self._dirty = True
+
+    def _read_file(self, path, directory):
+        """
+        Read the documents stored in a file.
+
+        Text and Markdown files hold one document whose title is the first
+        line. JSON files hold one document or a list of documents with
+        "title", "content" and optional "id" and "keywords" fields.
+
+        Yields:
+            tuple: (doc_id, title, content, keywords)
+        """
+        relative = os.path.relpath(path, directory)
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                if path.endswith(".json"):
+                    data = json.load(f)
+                else:
+                    text = f.read()
+        except (OSError, ValueError) as e:
+            print(f"Error reading knowledge base file {path}: {e}")
+            return
+
+        if path.endswith(".json"):
+            entries = data if isinstance(data, list) else [data]
+            for i, entry in enumerate(entries):
+                doc_id = str(entry.get("id", f"{relative}#{i}"))
+                yield doc_id, entry.get("title", doc_id), entry.get("content", ""), entry.get("keywords", [])
+        else:
+            title, _, content = text.partition("\n")
+            yield relative, title.lstrip("# ").strip() or relative, content.strip(), []
@@ -0,0 +1,282 @@
+import os
+import mmap
+import json
+import struct
+import hashlib
+
+try:
+    import numpy as np
+except ImportError:  # The mapped format is only available with numpy
+    np = None
+
+MAGIC = b"JKBMAP01"
+FORMAT_VERSION = 1
+
+# magic, version, num_docs, num_terms, total_length
+_HEADER = struct.Struct("<8sIIIQ")
+_SECTION = struct.Struct("<QQ")  # offset, length in bytes
+
+# Fixed-width sections are stored little-endian and 8-byte aligned so they
+# can be viewed in place without copying.
+_SECTIONS = [
+    ("term_hashes", "<u8"),      # Sorted 64-bit hashes of every term
+    ("term_offsets", "<u8"),     # num_terms + 1 offsets into term_blob
+    ("term_blob", None),         # UTF-8 term strings in hash order
+    ("posting_offsets", "<u8"),  # num_terms + 1 offsets into the posting arrays
+    ("posting_docs", "<u4"),     # Document numbers, grouped by term
+    ("posting_tfs", "<u4"),      # Term frequencies, parallel to posting_docs
+    ("doc_lengths", "<u4"),      # Number of terms in each document
+    ("doc_offsets", "<u8"),      # num_docs + 1 offsets into doc_blob
+    ("doc_blob", None),          # JSON [doc_id, title, content, keywords, source] per document
+    ("id_hashes", "<u8"),        # Sorted 64-bit hashes of document IDs
+    ("id_order", "<u4"),         # Document number for each entry of id_hashes
+    ("meta", None)               # JSON metadata (file manifest)
+]
+
+def available():
+    """Check whether the mapped index format can be used."""
+    return np is not None
+
+def is_mapped_index(path):
+    """
+    Check whether a file holds a mapped index.
+
+    Args:
+        path (str): File to inspect
+
+    Returns:
+        bool: True if the file starts with the mapped index magic bytes
+    """
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+def term_hash(text):
+    """Hash a term or document ID to 64 bits."""
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+def write_index(path, documents, postings, meta=None, before_replace=None):
+    """
+    Write a mapped index file.
+
+    Args:
+        path (str): Destination file
+        documents (list): (doc_id, title, content, keywords, source, length) tuples;
+            a document's position in the list is its document number
+        postings (dict): term -> (document numbers, term frequencies)
+        meta (dict): JSON-serializable metadata stored alongside the index
+        before_replace (callable): Called once the new file is complete, just
+            before it replaces path; Windows won't replace a file that is
+            still mapped, so this is where a reader of path unmaps it
+    """
+    terms = sorted(postings, key=term_hash)
+    hashes = np.array([term_hash(term) for term in terms], dtype="<u8")
+
+    encoded_terms = [term.encode("utf-8") for term in terms]
+    term_offsets = np.zeros(len(terms) + 1, dtype="<u8")
+    np.cumsum([len(term) for term in encoded_terms], out=term_offsets[1:])
+
+    posting_offsets = np.zeros(len(terms) + 1, dtype="<u8")
+    np.cumsum([len(postings[term][0]) for term in terms], out=posting_offsets[1:])
+    if terms:
+        posting_docs = np.concatenate([np.asarray(postings[term][0], dtype="<u4") for term in terms])
+        posting_tfs = np.concatenate([np.asarray(postings[term][1], dtype="<u4") for term in terms])
+    else:
+        posting_docs = np.zeros(0, dtype="<u4")
+        posting_tfs = np.zeros(0, dtype="<u4")
+
+    encoded_docs = [
+        json.dumps([doc_id, title, content, keywords, source], separators=(",", ":")).encode("utf-8")
+        for doc_id, title, content, keywords, source, _ in documents
+    ]
+    doc_offsets = np.zeros(len(documents) + 1, dtype="<u8")
+    np.cumsum([len(doc) for doc in encoded_docs], out=doc_offsets[1:])
+    doc_lengths = np.array([document[5] for document in documents], dtype="<u4")
+
+    id_hashes = np.array([term_hash(document[0]) for document in documents], dtype="<u8")
+    id_order = np.argsort(id_hashes, kind="stable").astype("<u4")
+    id_hashes = id_hashes[id_order]
+
+    sections = {
+        "term_hashes": hashes.tobytes(),
+        "term_offsets": term_offsets.tobytes(),
+        "term_blob": b"".join(encoded_terms),
+        "posting_offsets": posting_offsets.tobytes(),
+        "posting_docs": posting_docs.tobytes(),
+        "posting_tfs": posting_tfs.tobytes(),
+        "doc_lengths": doc_lengths.tobytes(),
+        "doc_offsets": doc_offsets.tobytes(),
+        "doc_blob": b"".join(encoded_docs),
+        "id_hashes": id_hashes.tobytes(),
+        "id_order": id_order.tobytes(),
+        "meta": json.dumps(meta or {}).encode("utf-8")
+    }
+
+    total_length = int(doc_lengths.sum()) if len(documents) else 0
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, len(documents), len(terms), total_length)
+    offset = _align(len(header) + _SECTION.size * len(_SECTIONS))
+
+    table = []
+    for name, _ in _SECTIONS:
+        table.append(_SECTION.pack(offset, len(sections[name])))
+        offset = _align(offset + len(sections[name]))
+
+    # Write to a temporary file first so a crash never leaves a torn index
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(header)
+        f.write(b"".join(table))
+        for name, _ in _SECTIONS:
+            f.write(b"\0" * (_align(f.tell()) - f.tell()))
+            f.write(sections[name])
+    if before_replace is not None:
+        before_replace()
+    os.replace(temp_path, path)
+
+def _align(offset):
+    """Round an offset up to the next multiple of 8."""
+    return (offset + 7) & ~7
+
+class MappedIndex:
+    """
+    Read-only knowledge base index backed by a memory-mapped file.
+    Postings, document lengths and offsets are NumPy views into the mapping,
+    so opening an index costs a header parse rather than a full load.
+    """
+
+    def __init__(self, path):
+        """
+        Open a mapped index file.
+
+        Args:
+            path (str): Index file written by write_index
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.num_docs, self.num_terms, self.total_length = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported knowledge base index format in {path}")
+
+        self._views = {}
+        position = _HEADER.size
+        for name, dtype in _SECTIONS:
+            offset, length = _SECTION.unpack_from(self._mmap, position)
+            position += _SECTION.size
+            if dtype is None:
+                self._views[name] = (offset, length)
+            else:
+                count = length // np.dtype(dtype).itemsize
+                self._views[name] = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=offset)
+
+        self.term_hashes = self._views["term_hashes"]
+        self.term_offsets = self._views["term_offsets"]
+        self.posting_offsets = self._views["posting_offsets"]
+        self.posting_docs = self._views["posting_docs"]
+        self.posting_tfs = self._views["posting_tfs"]
+        self.doc_lengths = self._views["doc_lengths"]
+        self.doc_offsets = self._views["doc_offsets"]
+        self.id_hashes = self._views["id_hashes"]
+        self.id_order = self._views["id_order"]
+
+        self._meta = None
+
+    @property
+    def meta(self):
+        """Metadata stored with the index, decoded on first access."""
+        if self._meta is None:
+            self._meta = json.loads(self._blob("meta", 0, None) or b"{}")
+        return self._meta
+
+    def postings(self, term):
+        """
+        Get the postings of a term.
+
+        Args:
+            term (str): The term to look up
+
+        Returns:
+            tuple: (document numbers, term frequencies) views, or None
+        """
+        index = self._find(self.term_hashes, term_hash(term), term, self.term)
+        if index is None:
+            return None
+
+        start, end = int(self.posting_offsets[index]), int(self.posting_offsets[index + 1])
+        return self.posting_docs[start:end], self.posting_tfs[start:end]
+
+    def term(self, index):
+        """Get the term with the given term number."""
+        return self._blob("term_blob", int(self.term_offsets[index]), int(self.term_offsets[index + 1])).decode("utf-8")
+
+    def iter_postings(self):
+        """
+        Iterate over every term and its postings.
+
+        Yields:
+            tuple: (term, document numbers view, term frequencies view)
+        """
+        for index in range(self.num_terms):
+            start, end = int(self.posting_offsets[index]), int(self.posting_offsets[index + 1])
+            yield self.term(index), self.posting_docs[start:end], self.posting_tfs[start:end]
+
+    def document(self, number):
+        """
+        Decode a stored document.
+
+        Args:
+            number (int): Document number
+
+        Returns:
+            dict: The document's doc_id, title, content, keywords and source
+        """
+        raw = self._blob("doc_blob", int(self.doc_offsets[number]), int(self.doc_offsets[number + 1]))
+        doc_id, title, content, keywords, source = json.loads(raw)
+        return {"doc_id": doc_id, "title": title, "content": content, "keywords": keywords, "source": source}
+
+    def find_document(self, doc_id):
+        """
+        Get the document number for a document ID.
+
+        Args:
+            doc_id (str): The document ID
+
+        Returns:
+            int: The document number, or None if the ID is not in the index
+        """
+        index = self._find(self.id_hashes, term_hash(doc_id), doc_id,
+                           lambda i: self.document(int(self.id_order[i]))["doc_id"])
+        return None if index is None else int(self.id_order[index])
+
+    def close(self):
+        """Release the mapping and the underlying file."""
+        self._views = {}
+        self.term_hashes = self.posting_docs = self.posting_tfs = None
+        self.term_offsets = self.posting_offsets = self.doc_lengths = None
+        self.doc_offsets = self.id_hashes = self.id_order = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Views handed out by search are still alive; the mapping is
+            # released when they are garbage collected.
+            pass
+        self._file.close()
+
+    def _find(self, hashes, key, value, decode):
+        """Binary search a sorted hash array, resolving hash collisions by value."""
+        index = int(np.searchsorted(hashes, np.uint64(key)))
+        while index < len(hashes) and int(hashes[index]) == key:
+            if decode(index) == value:
+                return index
+            index += 1
+        return None
+
+    def _blob(self, name, start, end):
+        """Slice bytes out of a variable-length section."""
+        offset, length = self._views[name]
+        end = length if end is None else end
+        return self._mmap[offset + start:offset + end]
@@ -0,0 +1,172 @@
+import time
+import threading
+from collections import deque
+
+class PrefetchScheduler:
+    """
+    Background prefetcher for Jarvis AI Assistant's information retrieval.
+    Learns which (source, query) pairs are asked for often and refreshes them
+    shortly before their cached results expire, so interactive queries find
+    a warm cache. Refreshes are limited by a request budget.
+    """
+
+    def __init__(self, info_retrieval, config=None, clock=time.time):
+        """
+        Initialize the prefetcher.
+
+        Args:
+            info_retrieval (InformationRetrieval): The module whose cache is kept warm
+            config (dict): Optional overrides for the default configuration
+            clock (callable): Time source, injectable for tests
+        """
+        self.info_retrieval = info_retrieval
+        self.clock = clock
+
+        self.config = {
+            "sources": ["weather", "news", "web"],  # Sources worth prefetching
+            "interval": 60,             # Seconds between prefetch cycles
+            "min_count": 2,             # Times a query must be asked before it is prefetched
+            "max_candidates": 10,       # Most frequent queries considered per cycle
+            "refresh_ahead": 0.2,       # Refresh once less than this fraction of the TTL is left
+            "budget": 30,               # Maximum prefetch requests per budget window
+            "budget_window": 3600       # Budget window (seconds)
+        }
+
+        if config:
+            self.config.update(config)
+
+        self._fetch_times = deque()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self.stats = {
+            "cycles": 0,
+            "fetches": 0,
+            "errors": 0,
+            "skipped_budget": 0
+        }
+
+    def start(self):
+        """Start prefetching in the background."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._prefetch_loop, name="prefetch")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background prefetcher."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def frequent_queries(self):
+        """
+        Find the prefetchable (source, query) pairs most worth keeping warm.
+
+        Candidates come from the search history's running counts, so no
+        history scan is needed. They are ordered by the time a warm cache
+        would save: how often the query is asked times the source's mean
+        latency.
+
+        Returns:
+            list: (source, query) pairs, most valuable first, using the most
+                recent phrasing of each query
+        """
+        cache = self.info_retrieval.cache
+        history = self.info_retrieval.search_history
+        latency = history.latency("source")
+
+        candidates = []
+        for key, count in history.top("source_query", None):
+            if count < self.config["min_count"]:
+                break
+            source = key[0]
+            if source not in self.config["sources"] or cache.ttl(source) <= 0:
+                continue
+            mean_latency = latency[source]["mean"] if source in latency else 1.0
+            candidates.append((count * mean_latency, count, key))
+
+        candidates.sort(key=lambda candidate: candidate[:2], reverse=True)
+        queries = []
+        for _, _, key in candidates:
+            latest = history.latest("source_query", key)
+            if latest is None:
+                # Counted in a history saved before latest entries were kept
+                continue
+            queries.append((key[0], latest["query"]))
+            if len(queries) >= self.config["max_candidates"]:
+                break
+        return queries
+
+    def run_once(self):
+        """
+        Run one prefetch cycle.
+
+        Returns:
+            int: Number of results fetched
+        """
+        cache = self.info_retrieval.cache
+        fetched = 0
+
+        for source, query in self.frequent_queries():
+            now = self.clock()
+            entry = cache.peek(source, query)
+            if entry is not None and entry.expires_at - now > cache.ttl(source) * self.config["refresh_ahead"]:
+                continue
+
+            if not self._take_budget(now):
+                self.stats["skipped_budget"] += 1
+                break
+
+            try:
+                result = self.info_retrieval.query_source(source, query)
+            except Exception as e:
+                print(f"Error prefetching {source} for '{query}': {e}")
+                self.stats["errors"] += 1
+                continue
+
+            cache.put(source, query, result, prefetched=True)
+            self.stats["fetches"] += 1
+            fetched += 1
+
+        self.stats["cycles"] += 1
+        return fetched
+
+    def get_stats(self):
+        """
+        Get prefetch metrics.
+
+        Returns:
+            dict: Fetch counters, prefetch hit rate and wasted fetches
+        """
+        cache_stats = self.info_retrieval.cache.get_stats()
+        lookups = cache_stats["hits"] + cache_stats["misses"]
+        stats = dict(self.stats)
+        stats["prefetch_hits"] = cache_stats["prefetch_hits"]
+        stats["prefetch_hit_rate"] = cache_stats["prefetch_hits"] / lookups if lookups else 0.0
+        stats["wasted_fetches"] = cache_stats["prefetched_entries_wasted"]
+        return stats
+
+    def _take_budget(self, now):
+        """Reserve one request from the rolling budget if any is left."""
+        window_start = now - self.config["budget_window"]
+        while self._fetch_times and self._fetch_times[0] <= window_start:
+            self._fetch_times.popleft()
+
+        if len(self._fetch_times) >= self.config["budget"]:
+            return False
+
+        self._fetch_times.append(now)
+        return True
+
+    def _prefetch_loop(self):
+        """Run prefetch cycles until stopped."""
+        while not self._stop_event.wait(self.config["interval"]):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Error in prefetch cycle: {e}")
@@ -0,0 +1,289 @@
+import time
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+class SharedPayload:
+    """Reference to bytes placed in a shared memory segment."""
+
+    __slots__ = ("name", "size")
+
+    def __init__(self, name, size):
+        self.name = name
+        self.size = size
+
+    def __repr__(self):
+        return f"<SharedPayload {self.name} {self.size} bytes>"
+
+    def __getstate__(self):
+        return self.name, self.size
+
+    def __setstate__(self, state):
+        self.name, self.size = state
+
+def _share(value, threshold, segments):
+    """Move large bytes (at the top level or in a dict) into shared memory."""
+    if isinstance(value, dict):
+        return {key: _share(item, threshold, segments) for key, item in value.items()}
+    if isinstance(value, (bytes, bytearray, memoryview)) and len(value) >= threshold:
+        data = memoryview(value).cast("B")
+        segment = shared_memory.SharedMemory(create=True, size=max(1, data.nbytes))
+        segment.buf[:data.nbytes] = data
+        segments.append(segment)
+        return SharedPayload(segment.name, data.nbytes)
+    return value
+
+def _unshare(value, unlink=False):
+    """Read shared payloads back into bytes, optionally freeing their segments."""
+    if isinstance(value, dict):
+        return {key: _unshare(item, unlink) for key, item in value.items()}
+    if isinstance(value, SharedPayload):
+        segment = shared_memory.SharedMemory(name=value.name)
+        try:
+            return bytes(segment.buf[:value.size])
+        finally:
+            segment.close()
+            if unlink:
+                segment.unlink()
+    return value
+
+def _warm():
+    """No-op run on each worker at startup so it is ready before the first task."""
+    return True
+
+def _call(function, kwargs, threshold):
+    """
+    Run a task function in a worker process.
+
+    Returns:
+        tuple: (result, seconds); large bytes in the result are left in
+            shared memory for the parent to collect and free
+    """
+    kwargs = _unshare(kwargs)
+    start = time.perf_counter()
+    result = function(**kwargs)
+    duration = time.perf_counter() - start
+
+    segments = []
+    result = _share(result, threshold, segments)
+    for segment in segments:
+        segment.close()
+    return result, duration
+
+class ProcessLane:
+    """
+    Process pool for Jarvis AI Assistant's CPU-bound tasks.
+    Runs task functions in worker processes, so heavy work (transcoding,
+    image processing, report generation) doesn't hold the GIL against
+    every other thread. Workers are started ahead of the first task and
+    kept warm. Bytes parameters and results of at least shm_threshold
+    bytes travel through shared memory instead of being pickled through
+    the pool's pipe. At most one task per worker is handed to the pool at
+    a time, so tasks still waiting here can be cancelled, and a task
+    counts as running once it is handed over.
+
+    Task functions and their parameters must be picklable: functions
+    have to be defined at module level.
+    """
+
+    def __init__(self, workers=None, shm_threshold=1 << 20, start_method="spawn", name="task-process"):
+        """
+        Initialize the lane; no processes are started until start() or the first submit().
+
+        Args:
+            workers (int): Number of worker processes (default: CPU count)
+            shm_threshold (int): Bytes values at least this large go through shared memory
+            start_method (str): multiprocessing start method; "spawn" doesn't
+                inherit the parent's threads and locks
+            name (str): Name used in error messages
+        """
+        self.workers = workers or multiprocessing.cpu_count()
+        self.shm_threshold = shm_threshold
+        self.start_method = start_method
+        self.name = name
+
+        self._pool = None
+        self._pending = deque()         # [key, function, params, on_start, on_done] waiting for a worker
+        self._running = {}              # key -> (future, shared memory segments, pool)
+        self._abandoned = set()
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "abandoned": 0,
+            "shared_payloads": 0,
+            "shared_bytes": 0,
+            "pool_restarts": 0
+        }
+
+    def start(self):
+        """Start the worker processes, if not already running."""
+        with self._lock:
+            self._ensure_pool()
+
+    def submit(self, key, function, params, on_start, on_done):
+        """
+        Queue a task function for a worker process.
+
+        Args:
+            key: Identifies the task to discard() or abandon()
+            function (callable): Module-level task function
+            params (dict): Keyword arguments for it
+            on_start (callable): Called when a worker takes the task;
+                returning False drops it (e.g. it was cancelled)
+            on_done (callable): Called with (result, error, seconds) when it finishes
+        """
+        with self._lock:
+            self._ensure_pool()
+            self._pending.append([key, function, params, on_start, on_done])
+            self.stats["submitted"] += 1
+        self._dispatch()
+
+    def discard(self, key):
+        """
+        Remove a task that no worker has taken yet.
+
+        Returns:
+            bool: True if the task was still waiting
+        """
+        with self._lock:
+            for position, entry in enumerate(self._pending):
+                if entry[0] is key:
+                    del self._pending[position]
+                    self.stats["cancelled"] += 1
+                    return True
+        return False
+
+    def abandon(self, key):
+        """
+        Give up on a running task: a worker process can't be interrupted,
+        so it finishes on its own and its result is ignored.
+
+        Returns:
+            bool: True if the task was running
+        """
+        with self._lock:
+            if key not in self._running or key in self._abandoned:
+                return False
+            self._abandoned.add(key)
+            self.stats["abandoned"] += 1
+            return True
+
+    def shutdown(self):
+        """Stop the worker processes; tasks still waiting fail."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+            pending, self._pending = self._pending, deque()
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        for entry in pending:
+            entry[4](None, RuntimeError(f"{self.name} shut down"), None)
+
+    def get_stats(self):
+        """
+        Get process lane metrics.
+
+        Returns:
+            dict: Workers, tasks waiting and running, task counters and
+                bytes passed through shared memory
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["workers"] = self.workers
+            stats["queued"] = len(self._pending)
+            stats["running"] = len(self._running)
+            return stats
+
+    def _ensure_pool(self):
+        """Create the pool and warm up its workers. Caller holds the lock."""
+        if self._pool is not None:
+            return
+        context = multiprocessing.get_context(self.start_method)
+        self._pool = ProcessPoolExecutor(self.workers, mp_context=context)
+        for _ in range(self.workers):
+            self._pool.submit(_warm)
+
+    def _dispatch(self):
+        """Hand waiting tasks to the pool while a worker is free."""
+        while True:
+            with self._lock:
+                if not self._pending or len(self._running) >= self.workers or self._pool is None:
+                    return
+                key, function, params, on_start, on_done = self._pending.popleft()
+                pool = self._pool
+                # Reserve the worker before leaving the lock
+                self._running[key] = (None, [], pool)
+
+            if not on_start():
+                with self._lock:
+                    self._running.pop(key, None)
+                continue
+
+            segments = []
+            try:
+                shared = _share(params, self.shm_threshold, segments)
+                future = pool.submit(_call, function, shared, self.shm_threshold)
+            except Exception as e:
+                self._release(segments)
+                with self._lock:
+                    self._running.pop(key, None)
+                    self.stats["failed"] += 1
+                    if isinstance(e, (BrokenProcessPool, RuntimeError)) and self._pool is pool:
+                        self._restart_pool()
+                on_done(None, e, None)
+                continue
+
+            with self._lock:
+                self._running[key] = (future, segments, pool)
+                self.stats["shared_payloads"] += len(segments)
+                self.stats["shared_bytes"] += sum(segment.size for segment in segments)
+            future.add_done_callback(lambda done, key=key, on_done=on_done: self._on_done(key, on_done, done))
+
+    def _on_done(self, key, on_done, future):
+        """Collect a finished task's result and free its shared memory."""
+        with self._lock:
+            _, segments, pool = self._running.pop(key, (None, [], None))
+            abandoned = key in self._abandoned
+            self._abandoned.discard(key)
+        self._release(segments)
+
+        result, error, duration = None, None, None
+        try:
+            result, duration = future.result()
+            result = _unshare(result, unlink=True)
+        except Exception as e:
+            error = e
+
+        with self._lock:
+            self.stats["failed" if error is not None else "completed"] += 1
+            if isinstance(error, BrokenProcessPool) and pool is self._pool:
+                self._restart_pool()
+
+        if not abandoned:
+            try:
+                on_done(result, error, duration)
+            except Exception as e:
+                print(f"Error completing {self.name} task: {e}")
+        self._dispatch()
+
+    def _restart_pool(self):
+        """Replace a pool whose worker died. Caller holds the lock."""
+        if self._pool is None:
+            return
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
+        self.stats["pool_restarts"] += 1
+        self._ensure_pool()
+
+    @staticmethod
+    def _release(segments):
+        """Free the shared memory holding a task's parameters."""
+        for segment in segments:
+            segment.close()
+            segment.unlink()
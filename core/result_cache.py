@@ -0,0 +1,153 @@
+import re
+import time
+import threading
+from collections import OrderedDict
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+
+class CacheEntry:
+    """A cached source result."""
+
+    __slots__ = ("value", "expires_at", "prefetched", "hits")
+
+    def __init__(self, value, expires_at, prefetched=False):
+        self.value = value
+        self.expires_at = expires_at
+        self.prefetched = prefetched
+        self.hits = 0
+
+class ResultCache:
+    """
+    Time-to-live cache for source results.
+    Entries are keyed by (source, normalized query) and evicted in
+    least-recently-used order once the cache is full. Entries written by the
+    prefetcher are tracked so their hit rate and waste can be reported.
+    """
+
+    def __init__(self, ttls=None, max_entries=1024, clock=time.time):
+        """
+        Initialize the cache.
+
+        Args:
+            ttls (dict): Seconds each source's results stay fresh; sources
+                without a positive TTL are never cached
+            max_entries (int): Maximum number of cached results
+            clock (callable): Time source, injectable for tests
+        """
+        self.ttls = dict(ttls or {})
+        self.max_entries = max_entries
+        self.clock = clock
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "prefetch_hits": 0,
+            "prefetched_entries_wasted": 0
+        }
+
+    @staticmethod
+    def normalize(query):
+        """
+        Normalize a query so trivially different phrasings share an entry.
+
+        Args:
+            query (str): The raw query
+
+        Returns:
+            str: Lowercase query without punctuation or repeated whitespace
+        """
+        return " ".join(_PUNCTUATION_RE.sub(" ", query.lower()).split())
+
+    def ttl(self, source):
+        """Get the time-to-live of a source's results (0 if uncached)."""
+        return self.ttls.get(source, 0)
+
+    def get(self, source, query):
+        """
+        Look up a fresh result.
+
+        Args:
+            source (str): The source name
+            query (str): The query
+
+        Returns:
+            The cached value, or None on a miss
+        """
+        if self.ttl(source) <= 0:
+            return None
+
+        key = (source, self.normalize(query))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= self.clock():
+                if entry is not None:
+                    self._discard(key)
+                self.stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            entry.hits += 1
+            self.stats["hits"] += 1
+            if entry.prefetched:
+                self.stats["prefetch_hits"] += 1
+            return entry.value
+
+    def peek(self, source, query):
+        """
+        Get the entry for a query without counting a lookup.
+
+        Returns:
+            CacheEntry: The entry (possibly expired), or None
+        """
+        with self._lock:
+            return self._entries.get((source, self.normalize(query)))
+
+    def put(self, source, query, value, prefetched=False):
+        """
+        Store a result.
+
+        Args:
+            source (str): The source name
+            query (str): The query
+            value: The result to cache
+            prefetched (bool): Whether the prefetcher produced the result
+        """
+        ttl = self.ttl(source)
+        if ttl <= 0:
+            return
+
+        key = (source, self.normalize(query))
+        with self._lock:
+            if key in self._entries:
+                self._discard(key)
+            self._entries[key] = CacheEntry(value, self.clock() + ttl, prefetched)
+
+            while len(self._entries) > self.max_entries:
+                self._discard(next(iter(self._entries)))
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            for key in list(self._entries):
+                self._discard(key)
+
+    def get_stats(self):
+        """
+        Get cache statistics.
+
+        Returns:
+            dict: Hit, miss and prefetch counters plus the current size
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+            return stats
+
+    def _discard(self, key):
+        """Remove an entry, counting prefetched entries that were never used."""
+        entry = self._entries.pop(key)
+        if entry.prefetched and entry.hits == 0:
+            self.stats["prefetched_entries_wasted"] += 1
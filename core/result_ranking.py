@@ -0,0 +1,214 @@
+import heapq
+
+from core.knowledge_base import score_confidence
+
+class ResultRanker:
+    """
+    Result merging for Jarvis AI Assistant's information retrieval.
+    Turns the differently shaped results of every source into scored
+    candidates ({"source", "score", "answer", ...}) and keeps the best k in
+    a bounded heap. Sources are visited from the most to the least
+    trusted, and each source yields its candidates best first, so ranking
+    stops as soon as nothing left could make the top k.
+    """
+
+    def __init__(self, priors=None, min_score=0.05):
+        """
+        Initialize the ranker.
+
+        Args:
+            priors (dict): Optional overrides for how much each source is
+                trusted (the highest score its candidates can reach)
+            min_score (float): Candidates scoring lower are dropped
+        """
+        self.priors = {
+            "weather": 1.0,
+            "time": 0.98,
+            "date": 0.96,
+            "calculator": 0.94,
+            "knowledge_base": 0.9,
+            "web": 0.4,
+            "news": 0.38
+        }
+        if priors:
+            self.priors.update(priors)
+
+        self.default_prior = 0.3        # Sources without a prior or normalizer
+        self.rank_decay = 0.8           # Score multiplier per position within a source's list
+        self.min_score = min_score
+
+        self.normalizers = {
+            "weather": self._weather_candidates,
+            "time": self._time_candidates,
+            "date": self._date_candidates,
+            "calculator": self._calculator_candidates,
+            "knowledge_base": self._knowledge_base_candidates,
+            "web": self._web_candidates,
+            "news": self._news_candidates
+        }
+
+    def rank(self, results, max_results=5):
+        """
+        Merge source results into a single ranked list.
+
+        Args:
+            results (dict): Source name -> result, as returned by search()
+            max_results (int): Maximum number of candidates to return
+
+        Returns:
+            list: Candidates, best first
+        """
+        if max_results <= 0:
+            return []
+
+        heap = []  # min-heap of (score, -order, candidate)
+        order = 0
+
+        for source in sorted(results, key=self.prior, reverse=True):
+            # Nothing from this or any later source can beat the current top k
+            if len(heap) == max_results and heap[0][0] >= self.prior(source):
+                break
+
+            result = results[source]
+            if not isinstance(result, dict) or "error" in result:
+                continue
+
+            for candidate in self.candidates(source, result):
+                score = candidate["score"]
+                if score < self.min_score:
+                    break
+                if len(heap) == max_results and score <= heap[0][0]:
+                    break
+
+                entry = (score, -order, candidate)
+                order += 1
+                if len(heap) < max_results:
+                    heapq.heappush(heap, entry)
+                else:
+                    heapq.heapreplace(heap, entry)
+
+        return [candidate for _, _, candidate in sorted(heap, reverse=True)]
+
+    def prior(self, source):
+        """Get the highest score a source's candidates can reach."""
+        return self.priors.get(source, self.default_prior)
+
+    def candidates(self, source, result):
+        """
+        Normalize one source result into candidates.
+
+        Args:
+            source (str): The source name
+            result (dict): The source's result
+
+        Yields:
+            dict: Candidates in decreasing score order
+        """
+        normalizer = self.normalizers.get(source)
+        if normalizer is None:
+            yield self._candidate(source, self.prior(source), str(result.get("answer", result)), data=result)
+            return
+
+        yield from normalizer(source, result)
+
+    @staticmethod
+    def trim(result, max_results):
+        """
+        Bound the size of the lists in a source result.
+
+        Args:
+            result (dict): The source's result (not modified)
+            max_results (int): Maximum number of items per list
+
+        Returns:
+            dict: The result, copied if any list had to be shortened
+        """
+        if not isinstance(result, dict):
+            return result
+
+        trimmed = result
+        for key in ("results", "articles"):
+            items = result.get(key)
+            if isinstance(items, list) and len(items) > max_results:
+                if trimmed is result:
+                    trimmed = dict(result)
+                trimmed[key] = items[:max_results]
+
+        return trimmed
+
+    @staticmethod
+    def _candidate(source, score, answer, title=None, url=None, data=None):
+        """Build a candidate dict."""
+        return {
+            "source": source,
+            "score": round(score, 4),
+            "answer": answer,
+            "title": title,
+            "url": url,
+            "data": data
+        }
+
+    def _ranked_items(self, source, items, answer):
+        """Yield candidates for a list of items, decaying the score by position."""
+        score = self.prior(source)
+        for item in items:
+            yield self._candidate(source, score, answer(item), item.get("title"), item.get("url"), item)
+            score *= self.rank_decay
+
+    def _weather_candidates(self, source, result):
+        location = result.get("location", "your location")
+        current = result.get("current", {})
+        condition = current.get("condition", "unknown")
+        temperature = current.get("temperature", "unknown")
+        yield self._candidate(
+            source, self.prior(source),
+            f"The weather in {location} is currently {condition} with a temperature of {temperature}.",
+            data=result
+        )
+
+    def _time_candidates(self, source, result):
+        current_time = result.get("current_time_12h", "unknown")
+        if "utc_offset" in result:
+            answer = f"The current time in {result['location']} is {current_time}."
+        else:
+            answer = f"The current time is {current_time}."
+        yield self._candidate(source, self.prior(source), answer, data=result)
+
+    def _date_candidates(self, source, result):
+        formatted_date = result.get("formatted_date", "unknown")
+        day_of_week = result.get("day_of_week", "")
+        yield self._candidate(source, self.prior(source), f"Today is {day_of_week}, {formatted_date}.", data=result)
+
+    def _calculator_candidates(self, source, result):
+        if result.get("success", False):
+            expression = result.get("expression", "")
+            value = result.get("result", "")
+            yield self._candidate(source, self.prior(source), f"The result of {expression} is {value}.", data=result)
+        else:
+            # Still worth saying when nothing else answered
+            yield self._candidate(source, self.min_score, "I couldn't calculate that. Please try again.", data=result)
+
+    def _knowledge_base_candidates(self, source, result):
+        if not result.get("found", False):
+            return
+
+        matches = result.get("results") or [{"title": result.get("title"), "content": result.get("content")}]
+        for position, match in enumerate(matches):
+            if "score" in match:
+                confidence = score_confidence(match["score"])
+            else:
+                confidence = result.get("confidence", 1.0)
+            score = self.prior(source) * confidence * self.rank_decay ** position
+            yield self._candidate(source, score, match.get("content", "No information found."), match.get("title"), data=match)
+
+    def _web_candidates(self, source, result):
+        yield from self._ranked_items(
+            source, result.get("results", []),
+            lambda item: f"I found this on the web: {item.get('title')} - {item.get('snippet')}"
+        )
+
+    def _news_candidates(self, source, result):
+        yield from self._ranked_items(
+            source, result.get("articles", []),
+            lambda item: f"From {item.get('source', 'the news')}: {item.get('title')} - {item.get('snippet')}"
+        )
@@ -0,0 +1,360 @@
+import time
+import threading
+import itertools
+
+from core.task_handle import TaskHandle
+from core.task_executor import PRIORITIES
+from core.cancellation import Watchdog
+
+FAILURE_POLICIES = ("abort", "skip", "continue")
+
+class RoutineRun:
+    """State of one routine execution."""
+
+    def __init__(self, routine_id, name, steps, dependents):
+        self.routine_id = routine_id
+        self.name = name
+        self.steps = steps              # step id -> step definition, in declaration order
+        self.dependents = dependents    # step id -> ids of steps that depend on it
+        self.waiting = {step_id: len(step["depends_on"]) for step_id, step in steps.items()}
+        self.outcomes = {}              # step id -> result entry once final
+        self.started = {}
+        self.task_ids = {}              # step id -> task id once queued
+        self.cancelled = None           # Reason, once the routine is cancelled
+        self.done = False
+        self.timer = None
+        self.start_time = time.monotonic()
+        self.lock = threading.Lock()
+        self.handle = TaskHandle(routine_id, name)
+
+class RoutineEngine:
+    """
+    Dependency-aware routine runner for Jarvis AI Assistant.
+    Each routine step may name the steps it depends on ("depends_on");
+    steps whose dependencies are satisfied are started right away through
+    TaskAutomation.execute_task, so independent steps run concurrently on
+    the task worker pool. No thread waits on a step: completion callbacks
+    start the next steps.
+
+    A failed step is handled according to its "on_failure" policy:
+
+    - "skip" (default): steps that depend on it, directly or not, are skipped
+    - "abort": no further steps of the routine are started
+    - "continue": dependents run as if the step had succeeded
+
+    Steps may set a "timeout"; a routine-wide timeout cancels whatever is
+    still queued or running when it expires.
+    """
+
+    def __init__(self, task_automation):
+        """
+        Initialize the engine.
+
+        Args:
+            task_automation (TaskAutomation): Runs the individual steps
+        """
+        self.task_automation = task_automation
+        self._routine_ids = itertools.count(int(time.time() * 1000))
+        self._runs = {}                 # routine id -> RoutineRun while running
+
+    def start(self, name, steps, priority="normal", timeout=None):
+        """
+        Start a routine.
+
+        Args:
+            name (str): The routine name
+            steps (list): Step definitions, each a dict with "task" and
+                optionally "params", "id", "depends_on", "on_failure", "priority"
+                and "timeout"
+            priority (str): Task priority of steps that don't set their own
+            timeout (float): Seconds after which the routine is cancelled
+
+        Returns:
+            TaskHandle: Resolves with the routine report (see _report())
+
+        Raises:
+            ValueError: If the steps are malformed or their dependencies
+                are unknown or cyclic
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown task priority: {priority}")
+        planned, dependents = self.plan(steps)
+        for step in planned.values():
+            step["priority"] = step["priority"] or priority
+        run = RoutineRun(f"{name}_{next(self._routine_ids)}", name, planned, dependents)
+
+        ready = [step_id for step_id, waiting in run.waiting.items() if waiting == 0]
+        if not ready:
+            run.done = True
+            run.handle.future.set_result(self._report(run))
+            return run.handle
+
+        self._runs[run.routine_id] = run
+        if timeout:
+            run.timer = self.task_automation.watchdog.call_later(
+                timeout, lambda: self.cancel(run.routine_id, f"Routine timed out after {timeout} seconds"))
+        for step_id in ready:
+            self._launch(run, step_id)
+
+        return run.handle
+
+    def cancel(self, routine_id, reason="Cancelled"):
+        """
+        Cancel a running routine: steps that haven't started are marked
+        cancelled and running steps are cancelled through TaskAutomation.
+
+        Args:
+            routine_id (str): The routine ID
+            reason (str): Why the routine is cancelled
+
+        Returns:
+            bool: True if the routine was running
+        """
+        run = self._runs.get(routine_id)
+        if run is None:
+            return False
+
+        with run.lock:
+            if run.cancelled is None:
+                run.cancelled = reason
+            for step_id in run.steps:
+                if step_id not in run.outcomes and step_id not in run.started:
+                    self._mark(run, step_id, "cancelled", reason)
+            running = [task_id for step_id, task_id in run.task_ids.items() if step_id not in run.outcomes]
+            finished = self._check_done(run)
+
+        for task_id in running:
+            self.task_automation.cancel(task_id, reason)
+
+        if finished:
+            self._complete(run)
+        return True
+
+    @staticmethod
+    def plan(steps):
+        """
+        Validate and normalize routine steps.
+
+        Steps without an "id" are named after their task, or after their
+        position if the task occurs more than once.
+
+        Args:
+            steps (list): Step definitions
+
+        Returns:
+            tuple: (step id -> normalized step, step id -> dependent step ids)
+
+        Raises:
+            ValueError: If a step is malformed or the dependencies are unknown or cyclic
+        """
+        task_counts = {}
+        for step in steps:
+            task_counts[step.get("task")] = task_counts.get(step.get("task"), 0) + 1
+
+        planned = {}
+        for position, step in enumerate(steps):
+            if "task" not in step:
+                raise ValueError(f"Step {position} has no task")
+            step_id = step.get("id") or (step["task"] if task_counts[step["task"]] == 1 else f"{step['task']}_{position}")
+            if step_id in planned:
+                raise ValueError(f"Duplicate step id: {step_id}")
+
+            on_failure = step.get("on_failure", "skip")
+            if on_failure not in FAILURE_POLICIES:
+                raise ValueError(f"Unknown failure policy for step {step_id}: {on_failure}")
+            if step.get("priority") not in (None,) + PRIORITIES:
+                raise ValueError(f"Unknown task priority for step {step_id}: {step['priority']}")
+
+            planned[step_id] = {
+                "id": step_id,
+                "task": step["task"],
+                "params": step.get("params", {}),
+                "depends_on": list(step.get("depends_on", [])),
+                "on_failure": on_failure,
+                "priority": step.get("priority"),
+                "timeout": step.get("timeout")
+            }
+
+        dependents = {step_id: [] for step_id in planned}
+        for step_id, step in planned.items():
+            for dependency in step["depends_on"]:
+                if dependency not in planned:
+                    raise ValueError(f"Step {step_id} depends on unknown step {dependency}")
+                dependents[dependency].append(step_id)
+
+        # Kahn's algorithm: every step must be reachable from the roots
+        waiting = {step_id: len(step["depends_on"]) for step_id, step in planned.items()}
+        ready = [step_id for step_id, count in waiting.items() if count == 0]
+        visited = 0
+        while ready:
+            step_id = ready.pop()
+            visited += 1
+            for dependent in dependents[step_id]:
+                waiting[dependent] -= 1
+                if waiting[dependent] == 0:
+                    ready.append(dependent)
+        if visited != len(planned):
+            raise ValueError("Routine steps have a dependency cycle")
+
+        return planned, dependents
+
+    def _launch(self, run, step_id):
+        """Start one step through the task automation module."""
+        step = run.steps[step_id]
+        with run.lock:
+            # An earlier root step may already have aborted the routine
+            if step_id in run.outcomes:
+                return
+            run.started[step_id] = time.monotonic()
+
+        result = self.task_automation.execute_task(step["task"], dict(step["params"]), step["priority"], step["timeout"])
+        if not result.get("success", False):
+            self._finish(run, step_id, "failed", error=result.get("message"))
+            return
+
+        task_id = result["task_id"]
+        with run.lock:
+            run.task_ids[step_id] = task_id
+            cancelled = run.cancelled
+        result["handle"].add_done_callback(lambda handle: self._on_step_done(run, step_id, task_id, handle))
+        if cancelled is not None:
+            # The routine was cancelled while this step was being queued
+            self.task_automation.cancel(task_id, cancelled)
+
+    def _on_step_done(self, run, step_id, task_id, handle):
+        """Record the outcome of a finished step."""
+        status = handle.status()
+        if status == "completed":
+            value = handle.result()
+            if isinstance(value, dict) and not value.get("success", True):
+                self._finish(run, step_id, "failed", task_id, result=value, error=value.get("message"))
+            else:
+                self._finish(run, step_id, "completed", task_id, result=value)
+        elif status == "cancelled":
+            task_status = self.task_automation.get_task_status(task_id)
+            self._finish(run, step_id, "cancelled", task_id, error=task_status.get("error", "Task was cancelled"))
+        else:
+            self._finish(run, step_id, "failed", task_id, error=str(handle.future.exception()))
+
+    def _finish(self, run, step_id, status, task_id=None, result=None, error=None):
+        """Record a step outcome, then start the steps it unblocked."""
+        now = time.monotonic()
+        to_launch = []
+
+        with run.lock:
+            started = run.started.get(step_id, now)
+            run.outcomes[step_id] = {
+                "step": step_id,
+                "task": run.steps[step_id]["task"],
+                "task_id": task_id,
+                "status": status,
+                "result": result,
+                "error": error,
+                "start": started - run.start_time,
+                "duration": now - started
+            }
+
+            policy = run.steps[step_id]["on_failure"]
+            failed = status != "completed"
+            if failed and policy == "abort":
+                for other in run.steps:
+                    if other not in run.outcomes and other not in run.started:
+                        self._mark(run, other, "cancelled", f"Routine aborted after {step_id} failed")
+            elif failed and policy == "skip":
+                pending = list(run.dependents[step_id])
+                while pending:
+                    dependent = pending.pop()
+                    if dependent not in run.outcomes:
+                        self._mark(run, dependent, "skipped", f"Dependency {step_id} failed")
+                        pending.extend(run.dependents[dependent])
+            else:
+                for dependent in run.dependents[step_id]:
+                    run.waiting[dependent] -= 1
+                    if run.waiting[dependent] == 0 and dependent not in run.outcomes:
+                        to_launch.append(dependent)
+
+            finished = self._check_done(run)
+
+        for dependent in to_launch:
+            self._launch(run, dependent)
+
+        if finished:
+            self._complete(run)
+
+    @staticmethod
+    def _check_done(run):
+        """Check whether every step has an outcome, exactly once. Caller holds the lock."""
+        if run.done or len(run.outcomes) < len(run.steps):
+            return False
+        run.done = True
+        return True
+
+    def _complete(self, run):
+        """Resolve a finished routine's handle."""
+        Watchdog.cancel(run.timer)
+        self._runs.pop(run.routine_id, None)
+        run.handle.future.set_result(self._report(run))
+
+    @staticmethod
+    def _mark(run, step_id, status, reason):
+        """Give a step that never ran a final status. Caller holds the lock."""
+        run.outcomes[step_id] = {
+            "step": step_id,
+            "task": run.steps[step_id]["task"],
+            "task_id": None,
+            "status": status,
+            "result": None,
+            "error": reason,
+            "start": None,
+            "duration": 0.0
+        }
+
+    def _report(self, run):
+        """
+        Summarize a finished routine.
+
+        The critical path is the chain of dependent steps with the longest
+        total duration: the shortest wall time the routine could take given
+        how long its steps actually ran.
+        """
+        results = [run.outcomes[step_id] for step_id in run.steps]
+        success = run.cancelled is None and all(
+            outcome["status"] == "completed" or
+            (outcome["status"] == "failed" and run.steps[outcome["step"]]["on_failure"] == "continue")
+            for outcome in results
+        )
+
+        # Longest path by duration; steps are visited after their dependencies
+        finish = {}
+        previous = {}
+        remaining = list(run.steps)
+        while remaining:
+            for step_id in list(remaining):
+                dependencies = run.steps[step_id]["depends_on"]
+                if all(dependency in finish for dependency in dependencies):
+                    before = max(dependencies, key=finish.get, default=None)
+                    finish[step_id] = run.outcomes[step_id]["duration"] + (finish[before] if before else 0.0)
+                    previous[step_id] = before
+                    remaining.remove(step_id)
+
+        path = []
+        step_id = max(finish, key=finish.get, default=None)
+        while step_id is not None:
+            path.append(step_id)
+            step_id = previous[step_id]
+
+        if run.cancelled is not None:
+            message = f"Routine '{run.name}' cancelled: {run.cancelled}"
+        else:
+            message = f"Routine '{run.name}' {'completed' if success else 'finished with errors'}"
+
+        return {
+            "success": success,
+            "message": message,
+            "routine_id": run.routine_id,
+            "results": results,
+            "duration": time.monotonic() - run.start_time,
+            "critical_path": path[::-1],
+            "critical_path_duration": max(finish.values(), default=0.0),
+            "sequential_duration": sum(outcome["duration"] for outcome in results)
+        }
@@ -0,0 +1,498 @@
+import os
+import json
+import time
+import heapq
+import threading
+import itertools
+from datetime import datetime, timedelta
+
+JOB_KINDS = ("task", "routine")
+
+class CronSchedule:
+    """
+    Five-field cron expression ("minute hour day month weekday"), evaluated
+    in local time. Fields accept "*", numbers, ranges ("1-5"), lists
+    ("1,15") and steps ("*/15"); weekdays run from 0 (Sunday) to 6 and may
+    also be written as names ("mon-fri"). As in cron, when both the day and
+    the weekday are restricted a time matches either of them.
+    """
+
+    ALIASES = {
+        "@hourly": "0 * * * *",
+        "@daily": "0 0 * * *",
+        "@weekly": "0 0 * * 0",
+        "@monthly": "0 0 1 * *",
+        "@weekdays": "0 8 * * 1-5"
+    }
+    WEEKDAYS = {name: number for number, name in enumerate(["sun", "mon", "tue", "wed", "thu", "fri", "sat"])}
+    FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+    MAX_YEARS = 5               # Give up on expressions that never match (e.g. "0 0 31 2 *")
+
+    def __init__(self, expression):
+        """
+        Parse an expression.
+
+        Args:
+            expression (str): The cron expression or an alias such as "@daily"
+
+        Raises:
+            ValueError: If the expression is malformed
+        """
+        self.expression = expression
+        fields = self.ALIASES.get(expression.strip(), expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression}")
+
+        parsed = [self._parse_field(field, low, high) for field, (low, high) in zip(fields, self.FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {day % 7 for day in weekdays}
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def __repr__(self):
+        return f"<CronSchedule {self.expression}>"
+
+    def _parse_field(self, field, low, high):
+        values = set()
+        for part in field.lower().split(","):
+            step = 1
+            if "/" in part:
+                part, step_text = part.split("/", 1)
+                step = int(step_text)
+                if step <= 0:
+                    raise ValueError(f"Invalid step in cron field: {field}")
+
+            if part == "*":
+                start, end = low, high
+            elif "-" in part:
+                start, end = (self._value(bound) for bound in part.split("-", 1))
+            else:
+                start = self._value(part)
+                end = high if step > 1 else start
+
+            if not low <= start <= end <= high:
+                raise ValueError(f"Cron field out of range: {field}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _value(self, text):
+        if text in self.WEEKDAYS:
+            return self.WEEKDAYS[text]
+        try:
+            return int(text)
+        except ValueError:
+            raise ValueError(f"Invalid cron value: {text}")
+
+    def _day_matches(self, moment):
+        day = moment.day in self.days
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_after(self, timestamp):
+        """
+        Get the first matching time after a timestamp.
+
+        Args:
+            timestamp (float): Seconds since the epoch
+
+        Returns:
+            float: The next matching time, at the start of its minute
+
+        Raises:
+            ValueError: If the expression matches no time in the coming years
+        """
+        moment = datetime.fromtimestamp(timestamp).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        last_year = moment.year + self.MAX_YEARS
+
+        # Skip whole months, days and hours that can't match, so this takes
+        # at most a few hundred steps
+        while moment.year <= last_year:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment.timestamp()
+
+        raise ValueError(f"Cron expression never matches: {self.expression}")
+
+class Scheduler:
+    """
+    Time-based job scheduler for Jarvis AI Assistant.
+    Holds one-shot ("at"), interval ("every") and cron jobs in a heap
+    ordered by due time, served by a single timer thread that sleeps until
+    the earliest job is due. Scheduling is O(log n); cancelling removes the
+    job from the index and leaves its heap entry to be discarded when it
+    surfaces, with the heap rebuilt once stale entries outnumber live jobs.
+
+    Jobs are plain dicts naming what to run (a task or routine and its
+    parameters), so they can be written to an append-only JSON-lines log
+    and replayed after a restart. The clock is injectable, and
+    run_pending() fires due jobs without the timer thread for tests.
+    """
+
+    def __init__(self, callback, path=None, config=None, clock=time.time):
+        """
+        Initialize the scheduler.
+
+        Args:
+            callback (callable): Called with a copy of each job when it is due;
+                should return quickly (e.g. by queueing the work)
+            path (str): Job log file (default: jobs are kept in memory only)
+            config (dict): Optional overrides for the default configuration
+            clock (callable): Wall-clock time source, injectable for tests
+        """
+        self.callback = callback
+        self.path = path
+        self.clock = clock
+
+        self.config = {
+            "max_sleep": 60,            # Longest the timer thread sleeps before re-reading the clock
+            "misfire_grace": None,      # Overdue one-shot jobs older than this (seconds) are dropped instead of run
+            "min_compact": 1000         # Log records before the log may be compacted
+        }
+        if config:
+            self.config.update(config)
+
+        self._jobs = {}                 # job id -> job
+        self._heap = []                 # (due, sequence, job id); entries may be stale
+        self._entries = {}              # job id -> sequence of its live heap entry
+        self._sequence = itertools.count()
+        self._job_ids = itertools.count(int(time.time() * 1000))
+        self._stale = 0
+
+        self._lock = threading.RLock()
+        self._wakeup = threading.Condition(self._lock)
+        self._thread = None
+        self._stopped = False
+        self._log = None
+        self._log_records = 0
+
+        self.stats = {
+            "scheduled": 0,
+            "fired": 0,
+            "cancelled": 0,
+            "missed": 0,
+            "errors": 0,
+            "max_lateness": 0.0,
+            "total_lateness": 0.0
+        }
+
+        if path:
+            self._replay()
+            self._log = open(path, "a", encoding="utf-8")
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def schedule(self, kind, target, params=None, at=None, every=None, cron=None, job_id=None):
+        """
+        Add a job.
+
+        Exactly one of at, every and cron must be given.
+
+        Args:
+            kind (str): What to run: "task" or "routine"
+            target (str): The task or routine name
+            params (dict): Task parameters
+            at (float): Run once at this timestamp
+            every (float): Run repeatedly, this many seconds apart
+            cron (str): Run at the times matching this cron expression
+            job_id (str): Optional ID; replaces an existing job with the same ID
+
+        Returns:
+            dict: The job, including its "id" and next "due" time
+
+        Raises:
+            ValueError: If the job is malformed
+        """
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if sum(option is not None for option in (at, every, cron)) != 1:
+            raise ValueError("Give exactly one of at, every and cron")
+        if every is not None and every <= 0:
+            raise ValueError("Interval must be positive")
+
+        now = self.clock()
+        if at is not None:
+            due = float(at)
+        elif every is not None:
+            due = now + every
+        else:
+            due = CronSchedule(cron).next_after(now)
+
+        with self._lock:
+            if job_id is None:
+                job_id = f"job_{next(self._job_ids)}"
+                while job_id in self._jobs:
+                    job_id = f"job_{next(self._job_ids)}"
+
+            job = {
+                "id": job_id,
+                "kind": kind,
+                "target": target,
+                "params": dict(params or {}),
+                "due": due,
+                "every": every,
+                "cron": cron,
+                "runs": 0,
+                "created": now
+            }
+            if job_id in self._jobs:
+                self._stale += 1
+            self._jobs[job_id] = job
+            self._push(job)
+            self._write({"op": "add", "job": job})
+            self.stats["scheduled"] += 1
+            self._wakeup.notify()
+            return dict(job)
+
+    def cancel(self, job_id):
+        """
+        Remove a job.
+
+        Args:
+            job_id (str): The job ID
+
+        Returns:
+            bool: True if the job existed
+        """
+        with self._lock:
+            if self._jobs.pop(job_id, None) is None:
+                return False
+            del self._entries[job_id]
+            self._stale += 1
+            self._write({"op": "remove", "id": job_id})
+            self.stats["cancelled"] += 1
+            self._compact_heap()
+            return True
+
+    def get_job(self, job_id):
+        """Get a copy of a job, or None."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def jobs(self, limit=None):
+        """
+        Get the next jobs to run.
+
+        Args:
+            limit (int): Maximum number of jobs to return (None for all)
+
+        Returns:
+            list: Copies of the jobs, earliest first
+        """
+        with self._lock:
+            jobs = self._jobs.values()
+            if limit is None:
+                ordered = sorted(jobs, key=lambda job: job["due"])
+            else:
+                ordered = heapq.nsmallest(limit, jobs, key=lambda job: job["due"])
+            return [dict(job) for job in ordered]
+
+    def next_due(self):
+        """Get the due time of the earliest job, or None if there are none."""
+        with self._lock:
+            self._drop_stale_head()
+            return self._heap[0][0] if self._heap else None
+
+    def run_pending(self, now=None):
+        """
+        Fire every job that is due.
+
+        Recurring jobs are rescheduled from the current time, so a job that
+        was missed several times (e.g. while Jarvis was off) fires once.
+
+        Args:
+            now (float): Current time (default: the scheduler's clock)
+
+        Returns:
+            list: Copies of the jobs that were fired
+        """
+        if now is None:
+            now = self.clock()
+        grace = self.config["misfire_grace"]
+        due_jobs = []
+
+        with self._lock:
+            while True:
+                self._drop_stale_head()
+                if not self._heap or self._heap[0][0] > now:
+                    break
+
+                due, _, job_id = heapq.heappop(self._heap)
+                job = self._jobs[job_id]
+                del self._entries[job_id]
+                lateness = now - due
+
+                missed = grace is not None and lateness > grace
+                if not missed:
+                    job["runs"] += 1
+                    due_jobs.append(dict(job))
+                    self.stats["fired"] += 1
+                    self.stats["total_lateness"] += lateness
+                    self.stats["max_lateness"] = max(self.stats["max_lateness"], lateness)
+                else:
+                    self.stats["missed"] += 1
+
+                if job["every"] is not None:
+                    job["due"] = due + job["every"]
+                    if job["due"] <= now:
+                        job["due"] = now + job["every"]
+                elif job["cron"] is not None:
+                    job["due"] = CronSchedule(job["cron"]).next_after(now)
+                else:
+                    del self._jobs[job_id]
+                    self._write({"op": "remove", "id": job_id})
+                    continue
+
+                self._push(job)
+                self._write({"op": "due", "id": job_id, "due": job["due"], "runs": job["runs"]})
+
+        for job in due_jobs:
+            try:
+                self.callback(job)
+            except Exception as e:
+                print(f"Error running scheduled job {job['id']}: {e}")
+                self.stats["errors"] += 1
+
+        return due_jobs
+
+    def start(self):
+        """Start the timer thread."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped = False
+            self._thread = threading.Thread(target=self._timer_loop, name="scheduler")
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self):
+        """Stop the timer thread."""
+        with self._lock:
+            self._stopped = True
+            self._wakeup.notify_all()
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def close(self):
+        """Stop the timer thread and close the job log."""
+        self.stop()
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    def get_stats(self):
+        """
+        Get scheduler metrics.
+
+        Returns:
+            dict: Job counters, pending jobs and firing lateness in seconds
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["pending"] = len(self._jobs)
+            stats["heap_size"] = len(self._heap)
+            stats["mean_lateness"] = stats["total_lateness"] / stats["fired"] if stats["fired"] else 0.0
+            return stats
+
+    def _push(self, job):
+        """Add a heap entry for a job. Caller holds the lock."""
+        sequence = next(self._sequence)
+        self._entries[job["id"]] = sequence
+        heapq.heappush(self._heap, (job["due"], sequence, job["id"]))
+
+    def _is_stale(self, entry):
+        return self._entries.get(entry[2]) != entry[1]
+
+    def _drop_stale_head(self):
+        """Discard cancelled or rescheduled entries from the top of the heap. Caller holds the lock."""
+        while self._heap and self._is_stale(self._heap[0]):
+            heapq.heappop(self._heap)
+            self._stale -= 1
+
+    def _compact_heap(self):
+        """Rebuild the heap once stale entries outnumber live ones. Caller holds the lock."""
+        if self._stale > 1024 and self._stale > len(self._jobs):
+            self._heap = [entry for entry in self._heap if not self._is_stale(entry)]
+            heapq.heapify(self._heap)
+            self._stale = 0
+
+    def _timer_loop(self):
+        """Fire jobs as they come due until stopped."""
+        while True:
+            with self._lock:
+                if self._stopped:
+                    return
+                due = self.next_due()
+                delay = self.config["max_sleep"] if due is None else min(due - self.clock(), self.config["max_sleep"])
+                if delay > 0:
+                    # Woken early when a job is scheduled
+                    self._wakeup.wait(delay)
+                    continue
+
+            try:
+                self.run_pending()
+            except Exception as e:
+                print(f"Error in scheduler: {e}")
+
+    def _write(self, record):
+        """Append a record to the job log. Caller holds the lock."""
+        if self._log is None:
+            return
+
+        self._log.write(json.dumps(record) + "\n")
+        self._log.flush()
+        self._log_records += 1
+        if self._log_records > max(self.config["min_compact"], 2 * len(self._jobs)):
+            self._compact_log()
+
+    def _replay(self):
+        """Load jobs from the log."""
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn final line from an interrupted write
+                    continue
+                self._log_records += 1
+
+                if record["op"] == "add":
+                    self._jobs[record["job"]["id"]] = record["job"]
+                elif record["op"] == "due" and record["id"] in self._jobs:
+                    self._jobs[record["id"]]["due"] = record["due"]
+                    self._jobs[record["id"]]["runs"] = record["runs"]
+                elif record["op"] == "remove":
+                    self._jobs.pop(record["id"], None)
+
+        for job in self._jobs.values():
+            self._entries[job["id"]] = sequence = next(self._sequence)
+            self._heap.append((job["due"], sequence, job["id"]))
+        heapq.heapify(self._heap)
+
+    def _compact_log(self):
+        """Rewrite the log as one record per job. Caller holds the lock."""
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for job in self._jobs.values():
+                f.write(json.dumps({"op": "add", "job": job}) + "\n")
+
+        self._log.close()
+        os.replace(temp_path, self.path)
+        self._log = open(self.path, "a", encoding="utf-8")
+        self._log_records = len(self._jobs)
@@ -0,0 +1,256 @@
+import time
+import threading
+from collections import deque
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class SourceUnavailableError(RuntimeError):
+    """Raised when a source is skipped because its circuit breaker is open."""
+
+class SourceStats:
+    """Rolling health statistics and circuit breaker state for one source."""
+
+    __slots__ = ("latencies", "outcomes", "errors_in_window", "consecutive_failures",
+                 "state", "opened_until", "probing", "probe_deadline", "counters")
+
+    def __init__(self, window):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.errors_in_window = 0
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self.opened_until = 0.0
+        self.probing = False
+        self.probe_deadline = 0.0
+        self.counters = {
+            "requests": 0,
+            "errors": 0,
+            "short_circuited": 0,
+            "trips": 0,
+            "hedges": 0,
+            "hedge_wins": 0
+        }
+
+class SourceHealth:
+    """
+    Per-source health tracking for Jarvis AI Assistant's information retrieval.
+    Keeps a rolling window of latencies and outcomes for each source and runs
+    a circuit breaker on top of it: a source that keeps failing is skipped
+    for a cool-down period, after which a single probe request decides
+    whether it is healthy again. The latency window also provides the delay
+    after which hedged requests send a second attempt.
+    """
+
+    def __init__(self, config=None, clock=time.monotonic):
+        """
+        Initialize health tracking.
+
+        Args:
+            config (dict): Optional overrides for the default configuration
+            clock (callable): Time source for cool-downs, injectable for tests
+        """
+        self.config = {
+            "window": 100,                  # Recent requests kept per source
+            "min_samples": 10,              # Requests needed before the error rate can trip the breaker
+            "error_threshold": 0.5,         # Error rate that trips the breaker
+            "consecutive_failures": 5,      # Failures in a row that trip the breaker
+            "cooldown": 30,                 # Seconds an open breaker skips the source
+            "probe_timeout": 10,            # Seconds a probe holds the half-open slot before another may go
+            "hedge_sources": [],            # Latency-critical sources that get hedged requests
+            "hedge_percentile": 95,         # Latency percentile after which a hedge is sent
+            "hedge_min_samples": 20         # Requests needed before hedging starts
+        }
+
+        if config:
+            self.config.update(config)
+
+        self.clock = clock
+        self._sources = {}
+        self._lock = threading.Lock()
+
+    def allow(self, source):
+        """
+        Check whether a request to a source may go ahead.
+
+        An open breaker rejects requests until its cool-down has passed, then
+        lets exactly one probe request through. A probe that hasn't reported
+        back within the probe timeout gives up its slot to a new one, so a
+        hung request can't keep the source skipped forever.
+
+        Args:
+            source (str): The source name
+
+        Returns:
+            bool: True if the request may be sent
+        """
+        with self._lock:
+            stats = self._stats(source)
+
+            if stats.state == OPEN and self.clock() >= stats.opened_until:
+                stats.state = HALF_OPEN
+                stats.probing = False
+
+            if stats.state == CLOSED:
+                return True
+            if stats.state == HALF_OPEN and (not stats.probing or self.clock() >= stats.probe_deadline):
+                stats.probing = True
+                stats.probe_deadline = self.clock() + self.config["probe_timeout"]
+                return True
+
+            stats.counters["short_circuited"] += 1
+            return False
+
+    def record(self, source, latency, success):
+        """
+        Record the outcome of a request.
+
+        Args:
+            source (str): The source name
+            latency (float): Request duration in seconds
+            success (bool): Whether the request succeeded
+        """
+        with self._lock:
+            stats = self._stats(source)
+            stats.counters["requests"] += 1
+            stats.latencies.append(latency)
+
+            if len(stats.outcomes) == stats.outcomes.maxlen and not stats.outcomes[0]:
+                stats.errors_in_window -= 1
+            stats.outcomes.append(success)
+
+            if success:
+                stats.consecutive_failures = 0
+                if stats.state == HALF_OPEN:
+                    # The probe succeeded; forget the failures that tripped the breaker
+                    stats.state = CLOSED
+                    stats.probing = False
+                    stats.outcomes.clear()
+                    stats.errors_in_window = 0
+                return
+
+            stats.counters["errors"] += 1
+            stats.errors_in_window += 1
+            stats.consecutive_failures += 1
+
+            if stats.state == HALF_OPEN or self._should_trip(stats):
+                self._trip(stats)
+
+    def record_hedge(self, source, won):
+        """
+        Record that a hedged second attempt was sent.
+
+        Args:
+            source (str): The source name
+            won (bool): Whether the hedge answered before the first attempt
+        """
+        with self._lock:
+            stats = self._stats(source)
+            stats.counters["hedges"] += 1
+            if won:
+                stats.counters["hedge_wins"] += 1
+
+    def percentile(self, source, percent):
+        """
+        Get a latency percentile for a source.
+
+        Args:
+            source (str): The source name
+            percent (float): Percentile between 0 and 100
+
+        Returns:
+            float: Latency in seconds, or None if nothing was recorded
+        """
+        with self._lock:
+            latencies = sorted(self._stats(source).latencies)
+
+        if not latencies:
+            return None
+        rank = max(0, min(len(latencies) - 1, int(round(percent / 100 * len(latencies))) - 1))
+        return latencies[rank]
+
+    def hedge_delay(self, source):
+        """
+        Get the delay after which a hedged attempt should be sent.
+
+        Args:
+            source (str): The source name
+
+        Returns:
+            float: Delay in seconds, or None if the source isn't hedged or
+                hasn't enough history yet
+        """
+        if source not in self.config["hedge_sources"]:
+            return None
+
+        with self._lock:
+            if len(self._stats(source).latencies) < self.config["hedge_min_samples"]:
+                return None
+
+        return self.percentile(source, self.config["hedge_percentile"])
+
+    def state(self, source):
+        """Get the circuit breaker state of a source."""
+        with self._lock:
+            return self._stats(source).state
+
+    def reset(self, source=None):
+        """
+        Forget the health history of one source, or of every source.
+
+        Args:
+            source (str): The source to reset (default: all sources)
+        """
+        with self._lock:
+            if source is None:
+                self._sources.clear()
+            else:
+                self._sources.pop(source, None)
+
+    def get_stats(self):
+        """
+        Get health statistics.
+
+        Returns:
+            dict: Per-source breaker state, counters, error rate and latency percentiles
+        """
+        with self._lock:
+            sources = list(self._sources)
+
+        report = {}
+        for source in sources:
+            with self._lock:
+                stats = self._stats(source)
+                entry = dict(stats.counters)
+                entry["state"] = stats.state
+                entry["error_rate"] = stats.errors_in_window / len(stats.outcomes) if stats.outcomes else 0.0
+
+            for percent in (50, 95, 99):
+                entry[f"p{percent}"] = self.percentile(source, percent)
+            report[source] = entry
+
+        return report
+
+    def _stats(self, source):
+        """Get (creating if needed) the statistics for a source. Caller holds the lock."""
+        stats = self._sources.get(source)
+        if stats is None:
+            stats = self._sources[source] = SourceStats(self.config["window"])
+        return stats
+
+    def _should_trip(self, stats):
+        """Check whether recent failures warrant opening the breaker."""
+        if stats.state != CLOSED:
+            return False
+        if stats.consecutive_failures >= self.config["consecutive_failures"]:
+            return True
+        return (len(stats.outcomes) >= self.config["min_samples"]
+                and stats.errors_in_window / len(stats.outcomes) >= self.config["error_threshold"])
+
+    def _trip(self, stats):
+        """Open the breaker for one cool-down period."""
+        stats.state = OPEN
+        stats.probing = False
+        stats.opened_until = self.clock() + self.config["cooldown"]
+        stats.counters["trips"] += 1
@@ -1,28 +1,167 @@
 import os
 import json
 import time
+import asyncio
+import inspect
+import itertools
 import threading
 
+from core.history import History
+from core.task_executor import TaskExecutor, QueueFullError, PRIORITIES
+from core.task_handle import TaskHandle
+from core.cancellation import CancellationToken, TaskTimeoutError, Watchdog, accepts_token
+from core.task_registry import TaskRecord, TaskRegistry
+from core.task_journal import TaskJournal
+from core.command_coalescer import CommandCoalescer
+from core.device_dispatcher import DeviceDispatcher
+from core.async_runtime import AsyncRuntime
+from core.process_lane import ProcessLane
+from core.task_catalog import TaskCatalog, LazyFunction
+from core.task_metrics import TaskMetrics, TaskSpan
+from core.routine_engine import RoutineEngine
+from core.scheduler import Scheduler, CronSchedule
+
+LANES = ("thread", "async", "process")
+
 class TaskAutomation:
     """
     Task Automation module for Jarvis AI Assistant.
     Handles execution of predefined tasks and routines.
     """
     
-    def __init__(self):
-        """Initialize the task automation module."""
+    def __init__(self, history_path=None, executor_config=None, schedule_path=None, retention_config=None,
+                 journal_path=None, recover_tasks=False, process_config=None, catalog_path=None,
+                 catalog_cache_path=None, catalog_reload=2.0):
+        """
+        Initialize the task automation module.
+        
+        Args:
+            history_path (str): Optional log file that keeps the task history across restarts
+            executor_config (dict): Optional overrides for the task worker pool
+            schedule_path (str): Optional log file that keeps scheduled jobs across restarts
+            retention_config (dict): Optional overrides for how long finished tasks stay queryable
+            journal_path (str): Optional SQLite task journal; tasks interrupted by a
+                crash are found there on the next start
+            recover_tasks (bool): Re-run interrupted idempotent tasks, or run the
+                compensating task of interrupted tasks that have one
+            process_config (dict): Optional overrides for the process pool of CPU-bound tasks
+            catalog_path (str or list): Optional JSON/YAML catalog files (or
+                directories of them) defining more tasks and routines
+            catalog_cache_path (str): File for the compiled catalog (default:
+                catalog_path + ".cache" for a single path)
+            catalog_reload (float): Seconds between checks for edited catalog
+                files (None: only reload_catalog() reloads them)
+        """
         self.tasks = {}
         self.routines = {}
-        self.running_tasks = {}
-        self.task_history = []
+        
+        # Queued and running tasks, plus recently finished ones under a retention policy
+        self.running_tasks = TaskRegistry(retention_config)
+        
+        # Latency histograms and outcome counters per task, plus span hooks for tracers
+        self.metrics = TaskMetrics()
+        
+        # Task ID sequence; starts at the current time in milliseconds so IDs
+        # stay unique across restarts as well as within the same second
+        self._task_counter = itertools.count(int(time.time() * 1000))
+        
         self.max_history = 100
+        self.task_history = History(
+            self.max_history, history_path,
+            keys={"task": lambda entry: [entry["name"]]},
+            timings={"task": lambda entry: [(entry["name"], entry["duration"])] if "duration" in entry else []}
+        )
+        
+        # Tasks run on a bounded worker pool instead of a thread each
+        self.executor_config = {
+            "workers": 8,               # Maximum concurrent tasks
+            "queue_size": 1000,         # Tasks that may wait for a worker
+            "policy": "reject",         # When the queue is full: reject, block or drop_oldest
+            "block_timeout": 5,         # Longest a caller waits under the block policy (seconds)
+            "aging": 10,                # Seconds of waiting that raise a task by one priority class
+            "reserved": 1               # Workers kept free for interactive tasks
+        }
+        if executor_config:
+            self.executor_config.update(executor_config)
+        self.executor = TaskExecutor(on_drop=self._on_task_dropped, name="task", **self.executor_config)
+        self._closed = False
+        
+        # Async task functions run on one event loop instead of the worker pool
+        self.max_async_tasks = 10000
+        self.async_runtime = AsyncRuntime("task-async", self.max_async_tasks)
+        
+        # CPU-bound tasks run in worker processes, started when the first such task is added
+        self.process_config = {
+            "workers": min(4, os.cpu_count() or 1),  # Worker processes
+            "shm_threshold": 1 << 20,   # Bytes values at least this large go through shared memory
+            "start_method": "spawn"     # How worker processes are started
+        }
+        if process_config:
+            self.process_config.update(process_config)
+        self.process_lane = ProcessLane(name="task-process", **self.process_config)
         
-        # Load predefined tasks and routines if available
+        # Shares one execution between repeats of the same device command
+        self.coalesce_window = 1.0
+        self.coalescer = CommandCoalescer(self.coalesce_window)
+        
+        # Rate limits device calls per backend, and batches commands for
+        # backends that accept several per request
+        self.devices = DeviceDispatcher()
+        
+        # Enforces task and routine timeouts from a single thread
+        self.watchdog = Watchdog("task-watchdog")
+        
+        # Runs routine steps concurrently in dependency order
+        self.routine_engine = RoutineEngine(self)
+        
+        # Runs tasks and routines at set times; the timer thread is started
+        # once there is something to wait for
+        self.scheduler = Scheduler(self._run_scheduled_job, schedule_path)
+        
+        # Load predefined devices, tasks and routines if available
+        self._load_devices()
         self._load_tasks()
         self._load_routines()
         
+        # Tasks and routines defined in catalog files, reloaded when the files change
+        self.catalog = None
+        self._catalog_tasks = {}        # task name -> catalog definition it was installed from
+        self._catalog_routines = {}
+        self._shadowed = {"tasks": {}, "routines": {}}  # Definitions overridden by catalog entries
+        self._catalog_lock = threading.Lock()
+        self._catalog_stop = threading.Event()
+        if catalog_path:
+            if catalog_cache_path is None and isinstance(catalog_path, str):
+                catalog_cache_path = f"{catalog_path.rstrip(os.sep)}.cache"
+            self.catalog = TaskCatalog(catalog_path, catalog_cache_path)
+            self.reload_catalog()
+            if catalog_reload:
+                watcher = threading.Thread(target=self._watch_catalog, args=(catalog_reload,), name="task-catalog")
+                watcher.daemon = True
+                watcher.start()
+        
+        # Journal of task state changes, replayed to find out what a crash interrupted
+        self.journal = None
+        self.recovered_tasks = []
+        if journal_path:
+            self.journal = TaskJournal(journal_path)
+            self.recovered_tasks = self._replay_journal(recover_tasks, keep_history=history_path is None)
+        
+        if len(self.scheduler):
+            self.scheduler.start()
+        
         print("Task Automation module initialized")
     
+    def _load_devices(self):
+        """Register the device backends predefined tasks talk to."""
+        # Smart home hub: a few requests per second, each carrying any number of light commands
+        self.devices.add_backend("hub", rate=5, burst=10, batch_handler=self._simulate_hub_batch)
+        
+        # Music service API
+        self.devices.add_backend("music", rate=2, burst=5)
+        
+        print(f"Loaded {len(self.devices.backends)} device backends")
+    
     def _load_tasks(self):
         """Load predefined tasks from storage."""
         # This is a placeholder for loading tasks from a file
@@ -34,13 +173,21 @@ class TaskAutomation:
                 "name": "Turn on lights",
                 "description": "Turn on the lights in a specified room",
                 "parameters": ["room"],
-                "function": self._simulate_turn_on_lights
+                "function": self._simulate_turn_on_lights,
+                "device": "hub",
+                "idempotent": True,
+                "coalesce": True,
+                "opposite": "turn_off_lights"
             },
             "turn_off_lights": {
                 "name": "Turn off lights",
                 "description": "Turn off the lights in a specified room",
                 "parameters": ["room"],
-                "function": self._simulate_turn_off_lights
+                "function": self._simulate_turn_off_lights,
+                "device": "hub",
+                "idempotent": True,
+                "coalesce": True,
+                "opposite": "turn_on_lights"
             },
             "set_reminder": {
                 "name": "Set reminder",
@@ -48,22 +195,97 @@ class TaskAutomation:
                 "parameters": ["message", "time"],
                 "function": self._simulate_set_reminder
             },
+            "remind": {
+                "name": "Remind",
+                "description": "Deliver a reminder message",
+                "parameters": ["message"],
+                "function": self._simulate_remind
+            },
             "check_weather": {
                 "name": "Check weather",
                 "description": "Check the weather for a location",
                 "parameters": ["location"],
-                "function": self._simulate_check_weather
+                "function": self._simulate_check_weather,
+                "idempotent": True
             },
             "play_music": {
                 "name": "Play music",
                 "description": "Play music from a specified source",
                 "parameters": ["genre", "source"],
-                "function": self._simulate_play_music
+                "function": self._simulate_play_music,
+                "device": "music",
+                "coalesce": True
             }
         }
         
         print(f"Loaded {len(self.tasks)} predefined tasks")
     
+    def reload_catalog(self):
+        """
+        Pick up edits to the catalog files: new and changed definitions
+        are installed (their functions are imported when they first run)
+        and definitions removed from the files are dropped.
+        
+        Returns:
+            dict: Result of the reload, with whether anything "changed"
+        """
+        if self.catalog is None:
+            return {"success": False, "message": "No task catalog configured"}
+        
+        with self._catalog_lock:
+            changed = self.catalog.load()
+            if changed:
+                self._install_catalog()
+        
+        return {"success": True, "message": "Task catalog reloaded" if changed else "Task catalog unchanged",
+                "changed": changed, "tasks": len(self._catalog_tasks), "routines": len(self._catalog_routines)}
+    
+    def _install_catalog(self):
+        """Bring self.tasks and self.routines in line with the catalog. Caller holds the catalog lock."""
+        tasks = self.catalog.tasks()
+        installed = {}
+        for name, spec in tasks.items():
+            if self._catalog_tasks.get(name) is spec:
+                installed[name] = spec
+                continue
+            if spec["lane"] is not None and spec["lane"] not in LANES:
+                print(f"Error adding task '{name}': unknown lane '{spec['lane']}'")
+                continue
+            if name not in self._catalog_tasks and name in self.tasks:
+                self._shadowed["tasks"][name] = self.tasks[name]
+            self.tasks[name] = dict(spec, function=LazyFunction(spec["function"]))
+            installed[name] = spec
+        self._uninstall(self.tasks, "tasks", set(self._catalog_tasks) - set(installed))
+        self._catalog_tasks = installed
+        
+        routines = self.catalog.routines()
+        for name, spec in routines.items():
+            if self._catalog_routines.get(name) is not spec:
+                if name not in self._catalog_routines and name in self.routines:
+                    self._shadowed["routines"][name] = self.routines[name]
+                self.routines[name] = dict(spec)
+        self._uninstall(self.routines, "routines", set(self._catalog_routines) - set(routines))
+        self._catalog_routines = routines
+        
+        print(f"Loaded {len(installed)} catalog tasks and {len(routines)} catalog routines")
+    
+    def _uninstall(self, definitions, kind, names):
+        """Remove catalog entries, restoring the definitions they overrode."""
+        for name in names:
+            original = self._shadowed[kind].pop(name, None)
+            if original is not None:
+                definitions[name] = original
+            else:
+                definitions.pop(name, None)
+    
+    def _watch_catalog(self, interval):
+        """Reload the catalog whenever its files change, until close()."""
+        while not self._catalog_stop.wait(interval):
+            try:
+                self.reload_catalog()
+            except Exception as e:
+                print(f"Error reloading task catalog: {e}")
+    
     def _load_routines(self):
         """Load predefined routines from storage."""
         # This is a placeholder for loading routines from a file
@@ -77,7 +299,8 @@ class TaskAutomation:
                 "tasks": [
                     {"task": "turn_on_lights", "params": {"room": "bedroom"}},
                     {"task": "check_weather", "params": {"location": "current"}},
-                    {"task": "play_music", "params": {"genre": "upbeat", "source": "spotify"}}
+                    {"task": "play_music", "params": {"genre": "upbeat", "source": "spotify"},
+                     "depends_on": ["turn_on_lights", "check_weather"]}
                 ]
             },
             "evening": {
@@ -85,7 +308,8 @@ class TaskAutomation:
                 "description": "Tasks to run in the evening",
                 "tasks": [
                     {"task": "turn_on_lights", "params": {"room": "living room"}},
-                    {"task": "play_music", "params": {"genre": "relaxing", "source": "spotify"}}
+                    {"task": "play_music", "params": {"genre": "relaxing", "source": "spotify"},
+                     "depends_on": ["turn_on_lights"]}
                 ]
             },
             "bedtime": {
@@ -100,112 +324,562 @@ class TaskAutomation:
         
         print(f"Loaded {len(self.routines)} predefined routines")
     
-    def execute_task(self, task_name, params=None):
+    def execute_task(self, task_name, params=None, priority="normal", timeout=None):
         """
         Execute a specific task with the given parameters.
         
+        Task functions that take a "cancel_token" argument receive a
+        CancellationToken and should return early once it is cancelled.
+        
+        For device commands (tasks with "coalesce"), a repeat of a command
+        that is still in flight, or that succeeded within the last
+        coalesce_window seconds, returns the first command's task ID and
+        handle ("coalesced": True) instead of running again. A command also
+        cancels its "opposite" (e.g. lights off after lights on) for the
+        same parameters if that is still queued.
+        
+        Tasks run in their lane (see add_task). Async task functions run on
+        a dedicated event loop instead of taking a worker, so many I/O-bound
+        tasks can wait at once; cancelling one interrupts it at its next
+        await. Process-lane tasks run in worker processes and can't be
+        interrupted once started. Priority only orders the thread lane.
+        
+        Tasks with a "device" wait for that backend's rate limit before
+        running. If the backend takes batches, the command skips the worker
+        pool: it is sent along with the backend's other pending commands
+        (see DeviceDispatcher), and priority and timeout don't apply.
+        
         Args:
             task_name (str): The name of the task to execute
             params (dict): Parameters for the task
+            priority (str): "interactive" for commands a user is waiting on,
+                "normal", or "background" for work nobody is waiting for
+            timeout (float): Seconds the task may run before it is stopped
+                (default: the task's own timeout, if any)
             
         Returns:
-            dict: Result of the task execution
+            dict: Result of the task execution; when the task was queued,
+                "handle" holds a TaskHandle that resolves with its result
         """
         if params is None:
             params = {}
+        
+        if self._closed:
+            return {"success": False, "message": "Task automation has been closed"}
             
         if task_name not in self.tasks:
             return {"success": False, "message": f"Task '{task_name}' not found"}
         
         task = self.tasks[task_name]
         
+        # Priority only orders the thread lane, but every lane records it
+        if priority not in PRIORITIES:
+            return {"success": False, "message": f"Unknown task priority: {priority}"}
+        
         # Check if all required parameters are provided
         for param in task["parameters"]:
             if param not in params:
                 return {"success": False, "message": f"Missing required parameter: {param}"}
         
-        # Execute the task
+        # Catalog tasks import their function the first time they run
+        if isinstance(task["function"], LazyFunction):
+            try:
+                task["function"] = task["function"].resolve()
+            except (ImportError, AttributeError) as e:
+                return {"success": False, "message": f"Error loading task '{task_name}': {str(e)}"}
+        
+        # Queue the task for the worker pool
+        task_id = f"{task_name}_{next(self._task_counter)}"
+        handle = TaskHandle(task_id, task_name)
+        
+        if task.get("coalesce"):
+            shared = self.coalescer.claim(task_name, params, task_id, handle)
+            if shared is not None:
+                return {"success": True, "message": f"Task '{task_name}' already requested",
+                        "task_id": shared[0], "handle": shared[1], "coalesced": True}
+            if task.get("opposite"):
+                self._supersede(task["opposite"], params, task_name)
+        
+        record = TaskRecord(task_id, task_name, params, priority)
+        record.handle = handle
+        if self.metrics.hooks:
+            record.span = TaskSpan(task_id, task_name, priority, record.created)
+        if "cooperative" not in task:
+            task["cooperative"] = accepts_token(task["function"])
+        lane = task.get("lane")
+        if lane is None:
+            lane = task["lane"] = "async" if inspect.iscoroutinefunction(task["function"]) else "thread"
+        if task["cooperative"] and lane != "process":
+            record.token = CancellationToken()
+        if timeout is None:
+            timeout = task.get("timeout")
         try:
-            task_id = f"{task_name}_{int(time.time())}"
-            self.running_tasks[task_id] = {"name": task_name, "params": params, "status": "running"}
-            
-            # Start task in a separate thread
-            thread = threading.Thread(
-                target=self._execute_task_thread,
-                args=(task_id, task["function"], params)
-            )
-            thread.daemon = True
-            thread.start()
+            self.running_tasks.add(record)
+            self._journal(task_id, "enqueue", {"name": task_name, "params": params, "priority": priority})
+            device = task.get("device")
+            if device is not None and self.devices.is_batched(device):
+                self.devices.submit(device, handle, task_name, params, lambda: self._start_task(record),
+                                    lambda result, error, duration:
+                                        self._finish_task(handle, record, params, result, error, duration))
+            elif lane == "process":
+                self.process_lane.submit(handle, task["function"], params, lambda: self._start_task(record, timeout),
+                                         lambda result, error, duration:
+                                             self._finish_task(handle, record, params, result, error, duration))
+            elif lane == "async":
+                self.async_runtime.submit(handle, self._run_async_task(handle, record, task["function"], params,
+                                                                       timeout, device))
+            else:
+                self.executor.submit(handle, self._run_task, handle, record, task["function"], params, timeout,
+                                     device, priority=priority)
             
-            return {"success": True, "message": f"Task '{task_name}' started", "task_id": task_id}
+            return {"success": True, "message": f"Task '{task_name}' started", "task_id": task_id, "handle": handle}
+        except (QueueFullError, ValueError) as e:
+            self._reject_task(record, handle, str(e))
+            return {"success": False, "message": f"Task '{task_name}' rejected: {str(e)}"}
         except Exception as e:
+            self._reject_task(record, handle, str(e))
             return {"success": False, "message": f"Error executing task: {str(e)}"}
     
-    def _execute_task_thread(self, task_id, task_function, params):
-        """Execute a task in a separate thread."""
+    def _reject_task(self, record, handle, error):
+        """Undo the bookkeeping of a task that couldn't be queued."""
+        if self.running_tasks.remove(record.task_id):
+            self._journal(record.task_id, "fail", {"status": "rejected", "error": error})
+        self.metrics.count(record.name, "rejected")
+        handle.future.cancel()
+    
+    def _supersede(self, task_name, params, by):
+        """
+        Stop sharing an opposite command's result, and cancel it if it is
+        still queued, since the newer command makes it pointless.
+        """
+        task_id = self.coalescer.forget(task_name, params)
+        record = self.running_tasks.get(task_id) if task_id is not None else None
+        if record is not None and record.status == "queued":
+            if self._stop_task(record, "superseded", f"Superseded by {by}"):
+                self.coalescer.note_superseded()
+    
+    def _on_task_dropped(self, handle):
+        """Mark a queued task that was dropped to make room for newer ones."""
+        record = self.running_tasks.get(handle.task_id)
+        span = record.span if record is not None else None
+        if record is not None and self.running_tasks.finish(record, "dropped", error="Dropped from a full task queue"):
+            self._journal(record.task_id, "fail", {"status": "dropped", "error": record.error})
+            self._observe_finish(record, span)
+        handle.future.cancel()
+    
+    def _run_task(self, handle, record, task_function, params, timeout, device=None):
+        """Execute a task on a worker thread, resolving its handle."""
+        token = record.token
+        if not self._start_task(record, timeout):
+            return
+        
+        kwargs = dict(params, cancel_token=token) if token is not None else params
         try:
-            result = task_function(**params)
-            self.running_tasks[task_id]["status"] = "completed"
-            self.running_tasks[task_id]["result"] = result
+            if device is not None:
+                self.devices.throttle(device)
+            start = time.perf_counter()
+            result = task_function(**kwargs)
+            duration = time.perf_counter() - start
+        except Exception as e:
+            self._finish_task(handle, record, params, error=e)
+            return
+        
+        self._finish_task(handle, record, params, result, duration=duration)
+    
+    async def _run_async_task(self, handle, record, task_function, params, timeout, device=None):
+        """Execute an async task on the event loop, resolving its handle."""
+        token = record.token
+        if not self._start_task(record, timeout):
+            return
+        
+        kwargs = dict(params, cancel_token=token) if token is not None else params
+        try:
+            if device is not None:
+                await asyncio.sleep(self.devices.throttle(device, wait=False))
+            start = time.perf_counter()
+            result = await task_function(**kwargs)
+            duration = time.perf_counter() - start
+        except asyncio.CancelledError:
+            # Stopped by cancel() or its timeout, which resolve the handle, or
+            # cut off by close(); then it stays "running" in the journal, so a
+            # restart sees it as interrupted
+            if self._closed:
+                handle.future.cancel()
+            raise
+        except Exception as e:
+            self._finish_task(handle, record, params, error=e)
+            return
+        
+        self._finish_task(handle, record, params, result, duration=duration)
+    
+    def _start_task(self, record, timeout=None):
+        """
+        Mark a task as running and start its timeout.
+        
+        Returns:
+            bool: False if the task was stopped before it started
+        """
+        if not self.running_tasks.start(record):
+            return False
+        record.started = time.time()
+        self._journal(record.task_id, "start")
+        self.metrics.record(record.name, "wait", record.started - record.created)
+        span = record.span
+        if span is not None:
+            span.started = record.started
+            span.status = "running"
+            self.metrics.emit("start", span)
+        if timeout:
+            record.timer = self.watchdog.call_later(
+                timeout, lambda: self._stop_task(record, "timed_out", f"Timed out after {timeout} seconds"))
+        return True
+    
+    def _finish_task(self, handle, record, params, result=None, error=None, duration=None):
+        """Record a task's result or error and resolve its handle."""
+        Watchdog.cancel(record.timer)
+        span = record.span
+        if error is not None:
+            if self.running_tasks.finish(record, "failed", error=str(error)):
+                self._journal(record.task_id, "fail", {"status": "failed", "error": str(error)})
+                self._observe_finish(record, span, duration)
+                handle.future.set_exception(error)
+            return
+        
+        if not self.running_tasks.finish(record, "completed", result=result):
+            # Stopped by cancel() or its timeout; the handle is already resolved
+            return
+        self._journal(record.task_id, "finish", {"result": result, "duration": duration})
+        self._observe_finish(record, span, duration)
+        
+        # Add to history
+        self.task_history.append({
+            "task_id": record.task_id,
+            "name": record.name,
+            "params": params,
+            "result": result,
+            "duration": duration,
+            "wait": record.started - record.created if record.started is not None else None,
+            "timestamp": time.time()
+        })
+        
+        handle.future.set_result(result)
+    
+    def _observe_finish(self, record, span, duration=None):
+        """Record a finished task's outcome and latencies, and end its span."""
+        now = time.time()
+        self.metrics.count(record.name, record.status)
+        self.metrics.record(record.name, "total", now - record.created)
+        if duration is None and record.started is not None:
+            duration = now - record.started
+        if duration is not None:
+            self.metrics.record(record.name, "run", duration)
+        
+        if span is not None:
+            span.finished = now
+            span.status = record.status
+            span.error = record.error
+            self.metrics.emit("end", span)
+    
+    def cancel(self, task_id, reason="Cancelled"):
+        """
+        Cancel a queued or running task, or a running routine.
+        
+        A queued task is removed from the queue. A running task's
+        cancellation token is set and its worker slot is freed right away;
+        a task that doesn't take a token can't be interrupted, so its thread
+        is left to finish on its own and the task is marked "abandoned".
+        Async tasks are interrupted at their next await; running
+        process-lane tasks are abandoned like threads.
+        
+        Args:
+            task_id (str): The task ID, or a routine ID from execute_routine
+            reason (str): Why the task is cancelled
+            
+        Returns:
+            dict: Result of the cancellation, with the task's final "status"
+        """
+        if self.routine_engine.cancel(task_id, reason):
+            return {"success": True, "message": f"Routine '{task_id}' cancelled", "status": "cancelled"}
+        
+        record = self.running_tasks.get(task_id)
+        if record is None:
+            return {"success": False, "message": f"Task ID '{task_id}' not found"}
+        
+        if not self._stop_task(record, "cancelled", reason):
+            return {"success": False, "message": f"Task '{task_id}' already {record.status}", "status": record.status}
+        
+        return {"success": True, "message": f"Task '{task_id}' {record.status}", "status": record.status}
+    
+    def _stop_task(self, record, status, reason):
+        """
+        Stop a queued or running task and resolve its handle.
+        
+        Args:
+            record (TaskRecord): The task
+            status (str): "cancelled", "superseded" or "timed_out"
+            reason (str): Why the task is stopped
             
-            # Add to history
-            self.task_history.append({
-                "task_id": task_id,
-                "name": self.running_tasks[task_id]["name"],
-                "params": params,
-                "result": result,
-                "timestamp": time.time()
-            })
+        Returns:
+            bool: False if the task had already finished
+        """
+        handle, token, timer, span = record.handle, record.token, record.timer, record.span
+        if handle is None:
+            return False
+        
+        if token is not None:
+            token.cancel(reason)
+        
+        if (self.executor.discard(handle) or self.devices.discard(handle) or self.async_runtime.cancel(handle)
+                or self.process_lane.discard(handle)):
+            final_status = status
+        elif self.executor.abandon(handle) or self.process_lane.abandon(handle):
+            final_status = status if token is not None else "abandoned"
+        else:
+            # It finished (or was dropped) in the meantime
+            return False
+        
+        Watchdog.cancel(timer)
+        if not self.running_tasks.finish(record, final_status, error=reason):
+            return False
+        self._journal(record.task_id, "fail", {"status": final_status, "error": reason})
+        self._observe_finish(record, span)
+        
+        if status == "timed_out":
+            handle.future.set_exception(TaskTimeoutError(reason))
+        else:
+            handle.future.cancel()
+        return True
+    
+    def _journal(self, task_id, event, data=None):
+        """Record a task state change in the journal, if there is one."""
+        if self.journal is not None:
+            self.journal.record(task_id, event, data)
+    
+    def _replay_journal(self, recover, keep_history):
+        """
+        Rebuild task state from the journal after a restart.
+        
+        Finished tasks become queryable again through get_task_status().
+        Tasks that were queued or running when the process stopped are
+        marked "interrupted"; with recover, idempotent ones are run again
+        and others run their compensating task, if they name one.
+        
+        Args:
+            recover (bool): Re-run or compensate interrupted tasks
+            keep_history (bool): Also rebuild the task history from the journal
             
-            # Trim history if needed
-            if len(self.task_history) > self.max_history:
-                self.task_history = self.task_history[-self.max_history:]
-                
-        except Exception as e:
-            self.running_tasks[task_id]["status"] = "failed"
-            self.running_tasks[task_id]["error"] = str(e)
+        Returns:
+            list: One entry per interrupted task, with the recovery "action"
+                ("rerun", "compensated", "unrecoverable" when its parameters
+                weren't journaled in full, or "none") and the new "recovery_task_id"
+        """
+        interrupted = []
+        
+        for state in self.journal.replay().values():
+            if state["name"] is None:
+                continue
+            record = TaskRecord(state["task_id"], state["name"], state["params"], state["priority"], state["created"])
+            
+            if state["status"] not in ("queued", "running"):
+                self.running_tasks.restore(record, state["status"], state["result"], state["error"], state["finished"])
+                if keep_history and state["status"] == "completed":
+                    self.task_history.append({
+                        "task_id": state["task_id"],
+                        "name": state["name"],
+                        "params": state["params"],
+                        "result": state["result"],
+                        "duration": state["duration"] or 0.0,
+                        "timestamp": state["finished"]
+                    })
+                continue
+            
+            error = f"Interrupted while {state['status']}"
+            self.running_tasks.restore(record, "interrupted", error=error)
+            self._journal(state["task_id"], "fail", {"status": "interrupted", "error": error})
+            
+            entry = {"task_id": state["task_id"], "name": state["name"], "params": state["params"],
+                     "status": state["status"], "action": "none", "recovery_task_id": None}
+            task = self.tasks.get(state["name"])
+            if recover and task is not None and not TaskJournal.is_complete(state["params"]):
+                # Parameters that couldn't be journaled (e.g. bytes) can't be replayed
+                entry["action"] = "unrecoverable"
+            elif recover and task is not None:
+                if task.get("idempotent"):
+                    result = self.execute_task(state["name"], state["params"], state["priority"])
+                    entry["action"] = "rerun"
+                elif task.get("compensate"):
+                    result = self.execute_task(task["compensate"], state["params"], state["priority"])
+                    entry["action"] = "compensated"
+                else:
+                    result = {}
+                entry["recovery_task_id"] = result.get("task_id")
+            interrupted.append(entry)
+        
+        if interrupted:
+            print(f"Found {len(interrupted)} interrupted tasks in the task journal")
+        return interrupted
     
-    def execute_routine(self, routine_name):
+    def execute_routine(self, routine_name, wait=True, timeout=None, priority="normal"):
         """
         Execute a predefined routine.
         
+        Steps run concurrently unless they declare dependencies with
+        "depends_on" (see RoutineEngine).
+        
         Args:
             routine_name (str): The name of the routine to execute
+            wait (bool): Wait for the routine to finish and report its outcome
+            timeout (float): Maximum seconds to wait (None: no limit)
+            priority (str): Priority of steps that don't set their own "priority"
             
         Returns:
-            dict: Result of the routine execution
+            dict: Result of the routine execution; when waiting, the per-step
+                outcomes under "results" plus the routine and critical-path
+                durations; otherwise a "handle" that resolves with that report
         """
         if routine_name not in self.routines:
             return {"success": False, "message": f"Routine '{routine_name}' not found"}
         
         routine = self.routines[routine_name]
-        results = []
         
-        for task_info in routine["tasks"]:
-            task_name = task_info["task"]
-            params = task_info["params"]
+        try:
+            handle = self.routine_engine.start(routine_name, routine["tasks"], priority, routine.get("timeout"))
+        except ValueError as e:
+            return {"success": False, "message": f"Invalid routine '{routine_name}': {str(e)}"}
+        
+        if not wait:
+            return {
+                "success": True,
+                "message": f"Routine '{routine_name}' started",
+                "routine_id": handle.task_id,
+                "handle": handle
+            }
+        
+        if not handle.wait(timeout):
+            return {
+                "success": False,
+                "message": f"Routine '{routine_name}' still running after {timeout} seconds",
+                "routine_id": handle.task_id,
+                "handle": handle
+            }
+        
+        return handle.result()
+    
+    def schedule_task(self, task_name, params=None, at=None, every=None, cron=None, job_id=None):
+        """
+        Run a task at a set time or on a recurring schedule.
+        
+        Args:
+            task_name (str): The name of the task to run
+            params (dict): Parameters for the task
+            at (float): Run once at this timestamp
+            every (float): Run repeatedly, this many seconds apart
+            cron (str): Run at the times matching this cron expression,
+                e.g. "0 8 * * 1-5" for 08:00 on weekdays
+            job_id (str): Optional ID; replaces an existing job with the same ID
+            
+        Returns:
+            dict: Result of scheduling, with the "job_id" and "next_run" timestamp
+        """
+        if task_name not in self.tasks:
+            return {"success": False, "message": f"Task '{task_name}' not found"}
+        
+        params = params or {}
+        for param in self.tasks[task_name]["parameters"]:
+            if param not in params:
+                return {"success": False, "message": f"Missing required parameter: {param}"}
+        
+        return self._schedule("task", task_name, params, at, every, cron, job_id)
+    
+    def schedule_routine(self, routine_name, at=None, every=None, cron=None, job_id=None):
+        """
+        Run a routine at a set time or on a recurring schedule.
+        
+        Args:
+            routine_name (str): The name of the routine to run
+            at (float): Run once at this timestamp
+            every (float): Run repeatedly, this many seconds apart
+            cron (str): Run at the times matching this cron expression
+            job_id (str): Optional ID; replaces an existing job with the same ID
             
-            result = self.execute_task(task_name, params)
-            results.append(result)
+        Returns:
+            dict: Result of scheduling, with the "job_id" and "next_run" timestamp
+        """
+        if routine_name not in self.routines:
+            return {"success": False, "message": f"Routine '{routine_name}' not found"}
         
+        return self._schedule("routine", routine_name, None, at, every, cron, job_id)
+    
+    def _schedule(self, kind, target, params, at, every, cron, job_id):
+        """Add a scheduler job and make sure the timer thread is running."""
+        try:
+            job = self.scheduler.schedule(kind, target, params, at=at, every=every, cron=cron, job_id=job_id)
+        except ValueError as e:
+            return {"success": False, "message": f"Invalid schedule: {str(e)}"}
+        
+        self.scheduler.start()
         return {
             "success": True,
-            "message": f"Routine '{routine_name}' executed",
-            "results": results
+            "message": f"Scheduled {kind} '{target}'",
+            "job_id": job["id"],
+            "next_run": job["due"]
         }
     
+    def cancel_scheduled(self, job_id):
+        """
+        Cancel a scheduled task or routine.
+        
+        Args:
+            job_id (str): The job ID returned when it was scheduled
+            
+        Returns:
+            dict: Result of the cancellation
+        """
+        if self.scheduler.cancel(job_id):
+            return {"success": True, "message": f"Cancelled scheduled job '{job_id}'"}
+        
+        return {"success": False, "message": f"Scheduled job '{job_id}' not found"}
+    
+    def get_scheduled_jobs(self, limit=10):
+        """
+        Get the next scheduled jobs.
+        
+        Args:
+            limit (int): Maximum number of jobs to return
+            
+        Returns:
+            list: Jobs, earliest first, each with its "id", "kind", "target" and "due" time
+        """
+        return self.scheduler.jobs(limit)
+    
+    def _run_scheduled_job(self, job):
+        """
+        Start a job that came due; called on the scheduler's timer thread.
+        Nobody is waiting on a timed job, so it runs as background work.
+        """
+        if job["kind"] == "routine":
+            result = self.execute_routine(job["target"], wait=False, priority="background")
+        else:
+            result = self.execute_task(job["target"], job["params"], priority="background")
+        
+        if not result.get("success", False):
+            print(f"Scheduled job {job['id']} failed to start: {result.get('message')}")
+    
     def get_task_status(self, task_id):
         """
         Get the status of a running or completed task.
         
+        Finished tasks are only kept for a while (see TaskRegistry).
+        
         Args:
             task_id (str): The ID of the task
             
         Returns:
             dict: Status of the task
         """
-        if task_id in self.running_tasks:
-            return self.running_tasks[task_id]
+        record = self.running_tasks.get(task_id)
+        if record is not None:
+            return record.to_dict()
         
         return {"success": False, "message": f"Task ID '{task_id}' not found"}
     
@@ -219,9 +893,123 @@ class TaskAutomation:
         Returns:
             list: List of task history items
         """
-        return self.task_history[-limit:]
+        return self.task_history.recent(limit)
+    
+    def close(self, timeout=5):
+        """
+        Shut down: new tasks are refused, queued and running tasks get up to
+        timeout seconds to finish (async tasks still running then are
+        cancelled), and the scheduler, catalog watcher, worker threads, event
+        loop, watchdog and worker processes are stopped. The task journal
+        and history are flushed and closed.
+        
+        Args:
+            timeout (float): Seconds to wait for outstanding tasks
+        """
+        self._closed = True
+        self._catalog_stop.set()
+        self.scheduler.close()
+        deadline = time.monotonic() + timeout
+        self.executor.shutdown(timeout=timeout)
+        self.async_runtime.shutdown(max(0, deadline - time.monotonic()))
+        self.process_lane.shutdown()
+        self.watchdog.close()
+        if self.journal is not None:
+            self.journal.close()
+        self.task_history.close()
+    
+    def get_coalescing_stats(self):
+        """
+        Get device command coalescing metrics.
+        
+        Returns:
+            dict: Commands run, repeats that shared a result and commands superseded
+        """
+        return self.coalescer.get_stats()
     
-    def add_task(self, task_name, description, parameters, function):
+    def get_device_stats(self):
+        """
+        Get device backend metrics.
+        
+        Returns:
+            dict: Per backend, device calls made, commands sent, commands
+                per call and time spent waiting for the rate limit
+        """
+        return self.devices.get_stats()
+    
+    def get_catalog_stats(self):
+        """
+        Get task catalog metrics.
+        
+        Returns:
+            dict: Catalog files, tasks and routines loaded, and how many
+                files were parsed or taken from the compiled cache
+        """
+        return self.catalog.get_stats() if self.catalog is not None else {}
+    
+    def get_task_metrics(self, task_name=None):
+        """
+        Get per-task latency and outcome metrics.
+        
+        Args:
+            task_name (str): Only this task (default: every task that ran)
+            
+        Returns:
+            dict: task name -> "outcomes" (counts by final status: completed,
+                failed, timed_out, cancelled, rejected...) and latency
+                summaries (count, mean, p50, p90, p99, p999, max in seconds)
+                for "wait" (queued until started), "run" and "total"
+        """
+        return self.metrics.get_stats(task_name)
+    
+    def add_span_hook(self, hook):
+        """
+        Register a span hook for an external tracer.
+        
+        Args:
+            hook (callable): Called with ("start", span) when a task starts
+                running and ("end", span) when it finishes, where span is a
+                TaskSpan; it can keep its own span object in span.context
+        """
+        self.metrics.add_hook(hook)
+    
+    def remove_span_hook(self, hook):
+        """Unregister a span hook."""
+        self.metrics.remove_hook(hook)
+    
+    def get_executor_stats(self):
+        """
+        Get task worker pool metrics.
+        
+        Returns:
+            dict: Queue depth, worker utilization and task counters, with the
+                event loop's counters for async tasks under "async" and the
+                process pool's under "process"
+        """
+        stats = self.executor.get_stats()
+        stats["async"] = self.async_runtime.get_stats()
+        stats["process"] = self.process_lane.get_stats()
+        return stats
+    
+    def get_task_analytics(self, top=10, hours=24):
+        """
+        Get aggregate statistics over all executed tasks.
+        
+        Args:
+            top (int): Number of most frequent tasks to report
+            hours (int): Number of hours of task counts to report
+            
+        Returns:
+            dict: Most frequent tasks, per-task duration and tasks per hour
+        """
+        return {
+            "top_tasks": self.task_history.top("task", top),
+            "task_duration": self.task_history.latency("task"),
+            "tasks_per_hour": self.task_history.per_hour(hours)
+        }
+    
+    def add_task(self, task_name, description, parameters, function, timeout=None,
+                 idempotent=False, compensate=None, coalesce=False, opposite=None, device=None, lane=None):
         """
         Add a new task to the system.
         
@@ -229,7 +1017,21 @@ class TaskAutomation:
             task_name (str): The name of the task
             description (str): Description of the task
             parameters (list): List of required parameters
-            function (callable): The function to execute
+            function (callable): The function to execute, sync or async; may
+                take a "cancel_token" argument to support cooperative cancellation
+            timeout (float): Default seconds the task may run
+            idempotent (bool): Whether running the task twice is harmless, so
+                it can be re-run after a crash interrupted it
+            compensate (str): Task that undoes this one, run with the same
+                parameters after a crash interrupted it
+            coalesce (bool): Whether repeats of the same command share one execution
+            opposite (str): Task whose queued commands this one supersedes
+            device (str): Device backend (see add_device) whose rate limit
+                and batching the task's commands go through
+            lane (str): Where the task runs: "thread" (the worker pool),
+                "async" (the event loop, for async functions) or "process"
+                (worker processes, for CPU-bound module-level functions);
+                default: "async" for async functions, otherwise "thread"
             
         Returns:
             bool: True if task was added successfully
@@ -237,23 +1039,67 @@ class TaskAutomation:
         if task_name in self.tasks:
             return False
         
+        if lane is not None:
+            if lane not in LANES:
+                print(f"Error adding task '{task_name}': unknown lane '{lane}'")
+                return False
+            if (lane == "async") != inspect.iscoroutinefunction(function):
+                print(f"Error adding task '{task_name}': async functions run in the async lane, and only they do")
+                return False
+            if lane == "process":
+                self.process_lane.start()
+        
         self.tasks[task_name] = {
             "name": task_name,
             "description": description,
             "parameters": parameters,
-            "function": function
+            "function": function,
+            "timeout": timeout,
+            "idempotent": idempotent,
+            "compensate": compensate,
+            "coalesce": coalesce,
+            "opposite": opposite,
+            "device": device,
+            "lane": lane
         }
         
         return True
     
-    def add_routine(self, routine_name, description, tasks):
+    def add_device(self, name, rate=None, burst=None, batch_handler=None, batch_window=0.05, max_batch=50):
+        """
+        Add a device backend (a device or hub API) that tasks can name.
+        
+        Args:
+            name (str): The backend name
+            rate (float): Calls per second the backend accepts (None: unlimited)
+            burst (float): Calls allowed in a burst (default: one second's worth)
+            batch_handler (callable): Sends several commands in one call; it
+                gets a list of {"task", "params"} dicts and returns one
+                result per command, in order
+            batch_window (float): Seconds to collect commands before sending a batch
+            max_batch (int): Most commands sent in one batch
+            
+        Returns:
+            bool: True if the backend was added successfully
+        """
+        if name in self.devices.backends:
+            return False
+        
+        self.devices.add_backend(name, rate, burst, batch_handler, batch_window, max_batch)
+        return True
+    
+    def add_routine(self, routine_name, description, tasks, timeout=None):
         """
         Add a new routine to the system.
         
         Args:
             routine_name (str): The name of the routine
             description (str): Description of the routine
-            tasks (list): List of tasks to execute
+            tasks (list): List of steps, each with "task" and "params" and
+                optionally "id", "depends_on" (step ids), "on_failure"
+                ("skip", "abort" or "continue"), "priority" and "timeout"
+            timeout (float): Seconds after which the routine's remaining
+                steps are cancelled
             
         Returns:
             bool: True if routine was added successfully
@@ -261,10 +1107,17 @@ class TaskAutomation:
         if routine_name in self.routines:
             return False
         
+        try:
+            RoutineEngine.plan(tasks)
+        except ValueError as e:
+            print(f"Error adding routine '{routine_name}': {e}")
+            return False
+        
         self.routines[routine_name] = {
             "name": routine_name,
             "description": description,
-            "tasks": tasks
+            "tasks": tasks,
+            "timeout": timeout
         }
         
         return True
@@ -280,14 +1133,33 @@ class TaskAutomation:
         time.sleep(1)  # Simulate task execution time
         return {"success": True, "message": f"Turned off lights in {room}"}
     
-    def _simulate_set_reminder(self, message, time):
-        """Simulate setting a reminder."""
+    def _simulate_hub_batch(self, commands):
+        """Simulate sending several light commands to the hub in one request."""
         time.sleep(1)  # Simulate task execution time
-        return {"success": True, "message": f"Set reminder '{message}' for {time}"}
+        state = {"turn_on_lights": "on", "turn_off_lights": "off"}
+        return [{"success": True, "message": f"Turned {state[command['task']]} lights in {command['params']['room']}"}
+                for command in commands]
     
-    def _simulate_check_weather(self, location):
+    def _simulate_set_reminder(self, message, time):
+        """Set a reminder for the next occurrence of a time of day ("HH:MM")."""
+        try:
+            hour, minute = (int(part) for part in time.split(":"))
+            due = CronSchedule(f"{minute} {hour} * * *").next_after(self.scheduler.clock())
+        except ValueError:
+            return {"success": False, "message": f"Invalid reminder time: {time}"}
+        
+        job = self.scheduler.schedule("task", "remind", {"message": message}, at=due)
+        self.scheduler.start()
+        return {"success": True, "message": f"Set reminder '{message}' for {time}", "job_id": job["id"], "due": due}
+    
+    def _simulate_remind(self, message):
+        """Simulate delivering a reminder."""
+        print(f"Reminder: {message}")
+        return {"success": True, "message": f"Reminder: {message}"}
+    
+    async def _simulate_check_weather(self, location):
         """Simulate checking the weather."""
-        time.sleep(2)  # Simulate task execution time
+        await asyncio.sleep(2)  # Simulate task execution time
         weather_conditions = ["sunny", "cloudy", "rainy", "snowy"]
         temperatures = [f"{temp}°F" for temp in range(32, 95, 5)]
         
@@ -303,9 +1175,9 @@ class TaskAutomation:
             "message": f"Weather in {location}: {condition}, {temperature}"
         }
     
-    def _simulate_play_music(self, genre, source):
+    async def _simulate_play_music(self, genre, source):
         """Simulate playing music."""
-        time.sleep(1)  # Simulate task execution time
+        await asyncio.sleep(1)  # Simulate task execution time
         return {"success": True, "message": f"Playing {genre} music from {source}"}
 
 
@@ -0,0 +1,319 @@
+import os
+import json
+import pickle
+import importlib
+import threading
+
+from core.routine_engine import RoutineEngine
+
+try:
+    import yaml
+except ImportError:  # YAML catalogs are only available with PyYAML
+    yaml = None
+
+CATALOG_VERSION = 1
+CATALOG_EXTENSIONS = (".json", ".yaml", ".yml")
+
+# Task settings a catalog may give, with their defaults
+TASK_FIELDS = {
+    "description": "",
+    "parameters": [],
+    "timeout": None,
+    "idempotent": False,
+    "compensate": None,
+    "coalesce": False,
+    "opposite": None,
+    "device": None,
+    "lane": None
+}
+
+class LazyFunction:
+    """
+    Task function named by a "module:function" reference, imported the
+    first time the task runs instead of when the catalog is loaded.
+    """
+
+    __slots__ = ("ref", "_function")
+
+    def __init__(self, ref):
+        """
+        Args:
+            ref (str): "package.module:function" (the function part may be dotted, e.g. "Class.method")
+
+        Raises:
+            ValueError: If the reference isn't in module:function form
+        """
+        module, _, attribute = ref.partition(":")
+        if not module or not attribute:
+            raise ValueError(f"Function reference must be 'module:function': {ref}")
+        self.ref = ref
+        self._function = None
+
+    def __repr__(self):
+        return f"<LazyFunction {self.ref}{'' if self._function is None else ' (loaded)'}>"
+
+    def resolve(self):
+        """
+        Import the function.
+
+        Returns:
+            callable: The function
+
+        Raises:
+            ImportError: If the module can't be imported
+            AttributeError: If it has no such function
+        """
+        if self._function is None:
+            module, _, attribute = self.ref.partition(":")
+            function = importlib.import_module(module)
+            for name in attribute.split("."):
+                function = getattr(function, name)
+            if not callable(function):
+                raise AttributeError(f"{self.ref} is not callable")
+            self._function = function
+        return self._function
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+class TaskCatalog:
+    """
+    Declarative task and routine definitions for Jarvis AI Assistant.
+    Reads JSON (or, with PyYAML, YAML) files holding "tasks" and
+    "routines" maps, where each task names its function as
+    "module:function". Files are validated once into a compiled form
+    that is cached on disk keyed by each file's mtime and size, so a
+    restart only parses files that changed. load() can be called again at
+    any time to pick up edits; later files override earlier ones.
+    """
+
+    def __init__(self, paths, cache_path=None):
+        """
+        Initialize the catalog; nothing is read until load().
+
+        Args:
+            paths (str or list): Catalog files, or directories of them
+            cache_path (str): Optional file for the compiled catalog
+        """
+        self.paths = [paths] if isinstance(paths, str) else list(paths)
+        self.cache_path = cache_path
+
+        self._files = {}                # path -> {"mtime", "size", "tasks", "routines"}
+        self._cached = {}               # compiled files read from cache_path, not yet checked
+        self._broken = {}               # path -> (mtime, size) of a version that failed to load
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "loads": 0,
+            "parsed": 0,
+            "from_cache": 0,
+            "errors": 0
+        }
+
+        if cache_path:
+            self._load_cache()
+
+    def files(self):
+        """
+        List the catalog files, in load order.
+
+        Returns:
+            list: Paths of catalog files that exist
+        """
+        found = []
+        for path in self.paths:
+            if os.path.isdir(path):
+                found.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                             if name.endswith(CATALOG_EXTENSIONS) and not name.startswith("."))
+            elif os.path.exists(path):
+                found.append(path)
+        return found
+
+    def load(self):
+        """
+        Bring the catalog up to date with its files. A file that fails to
+        load keeps its previous definitions, and isn't retried until it changes.
+
+        Returns:
+            bool: True if any file was added, changed or removed
+        """
+        with self._lock:
+            self.stats["loads"] += 1
+            files = {}
+            compiled = False
+
+            for path in self.files():
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+
+                known = self._files.get(path)
+                if known and known["mtime"] == stat.st_mtime and known["size"] == stat.st_size:
+                    files[path] = known
+                    continue
+
+                if self._broken.get(path) == (stat.st_mtime, stat.st_size):
+                    if known:
+                        files[path] = known
+                    continue
+
+                cached = self._cached.pop(path, None)
+                if cached and cached["mtime"] == stat.st_mtime and cached["size"] == stat.st_size:
+                    files[path] = cached
+                    self.stats["from_cache"] += 1
+                    continue
+
+                try:
+                    tasks, routines = self._compile(self._read(path))
+                except (OSError, ValueError, TypeError) as e:
+                    print(f"Error loading task catalog {path}: {e}")
+                    self.stats["errors"] += 1
+                    self._broken[path] = (stat.st_mtime, stat.st_size)
+                    if known:
+                        files[path] = known
+                    continue
+
+                files[path] = {"mtime": stat.st_mtime, "size": stat.st_size, "tasks": tasks, "routines": routines}
+                self.stats["parsed"] += 1
+                compiled = True
+
+            removed = set(self._files) - set(files)
+            changed = list(files) != list(self._files) or any(files[path] is not self._files[path] for path in files)
+            self._files = files
+            self._cached.clear()
+
+            if (compiled or removed) and self.cache_path:
+                self._save_cache()
+            return changed
+
+    def tasks(self):
+        """
+        Get the compiled task definitions.
+
+        Returns:
+            dict: task name -> definition with "function" as a "module:function"
+                string; a definition object only changes when its file does
+        """
+        with self._lock:
+            merged = {}
+            for entry in self._files.values():
+                merged.update(entry["tasks"])
+            return merged
+
+    def routines(self):
+        """
+        Get the compiled routine definitions.
+
+        Returns:
+            dict: routine name -> {"name", "description", "tasks", "timeout"}
+        """
+        with self._lock:
+            merged = {}
+            for entry in self._files.values():
+                merged.update(entry["routines"])
+            return merged
+
+    def get_stats(self):
+        """
+        Get catalog metrics.
+
+        Returns:
+            dict: Files loaded, tasks and routines defined, and load counters
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["files"] = len(self._files)
+            stats["tasks"] = sum(len(entry["tasks"]) for entry in self._files.values())
+            stats["routines"] = sum(len(entry["routines"]) for entry in self._files.values())
+            return stats
+
+    def _read(self, path):
+        """Parse a catalog file."""
+        with open(path, "r", encoding="utf-8") as f:
+            if path.endswith(".json"):
+                return json.load(f)
+            if yaml is None:
+                raise ValueError("YAML catalogs need PyYAML")
+            try:
+                return yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+            except yaml.YAMLError as e:
+                raise ValueError(str(e))
+
+    @staticmethod
+    def _compile(data):
+        """
+        Validate a parsed catalog file.
+
+        Returns:
+            tuple: (task name -> definition, routine name -> definition)
+
+        Raises:
+            ValueError: If a definition is malformed
+        """
+        if data is None:
+            data = {}
+        if not isinstance(data, dict):
+            raise ValueError("A catalog must be a mapping with 'tasks' and 'routines'")
+
+        for section in ("tasks", "routines"):
+            if not isinstance(data.get(section) or {}, dict):
+                raise ValueError(f"'{section}' must be a mapping of names to definitions")
+
+        tasks = {}
+        for name, spec in (data.get("tasks") or {}).items():
+            if not isinstance(spec, dict) or not isinstance(spec.get("function"), str):
+                raise ValueError(f"Task '{name}' needs a 'function' reference")
+            LazyFunction(spec["function"])
+            if not isinstance(spec.get("parameters", []), list):
+                raise ValueError(f"Task '{name}' parameters must be a list")
+
+            task = {"name": spec.get("name", name), "function": spec["function"]}
+            for field, default in TASK_FIELDS.items():
+                task[field] = spec.get(field, default)
+            task["parameters"] = list(task["parameters"])
+            tasks[name] = task
+
+        routines = {}
+        for name, spec in (data.get("routines") or {}).items():
+            if not isinstance(spec, dict) or not isinstance(spec.get("tasks"), list):
+                raise ValueError(f"Routine '{name}' needs a list of 'tasks'")
+            if not all(isinstance(step, dict) for step in spec["tasks"]):
+                raise ValueError(f"Routine '{name}' steps must be mappings with a 'task'")
+            try:
+                RoutineEngine.plan(spec["tasks"])
+            except ValueError as e:
+                raise ValueError(f"Routine '{name}': {e}")
+            routines[name] = {
+                "name": spec.get("name", name),
+                "description": spec.get("description", ""),
+                "tasks": spec["tasks"],
+                "timeout": spec.get("timeout")
+            }
+
+        return tasks, routines
+
+    def _load_cache(self):
+        """Read compiled files saved by an earlier run."""
+        try:
+            with open(self.cache_path, "rb") as f:
+                state = pickle.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            print(f"Error loading task catalog cache: {e}")
+            return
+
+        if state.get("version") == CATALOG_VERSION:
+            self._cached = state["files"]
+
+    def _save_cache(self):
+        """Persist the compiled files. Caller holds the lock."""
+        state = {"version": CATALOG_VERSION, "files": self._files}
+        temp_path = f"{self.cache_path}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            print(f"Error saving task catalog cache: {e}")
@@ -0,0 +1,347 @@
+import time
+import threading
+import itertools
+from collections import deque
+
+POLICIES = ("reject", "block", "drop_oldest")
+PRIORITIES = ("interactive", "normal", "background")  # Highest first
+
+class QueueFullError(RuntimeError):
+    """Raised when a task can't be queued because the executor is saturated."""
+
+class TaskExecutor:
+    """
+    Bounded worker pool for Jarvis AI Assistant's task automation.
+    Runs queued work items on a fixed maximum number of worker threads,
+    started on demand. When the queue is full, new work is handled by the
+    backpressure policy:
+
+    - "reject": refuse the new item (QueueFullError)
+    - "block": wait for room, up to block_timeout seconds
+    - "drop_oldest": discard the oldest queued item to make room
+
+    Each item has a priority class ("interactive", "normal" or
+    "background") with its own FIFO queue and queue_size limit. Workers take
+    the item with the best priority after aging: every aging seconds spent
+    waiting count as one class higher, so background work still progresses
+    under a steady stream of higher-priority items. Running items are never
+    interrupted; instead, "reserved" workers only take interactive items,
+    so an interactive command starts at once even behind a backlog.
+
+    A running item that has to be given up on (e.g. a hung device call
+    past its timeout) can be abandoned: its worker no longer counts
+    towards the pool, a replacement is started, and the thread exits once
+    the item eventually returns.
+    """
+
+    def __init__(self, workers=8, queue_size=1000, policy="reject", block_timeout=None,
+                 on_drop=None, name="task", aging=10.0, reserved=0):
+        """
+        Initialize the executor.
+
+        Args:
+            workers (int): Maximum number of worker threads
+            queue_size (int): Maximum number of items waiting for a worker
+            policy (str): Backpressure policy: "reject", "block" or "drop_oldest"
+            block_timeout (float): Longest a "block" submit waits (None: forever)
+            on_drop (callable): Called with the key of each item dropped by "drop_oldest"
+            name (str): Prefix for worker thread names
+            aging (float): Seconds of waiting that raise an item by one priority class
+            reserved (int): Workers kept free for interactive items (at most workers - 1)
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown backpressure policy: {policy}")
+
+        self.workers = workers
+        self.queue_size = queue_size
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.on_drop = on_drop
+        self.name = name
+        self.aging = aging
+        self.reserved = max(0, min(reserved, workers - 1))
+
+        self._queues = {priority: deque() for priority in PRIORITIES}
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._threads = []
+        self._current = {}              # worker thread -> (key, shared) of the item it runs
+        self._abandoned = set()         # worker threads given up on
+        self._worker_ids = itertools.count()
+        self._idle = 0
+        self._active = 0
+        self._active_shared = 0         # Running items that aren't interactive
+        self._busy_time = 0.0
+        self._started = time.monotonic()
+        self._shutdown = False
+
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "dropped": 0,
+            "discarded": 0,
+            "abandoned": 0,
+            "max_queue_depth": 0
+        }
+
+        # Recent queue waits per priority class, for wait percentiles
+        self._waits = {priority: deque(maxlen=1000) for priority in PRIORITIES}
+
+    def submit(self, key, function, *args, priority="normal", **kwargs):
+        """
+        Queue a work item.
+
+        Args:
+            key: Identifies the item to on_drop (e.g. a task ID)
+            function (callable): The work to run
+            *args, **kwargs: Arguments for the function
+            priority (str): "interactive", "normal" or "background"
+
+        Raises:
+            QueueFullError: If the queue is full and the policy refuses the item
+            RuntimeError: If the executor has been shut down
+            ValueError: If the priority is unknown
+        """
+        if priority not in self._queues:
+            raise ValueError(f"Unknown task priority: {priority}")
+
+        queue = self._queues[priority]
+        dropped = None
+
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("Executor has been shut down")
+
+            if len(queue) >= self.queue_size:
+                if self.policy == "reject":
+                    self.stats["rejected"] += 1
+                    raise QueueFullError(f"Task queue is full ({self.queue_size} waiting)")
+
+                if self.policy == "block":
+                    if not self._not_full.wait_for(
+                            lambda: len(queue) < self.queue_size or self._shutdown, self.block_timeout):
+                        self.stats["rejected"] += 1
+                        raise QueueFullError(f"Task queue stayed full for {self.block_timeout} seconds")
+                    if self._shutdown:
+                        raise RuntimeError("Executor has been shut down")
+                else:
+                    dropped = queue.popleft()[0]
+                    self.stats["dropped"] += 1
+
+            queue.append((key, function, args, kwargs, time.monotonic()))
+            self.stats["submitted"] += 1
+            depth = self._depth()
+            if depth > self.stats["max_queue_depth"]:
+                self.stats["max_queue_depth"] = depth
+
+            # Start another worker while there is more work than idle workers
+            if depth > self._idle and len(self._threads) < self.workers:
+                self._start_worker()
+            # Idle workers may only be able to take some classes, so wake them all
+            self._not_empty.notify_all()
+
+        if dropped is not None and self.on_drop is not None:
+            self.on_drop(dropped)
+
+    def discard(self, key):
+        """
+        Remove a queued item before it runs.
+
+        Args:
+            key: The key the item was submitted with
+
+        Returns:
+            bool: True if the item was still queued
+        """
+        with self._lock:
+            for queue in self._queues.values():
+                for position, item in enumerate(queue):
+                    if item[0] is key:
+                        del queue[position]
+                        self.stats["discarded"] += 1
+                        self._not_full.notify_all()
+                        return True
+            return False
+
+    def abandon(self, key):
+        """
+        Stop waiting for a running item and free its worker slot.
+
+        The item's thread can't be stopped; it is left to finish on its own
+        and exits afterwards, while a replacement worker takes over the queue.
+
+        Args:
+            key: The key the item was submitted with
+
+        Returns:
+            bool: True if the item was running
+        """
+        with self._lock:
+            for thread, (current, shared) in self._current.items():
+                if current is key:
+                    break
+            else:
+                return False
+
+            del self._current[thread]
+            self._threads.remove(thread)
+            self._abandoned.add(thread)
+            self._active -= 1
+            if shared:
+                self._active_shared -= 1
+            self.stats["abandoned"] += 1
+
+            if self._depth() > self._idle and len(self._threads) < self.workers and not self._shutdown:
+                self._start_worker()
+            self._not_empty.notify_all()
+            return True
+
+    def queue_depth(self):
+        """Get the number of items waiting for a worker."""
+        with self._lock:
+            return self._depth()
+
+    def wait_percentile(self, priority, percentile=99):
+        """
+        Get a percentile of recent queue waits for a priority class.
+
+        Args:
+            priority (str): The priority class
+            percentile (float): The percentile (0-100)
+
+        Returns:
+            float: Seconds items waited for a worker, or 0.0 with no samples
+        """
+        with self._lock:
+            waits = sorted(self._waits[priority])
+        if not waits:
+            return 0.0
+        return waits[min(len(waits) - 1, int(len(waits) * percentile / 100))]
+
+    def get_stats(self):
+        """
+        Get executor metrics.
+
+        Returns:
+            dict: Counters, queue depth, active workers and utilization (the
+                fraction of worker capacity spent running items since start)
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["queue_depth"] = self._depth()
+            stats["queue_depth_by_priority"] = {priority: len(queue) for priority, queue in self._queues.items()}
+            stats["queue_size"] = self.queue_size
+            stats["workers"] = len(self._threads)
+            stats["max_workers"] = self.workers
+            stats["active"] = self._active
+            stats["abandoned_running"] = len(self._abandoned)
+            elapsed = time.monotonic() - self._started
+            stats["utilization"] = self._busy_time / (self.workers * elapsed) if elapsed > 0 else 0.0
+        stats["wait_p99"] = {priority: self.wait_percentile(priority) for priority in PRIORITIES}
+        return stats
+
+    def shutdown(self, wait=True, cancel_pending=False, timeout=None):
+        """
+        Stop accepting work and let the workers exit.
+
+        Args:
+            wait (bool): Wait for the workers to finish
+            cancel_pending (bool): Discard queued items instead of running them
+            timeout (float): Maximum seconds to wait in total (None: no limit)
+        """
+        with self._lock:
+            self._shutdown = True
+            if cancel_pending:
+                for queue in self._queues.values():
+                    queue.clear()
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+            threads = list(self._threads)
+
+        if wait:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            for thread in threads:
+                if thread is not threading.current_thread():
+                    thread.join(None if deadline is None else max(0, deadline - time.monotonic()))
+
+    def _start_worker(self):
+        """Start one more worker thread. Caller holds the lock."""
+        thread = threading.Thread(target=self._worker, name=f"{self.name}-{next(self._worker_ids)}")
+        thread.daemon = True
+        self._threads.append(thread)
+        thread.start()
+
+    def _depth(self):
+        """Count queued items. Caller holds the lock."""
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _next_priority(self, now):
+        """
+        Pick the class whose oldest item should run next. Caller holds the lock.
+
+        Returns:
+            str: The priority class, or None if nothing may run now
+        """
+        shared_full = self._active_shared >= self.workers - self.reserved
+        best = None
+        best_rank = None
+
+        for rank, priority in enumerate(PRIORITIES):
+            queue = self._queues[priority]
+            if not queue or (priority != "interactive" and shared_full):
+                continue
+            aged_rank = rank - (now - queue[0][4]) / self.aging if self.aging else rank
+            if best is None or aged_rank < best_rank:
+                best, best_rank = priority, aged_rank
+
+        return best
+
+    def _worker(self):
+        """Run queued items until shut down."""
+        while True:
+            with self._lock:
+                self._idle += 1
+                priority = self._next_priority(time.monotonic())
+                while priority is None and not (self._shutdown and not self._depth()):
+                    self._not_empty.wait()
+                    priority = self._next_priority(time.monotonic())
+                self._idle -= 1
+
+                if priority is None:
+                    return
+
+                key, function, args, kwargs, queued = self._queues[priority].popleft()
+                start = time.monotonic()
+                self._waits[priority].append(start - queued)
+                self._active += 1
+                shared = priority != "interactive"
+                if shared:
+                    self._active_shared += 1
+                thread = threading.current_thread()
+                self._current[thread] = (key, shared)
+                self._not_full.notify_all()
+
+            try:
+                function(*args, **kwargs)
+                outcome = "completed"
+            except Exception as e:
+                print(f"Error in {self.name} worker: {e}")
+                outcome = "failed"
+
+            with self._lock:
+                if thread in self._abandoned:
+                    # Replaced by another worker while this item ran
+                    self._abandoned.discard(thread)
+                    return
+
+                del self._current[thread]
+                self._active -= 1
+                if shared:
+                    self._active_shared -= 1
+                    # A shared slot opened up for waiting non-interactive items
+                    self._not_empty.notify_all()
+                self._busy_time += time.monotonic() - start
+                self.stats[outcome] += 1
@@ -0,0 +1,90 @@
+import asyncio
+from concurrent.futures import Future, CancelledError, TimeoutError
+
+class TaskHandle:
+    """
+    Handle to a task queued by TaskAutomation.
+    Wraps a concurrent.futures.Future that resolves with the task's result,
+    so callers can block on it, register completion callbacks or await it
+    from asyncio code instead of polling get_task_status().
+    """
+
+    def __init__(self, task_id, name):
+        """
+        Initialize the handle.
+
+        Args:
+            task_id (str): The task's unique ID
+            name (str): The task name
+        """
+        self.task_id = task_id
+        self.name = name
+        self.future = Future()
+
+    def __repr__(self):
+        return f"<TaskHandle {self.task_id} {self.status()}>"
+
+    def __await__(self):
+        return asyncio.wrap_future(self.future).__await__()
+
+    def done(self):
+        """Check whether the task has finished (or was cancelled)."""
+        return self.future.done()
+
+    def status(self):
+        """
+        Get the task's state.
+
+        Returns:
+            str: "pending", "completed", "failed" or "cancelled"
+        """
+        if not self.future.done():
+            return "pending"
+        if self.future.cancelled():
+            return "cancelled"
+        return "failed" if self.future.exception() is not None else "completed"
+
+    def wait(self, timeout=None):
+        """
+        Wait for the task to finish.
+
+        Args:
+            timeout (float): Maximum seconds to wait (None: no limit)
+
+        Returns:
+            bool: True if the task finished within the timeout
+        """
+        try:
+            self.future.exception(timeout)
+        except CancelledError:
+            pass
+        except TimeoutError:
+            return False
+        return True
+
+    def result(self, timeout=None):
+        """
+        Get the task's result, waiting for it if needed.
+
+        Args:
+            timeout (float): Maximum seconds to wait (None: no limit)
+
+        Returns:
+            The value returned by the task function
+
+        Raises:
+            TimeoutError: If the task didn't finish in time
+            CancelledError: If the task was cancelled or dropped
+            Exception: Whatever the task function raised
+        """
+        return self.future.result(timeout)
+
+    def add_done_callback(self, callback):
+        """
+        Call a function once the task finishes.
+
+        Args:
+            callback (callable): Called with this handle; runs immediately if
+                the task has already finished
+        """
+        self.future.add_done_callback(lambda _: callback(self))
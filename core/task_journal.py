@@ -0,0 +1,260 @@
+import json
+import time
+import sqlite3
+import threading
+
+# Key of the placeholder journaled in place of a value JSON can't hold
+UNSERIALIZABLE = "__unserializable__"
+
+def _placeholder(value):
+    """Describe a value that can't be journaled: its type, and its length if it has one."""
+    try:
+        size = len(value)
+    except TypeError:
+        size = None
+    return {UNSERIALIZABLE: type(value).__name__, "size": size}
+
+def _encode(data):
+    """Serialize event details, replacing values JSON can't hold with placeholders."""
+    try:
+        return json.dumps(data, default=_placeholder)
+    except (TypeError, ValueError):
+        # Non-string keys or a circular reference somewhere: keep what can be kept
+        fields = {}
+        for key, value in data.items():
+            try:
+                json.dumps(value, default=_placeholder)
+                fields[key] = value
+            except (TypeError, ValueError):
+                fields[key] = _placeholder(value)
+        return json.dumps(fields, default=_placeholder)
+
+class TaskJournal:
+    """
+    Crash-safe task journal for Jarvis AI Assistant's task automation.
+    Appends one event per task state change (enqueue, start, finish, fail)
+    to an SQLite database in WAL mode. Callers only add events to an
+    in-memory batch; a writer thread commits the batch every few
+    milliseconds (group commit), so journaling costs each task a few
+    microseconds instead of a disk sync. On startup, replay() rebuilds the
+    last known state of every journaled task, including the ones that
+    never finished because the process died.
+    """
+
+    def __init__(self, path, config=None):
+        """
+        Open (or create) the journal.
+
+        Args:
+            path (str): SQLite database file
+            config (dict): Optional overrides for the default configuration
+        """
+        self.path = path
+
+        self.config = {
+            "commit_interval": 0.005,   # Seconds between group commits
+            "max_batch": 1000,          # Events that trigger an early commit
+            "keep_finished": 1000,      # Finished tasks kept when the journal is compacted on open
+            "synchronous": "NORMAL"     # SQLite synchronous mode (FULL also survives power loss)
+        }
+        if config:
+            self.config.update(config)
+
+        self._pending = []
+        self._appended = 0              # Events handed to record()
+        self._committed = 0             # Events committed to disk
+        self._lock = threading.Lock()
+        self._has_work = threading.Condition(self._lock)
+        self._flushed = threading.Condition(self._lock)
+        self._closed = False
+
+        self.stats = {
+            "events": 0,
+            "commits": 0,
+            "max_batch": 0,
+            "errors": 0
+        }
+
+        self._initialize_db()
+        self._thread = threading.Thread(target=self._writer, name="task-journal")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.config['synchronous']}")
+        return conn
+
+    def _initialize_db(self):
+        """Create the events table and compact away old finished tasks."""
+        conn = self._connect()
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS task_events (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            task_id TEXT NOT NULL,
+            event TEXT NOT NULL,
+            time REAL NOT NULL,
+            data TEXT
+        )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS task_events_task ON task_events (task_id)")
+
+        # Keep the events of unfinished tasks and of the most recently finished ones
+        conn.execute("""
+        DELETE FROM task_events WHERE task_id IN (
+            SELECT task_id FROM task_events WHERE event IN ('finish', 'fail')
+            ORDER BY seq DESC LIMIT -1 OFFSET ?
+        )
+        """, (self.config["keep_finished"],))
+        conn.commit()
+        conn.close()
+
+    def record(self, task_id, event, data=None):
+        """
+        Append an event; it is committed with the next group commit.
+        Events recorded after close() are ignored.
+
+        Args:
+            task_id (str): The task ID
+            event (str): "enqueue", "start", "finish" or "fail"
+            data (dict): Event details; values JSON can't hold (such as bytes
+                payloads) are stored as {"__unserializable__": type name, "size": length}
+        """
+        row = (task_id, event, time.time(), _encode(data) if data is not None else None)
+        with self._lock:
+            if self._closed:
+                return
+            self._pending.append(row)
+            self._appended += 1
+            if len(self._pending) == 1 or len(self._pending) >= self.config["max_batch"]:
+                self._has_work.notify()
+
+    def flush(self, timeout=None):
+        """
+        Wait until every event recorded so far is committed.
+
+        Args:
+            timeout (float): Maximum seconds to wait (None: no limit)
+
+        Returns:
+            bool: True if everything was committed in time
+        """
+        with self._lock:
+            target = self._appended
+            self._has_work.notify()
+            return self._flushed.wait_for(lambda: self._committed >= target or self._closed, timeout)
+
+    def replay(self):
+        """
+        Rebuild the last known state of every journaled task.
+
+        Returns:
+            dict: task ID -> {"task_id", "name", "params", "priority",
+                "status", "created", "started", "finished", "result",
+                "error", "duration"}, in the order the tasks were queued;
+                "status" is "queued" or "running" for tasks that never finished
+        """
+        self.flush()
+        conn = self._connect()
+        rows = conn.execute("SELECT task_id, event, time, data FROM task_events ORDER BY seq").fetchall()
+        conn.close()
+
+        tasks = {}
+        for task_id, event, timestamp, data in rows:
+            data = json.loads(data) if data else {}
+            task = tasks.get(task_id)
+            if task is None:
+                task = tasks[task_id] = {
+                    "task_id": task_id, "name": None, "params": {}, "priority": "normal",
+                    "status": "queued", "created": timestamp, "started": None, "finished": None,
+                    "result": None, "error": None, "duration": None
+                }
+
+            if event == "enqueue":
+                task["name"] = data.get("name")
+                task["params"] = data.get("params", {})
+                task["priority"] = data.get("priority", "normal")
+                task["created"] = timestamp
+            elif event == "start":
+                task["started"] = timestamp
+                if task["status"] == "queued":
+                    task["status"] = "running"
+            elif event == "finish":
+                task.update(status="completed", finished=timestamp,
+                            result=data.get("result"), duration=data.get("duration"))
+            elif event == "fail":
+                task.update(status=data.get("status", "failed"), finished=timestamp, error=data.get("error"))
+
+        return tasks
+
+    @staticmethod
+    def is_complete(value):
+        """
+        Check that a replayed value was journaled in full.
+
+        Args:
+            value: Params or a result from replay()
+
+        Returns:
+            bool: False if any part of it was replaced by a placeholder
+        """
+        if isinstance(value, dict):
+            return UNSERIALIZABLE not in value and all(TaskJournal.is_complete(item) for item in value.values())
+        if isinstance(value, list):
+            return all(TaskJournal.is_complete(item) for item in value)
+        return True
+
+    def close(self):
+        """Commit outstanding events and stop the writer."""
+        self.flush()
+        with self._lock:
+            self._closed = True
+            self._has_work.notify()
+        self._thread.join(timeout=5)
+
+    def get_stats(self):
+        """
+        Get journal metrics.
+
+        Returns:
+            dict: Events and commits written, largest batch and events not yet committed
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["pending"] = self._appended - self._committed
+            stats["mean_batch"] = stats["events"] / stats["commits"] if stats["commits"] else 0.0
+            return stats
+
+    def _writer(self):
+        """Commit recorded events in batches until closed."""
+        conn = self._connect()
+        while True:
+            with self._lock:
+                while not self._pending and not self._closed:
+                    self._has_work.wait()
+                if not self._closed and len(self._pending) < self.config["max_batch"]:
+                    # Let a group of events gather; flush() and full batches cut this short
+                    self._has_work.wait(self.config["commit_interval"])
+                batch, self._pending = self._pending, []
+                closed = self._closed
+
+            if batch:
+                try:
+                    conn.executemany("INSERT INTO task_events (task_id, event, time, data) VALUES (?, ?, ?, ?)", batch)
+                    conn.commit()
+                except sqlite3.Error as e:
+                    print(f"Error writing task journal: {e}")
+                    self.stats["errors"] += 1
+
+            with self._lock:
+                self._committed += len(batch)
+                if batch:
+                    self.stats["events"] += len(batch)
+                    self.stats["commits"] += 1
+                    self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+                self._flushed.notify_all()
+                if closed and not self._pending:
+                    break
+
+        conn.close()
@@ -0,0 +1,257 @@
+import threading
+
+PHASES = ("wait", "run", "total")
+
+class LatencyHistogram:
+    """
+    Log-linear latency histogram in the style of HdrHistogram.
+    Values are recorded in microseconds: below 2^SUB_BUCKET_BITS each
+    microsecond has its own bucket, and above that every power of two is
+    split into 2^(SUB_BUCKET_BITS - 1) equal buckets, so percentiles are
+    within about 3% of the true value at any magnitude. Buckets are kept
+    sparsely, so an idle or narrow histogram costs a few entries.
+
+    Not thread-safe: TaskMetrics gives each thread its own histograms.
+    """
+
+    SUB_BUCKET_BITS = 5
+
+    __slots__ = ("buckets", "count", "total", "max")
+
+    def __init__(self):
+        self.buckets = {}               # bucket index -> count
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        """Record a latency."""
+        if seconds < 0:
+            seconds = 0.0
+        index = self._index(int(seconds * 1e6))
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other):
+        """Add another histogram's values to this one."""
+        for index, count in list(other.buckets.items()):
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, percent):
+        """
+        Get a latency percentile.
+
+        Args:
+            percent (float): Percentile, 0-100
+
+        Returns:
+            float: Seconds, or None if nothing was recorded
+        """
+        if not self.count:
+            return None
+        target = max(1, percent / 100 * self.count)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= target:
+                low, high = self._bounds(index)
+                return min((low + high) / 2e6, self.max)
+        return self.max
+
+    def summary(self):
+        """
+        Summarize the histogram.
+
+        Returns:
+            dict: count, mean, p50, p90, p99, p999 and max, in seconds
+        """
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "p999": self.percentile(99.9),
+            "max": self.max if self.count else None
+        }
+
+    @classmethod
+    def _index(cls, micros):
+        """Bucket index of a value in microseconds."""
+        sub_buckets = 1 << cls.SUB_BUCKET_BITS
+        if micros < sub_buckets:
+            return micros
+        shift = micros.bit_length() - cls.SUB_BUCKET_BITS
+        half = sub_buckets >> 1
+        return sub_buckets + (shift - 1) * half + (micros >> shift) - half
+
+    @classmethod
+    def _bounds(cls, index):
+        """Lowest and highest microsecond value in a bucket."""
+        sub_buckets = 1 << cls.SUB_BUCKET_BITS
+        if index < sub_buckets:
+            return index, index
+        half = sub_buckets >> 1
+        shift, offset = divmod(index - sub_buckets, half)
+        top = offset + half
+        return top << (shift + 1), ((top + 1) << (shift + 1)) - 1
+
+class TaskSpan:
+    """
+    A task's trace span, passed to span hooks. Hooks may keep their own
+    object (e.g. a tracer's span) in "context" at "start" and find it
+    again at "end".
+    """
+
+    __slots__ = ("task_id", "name", "priority", "created", "started", "finished", "status", "error", "context")
+
+    def __init__(self, task_id, name, priority, created):
+        self.task_id = task_id
+        self.name = name
+        self.priority = priority
+        self.created = created
+        self.started = None
+        self.finished = None
+        self.status = "queued"
+        self.error = None
+        self.context = None
+
+    def __repr__(self):
+        return f"<TaskSpan {self.task_id} {self.status}>"
+
+class TaskMetrics:
+    """
+    Per-task instrumentation for Jarvis AI Assistant's task automation.
+    Keeps latency histograms for queue wait, run time and end-to-end time,
+    and outcome counters, per task name. Each thread records into its own
+    shard, so recording takes no lock and threads never contend; readers
+    merge the shards. Optional span hooks are called as tasks start and
+    end, for an external tracer.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []               # One {task name -> entry} per recording thread
+        self._lock = threading.Lock()
+        self.hooks = []
+
+        self.stats = {
+            "hook_errors": 0
+        }
+
+    def record(self, name, phase, seconds):
+        """
+        Record a latency.
+
+        Args:
+            name (str): The task name
+            phase (str): "wait" (queued until started), "run" or "total" (queued until finished)
+            seconds (float): The latency
+        """
+        self._entry(name)[phase].record(seconds)
+
+    def count(self, name, outcome):
+        """
+        Count a task outcome.
+
+        Args:
+            name (str): The task name
+            outcome (str): A final status such as "completed", "failed",
+                "timed_out", "cancelled" or "rejected"
+        """
+        counts = self._entry(name)["outcomes"]
+        counts[outcome] = counts.get(outcome, 0) + 1
+
+    def add_hook(self, hook):
+        """
+        Register a span hook.
+
+        Args:
+            hook (callable): Called with ("start", span) when a task starts
+                running and ("end", span) when it finishes, however it
+                finishes; it runs on the task's thread, so should be quick
+        """
+        with self._lock:
+            self.hooks = self.hooks + [hook]
+
+    def remove_hook(self, hook):
+        """Unregister a span hook."""
+        with self._lock:
+            self.hooks = [registered for registered in self.hooks if registered is not hook]
+
+    def emit(self, event, span):
+        """Call the span hooks; errors in hooks are counted, not raised."""
+        for hook in self.hooks:
+            try:
+                hook(event, span)
+            except Exception as e:
+                print(f"Error in task span hook: {e}")
+                with self._lock:
+                    self.stats["hook_errors"] += 1
+
+    def snapshot(self, name=None):
+        """
+        Merge the shards.
+
+        Args:
+            name (str): Only this task (default: all tasks)
+
+        Returns:
+            dict: task name -> {"outcomes": counts, "wait"/"run"/"total": LatencyHistogram}
+        """
+        with self._lock:
+            shards = list(self._shards)
+
+        merged = {}
+        for shard in shards:
+            for task_name, entry in list(shard.items()):
+                if name is not None and task_name != name:
+                    continue
+                total = merged.get(task_name)
+                if total is None:
+                    total = merged[task_name] = self._new_entry()
+                for outcome, count in list(entry["outcomes"].items()):
+                    total["outcomes"][outcome] = total["outcomes"].get(outcome, 0) + count
+                for phase in PHASES:
+                    total[phase].merge(entry[phase])
+        return merged
+
+    def get_stats(self, name=None):
+        """
+        Get per-task metrics.
+
+        Args:
+            name (str): Only this task (default: all tasks)
+
+        Returns:
+            dict: task name -> {"outcomes": counts by final status, and
+                "wait", "run" and "total" latency summaries in seconds}
+        """
+        stats = {}
+        for task_name, entry in self.snapshot(name).items():
+            stats[task_name] = {"outcomes": entry["outcomes"]}
+            for phase in PHASES:
+                stats[task_name][phase] = entry[phase].summary()
+        return stats
+
+    @staticmethod
+    def _new_entry():
+        return {"outcomes": {}, "wait": LatencyHistogram(), "run": LatencyHistogram(), "total": LatencyHistogram()}
+
+    def _entry(self, name):
+        """This thread's metrics for a task."""
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+        entry = shard.get(name)
+        if entry is None:
+            entry = shard[name] = self._new_entry()
+        return entry
@@ -0,0 +1,232 @@
+import time
+import threading
+from collections import OrderedDict
+
+class TaskRecord:
+    """State of one task executed by TaskAutomation."""
+
+    __slots__ = ("task_id", "name", "params", "priority", "status", "result", "error", "created", "started",
+                 "finished", "handle", "token", "timer", "span")
+
+    def __init__(self, task_id, name, params, priority="normal", created=None):
+        self.task_id = task_id
+        self.name = name
+        self.params = params
+        self.priority = priority
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.created = time.time() if created is None else created
+        self.started = None
+        self.finished = None
+
+        # Only needed while the task is active; released once it finishes
+        self.handle = None
+        self.token = None
+        self.timer = None
+        self.span = None
+
+    def __repr__(self):
+        return f"<TaskRecord {self.task_id} {self.status}>"
+
+    def to_dict(self):
+        """
+        Describe the task as get_task_status() reports it.
+
+        Returns:
+            dict: The task's name, params, priority and status, plus its
+                "result" or "error" once it has one
+        """
+        status = {
+            "task_id": self.task_id,
+            "name": self.name,
+            "params": self.params,
+            "priority": self.priority,
+            "status": self.status,
+            "created": self.created
+        }
+        if self.result is not None:
+            status["result"] = self.result
+        if self.error is not None:
+            status["error"] = self.error
+        if self.started is not None:
+            status["started"] = self.started
+        if self.finished is not None:
+            status["finished"] = self.finished
+        return status
+
+class TaskRegistry:
+    """
+    Bounded registry of tasks for Jarvis AI Assistant's task automation.
+    Queued and running tasks are always kept. Finished tasks are kept for
+    status lookups under a retention policy: a maximum count and age,
+    with separate (by default longer) limits for tasks that failed so they
+    remain available for troubleshooting. Finished tasks are evicted
+    oldest first as new ones finish, so memory stays flat however many
+    tasks run.
+    """
+
+    def __init__(self, config=None, clock=time.time):
+        """
+        Initialize the registry.
+
+        Args:
+            config (dict): Optional overrides for the default retention policy
+            clock (callable): Time source, injectable for tests
+        """
+        self.clock = clock
+
+        self.config = {
+            "max_completed": 1000,      # Completed tasks kept
+            "max_age": 3600,            # Seconds a completed task is kept (None: no limit)
+            "max_failed": 1000,         # Failed, dropped or cancelled tasks kept
+            "failed_max_age": 86400     # Seconds a failed task is kept (None: no limit)
+        }
+        if config:
+            self.config.update(config)
+
+        self._active = {}               # task id -> record
+        self._completed = OrderedDict() # task id -> record, oldest finished first
+        self._failed = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "added": 0,
+            "evicted": 0
+        }
+
+    def __len__(self):
+        with self._lock:
+            return len(self._active) + len(self._completed) + len(self._failed)
+
+    def __contains__(self, task_id):
+        return self.get(task_id) is not None
+
+    def add(self, record):
+        """Register a queued task."""
+        with self._lock:
+            self._active[record.task_id] = record
+            self.stats["added"] += 1
+
+    def remove(self, task_id):
+        """Forget a task, e.g. one that was never queued."""
+        with self._lock:
+            for records in (self._active, self._completed, self._failed):
+                if records.pop(task_id, None) is not None:
+                    return True
+            return False
+
+    def get(self, task_id):
+        """
+        Look up a task.
+
+        Returns:
+            TaskRecord: The record, or None if unknown or evicted
+        """
+        with self._lock:
+            return self._active.get(task_id) or self._completed.get(task_id) or self._failed.get(task_id)
+
+    def start(self, record):
+        """
+        Mark a queued task as running.
+
+        Returns:
+            bool: False if the task was cancelled before it started
+        """
+        with self._lock:
+            if record.task_id not in self._active:
+                return False
+            record.status = "running"
+            return True
+
+    def finish(self, record, status, result=None, error=None):
+        """
+        Record a task's final status and apply the retention policy.
+
+        Args:
+            record (TaskRecord): The task
+            status (str): "completed", or a failure status such as "failed",
+                "dropped", "cancelled", "timed_out" or "abandoned"
+            result: The task's return value
+            error (str): Why the task failed
+
+        Returns:
+            bool: False if the task had already finished (e.g. it was
+                cancelled, then returned anyway)
+        """
+        now = self.clock()
+        with self._lock:
+            if self._active.pop(record.task_id, None) is None:
+                return False
+
+            record.status = status
+            record.result = result
+            record.error = error
+            record.finished = now
+            record.handle = record.token = record.timer = record.span = None
+
+            records = self._completed if status == "completed" else self._failed
+            records[record.task_id] = record
+            self._prune(now)
+            return True
+
+    def restore(self, record, status, result=None, error=None, finished=None):
+        """
+        Add a task that finished earlier (e.g. replayed from a journal).
+
+        Args:
+            record (TaskRecord): The task
+            status (str): Its final status
+            result: The task's return value
+            error (str): Why the task failed
+            finished (float): When it finished (default: now)
+        """
+        with self._lock:
+            record.status = status
+            record.result = result
+            record.error = error
+            record.finished = self.clock() if finished is None else finished
+
+            records = self._completed if status == "completed" else self._failed
+            records[record.task_id] = record
+            self.stats["added"] += 1
+            self._prune(self.clock())
+
+    def prune(self):
+        """Evict finished tasks that exceed the retention policy."""
+        with self._lock:
+            self._prune(self.clock())
+
+    def get_stats(self):
+        """
+        Get registry metrics.
+
+        Returns:
+            dict: Number of active, completed and failed tasks held, and counters
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["active"] = len(self._active)
+            stats["completed"] = len(self._completed)
+            stats["failed"] = len(self._failed)
+            return stats
+
+    def _prune(self, now):
+        """Evict from both finished queues. Caller holds the lock."""
+        self._evict(self._completed, self.config["max_completed"], self.config["max_age"], now)
+        self._evict(self._failed, self.config["max_failed"], self.config["failed_max_age"], now)
+
+    def _evict(self, records, max_entries, max_age, now):
+        """Evict the oldest records over the count or age limit. Caller holds the lock."""
+        while len(records) > max_entries:
+            records.popitem(last=False)
+            self.stats["evicted"] += 1
+
+        if max_age is None:
+            return
+        while records:
+            oldest = next(iter(records.values()))
+            if now - oldest.finished <= max_age:
+                break
+            records.popitem(last=False)
+            self.stats["evicted"] += 1
@@ -1,8 +1,15 @@
 import sys
 import os
+import asyncio
 import unittest
 import json
+import time
+import shutil
 import sqlite3
+import tempfile
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import MagicMock, patch
 
 # Add the core directory to the path so we can import the modules
@@ -12,6 +19,96 @@ from core.task_automation import TaskAutomation
 from core.information_retrieval import InformationRetrieval
 from core.memory_system import MemorySystem
 from core.integration import JarvisCore
+from core.http_client import HttpClient
+from core.intent_matcher import IntentMatcher, DEFAULT_SOURCE_INTENTS, DEFAULT_COMMAND_INTENTS
+from core.knowledge_base import KnowledgeBase, score_confidence
+from core import mapped_index
+from core.calculator import Calculator
+from core.source_health import SourceHealth
+from core.gazetteer import Gazetteer
+from core.result_ranking import ResultRanker
+from core.history import History
+from core.task_executor import TaskExecutor, QueueFullError
+from core.task_handle import TaskHandle
+from core.routine_engine import RoutineEngine
+from core.task_registry import TaskRecord, TaskRegistry
+from core.cancellation import CancellationToken, TaskTimeoutError, Watchdog
+from core.task_journal import TaskJournal
+from core.device_dispatcher import TokenBucket, DeviceDispatcher
+from core.async_runtime import AsyncRuntime
+from core.process_lane import ProcessLane
+from core.task_catalog import TaskCatalog, LazyFunction
+from core.task_metrics import LatencyHistogram, TaskMetrics
+from core.scheduler import Scheduler, CronSchedule
+
+
+class StubHttpServer:
+    """
+    Local stand-in HTTP server for exercising network-backed sources.
+    
+    Routes:
+        /json     - echoes the query string back as JSON
+        /flaky    - returns 503 until `fail_count` requests have been served
+        /slow     - sleeps `delay` seconds before answering
+    """
+    
+    def __init__(self, fail_count=0, delay=0.0):
+        self.fail_count = fail_count
+        self.delay = delay
+        self.requests = 0
+        self.connections = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        
+        stub = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Allow keep-alive
+            
+            def do_GET(self):
+                with stub.lock:
+                    stub.requests += 1
+                    stub.connections.add(self.client_address)
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                    attempt = stub.requests
+                try:
+                    path, _, query = self.path.partition("?")
+                    if path == "/slow":
+                        time.sleep(stub.delay)
+                    if path == "/flaky" and attempt <= stub.fail_count:
+                        self._send(503, {"error": "unavailable"})
+                    else:
+                        self._send(200, {"path": path, "query": query})
+                finally:
+                    with stub.lock:
+                        stub.in_flight -= 1
+            
+            def _send(self, status, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+    
+    def __enter__(self):
+        self.thread.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
 
 class TestVoiceRecognition(unittest.TestCase):
     """Test cases for the Voice Recognition module."""
@@ -173,6 +270,2404 @@ class TestInformationRetrieval(unittest.TestCase):
         self.assertEqual(history[-1]["query"], "what is the weather")
 
 
+class TestSearchMany(unittest.TestCase):
+    """Test cases for batch searching."""
+    
+    def setUp(self):
+        """Set up test fixtures with fast, instrumented stub sources."""
+        self.info_retrieval = InformationRetrieval(max_workers=2)
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+        
+        def slow_source(name):
+            def source(query):
+                with self.lock:
+                    self.calls.append((name, query))
+                    self.active += 1
+                    self.max_active = max(self.max_active, self.active)
+                time.sleep(0.05)
+                with self.lock:
+                    self.active -= 1
+                return {"answer": f"{name}:{query}"}
+            return source
+        
+        self.info_retrieval.sources["web"] = slow_source("web")
+        self.info_retrieval.sources["weather"] = slow_source("weather")
+        self.batches = []
+        self.info_retrieval.batch_sources["calculator"] = lambda queries: (
+            self.batches.append(list(queries)) or self.info_retrieval.calculate_many(queries)
+        )
+    
+    def tearDown(self):
+        """Release the worker pool."""
+        self.info_retrieval.close()
+    
+    def test_order_and_deduplication(self):
+        """Test that results keep input order and duplicates are fetched once."""
+        queries = ["weather in Paris", "2 plus 2", "weather in Paris", "who is Ada Lovelace", "3 times 3"]
+        results = self.info_retrieval.search_many(queries)
+        
+        self.assertEqual([r["query"] for r in results], queries)
+        self.assertEqual(results[0]["results"]["weather"], {"answer": "weather:weather in Paris"})
+        self.assertEqual(results[0]["results"], results[2]["results"])
+        self.assertEqual(results[1]["results"]["calculator"]["result"], 4)
+        self.assertEqual(results[4]["results"]["calculator"]["result"], 9)
+        self.assertIn("web", results[3]["results"])
+        self.assertIn("knowledge_base", results[3]["results"])
+        
+        self.assertEqual(self.calls.count(("weather", "weather in Paris")), 1)
+        self.assertEqual(self.batches, [["2 plus 2", "3 times 3"]])
+        self.assertEqual(len(self.info_retrieval.get_search_history()), 5)
+    
+    def test_explicit_sources(self):
+        """Test searching a fixed set of sources for every query."""
+        results = self.info_retrieval.search_many(["a", "b"], sources=["web", "unknown"])
+        self.assertEqual([list(r["results"]) for r in results], [["web"], ["web"]])
+    
+    def test_shared_concurrency_budget(self):
+        """Test that lookups never exceed the worker pool size."""
+        self.info_retrieval.search_many([f"topic {i}" for i in range(6)], sources=["web", "weather"])
+        
+        self.assertEqual(len(self.calls), 12)
+        self.assertLessEqual(self.max_active, 2)
+    
+    def test_source_errors(self):
+        """Test that a failing source yields an error result."""
+        def broken(query):
+            raise RuntimeError("backend down")
+        self.info_retrieval.sources["web"] = broken
+        
+        result = self.info_retrieval.search_many(["anything"], sources=["web"])[0]
+        self.assertEqual(result["results"]["web"], {"error": "backend down"})
+
+    def test_independent_results(self):
+        """Test that each query gets its own result dicts and a ranked list like search()."""
+        def broken(queries):
+            raise RuntimeError("batch down")
+        self.info_retrieval.batch_sources["calculator"] = broken
+
+        results = self.info_retrieval.search_many(["2 plus 2", "3 times 3", "weather in Paris", "weather in Paris"])
+        results[0]["results"]["calculator"]["tagged"] = True
+        results[2]["results"]["weather"]["tagged"] = True
+        self.assertNotIn("tagged", results[1]["results"]["calculator"])
+        self.assertNotIn("tagged", results[3]["results"]["weather"])
+
+        single = self.info_retrieval.search("weather in Paris")
+        self.assertEqual(set(results[3]), set(single))
+        self.assertEqual(results[3]["ranked"], single["ranked"])
+        self.assertEqual(results[0]["ranked"], [])
+
+
+class FakeClock:
+    """Manually advanced clock for time-dependent tests."""
+    
+    def __init__(self, now=1000.0):
+        self.now = now
+    
+    def __call__(self):
+        return self.now
+    
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class TestPrefetch(unittest.TestCase):
+    """Test cases for the result cache and background prefetcher."""
+    
+    def setUp(self):
+        """Set up test fixtures with a fake clock and a counting weather source."""
+        self.clock = FakeClock()
+        self.info_retrieval = InformationRetrieval(
+            cache_ttls={"weather": 100},
+            prefetch_config={"min_count": 2, "budget": 10, "budget_window": 1000}
+        )
+        self.info_retrieval.cache.clock = self.clock
+        self.info_retrieval.prefetcher.clock = self.clock
+        
+        self.fetches = []
+        def weather(query):
+            self.fetches.append(query)
+            return {"location": query, "fetch": len(self.fetches)}
+        self.info_retrieval.sources["weather"] = weather
+    
+    def tearDown(self):
+        """Stop background work."""
+        self.info_retrieval.close()
+    
+    def test_cache(self):
+        """Test that repeated queries are served from the cache until they expire."""
+        self.info_retrieval.search("Weather in Paris?")
+        self.info_retrieval.search("weather in paris")
+        self.assertEqual(len(self.fetches), 1)
+        
+        self.clock.advance(101)
+        self.info_retrieval.search("weather in paris")
+        self.assertEqual(len(self.fetches), 2)
+    
+    def test_learns_frequent_queries(self):
+        """Test that only queries asked min_count times are prefetched."""
+        self.info_retrieval.search("weather in Paris")
+        self.info_retrieval.search("weather in Paris")
+        self.info_retrieval.search("weather in Oslo")
+        
+        self.assertEqual(
+            self.info_retrieval.prefetcher.frequent_queries(),
+            [("weather", "weather in Paris")]
+        )
+    
+    def test_refresh_before_expiry(self):
+        """Test that entries are refreshed ahead of their TTL and then hit."""
+        prefetcher = self.info_retrieval.prefetcher
+        self.info_retrieval.search("weather in Paris")
+        self.info_retrieval.search("weather in Paris")
+        
+        # Still fresh: nothing to do
+        self.assertEqual(prefetcher.run_once(), 0)
+        
+        # Within the refresh-ahead window: refreshed in the background
+        self.clock.advance(90)
+        self.assertEqual(prefetcher.run_once(), 1)
+        
+        self.clock.advance(50)
+        result = self.info_retrieval.search("weather in Paris")
+        self.assertEqual(result["results"]["weather"]["fetch"], 2)
+        
+        stats = prefetcher.get_stats()
+        self.assertEqual(stats["fetches"], 1)
+        self.assertEqual(stats["prefetch_hits"], 1)
+        self.assertGreater(stats["prefetch_hit_rate"], 0)
+        self.assertEqual(stats["wasted_fetches"], 0)
+    
+    def test_wasted_fetches(self):
+        """Test that prefetched results nobody read are reported as waste."""
+        prefetcher = self.info_retrieval.prefetcher
+        self.info_retrieval.search("weather in Paris")
+        self.info_retrieval.search("weather in Paris")
+        
+        self.clock.advance(90)
+        prefetcher.run_once()
+        self.clock.advance(90)
+        prefetcher.run_once()
+        
+        self.assertEqual(prefetcher.get_stats()["wasted_fetches"], 1)
+    
+    def test_budget(self):
+        """Test that prefetching stops once the request budget is spent."""
+        prefetcher = self.info_retrieval.prefetcher
+        prefetcher.config["budget"] = 1
+        for city in ["Paris", "Oslo"]:
+            self.info_retrieval.search_many([f"weather in {city}"] * 2)
+        
+        self.clock.advance(200)
+        self.assertEqual(prefetcher.run_once(), 1)
+        self.assertEqual(prefetcher.get_stats()["skipped_budget"], 1)
+        
+        self.clock.advance(1000)
+        self.assertEqual(prefetcher.run_once(), 1)
+    
+    def test_background_thread(self):
+        """Test that the scheduler refreshes entries on its own."""
+        self.info_retrieval.cache.clock = time.time
+        self.info_retrieval.prefetcher.clock = time.time
+        self.info_retrieval.prefetcher.config["interval"] = 0.05
+        self.info_retrieval.search_many(["weather in Paris"] * 2)
+        self.info_retrieval.cache.clear()
+        
+        self.info_retrieval.start_prefetch()
+        time.sleep(0.3)
+        self.info_retrieval.stop_prefetch()
+        
+        self.assertGreaterEqual(len(self.fetches), 2)
+        self.assertIsNotNone(self.info_retrieval.cache.peek("weather", "weather in Paris"))
+
+
+class FlakySource:
+    """Stub source that fails or stalls on demand."""
+    
+    def __init__(self, fail=False, delays=None):
+        self.fail = fail
+        self.delays = list(delays or [])
+        self.calls = 0
+    
+    def __call__(self, query):
+        self.calls += 1
+        if self.delays:
+            time.sleep(self.delays.pop(0))
+        if self.fail:
+            raise ConnectionError("source down")
+        return {"query": query, "call": self.calls}
+
+
+class TestSourceHealth(unittest.TestCase):
+    """Test cases for source health tracking, circuit breaking and hedging."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.clock = FakeClock()
+        self.info_retrieval = InformationRetrieval(
+            cache_ttls={"web": 0},
+            health_config={"consecutive_failures": 3, "cooldown": 30}
+        )
+        self.info_retrieval.health.clock = self.clock
+    
+    def tearDown(self):
+        """Release worker pools."""
+        self.info_retrieval.close()
+    
+    def test_percentiles(self):
+        """Test latency percentiles over the rolling window."""
+        health = SourceHealth({"window": 100})
+        for i in range(1, 101):
+            health.record("web", i / 100, True)
+        
+        self.assertEqual(health.percentile("web", 50), 0.5)
+        self.assertEqual(health.percentile("web", 95), 0.95)
+        self.assertIsNone(health.percentile("news", 95))
+    
+    def test_breaker_opens_and_recovers(self):
+        """Test that a failing source is skipped until a probe succeeds."""
+        source = FlakySource(fail=True)
+        self.info_retrieval.sources["web"] = source
+        
+        for _ in range(3):
+            result = self.info_retrieval.search("anything", sources=["web"])
+            self.assertIn("error", result["results"]["web"])
+        self.assertEqual(self.info_retrieval.health.state("web"), "open")
+        
+        # Open: skipped without calling the source
+        result = self.info_retrieval.search("anything", sources=["web"])
+        self.assertTrue(result["results"]["web"]["skipped"])
+        self.assertEqual(source.calls, 3)
+        
+        # After the cool-down a failed probe re-opens the breaker
+        self.clock.advance(31)
+        self.info_retrieval.search("anything", sources=["web"])
+        self.assertEqual(source.calls, 4)
+        self.assertEqual(self.info_retrieval.health.state("web"), "open")
+        
+        # A successful probe closes it
+        source.fail = False
+        self.clock.advance(31)
+        result = self.info_retrieval.search("anything", sources=["web"])
+        self.assertNotIn("error", result["results"]["web"])
+        self.assertEqual(self.info_retrieval.health.state("web"), "closed")
+    
+    def test_error_rate_trips_breaker(self):
+        """Test that a high error rate trips the breaker without consecutive failures."""
+        health = SourceHealth({"min_samples": 10, "error_threshold": 0.5, "consecutive_failures": 100})
+        for i in range(10):
+            health.record("news", 0.1, i % 2 == 0)
+        
+        self.assertEqual(health.state("news"), "open")
+        self.assertFalse(health.allow("news"))
+        self.assertEqual(health.get_stats()["news"]["short_circuited"], 1)
+    
+    def test_hung_probe_released(self):
+        """Test that a probe that never reports back frees the half-open slot."""
+        health = SourceHealth({"consecutive_failures": 1, "cooldown": 30, "probe_timeout": 10}, clock=self.clock)
+        health.record("web", 0.1, False)
+        
+        self.clock.advance(31)
+        self.assertTrue(health.allow("web"))
+        self.assertFalse(health.allow("web"))
+        
+        # The first probe hangs; after the probe timeout another may go
+        self.clock.advance(11)
+        self.assertTrue(health.allow("web"))
+        self.assertFalse(health.allow("web"))
+        
+        health.record("web", 0.1, True)
+        self.assertEqual(health.state("web"), "closed")
+        self.assertEqual(self.info_retrieval.health.config["probe_timeout"], self.info_retrieval.source_timeout)
+    
+    def test_hedged_request(self):
+        """Test that a slow first attempt is hedged by a second one."""
+        self.info_retrieval.health.config.update({"hedge_sources": ["web"], "hedge_min_samples": 5})
+        for _ in range(5):
+            self.info_retrieval.health.record("web", 0.05, True)
+        
+        source = FlakySource(delays=[2, 0])
+        self.info_retrieval.sources["web"] = source
+        
+        start = time.time()
+        result = self.info_retrieval.search("anything", sources=["web"])
+        elapsed = time.time() - start
+        
+        self.assertEqual(result["results"]["web"]["call"], 2)
+        self.assertLess(elapsed, 1)
+        
+        stats = self.info_retrieval.health.get_stats()["web"]
+        self.assertEqual(stats["hedges"], 1)
+        self.assertEqual(stats["hedge_wins"], 1)
+    
+    def test_no_hedge_without_history(self):
+        """Test that hedging waits for enough latency samples."""
+        self.info_retrieval.health.config["hedge_sources"] = ["web"]
+        self.assertIsNone(self.info_retrieval.health.hedge_delay("web"))
+        self.assertIsNone(self.info_retrieval.health.hedge_delay("news"))
+
+
+class TestGazetteer(unittest.TestCase):
+    """Test cases for gazetteer-backed location extraction."""
+    
+    def setUp(self):
+        """Set up a small gazetteer."""
+        self.gazetteer = Gazetteer()
+        self.gazetteer.add("New York", "US", 18820000, "America/New_York", ["New York City", "NYC"])
+        self.gazetteer.add("York", "GB", 210000, "Europe/London")
+        self.gazetteer.add("Paris", "FR", 11020000, "Europe/Paris")
+        self.gazetteer.add("Paris", "US", 25000, "America/Chicago")
+        self.gazetteer.add("Nice", "FR", 342000, "Europe/Paris")
+        self.gazetteer.add("Sao Paulo", "BR", 22430000, "America/Sao_Paulo")
+    
+    def test_longest_match(self):
+        """Test that multi-word names win over the names they contain."""
+        self.assertEqual(self.gazetteer.extract("weather in new york city").name, "New York")
+        self.assertEqual(self.gazetteer.extract("weather in York").country, "GB")
+        self.assertEqual(self.gazetteer.extract("time in NYC").name, "New York")
+        self.assertEqual(self.gazetteer.extract("time in São Paulo").name, "Sao Paulo")
+    
+    def test_context(self):
+        """Test that indicators and capitalization decide which names count."""
+        self.assertEqual(self.gazetteer.extract("nice weather in Paris").name, "Paris")
+        self.assertEqual(self.gazetteer.extract("Paris forecast").name, "Paris")
+        self.assertIsNone(self.gazetteer.extract("nice weather today"))
+        self.assertEqual(len(self.gazetteer.find("nice weather in Paris")), 2)
+    
+    def test_disambiguation(self):
+        """Test that shared names resolve by population, then by recent use."""
+        self.assertEqual(self.gazetteer.extract("weather in Paris").country, "FR")
+        self.assertEqual([p.country for p in self.gazetteer.lookup("paris")], ["FR", "US"])
+        
+        texas = self.gazetteer.lookup("paris")[1]
+        for _ in range(3):
+            self.gazetteer.note_use(texas)
+        self.assertEqual(self.gazetteer.extract("weather in Paris").country, "US")
+    
+    def test_recency_interactive_only(self):
+        """Test that only searches, not background refreshes, count as recent uses."""
+        info_retrieval = InformationRetrieval()
+        info_retrieval.gazetteer = self.gazetteer
+        try:
+            for _ in range(3):
+                info_retrieval.query_source("time", "what time is it in Paris")
+            self.assertEqual(len(self.gazetteer._recent), 0)
+            
+            info_retrieval.search("what time is it in Paris", sources=["time"])
+            info_retrieval.search("what time is it in Paris", sources=["time"])
+            self.assertEqual(len(self.gazetteer._recent), 2)
+            
+            info_retrieval.search("anything", sources=["knowledge_base"])
+            self.assertEqual(len(self.gazetteer._recent), 2)
+        finally:
+            info_retrieval.close()
+    
+    def test_cache(self):
+        """Test that repeated queries reuse the scanned matches."""
+        self.gazetteer.extract("weather in Paris")
+        self.gazetteer.extract("weather in Paris")
+        self.assertEqual(self.gazetteer._scan.cache_info().hits, 1)
+    
+    def test_time_zone(self):
+        """Test that the time source answers for known places from the gazetteer."""
+        info_retrieval = InformationRetrieval()
+        try:
+            result = info_retrieval._get_time("what time is it in Tokyo")
+            self.assertEqual(result["location"], "Tokyo")
+            self.assertEqual(result["timezone"], "Asia/Tokyo")
+            self.assertEqual(result["utc_offset"], "+0900")
+            self.assertEqual(info_retrieval._extract_location("weather in New York"), "New York")
+        finally:
+            info_retrieval.close()
+
+
+class TestResultRanking(unittest.TestCase):
+    """Test cases for merging and ranking results across sources."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.ranker = ResultRanker()
+        self.web = {"results": [
+            {"title": f"Result {i}", "url": f"https://example.com/{i}", "snippet": "..."} for i in range(10)
+        ]}
+        self.knowledge_base = {"found": True, "results": [
+            {"title": "Artificial Intelligence", "content": "AI is...", "score": 6.0},
+            {"title": "Voice Recognition", "content": "Voice...", "score": 1.0}
+        ]}
+    
+    def test_merge_order(self):
+        """Test that candidates from all sources form one list, best first."""
+        ranked = self.ranker.rank({
+            "web": self.web,
+            "knowledge_base": self.knowledge_base,
+            "calculator": {"success": False},
+            "news": {"error": "timeout"}
+        }, max_results=4)
+        
+        self.assertEqual([c["source"] for c in ranked], ["knowledge_base", "web", "web", "web"])
+        self.assertEqual(ranked[0]["answer"], "AI is...")
+        self.assertEqual([c["score"] for c in ranked], sorted((c["score"] for c in ranked), reverse=True))
+    
+    def test_max_results(self):
+        """Test that max_results bounds the ranked list and result payloads."""
+        self.assertEqual(len(self.ranker.rank({"web": self.web}, max_results=3)), 3)
+        self.assertEqual(self.ranker.rank({"web": self.web}, max_results=0), [])
+        
+        trimmed = self.ranker.trim(self.web, 2)
+        self.assertEqual(len(trimmed["results"]), 2)
+        self.assertEqual(len(self.web["results"]), 10)
+    
+    def test_early_stop(self):
+        """Test that sources which can't reach the top k are never normalized."""
+        visited = []
+        normalize = self.ranker.normalizers["web"]
+        self.ranker.normalizers["web"] = lambda source, result: visited.append(source) or normalize(source, result)
+        
+        ranked = self.ranker.rank({
+            "web": self.web,
+            "time": {"current_time_12h": "10:00:00 AM"},
+            "calculator": {"success": True, "expression": "2+2", "result": 4}
+        }, max_results=2)
+        
+        self.assertEqual([c["source"] for c in ranked], ["time", "calculator"])
+        self.assertEqual(visited, [])
+    
+    def test_search_stops_waiting(self):
+        """Test that search returns once slow sources can't change the top k."""
+        info_retrieval = InformationRetrieval()
+        info_retrieval.sources["web"] = FlakySource(delays=[2])
+        try:
+            start = time.time()
+            result = info_retrieval.search("what time is it", sources=["time", "web"], max_results=1)
+            
+            self.assertLess(time.time() - start, 1)
+            self.assertEqual(result["ranked"][0]["source"], "time")
+            self.assertNotIn("web", result["results"])
+            
+            result = info_retrieval.search("what time is it", sources=["time", "knowledge_base"], max_results=5)
+            self.assertIn("knowledge_base", result["results"])
+        finally:
+            info_retrieval.close()
+
+
+class TestHistory(unittest.TestCase):
+    """Test cases for the bounded, persistent history."""
+    
+    def setUp(self):
+        """Set up a temporary log directory."""
+        self.directory = tempfile.mkdtemp()
+        self.log_path = os.path.join(self.directory, "history.log")
+    
+    def tearDown(self):
+        """Remove the temporary directory."""
+        shutil.rmtree(self.directory)
+    
+    def make_history(self, **kwargs):
+        return History(
+            kwargs.pop("max_entries", 3), kwargs.pop("log_path", self.log_path),
+            keys={"query": lambda entry: [entry["query"]]},
+            timings={"source": lambda entry: entry.get("latency", {}).items()},
+            **kwargs
+        )
+    
+    def test_ring_buffer_and_aggregates(self):
+        """Test that only recent entries are kept while aggregates cover everything."""
+        history = self.make_history(log_path=None)
+        for i, query in enumerate(["a", "b", "a", "c", "a"]):
+            history.append({"query": query, "latency": {"web": i}, "timestamp": 7200 + i * 1800})
+        
+        self.assertEqual([entry["query"] for entry in history.recent(10)], ["a", "c", "a"])
+        self.assertEqual(history.top("query", 2), [("a", 3), ("b", 1)])
+        self.assertEqual(history.latency("source")["web"], {"count": 5, "mean": 2.0, "max": 4})
+        self.assertEqual(history.per_hour(3, now=7200 + 2 * 3600 + 60), [(7200, 2), (10800, 2), (14400, 1)])
+    
+    def test_persistence(self):
+        """Test that entries and aggregates survive a restart."""
+        history = self.make_history()
+        for query in ["a", "b", "a"]:
+            history.append({"query": query})
+        history.close()
+        
+        # A write interrupted mid-line is ignored
+        with open(self.log_path, "a") as f:
+            f.write('{"query": "tor')
+        
+        history = self.make_history()
+        self.assertEqual(len(history), 3)
+        self.assertEqual(history.count("query", "a"), 2)
+        history.close()
+    
+    def test_compaction(self):
+        """Test that a long log is compacted without losing aggregates."""
+        history = self.make_history(max_log_entries=10)
+        for i in range(25):
+            history.append({"query": f"q{i % 4}", "latency": {"web": 1.0}})
+        history.close()
+        
+        with open(self.log_path) as f:
+            self.assertLessEqual(len(f.readlines()), 11)
+        
+        history = self.make_history(max_log_entries=10)
+        self.assertEqual(history.top("query", 1), [("q0", 7)])
+        self.assertEqual(history.latency("source")["web"]["count"], 25)
+        self.assertEqual([entry["query"] for entry in history.recent(3)], ["q2", "q3", "q0"])
+        self.assertEqual(history.latest("query", "q0")["query"], "q0")
+        history.close()
+
+    def test_latest_survives_compaction(self):
+        """Test that keys whose entries left the ring buffer keep their latest entry across a restart."""
+        info_retrieval = InformationRetrieval(history_path=self.log_path)
+        try:
+            info_retrieval.search_history.max_log_entries = 50
+            info_retrieval.sources["weather"] = lambda query: {"location": query}
+            info_retrieval.sources["web"] = lambda query: {"results": []}
+            for _ in range(3):
+                info_retrieval.search("weather in Paris")
+            for i in range(200):
+                info_retrieval.search(f"topic {i}")
+        finally:
+            info_retrieval.close()
+
+        info_retrieval = InformationRetrieval(history_path=self.log_path)
+        try:
+            history = info_retrieval.search_history
+            self.assertNotIn("weather in paris", [entry["query"].lower() for entry in history.recent(history.max_entries)])
+            self.assertEqual(history.latest("query", "weather in paris")["query"], "weather in Paris")
+            self.assertIn(("weather", "weather in Paris"), info_retrieval.prefetcher.frequent_queries())
+        finally:
+            info_retrieval.close()
+
+    def test_search_analytics(self):
+        """Test search analytics and that they order prefetch candidates."""
+        info_retrieval = InformationRetrieval(history_path=self.log_path)
+        try:
+            info_retrieval.sources["weather"] = lambda query: {"location": query}
+            info_retrieval.sources["news"] = lambda query: time.sleep(0.05) or {"articles": []}
+            for query in ["weather in Paris", "weather in Paris", "latest news", "latest news"]:
+                info_retrieval.search(query)
+            
+            analytics = info_retrieval.get_search_analytics()
+            self.assertEqual(analytics["top_queries"][0][1], 2)
+            self.assertGreater(analytics["source_latency"]["news"]["mean"], analytics["source_latency"]["weather"]["mean"])
+            self.assertEqual(analytics["queries_per_hour"][-1][1], 4)
+            
+            # The slower source saves more time when prefetched
+            self.assertEqual(info_retrieval.prefetcher.frequent_queries()[0], ("news", "latest news"))
+        finally:
+            info_retrieval.close()
+        
+        info_retrieval = InformationRetrieval(history_path=self.log_path)
+        try:
+            self.assertEqual(len(info_retrieval.get_search_history()), 4)
+        finally:
+            info_retrieval.close()
+
+
+class TestTaskExecutor(unittest.TestCase):
+    """Test cases for the bounded task worker pool."""
+    
+    def setUp(self):
+        """Set up a gate that holds workers busy until released."""
+        self.gate = threading.Event()
+        self.ran = []
+    
+    def tearDown(self):
+        """Release any blocked workers."""
+        self.gate.set()
+    
+    def work(self, key):
+        self.gate.wait(5)
+        self.ran.append(key)
+    
+    def fill(self, executor, count, start=0):
+        for i in range(start, start + count):
+            executor.submit(i, self.work, i)
+    
+    def test_fixed_workers(self):
+        """Test that workers are capped and queued work runs in order."""
+        executor = TaskExecutor(workers=2, queue_size=10)
+        self.fill(executor, 6)
+        time.sleep(0.1)
+        
+        stats = executor.get_stats()
+        self.assertEqual(stats["workers"], 2)
+        self.assertEqual(stats["active"], 2)
+        self.assertEqual(stats["queue_depth"], 4)
+        
+        self.gate.set()
+        executor.shutdown()
+        self.assertEqual(sorted(self.ran), list(range(6)))
+        self.assertEqual(executor.get_stats()["completed"], 6)
+        self.assertGreater(executor.get_stats()["utilization"], 0)
+    
+    def test_reject(self):
+        """Test that a full queue rejects new work."""
+        executor = TaskExecutor(workers=1, queue_size=2, policy="reject")
+        self.fill(executor, 1)
+        time.sleep(0.05)
+        self.fill(executor, 2, start=1)
+        
+        with self.assertRaises(QueueFullError):
+            executor.submit("extra", self.work, "extra")
+        self.assertEqual(executor.get_stats()["rejected"], 1)
+    
+    def test_block(self):
+        """Test that a blocking submit waits for room, then times out."""
+        executor = TaskExecutor(workers=1, queue_size=1, policy="block", block_timeout=0.1)
+        self.fill(executor, 2)
+        
+        start = time.time()
+        with self.assertRaises(QueueFullError):
+            executor.submit("extra", self.work, "extra")
+        self.assertGreaterEqual(time.time() - start, 0.1)
+        
+        threading.Timer(0.05, self.gate.set).start()
+        executor.block_timeout = 5
+        executor.submit("late", self.work, "late")
+        executor.shutdown()
+        self.assertIn("late", self.ran)
+    
+    def test_drop_oldest(self):
+        """Test that the oldest queued item is dropped to make room."""
+        dropped = []
+        executor = TaskExecutor(workers=1, queue_size=2, policy="drop_oldest", on_drop=dropped.append)
+        self.fill(executor, 1)
+        time.sleep(0.05)
+        self.fill(executor, 3, start=1)
+        
+        self.assertEqual(dropped, [1])
+        self.gate.set()
+        executor.shutdown()
+        self.assertEqual(self.ran, [0, 2, 3])
+    
+    def test_task_automation_backpressure(self):
+        """Test that execute_task keeps its return shape under backpressure."""
+        task_automation = TaskAutomation(executor_config={"workers": 1, "queue_size": 1})
+        task_automation.add_task("wait", "Wait for the gate", [], lambda: self.gate.wait(5))
+        
+        results = [task_automation.execute_task("wait")]
+        time.sleep(0.05)
+        results += [task_automation.execute_task("wait") for _ in range(2)]
+        self.assertTrue(results[0]["success"])
+        self.assertFalse(results[2]["success"])
+        self.assertIn("rejected", results[2]["message"])
+        
+        stats = task_automation.get_executor_stats()
+        self.assertEqual(stats["rejected"], 1)
+        self.gate.set()
+
+
+class TestTaskPriority(unittest.TestCase):
+    """Test cases for priority classes, aging and reserved interactive capacity."""
+    
+    def setUp(self):
+        """Set up a gate that holds workers busy until released."""
+        self.gate = threading.Event()
+        self.ran = []
+    
+    def tearDown(self):
+        """Release any blocked workers."""
+        self.gate.set()
+    
+    def work(self, key):
+        self.gate.wait(5)
+        self.ran.append(key)
+    
+    def test_priority_order(self):
+        """Test that queued items run best priority first, FIFO within a class."""
+        executor = TaskExecutor(workers=1, queue_size=10)
+        executor.submit("first", self.work, "first")
+        time.sleep(0.05)
+        for key, priority in [("b1", "background"), ("n1", "normal"), ("b2", "background"),
+                              ("i1", "interactive"), ("n2", "normal")]:
+            executor.submit(key, self.work, key, priority=priority)
+        
+        self.gate.set()
+        executor.shutdown()
+        self.assertEqual(self.ran, ["first", "i1", "n1", "n2", "b1", "b2"])
+        
+        with self.assertRaises(ValueError):
+            TaskExecutor().submit("x", self.work, "x", priority="urgent")
+    
+    def test_aging(self):
+        """Test that long-waiting low-priority items overtake fresh ones."""
+        executor = TaskExecutor(workers=1, queue_size=10, aging=0.05)
+        executor.submit("first", self.work, "first")
+        time.sleep(0.05)
+        executor.submit("old", self.work, "old", priority="background")
+        time.sleep(0.2)
+        executor.submit("new", self.work, "new", priority="interactive")
+        
+        self.gate.set()
+        executor.shutdown()
+        self.assertEqual(self.ran, ["first", "old", "new"])
+    
+    def test_reserved_workers(self):
+        """Test that interactive items start at once behind a backlog."""
+        executor = TaskExecutor(workers=2, queue_size=100, reserved=1)
+        for i in range(10):
+            executor.submit(i, self.work, i, priority="background")
+        time.sleep(0.05)
+        self.assertEqual(executor.get_stats()["active"], 1)
+        
+        started = threading.Event()
+        executor.submit("interactive", started.set, priority="interactive")
+        self.assertTrue(started.wait(1))
+        self.assertEqual(self.ran, [])
+    
+    def test_wait_percentiles_under_mixed_load(self):
+        """Test p99 queue wait per class with a background backlog."""
+        executor = TaskExecutor(workers=4, queue_size=1000, reserved=1)
+        for _ in range(150):
+            executor.submit("bg", time.sleep, 0.01, priority="background")
+        for _ in range(20):
+            executor.submit("normal", time.sleep, 0.005, priority="normal")
+            executor.submit("cmd", time.sleep, 0.001, priority="interactive")
+            time.sleep(0.01)
+        executor.shutdown()
+        
+        stats = executor.get_stats()
+        self.assertEqual(stats["completed"], 190)
+        self.assertLess(stats["wait_p99"]["interactive"], 0.02)
+        self.assertLess(stats["wait_p99"]["normal"], stats["wait_p99"]["background"])
+        self.assertGreater(stats["wait_p99"]["background"], 0.2)
+    
+    def test_task_and_routine_priority(self):
+        """Test that priorities reach the executor from tasks and routine steps."""
+        task_automation = TaskAutomation()
+        task_automation.add_task("echo", "Echo", ["value"], lambda value: {"success": True})
+        
+        result = task_automation.execute_task("echo", {"value": 1}, priority="interactive")
+        self.assertEqual(task_automation.get_task_status(result["task_id"])["priority"], "interactive")
+        self.assertFalse(task_automation.execute_task("echo", {"value": 1}, priority="urgent")["success"])
+        
+        # Lanes that don't order by priority validate it too, before the task is recorded
+        tasks = len(task_automation.running_tasks)
+        for task_name, params in [("check_weather", {"location": "Paris"}), ("play_music", {"genre": "jazz"}),
+                                  ("turn_on_lights", {"room": "hall"})]:
+            result = task_automation.execute_task(task_name, params, priority="bogus")
+            self.assertFalse(result["success"])
+            self.assertIn("Unknown task priority", result["message"])
+        self.assertEqual(len(task_automation.running_tasks), tasks)
+        
+        task_automation.add_routine("mixed", "Mixed priorities", [
+            {"id": "a", "task": "echo", "params": {"value": 1}},
+            {"id": "b", "task": "echo", "params": {"value": 2}, "priority": "interactive"}
+        ])
+        report = task_automation.execute_routine("mixed", timeout=5, priority="background")
+        priorities = [task_automation.get_task_status(step["task_id"])["priority"] for step in report["results"]]
+        self.assertEqual(priorities, ["background", "interactive"])
+
+
+class TestTaskHandle(unittest.TestCase):
+    """Test cases for unique task IDs and task handles."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.task_automation = TaskAutomation()
+        self.task_automation.add_task("echo", "Return a value", ["value"], lambda value: {"success": True, "value": value})
+        self.task_automation.add_task("fail", "Raise an error", [], lambda: 1 / 0)
+    
+    def test_unique_ids(self):
+        """Test that tasks started in the same second get distinct, increasing IDs."""
+        ids = [self.task_automation.execute_task("echo", {"value": i})["task_id"] for i in range(5)]
+        
+        self.assertEqual(len(set(ids)), 5)
+        self.assertEqual(ids, sorted(ids, key=lambda task_id: int(task_id.rsplit("_", 1)[1])))
+        for task_id in ids:
+            self.assertIn(task_id, self.task_automation.running_tasks)
+    
+    def test_wait_and_callback(self):
+        """Test waiting on a handle and completion callbacks."""
+        finished = []
+        handle = self.task_automation.execute_task("echo", {"value": 42})["handle"]
+        handle.add_done_callback(finished.append)
+        
+        self.assertTrue(handle.wait(5))
+        self.assertEqual(handle.result()["value"], 42)
+        self.assertEqual(handle.status(), "completed")
+        self.assertEqual(self.task_automation.get_task_status(handle.task_id)["status"], "completed")
+        time.sleep(0.01)
+        self.assertEqual(finished, [handle])
+    
+    def test_failure(self):
+        """Test that a failing task resolves its handle with the error."""
+        handle = self.task_automation.execute_task("fail")["handle"]
+        
+        self.assertTrue(handle.wait(5))
+        self.assertEqual(handle.status(), "failed")
+        with self.assertRaises(ZeroDivisionError):
+            handle.result()
+        self.assertEqual(self.task_automation.get_task_status(handle.task_id)["status"], "failed")
+    
+    def test_timeout(self):
+        """Test that wait returns False while the task is still running."""
+        gate = threading.Event()
+        self.task_automation.add_task("slow", "Wait for a gate", [], lambda: gate.wait(5))
+        handle = self.task_automation.execute_task("slow")["handle"]
+        
+        self.assertFalse(handle.wait(0.05))
+        self.assertEqual(handle.status(), "pending")
+        gate.set()
+        self.assertTrue(handle.wait(5))
+    
+    def test_awaitable(self):
+        """Test awaiting a handle from asyncio code."""
+        async def run():
+            return await self.task_automation.execute_task("echo", {"value": "async"})["handle"]
+        
+        self.assertEqual(asyncio.run(run())["value"], "async")
+    
+    def test_submit_error(self):
+        """Test that a task that fails to queue is forgotten, journaled and counted as rejected."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        task_automation = TaskAutomation(journal_path=os.path.join(directory, "journal.db"))
+        task_automation.add_task("echo", "Return a value", ["value"], lambda value: {"success": True})
+        task_automation.executor.shutdown()
+        tasks = len(task_automation.running_tasks)
+        
+        result = task_automation.execute_task("echo", {"value": 1})
+        self.assertFalse(result["success"])
+        self.assertIn("Error executing task", result["message"])
+        self.assertEqual(len(task_automation.running_tasks), tasks)
+        self.assertEqual(task_automation.get_task_metrics("echo")["echo"]["outcomes"], {"rejected": 1})
+        
+        replayed = list(task_automation.journal.replay().values())[-1]
+        self.assertEqual((replayed["name"], replayed["status"]), ("echo", "rejected"))
+        task_automation.close()
+
+
+class TestTaskRegistry(unittest.TestCase):
+    """Test cases for task records and their retention policy."""
+    
+    def setUp(self):
+        """Set up a registry with small limits on a fake clock."""
+        self.clock = FakeClock()
+        self.registry = TaskRegistry({"max_completed": 3, "max_age": 10, "max_failed": 3, "failed_max_age": 100},
+                                     clock=self.clock)
+    
+    def run_task(self, task_id, status="completed"):
+        record = TaskRecord(task_id, "task", {"value": task_id})
+        self.registry.add(record)
+        self.registry.finish(record, status, result={"success": True} if status == "completed" else None,
+                             error=None if status == "completed" else "boom")
+        return record
+    
+    def test_record(self):
+        """Test the compact record and its status dict."""
+        record = self.run_task("t1")
+        self.assertFalse(hasattr(record, "__dict__"))
+        status = record.to_dict()
+        self.assertEqual(status["status"], "completed")
+        self.assertEqual(status["result"], {"success": True})
+        self.assertNotIn("error", status)
+    
+    def test_max_entries(self):
+        """Test that the oldest finished tasks are evicted first, active ones never."""
+        active = TaskRecord("active", "task", {})
+        self.registry.add(active)
+        for i in range(5):
+            self.run_task(f"t{i}")
+        
+        self.assertNotIn("t1", self.registry)
+        self.assertIn("t2", self.registry)
+        self.assertIs(self.registry.get("active"), active)
+        self.assertEqual(self.registry.get_stats()["evicted"], 2)
+        self.assertEqual(len(self.registry), 4)
+    
+    def test_max_age_keeps_failures_longer(self):
+        """Test age-based eviction with a longer limit for failures."""
+        self.run_task("done")
+        self.run_task("broken", "failed")
+        
+        self.clock.advance(11)
+        self.registry.prune()
+        self.assertNotIn("done", self.registry)
+        self.assertEqual(self.registry.get("broken").error, "boom")
+        
+        self.clock.advance(90)
+        self.run_task("later", "dropped")
+        self.assertNotIn("broken", self.registry)
+        self.assertIn("later", self.registry)
+    
+    def test_task_automation_retention(self):
+        """Test that running_tasks stays bounded as tasks complete."""
+        task_automation = TaskAutomation(retention_config={"max_completed": 2})
+        task_automation.add_task("echo", "Echo", ["value"], lambda value: {"success": True, "value": value})
+        
+        results = [task_automation.execute_task("echo", {"value": i}) for i in range(5)]
+        for result in results:
+            result["handle"].wait(5)
+        
+        self.assertEqual(len(task_automation.running_tasks), 2)
+        self.assertFalse(task_automation.get_task_status(results[0]["task_id"]).get("success", True))
+        self.assertEqual(task_automation.get_task_status(results[4]["task_id"])["result"]["value"], 4)
+
+
+class TestCancellation(unittest.TestCase):
+    """Test cases for cancelling, timing out and abandoning tasks."""
+    
+    def setUp(self):
+        """Set up a one-worker task pool with cooperative and hung tasks."""
+        self.gate = threading.Event()
+        self.task_automation = TaskAutomation(executor_config={"workers": 1, "reserved": 0})
+        self.task_automation.add_task(
+            "cooperative", "Wait until cancelled", [],
+            lambda cancel_token: {"success": True, "cancelled": cancel_token.wait(5)})
+        self.task_automation.add_task("hung", "Ignore cancellation", [], lambda: self.gate.wait(5))
+        self.task_automation.add_task("echo", "Echo", ["value"], lambda value: value)
+    
+    def tearDown(self):
+        """Release hung tasks."""
+        self.gate.set()
+    
+    def test_cooperative_cancel(self):
+        """Test that a task taking a token is cancelled cooperatively."""
+        result = self.task_automation.execute_task("cooperative")
+        time.sleep(0.05)
+        
+        cancelled = self.task_automation.cancel(result["task_id"], "User changed their mind")
+        self.assertTrue(cancelled["success"])
+        self.assertEqual(cancelled["status"], "cancelled")
+        self.assertEqual(result["handle"].status(), "cancelled")
+        self.assertEqual(self.task_automation.get_task_status(result["task_id"])["error"], "User changed their mind")
+        self.assertFalse(self.task_automation.cancel(result["task_id"])["success"])
+        self.assertFalse(self.task_automation.cancel("unknown")["success"])
+    
+    def test_abandon_frees_capacity(self):
+        """Test that a hung task is abandoned and a replacement worker takes over."""
+        hung = self.task_automation.execute_task("hung")
+        queued = self.task_automation.execute_task("echo", {"value": 1})
+        time.sleep(0.05)
+        
+        self.assertEqual(self.task_automation.cancel(hung["task_id"])["status"], "abandoned")
+        self.assertEqual(queued["handle"].result(1), 1)
+        stats = self.task_automation.get_executor_stats()
+        self.assertEqual(stats["abandoned"], 1)
+        self.assertEqual(stats["abandoned_running"], 1)
+        
+        # The abandoned thread exits once its call finally returns
+        self.gate.set()
+        time.sleep(0.05)
+        self.assertEqual(self.task_automation.get_executor_stats()["abandoned_running"], 0)
+        self.assertEqual(self.task_automation.get_task_status(hung["task_id"])["status"], "abandoned")
+    
+    def test_cancel_queued(self):
+        """Test that a queued task is removed before it runs."""
+        ran = []
+        self.task_automation.add_task("record", "Record", [], lambda: ran.append(1))
+        self.task_automation.execute_task("hung")
+        queued = self.task_automation.execute_task("record")
+        
+        self.assertEqual(self.task_automation.cancel(queued["task_id"])["status"], "cancelled")
+        self.assertEqual(self.task_automation.get_executor_stats()["discarded"], 1)
+        self.gate.set()
+        time.sleep(0.05)
+        self.assertEqual(ran, [])
+    
+    def test_timeouts(self):
+        """Test per-task timeouts for cooperative and hung tasks."""
+        cooperative = self.task_automation.execute_task("cooperative", timeout=0.1)
+        with self.assertRaises(TaskTimeoutError):
+            cooperative["handle"].result(2)
+        self.assertEqual(self.task_automation.get_task_status(cooperative["task_id"])["status"], "timed_out")
+        
+        self.task_automation.tasks["hung"]["timeout"] = 0.1
+        start = time.time()
+        hung = self.task_automation.execute_task("hung")
+        with self.assertRaises(TaskTimeoutError):
+            hung["handle"].result(2)
+        self.assertLess(time.time() - start, 1)
+        self.assertEqual(self.task_automation.get_task_status(hung["task_id"])["status"], "abandoned")
+        self.assertEqual(self.task_automation.execute_task("echo", {"value": 2})["handle"].result(1), 2)
+    
+    def test_routine_timeout_and_cancel(self):
+        """Test that routine timeouts and cancel() stop remaining steps."""
+        self.task_automation.add_routine("slow", "Slow routine", [
+            {"id": "wait", "task": "cooperative"},
+            {"id": "after", "task": "echo", "params": {"value": 3}, "depends_on": ["wait"]}
+        ], timeout=0.1)
+        
+        report = self.task_automation.execute_routine("slow", timeout=2)
+        statuses = {step["step"]: step["status"] for step in report["results"]}
+        self.assertFalse(report["success"])
+        self.assertIn("timed out", report["message"])
+        self.assertEqual(statuses, {"wait": "cancelled", "after": "cancelled"})
+        
+        self.task_automation.routines["slow"]["timeout"] = None
+        started = self.task_automation.execute_routine("slow", wait=False)
+        time.sleep(0.05)
+        self.assertTrue(self.task_automation.cancel(started["routine_id"])["success"])
+        self.assertIn("cancelled", started["handle"].result(2)["message"])
+    
+    def test_token_and_watchdog(self):
+        """Test the cancellation token and deadline timer on their own."""
+        token = CancellationToken()
+        token.raise_if_cancelled()
+        token.cancel("first")
+        token.cancel("second")
+        self.assertTrue(token.cancelled)
+        self.assertEqual(token.reason, "first")
+        
+        fired = []
+        watchdog = Watchdog()
+        entry = watchdog.call_later(0.05, lambda: fired.append("cancelled"))
+        watchdog.call_later(0.1, lambda: fired.append("kept"))
+        Watchdog.cancel(entry)
+        time.sleep(0.3)
+        self.assertEqual(fired, ["kept"])
+        
+        watchdog.call_later(60, lambda: fired.append("dropped"))
+        thread = watchdog._thread
+        watchdog.close()
+        self.assertFalse(thread.is_alive())
+        watchdog.call_later(0, lambda: fired.append("after close"))
+        time.sleep(0.05)
+        self.assertEqual(fired, ["kept"])
+        
+        task_automation = TaskAutomation()
+        task_automation.add_task("slow", "Slow", [], lambda: time.sleep(0.01), timeout=5)
+        task_automation.execute_task("slow")["handle"].wait(2)
+        thread = task_automation.watchdog._thread
+        task_automation.close()
+        self.assertFalse(thread.is_alive())
+
+
+class TestTaskJournal(unittest.TestCase):
+    """Test cases for the crash-safe task journal."""
+    
+    def setUp(self):
+        """Set up a temporary journal file."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.path = os.path.join(self.temp_dir, "journal.db")
+    
+    def crashed_journal(self):
+        """Write a journal as left by a process that died mid-routine."""
+        journal = TaskJournal(self.path)
+        journal.record("done_1", "enqueue", {"name": "turn_off_lights", "params": {"room": "hall"}})
+        journal.record("done_1", "start")
+        journal.record("done_1", "finish", {"result": {"success": True}, "duration": 0.5})
+        journal.record("lights_2", "enqueue", {"name": "turn_on_lights", "params": {"room": "bedroom"}})
+        journal.record("lights_2", "start")
+        journal.record("music_3", "enqueue", {"name": "play_music", "params": {"genre": "jazz", "source": "radio"}})
+        journal.close()
+    
+    def test_replay(self):
+        """Test that replay rebuilds the last state of each task."""
+        self.crashed_journal()
+        journal = TaskJournal(self.path)
+        tasks = journal.replay()
+        journal.close()
+        
+        self.assertEqual(list(tasks), ["done_1", "lights_2", "music_3"])
+        self.assertEqual([task["status"] for task in tasks.values()], ["completed", "running", "queued"])
+        self.assertEqual(tasks["done_1"]["result"], {"success": True})
+        self.assertEqual(tasks["lights_2"]["params"], {"room": "bedroom"})
+    
+    def test_group_commit(self):
+        """Test that events are batched into few commits and flush() waits for them."""
+        journal = TaskJournal(self.path, {"commit_interval": 0.05})
+        for i in range(100):
+            journal.record(f"t{i}", "enqueue", {"name": "echo"})
+        self.assertTrue(journal.flush(2))
+        
+        stats = journal.get_stats()
+        self.assertEqual(stats["events"], 100)
+        self.assertEqual(stats["pending"], 0)
+        self.assertLessEqual(stats["commits"], 3)
+        journal.close()
+    
+    def test_compaction(self):
+        """Test that only the most recent finished tasks are kept on open."""
+        journal = TaskJournal(self.path)
+        for i in range(10):
+            journal.record(f"t{i}", "enqueue", {"name": "echo"})
+            journal.record(f"t{i}", "finish")
+        journal.record("open", "enqueue", {"name": "echo"})
+        journal.close()
+        
+        journal = TaskJournal(self.path, {"keep_finished": 3})
+        self.assertEqual(list(journal.replay()), ["t7", "t8", "t9", "open"])
+        journal.close()
+    
+    def test_restart_recovery(self):
+        """Test that TaskAutomation restores finished tasks and recovers interrupted ones."""
+        self.crashed_journal()
+        task_automation = TaskAutomation(journal_path=self.path, recover_tasks=True)
+        
+        self.assertEqual(task_automation.get_task_status("done_1")["status"], "completed")
+        self.assertEqual(task_automation.get_task_history()[0]["task_id"], "done_1")
+        
+        recovered = {entry["task_id"]: entry for entry in task_automation.recovered_tasks}
+        self.assertEqual(recovered["lights_2"]["action"], "rerun")
+        self.assertEqual(recovered["music_3"]["action"], "none")
+        self.assertEqual(task_automation.get_task_status("music_3")["status"], "interrupted")
+        
+        rerun = recovered["lights_2"]["recovery_task_id"]
+        self.assertEqual(task_automation.get_task_status(rerun)["params"], {"room": "bedroom"})
+        task_automation.close()
+        
+        # Interrupted tasks are recorded as such and not recovered twice
+        restarted = TaskAutomation(journal_path=self.path, recover_tasks=True)
+        self.assertNotIn("lights_2", [entry["task_id"] for entry in restarted.recovered_tasks])
+        self.assertEqual(restarted.get_task_status("lights_2")["status"], "interrupted")
+        restarted.close()
+    
+    def test_journaled_task_lifecycle(self):
+        """Test that executed tasks are journaled and compensated when interrupted."""
+        task_automation = TaskAutomation(journal_path=self.path)
+        task_automation.add_task("echo", "Echo", ["value"], lambda value: {"success": True, "value": value})
+        task_automation.add_task("open_door", "Open a door", [], lambda: None, compensate="close_door")
+        task_automation.add_task("close_door", "Close a door", [], lambda: {"success": True})
+        
+        handle = task_automation.execute_task("echo", {"value": 7})["handle"]
+        handle.wait(5)
+        task_automation.journal.flush()
+        state = task_automation.journal.replay()[handle.task_id]
+        self.assertEqual(state["status"], "completed")
+        self.assertEqual(state["result"], {"success": True, "value": 7})
+        
+        task_automation.journal.record("door_1", "enqueue", {"name": "open_door", "params": {}})
+        recovered = task_automation._replay_journal(True, False)
+        self.assertEqual(recovered[0]["action"], "compensated")
+        self.assertEqual(task_automation.get_task_status(recovered[0]["recovery_task_id"])["name"], "close_door")
+        task_automation.close()
+
+    def test_unserializable_values(self):
+        """Test that values JSON can't hold are journaled as placeholders and not replayed."""
+        journal = TaskJournal(self.path)
+        journal.record("upload_1", "enqueue", {"name": "turn_on_lights",
+                                               "params": {"room": "hall", "data": b"\x00" * 4096}})
+        journal.record("upload_1", "start")
+        journal.record("keyed_2", "enqueue", {"name": "turn_on_lights", "params": {(1, 2): "tuple key"}})
+        journal.close()
+
+        with sqlite3.connect(self.path) as conn:
+            size = conn.execute("SELECT MAX(LENGTH(data)) FROM task_events").fetchone()[0]
+        self.assertLess(size, 200)
+
+        journal = TaskJournal(self.path)
+        tasks = journal.replay()
+        journal.close()
+        self.assertEqual(tasks["upload_1"]["params"]["data"], {"__unserializable__": "bytes", "size": 4096})
+        self.assertEqual(tasks["upload_1"]["params"]["room"], "hall")
+        self.assertEqual(tasks["keyed_2"]["params"]["__unserializable__"], "dict")
+        self.assertFalse(TaskJournal.is_complete(tasks["upload_1"]["params"]))
+        self.assertTrue(TaskJournal.is_complete({"room": "hall", "scenes": [{"dim": 3}]}))
+
+        task_automation = TaskAutomation(journal_path=self.path, recover_tasks=True)
+        recovered = {entry["task_id"]: entry for entry in task_automation.recovered_tasks}
+        self.assertEqual(recovered["upload_1"]["action"], "unrecoverable")
+        self.assertIsNone(recovered["upload_1"]["recovery_task_id"])
+        task_automation.close()
+
+
+class TestCommandCoalescing(unittest.TestCase):
+    """Test cases for merging repeated device commands."""
+    
+    def setUp(self):
+        """Set up counting light commands on a two-worker pool."""
+        self.calls = []
+        self.gate = threading.Event()
+        self.task_automation = TaskAutomation(executor_config={"workers": 2, "reserved": 0})
+        
+        def device(command):
+            def call(room):
+                self.calls.append((command, room))
+                time.sleep(0.1)
+                return {"success": room != "broken", "message": f"{command} {room}"}
+            return call
+        
+        self.task_automation.add_task("lights_on", "Lights on", ["room"], device("on"),
+                                      coalesce=True, opposite="lights_off")
+        self.task_automation.add_task("lights_off", "Lights off", ["room"], device("off"),
+                                      coalesce=True, opposite="lights_on")
+        self.task_automation.add_task("busy", "Hold a worker", [], lambda: self.gate.wait(5))
+    
+    def tearDown(self):
+        self.gate.set()
+    
+    def test_burst(self):
+        """Test that a concurrent burst of duplicates calls the device once per command."""
+        rooms = ["bedroom"] * 20 + ["kitchen"] * 5
+        results = [None] * len(rooms)
+        
+        def send(i):
+            results[i] = self.task_automation.execute_task("lights_on", {"room": rooms[i]})
+        threads = [threading.Thread(target=send, args=(i,)) for i in range(len(rooms))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        outcomes = [result["handle"].result(2) for result in results]
+        self.assertEqual(sorted(self.calls), [("on", "bedroom"), ("on", "kitchen")])
+        self.assertEqual(len({result["task_id"] for result in results}), 2)
+        self.assertEqual(outcomes[0], {"success": True, "message": "on bedroom"})
+        self.assertTrue(all(outcome is outcomes[0] for outcome in outcomes[:20]))
+        self.assertEqual(self.task_automation.get_coalescing_stats()["coalesced"], 23)
+    
+    def test_window(self):
+        """Test that repeats share a success within the window but failures are retried."""
+        self.task_automation.coalescer.window = 0.2
+        self.task_automation.execute_task("lights_on", {"room": "hall"})["handle"].wait(2)
+        repeat = self.task_automation.execute_task("lights_on", {"room": "hall"})
+        self.assertTrue(repeat["coalesced"])
+        
+        time.sleep(0.25)
+        self.task_automation.execute_task("lights_on", {"room": "hall"})["handle"].wait(2)
+        self.assertEqual(self.calls, [("on", "hall"), ("on", "hall")])
+        
+        for _ in range(2):
+            self.task_automation.execute_task("lights_on", {"room": "broken"})["handle"].wait(2)
+        self.assertEqual(self.calls.count(("on", "broken")), 2)
+    
+    def test_opposite_supersedes(self):
+        """Test that off cancels a queued on, and on after off runs again."""
+        for _ in range(2):
+            self.task_automation.execute_task("busy")
+        on = self.task_automation.execute_task("lights_on", {"room": "bedroom"})
+        off = self.task_automation.execute_task("lights_off", {"room": "bedroom"})
+        
+        self.assertEqual(on["handle"].status(), "cancelled")
+        self.assertEqual(self.task_automation.get_task_status(on["task_id"])["status"], "superseded")
+        self.gate.set()
+        off["handle"].wait(2)
+        
+        again = self.task_automation.execute_task("lights_on", {"room": "bedroom"})
+        self.assertNotIn("coalesced", again)
+        again["handle"].wait(2)
+        self.assertEqual(self.calls, [("off", "bedroom"), ("on", "bedroom")])
+        self.assertEqual(self.task_automation.get_coalescing_stats()["superseded"], 1)
+
+
+class TestDeviceDispatch(unittest.TestCase):
+    """Test cases for device rate limits and batched device commands."""
+    
+    def setUp(self):
+        """Set up a batching hub and a rate-limited device."""
+        self.batches = []
+        self.calls = []
+        self.task_automation = TaskAutomation(executor_config={"workers": 4, "reserved": 0})
+        
+        def hub(commands):
+            self.batches.append([command["params"]["room"] for command in commands])
+            if any(command["params"]["room"] == "broken" for command in commands):
+                raise RuntimeError("Hub unavailable")
+            return [{"success": True, "room": command["params"]["room"]} for command in commands]
+        
+        def thermostat(level):
+            self.calls.append(time.monotonic())
+            return {"success": True, "level": level}
+        
+        self.task_automation.add_device("test_hub", batch_handler=hub, batch_window=0.05)
+        self.task_automation.add_device("thermostat", rate=20, burst=2)
+        self.task_automation.add_task("dim", "Dim lights", ["room"], lambda room: None, device="test_hub")
+        self.task_automation.add_task("heat", "Set heating", ["level"], thermostat, device="thermostat")
+    
+    def test_token_bucket(self):
+        """Test that a bucket allows a burst, then spaces calls at its rate."""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, burst=3, clock=clock)
+        self.assertEqual([bucket.reserve() for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(bucket.reserve(), 0.5)
+        self.assertAlmostEqual(bucket.reserve(), 1.0)
+        
+        clock.advance(10)
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertRaises(ValueError, TokenBucket, 0)
+    
+    def test_batching(self):
+        """Test that commands sent within the window go to the device in one call."""
+        rooms = [f"room {i}" for i in range(10)]
+        results = [self.task_automation.execute_task("dim", {"room": room}) for room in rooms]
+        outcomes = [result["handle"].result(2) for result in results]
+        
+        self.assertEqual(self.batches, [rooms])
+        self.assertEqual([outcome["room"] for outcome in outcomes], rooms)
+        self.assertEqual(self.task_automation.get_task_status(results[3]["task_id"])["status"], "completed")
+        self.assertEqual(self.task_automation.get_task_history(1)[0]["name"], "dim")
+        
+        stats = self.task_automation.get_device_stats()["test_hub"]
+        self.assertEqual((stats["calls"], stats["commands"], stats["max_batch"]), (1, 10, 10))
+    
+    def test_batch_errors_and_cancel(self):
+        """Test that a failed batch fails its commands and cancelled commands are left out."""
+        first = self.task_automation.execute_task("dim", {"room": "broken"})
+        second = self.task_automation.execute_task("dim", {"room": "hall"})
+        cancelled = self.task_automation.execute_task("dim", {"room": "attic"})
+        self.assertTrue(self.task_automation.cancel(cancelled["task_id"])["success"])
+        
+        for result in (first, second):
+            self.assertRaises(RuntimeError, result["handle"].result, 2)
+        self.assertEqual(self.batches, [["broken", "hall"]])
+        self.assertEqual(self.task_automation.get_task_status(second["task_id"])["status"], "failed")
+        self.assertEqual(self.task_automation.get_task_status(cancelled["task_id"])["status"], "cancelled")
+    
+    def test_max_batch(self):
+        """Test that a full batch is sent without waiting for the window."""
+        self.task_automation.add_device("small_hub", batch_handler=lambda commands: [None] * len(commands),
+                                        batch_window=5, max_batch=3)
+        self.task_automation.add_task("ping", "Ping", ["room"], lambda room: None, device="small_hub")
+        handles = [self.task_automation.execute_task("ping", {"room": str(i)})["handle"] for i in range(3)]
+        self.assertTrue(all(handle.wait(2) for handle in handles))
+        self.assertFalse(self.task_automation.add_device("small_hub"))
+    
+    def test_rate_limit(self):
+        """Test that calls beyond the burst are spaced out at the device's rate."""
+        handles = [self.task_automation.execute_task("heat", {"level": i})["handle"] for i in range(6)]
+        for handle in handles:
+            handle.result(5)
+        
+        self.calls.sort()
+        self.assertGreaterEqual(self.calls[-1] - self.calls[0], 0.18)
+        stats = self.task_automation.get_device_stats()["thermostat"]
+        self.assertEqual(stats["calls"], 6)
+        self.assertGreaterEqual(stats["throttled"], 3)
+
+
+class TestAsyncTasks(unittest.TestCase):
+    """Test cases for async task functions on the event loop."""
+    
+    def setUp(self):
+        """Set up async and sync tasks on a two-worker pool."""
+        self.task_automation = TaskAutomation(executor_config={"workers": 2, "reserved": 0})
+        
+        async def fetch(delay):
+            await asyncio.sleep(delay)
+            return {"success": True, "delay": delay}
+        
+        async def broken():
+            await asyncio.sleep(0)
+            raise ValueError("No response")
+        
+        self.task_automation.add_task("fetch", "Fetch", ["delay"], fetch)
+        self.task_automation.add_task("broken", "Broken", [], broken)
+        self.task_automation.add_task("sync_fetch", "Sync fetch", ["delay"],
+                                      lambda delay: time.sleep(delay) or {"success": True})
+    
+    def tearDown(self):
+        """Shut the automation down."""
+        self.task_automation.close()
+    
+    def test_concurrency(self):
+        """Test that many async tasks wait concurrently without worker threads."""
+        threads = threading.active_count()
+        start = time.monotonic()
+        results = [self.task_automation.execute_task("fetch", {"delay": 0.3}) for _ in range(500)]
+        outcomes = [result["handle"].result(5) for result in results]
+        
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(outcomes[0], {"success": True, "delay": 0.3})
+        self.assertLessEqual(threading.active_count(), threads + 1)
+        stats = self.task_automation.get_executor_stats()
+        self.assertEqual(stats["async"]["completed"], 500)
+        self.assertEqual(stats["submitted"], 0)
+    
+    def test_status_and_history(self):
+        """Test that async and sync tasks report status the same way."""
+        async_result = self.task_automation.execute_task("fetch", {"delay": 0.1})
+        sync_result = self.task_automation.execute_task("sync_fetch", {"delay": 0.1})
+        time.sleep(0.02)
+        self.assertEqual(self.task_automation.get_task_status(async_result["task_id"])["status"], "running")
+        
+        for result in (async_result, sync_result):
+            result["handle"].wait(2)
+            status = self.task_automation.get_task_status(result["task_id"])
+            self.assertEqual(status["status"], "completed")
+            self.assertTrue(status["result"]["success"])
+        self.assertEqual({entry["name"] for entry in self.task_automation.get_task_history()}, {"fetch", "sync_fetch"})
+        
+        failed = self.task_automation.execute_task("broken")
+        self.assertRaises(ValueError, failed["handle"].result, 2)
+        self.assertEqual(self.task_automation.get_task_status(failed["task_id"])["status"], "failed")
+    
+    def test_cancel_and_timeout(self):
+        """Test that cancelling or timing out an async task interrupts it."""
+        running = self.task_automation.execute_task("fetch", {"delay": 5})
+        time.sleep(0.05)
+        self.assertEqual(self.task_automation.cancel(running["task_id"])["status"], "cancelled")
+        self.assertEqual(running["handle"].status(), "cancelled")
+        
+        timed = self.task_automation.execute_task("fetch", {"delay": 5}, timeout=0.1)
+        self.assertRaises(TaskTimeoutError, timed["handle"].result, 2)
+        self.assertEqual(self.task_automation.get_task_status(timed["task_id"])["status"], "timed_out")
+        
+        time.sleep(0.05)
+        stats = self.task_automation.get_executor_stats()["async"]
+        self.assertEqual((stats["cancelled"], stats["active"]), (2, 0))
+    
+    def test_max_concurrent(self):
+        """Test that coroutines beyond max_concurrent wait for a slot."""
+        runtime = AsyncRuntime("test-async", max_concurrent=2)
+        gate = threading.Event()
+        
+        async def hold():
+            while not gate.is_set():
+                await asyncio.sleep(0.01)
+        
+        for key in range(5):
+            runtime.submit(key, hold())
+        time.sleep(0.1)
+        self.assertEqual((runtime.get_stats()["running"], runtime.get_stats()["waiting"]), (2, 3))
+        self.assertTrue(runtime.cancel(4))
+        self.assertFalse(runtime.cancel("unknown"))
+        
+        gate.set()
+        time.sleep(0.2)
+        stats = runtime.get_stats()
+        self.assertEqual((stats["completed"], stats["cancelled"], stats["max_running"]), (4, 1, 2))
+        
+        thread = runtime._thread
+        runtime.shutdown()
+        self.assertFalse(thread.is_alive())
+        self.assertTrue(runtime.loop.is_closed())
+        with self.assertRaises(RuntimeError):
+            runtime.submit("late", hold())
+    
+    def test_close(self):
+        """Test that close() finishes or cancels outstanding tasks, stops its threads and refuses new work."""
+        quick = self.task_automation.execute_task("fetch", {"delay": 0.05})["handle"]
+        stuck = self.task_automation.execute_task("fetch", {"delay": 60})["handle"]
+        queued = self.task_automation.execute_task("sync_fetch", {"delay": 0.05})["handle"]
+        time.sleep(0.01)
+        threads = list(self.task_automation.executor._threads) + [self.task_automation.async_runtime._thread,
+                                                                   self.task_automation.watchdog._thread]
+        
+        self.task_automation.close(timeout=0.5)
+        self.assertEqual(quick.result(0), {"success": True, "delay": 0.05})
+        self.assertEqual(queued.result(0), {"success": True})
+        self.assertTrue(stuck.future.cancelled())
+        
+        self.assertEqual([thread.name for thread in threads if thread is not None and thread.is_alive()], [])
+        result = self.task_automation.execute_task("fetch", {"delay": 0})
+        self.assertFalse(result["success"])
+        self.assertIn("closed", result["message"])
+
+
+def checksum_task(data):
+    """CPU-bound process-lane task: checksum a payload."""
+    return {"success": True, "size": len(data), "checksum": sum(data[::4096]) % 65521}
+
+
+def render_task(size):
+    """Process-lane task with a large bytes result."""
+    return {"success": True, "image": bytes(range(256)) * (size // 256)}
+
+
+def failing_task(message):
+    """Process-lane task that raises."""
+    raise ValueError(message)
+
+
+def spin_task(seconds):
+    """Process-lane task that keeps its worker busy."""
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        pass
+    return {"success": True}
+
+
+class TestProcessLane(unittest.TestCase):
+    """Test cases for CPU-bound tasks in worker processes."""
+    
+    @classmethod
+    def setUpClass(cls):
+        """Set up process-lane tasks on a single warm worker process."""
+        cls.task_automation = TaskAutomation(process_config={"workers": 1, "shm_threshold": 64 * 1024})
+        cls.task_automation.add_task("checksum", "Checksum", ["data"], checksum_task, lane="process")
+        cls.task_automation.add_task("render", "Render", ["size"], render_task, lane="process")
+        cls.task_automation.add_task("failing", "Failing", ["message"], failing_task, lane="process")
+        cls.task_automation.add_task("spin", "Spin", ["seconds"], spin_task, lane="process")
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.task_automation.close()
+    
+    def test_shared_memory(self):
+        """Test that large parameters and results go through shared memory."""
+        data = os.urandom(2 * 1024 * 1024)
+        before = self.task_automation.get_executor_stats()["process"]["shared_payloads"]
+        result = self.task_automation.execute_task("checksum", {"data": data})
+        outcome = result["handle"].result(30)
+        self.assertEqual(outcome, checksum_task(data))
+        
+        rendered = self.task_automation.execute_task("render", {"size": 256 * 1024})["handle"].result(30)
+        self.assertEqual(rendered["image"], bytes(range(256)) * 1024)
+        small = self.task_automation.execute_task("checksum", {"data": b"abc"})["handle"].result(30)
+        self.assertEqual(small["size"], 3)
+        
+        stats = self.task_automation.get_executor_stats()["process"]
+        self.assertEqual(stats["shared_payloads"] - before, 1)
+        self.assertEqual(self.task_automation.get_task_status(result["task_id"])["status"], "completed")
+        self.assertIn("checksum", [entry["name"] for entry in self.task_automation.get_task_history()])
+    
+    def test_exception(self):
+        """Test that an exception raised in the worker fails the task."""
+        result = self.task_automation.execute_task("failing", {"message": "Corrupt frame"})
+        self.assertRaises(ValueError, result["handle"].result, 30)
+        status = self.task_automation.get_task_status(result["task_id"])
+        self.assertEqual((status["status"], status["error"]), ("failed", "Corrupt frame"))
+    
+    def test_cancel(self):
+        """Test that a queued task is cancelled and a running one abandoned."""
+        running = self.task_automation.execute_task("spin", {"seconds": 0.5})
+        queued = self.task_automation.execute_task("spin", {"seconds": 0.5})
+        time.sleep(0.05)
+        self.assertEqual(self.task_automation.get_task_status(queued["task_id"])["status"], "queued")
+        self.assertEqual(self.task_automation.cancel(queued["task_id"])["status"], "cancelled")
+        self.assertEqual(self.task_automation.cancel(running["task_id"])["status"], "abandoned")
+        
+        after = self.task_automation.execute_task("checksum", {"data": b"x"})
+        self.assertTrue(after["handle"].result(30)["success"])
+        self.assertEqual(self.task_automation.get_task_status(running["task_id"])["status"], "abandoned")
+    
+    def test_lanes(self):
+        """Test that lane hints are validated against the function."""
+        async def fetch():
+            return {"success": True}
+        
+        self.assertFalse(self.task_automation.add_task("bad_lane", "Bad", [], spin_task, lane="gpu"))
+        self.assertFalse(self.task_automation.add_task("async_process", "Bad", [], fetch, lane="process"))
+        self.assertFalse(self.task_automation.add_task("sync_async", "Bad", [], spin_task, lane="async"))
+        self.assertTrue(self.task_automation.add_task("fetch", "Fetch", [], fetch))
+        self.assertEqual(self.task_automation.execute_task("fetch")["handle"].result(2), {"success": True})
+        self.assertEqual(self.task_automation.tasks["fetch"]["lane"], "async")
+
+
+def catalog_echo(message):
+    """Task function referenced from test catalogs."""
+    return {"success": True, "message": message}
+
+
+class TestTaskCatalog(unittest.TestCase):
+    """Test cases for tasks and routines defined in catalog files."""
+    
+    def setUp(self):
+        """Set up a catalog directory with a JSON and a YAML file."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.catalog_dir = os.path.join(self.temp_dir, "catalog")
+        os.makedirs(self.catalog_dir)
+        self.echo = f"{catalog_echo.__module__}:catalog_echo"
+        
+        self.write("basic.json", json.dumps({
+            "tasks": {
+                "echo": {"description": "Echo a message", "parameters": ["message"], "function": self.echo},
+                "missing": {"parameters": [], "function": "jarvis_no_such_module:run"}
+            },
+            "routines": {
+                "greeting": {"description": "Say hello", "tasks": [
+                    {"task": "echo", "params": {"message": "Hello"}},
+                    {"task": "turn_on_lights", "params": {"room": "hall"}, "depends_on": ["echo"]}
+                ]}
+            }
+        }))
+        self.write("extra.yaml", f"tasks:\n  shout:\n    parameters: [message]\n    function: \"{self.echo}\"\n    idempotent: true\n")
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+    
+    def write(self, name, content, mtime=None):
+        path = os.path.join(self.catalog_dir, name)
+        with open(path, "w") as f:
+            f.write(content)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return path
+    
+    def test_lazy_loading(self):
+        """Test that catalog tasks run and import their function on first execution."""
+        task_automation = TaskAutomation(catalog_path=self.catalog_dir, catalog_reload=None)
+        self.assertIn("turn_on_lights", task_automation.tasks)
+        self.assertIsInstance(task_automation.tasks["echo"]["function"], LazyFunction)
+        self.assertTrue(task_automation.tasks["shout"]["idempotent"])
+        
+        result = task_automation.execute_task("echo", {"message": "hi"})
+        self.assertEqual(result["handle"].result(2), {"success": True, "message": "hi"})
+        self.assertIs(task_automation.tasks["echo"]["function"], catalog_echo)
+        self.assertEqual(task_automation.get_task_status(result["task_id"])["status"], "completed")
+        
+        missing = task_automation.execute_task("missing")
+        self.assertFalse(missing["success"])
+        self.assertIn("Error loading task", missing["message"])
+        self.assertIn("greeting", task_automation.routines)
+        task_automation.close()
+    
+    def test_compiled_cache(self):
+        """Test that unchanged files are taken from the compiled cache."""
+        cache_path = os.path.join(self.temp_dir, "catalog.cache")
+        catalog = TaskCatalog(self.catalog_dir, cache_path)
+        self.assertTrue(catalog.load())
+        self.assertEqual(catalog.get_stats()["parsed"], 2)
+        self.assertFalse(catalog.load())
+        
+        warm = TaskCatalog(self.catalog_dir, cache_path)
+        self.assertTrue(warm.load())
+        stats = warm.get_stats()
+        self.assertEqual((stats["parsed"], stats["from_cache"], stats["tasks"], stats["routines"]), (0, 2, 3, 1))
+        
+        self.write("extra.yaml", "tasks: {}\n", mtime=time.time() + 10)
+        edited = TaskCatalog(self.catalog_dir, cache_path)
+        edited.load()
+        self.assertEqual((edited.get_stats()["parsed"], edited.get_stats()["from_cache"]), (1, 1))
+        self.assertNotIn("shout", edited.tasks())
+    
+    def test_hot_reload(self):
+        """Test that edited catalog files are picked up without a restart."""
+        task_automation = TaskAutomation(catalog_path=self.catalog_dir, catalog_reload=0.05)
+        echo = task_automation.tasks["echo"]
+        
+        self.write("extra.yaml", f"tasks:\n  whisper:\n    parameters: [message]\n    function: \"{self.echo}\"\n",
+                   mtime=time.time() + 10)
+        deadline = time.time() + 2
+        while "whisper" not in task_automation.tasks and time.time() < deadline:
+            time.sleep(0.02)
+        
+        self.assertIn("whisper", task_automation.tasks)
+        self.assertNotIn("shout", task_automation.tasks)
+        self.assertIs(task_automation.tasks["echo"], echo)
+        self.assertFalse(task_automation.reload_catalog()["changed"])
+        task_automation.close()
+    
+    def test_invalid_files(self):
+        """Test that a broken edit keeps the previous definitions."""
+        catalog = TaskCatalog(self.catalog_dir)
+        catalog.load()
+        
+        self.write("basic.json", "{not json", mtime=time.time() + 10)
+        catalog.load()
+        self.assertIn("echo", catalog.tasks())
+        self.assertEqual(catalog.get_stats()["errors"], 1)
+        
+        cyclic = {"routines": {"loop": {"tasks": [{"task": "echo", "id": "a", "depends_on": ["b"]},
+                                                  {"task": "echo", "id": "b", "depends_on": ["a"]}]}}}
+        for content in (json.dumps(cyclic), json.dumps({"tasks": {"bad": {"function": "no_colon"}}})):
+            self.write("broken.json", content, mtime=time.time() + 20)
+            catalog.load()
+            self.assertNotIn("loop", catalog.routines())
+            self.assertNotIn("bad", catalog.tasks())
+        self.assertEqual(catalog.get_stats()["errors"], 3)
+
+    def test_overrides_restored(self):
+        """Test that built-ins overridden by a catalog come back when the entry is removed."""
+        task_automation = TaskAutomation(catalog_path=self.catalog_dir, catalog_reload=None)
+        lights, morning = task_automation.tasks["turn_on_lights"], task_automation.routines["morning"]
+        
+        path = self.write("override.json", json.dumps({
+            "tasks": {"turn_on_lights": {"parameters": ["message"], "function": self.echo}},
+            "routines": {"morning": {"tasks": [{"task": "echo", "params": {"message": "Morning"}}]}}
+        }), mtime=time.time() + 10)
+        task_automation.reload_catalog()
+        self.assertIsInstance(task_automation.tasks["turn_on_lights"]["function"], LazyFunction)
+        self.assertIsNot(task_automation.routines["morning"], morning)
+        
+        os.remove(path)
+        task_automation.reload_catalog()
+        self.assertIs(task_automation.tasks["turn_on_lights"], lights)
+        self.assertIs(task_automation.routines["morning"], morning)
+        task_automation.close()
+    
+    def test_malformed_structure(self):
+        """Test that wrongly shaped sections are rejected once without breaking startup."""
+        for number, content in enumerate((json.dumps({"tasks": [{"function": self.echo}]}),
+                                          json.dumps({"routines": {"hello": {"tasks": ["echo"]}}}),
+                                          json.dumps({"routines": ["hello"]}))):
+            path = self.write("malformed.json", content, mtime=time.time() + 10 * (number + 1))
+            task_automation = TaskAutomation(catalog_path=self.catalog_dir, catalog_reload=None)
+            self.assertIn("echo", task_automation.tasks)
+            self.assertNotIn("hello", task_automation.routines)
+
+            catalog = task_automation.catalog
+            self.assertEqual(catalog.get_stats()["errors"], 1)
+            catalog.load()
+            self.assertEqual(catalog.get_stats()["errors"], 1)
+            task_automation.close()
+            os.remove(path)
+
+
+class TestTaskMetrics(unittest.TestCase):
+    """Test cases for task latency histograms, outcome counters and span hooks."""
+    
+    def setUp(self):
+        """Set up quick, failing and slow tasks on a single worker."""
+        self.task_automation = TaskAutomation(executor_config={"workers": 1, "reserved": 0})
+        self.task_automation.add_task("quick", "Quick", [], lambda: time.sleep(0.02) or {"success": True})
+        self.task_automation.add_task("broken", "Broken", [], lambda: 1 / 0)
+        self.task_automation.add_task("slow", "Slow", [], lambda cancel_token: cancel_token.wait(5))
+    
+    def test_histogram_accuracy(self):
+        """Test that percentiles stay within a few percent at every magnitude."""
+        for micros in list(range(0, 2000)) + [2 ** 20, 2 ** 32 + 12345]:
+            low, high = LatencyHistogram._bounds(LatencyHistogram._index(micros))
+            self.assertTrue(low <= micros <= high)
+            self.assertLessEqual(high - low, max(1, low * 0.07))
+        
+        histogram = LatencyHistogram()
+        for micros in range(1, 100001):
+            histogram.record(micros / 1e6)
+        for percent, expected in ((50, 0.05), (90, 0.09), (99, 0.099)):
+            self.assertAlmostEqual(histogram.percentile(percent), expected, delta=expected * 0.035)
+        summary = histogram.summary()
+        self.assertEqual(summary["count"], 100000)
+        self.assertAlmostEqual(summary["mean"], 0.05, delta=0.001)
+        self.assertEqual(summary["max"], 0.1)
+        self.assertIsNone(LatencyHistogram().percentile(50))
+    
+    def test_sharded_recording(self):
+        """Test that concurrent recording from many threads loses nothing."""
+        metrics = TaskMetrics()
+        
+        def record():
+            for _ in range(5000):
+                metrics.record("lights", "run", 0.001)
+                metrics.count("lights", "completed")
+        threads = [threading.Thread(target=record) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        stats = metrics.get_stats()["lights"]
+        self.assertEqual(stats["outcomes"], {"completed": 40000})
+        self.assertEqual(stats["run"]["count"], 40000)
+        self.assertEqual(stats["wait"]["count"], 0)
+    
+    def test_task_metrics(self):
+        """Test that wait, run and total time and outcomes are recorded per task."""
+        handles = [self.task_automation.execute_task("quick")["handle"] for _ in range(5)]
+        for handle in handles:
+            handle.wait(2)
+        self.task_automation.execute_task("broken")["handle"].wait(2)
+        self.task_automation.execute_task("slow", timeout=0.05)["handle"].wait(2)
+        
+        metrics = self.task_automation.get_task_metrics()
+        quick = metrics["quick"]
+        self.assertEqual(quick["outcomes"], {"completed": 5})
+        self.assertAlmostEqual(quick["run"]["p50"], 0.02, delta=0.015)
+        self.assertGreater(quick["wait"]["max"], 0.06)
+        self.assertGreaterEqual(quick["total"]["max"], quick["wait"]["max"] + 0.015)
+        self.assertEqual(metrics["broken"]["outcomes"], {"failed": 1})
+        self.assertEqual(metrics["slow"]["outcomes"], {"timed_out": 1})
+        self.assertGreaterEqual(metrics["slow"]["run"]["max"], 0.05)
+        self.assertEqual(list(self.task_automation.get_task_metrics("broken")), ["broken"])
+        self.assertIsNotNone(self.task_automation.get_task_history(1)[0]["wait"])
+    
+    def test_span_hooks(self):
+        """Test that span hooks see every task start and end."""
+        events = []
+        
+        def tracer(event, span):
+            if event == "start":
+                span.context = f"trace-{span.task_id}"
+            events.append((event, span.name, span.status, span.context))
+        
+        def broken_hook(event, span):
+            raise RuntimeError("Tracer down")
+        
+        self.task_automation.add_span_hook(tracer)
+        self.task_automation.add_span_hook(broken_hook)
+        running = self.task_automation.execute_task("slow")
+        queued = self.task_automation.execute_task("quick")
+        deadline = time.time() + 2
+        while not events and time.time() < deadline:
+            time.sleep(0.01)
+        self.task_automation.cancel(queued["task_id"])
+        self.task_automation.cancel(running["task_id"])
+        result = self.task_automation.execute_task("quick")
+        self.assertEqual(result["handle"].result(2), {"success": True})
+        
+        context = f"trace-{result['task_id']}"
+        self.assertEqual(events, [
+            ("start", "slow", "running", f"trace-{running['task_id']}"),
+            ("end", "quick", "cancelled", None),
+            ("end", "slow", "cancelled", f"trace-{running['task_id']}"),
+            ("start", "quick", "running", context),
+            ("end", "quick", "completed", context)
+        ])
+        self.assertEqual(self.task_automation.metrics.stats["hook_errors"], 5)
+        
+        self.task_automation.remove_span_hook(tracer)
+        self.task_automation.execute_task("quick")["handle"].wait(2)
+        self.assertEqual(len(events), 5)
+
+
+class TestRoutineEngine(unittest.TestCase):
+    """Test cases for dependency-aware routine execution."""
+    
+    def setUp(self):
+        """Set up fast stub tasks that record when they start and finish."""
+        self.task_automation = TaskAutomation()
+        self.events = []
+        
+        def step(name, seconds=0.1, succeed=True):
+            self.events.append(("start", name))
+            time.sleep(seconds)
+            self.events.append(("end", name))
+            return {"success": succeed, "message": f"{name} {'done' if succeed else 'failed'}"}
+        
+        self.task_automation.add_task("step", "Sleep briefly", ["name"], step)
+    
+    def run_routine(self, steps):
+        self.assertTrue(self.task_automation.add_routine("test", "Test routine", steps))
+        return self.task_automation.execute_routine("test", timeout=5)
+    
+    def test_parallel_with_dependencies(self):
+        """Test that independent steps overlap and dependents wait for them."""
+        result = self.run_routine([
+            {"id": "a", "task": "step", "params": {"name": "a", "seconds": 0.2}},
+            {"id": "b", "task": "step", "params": {"name": "b", "seconds": 0.1}},
+            {"id": "c", "task": "step", "params": {"name": "c"}, "depends_on": ["a", "b"]}
+        ])
+        
+        self.assertTrue(result["success"])
+        self.assertEqual([step["status"] for step in result["results"]], ["completed"] * 3)
+        self.assertEqual(self.events[-2:], [("start", "c"), ("end", "c")])
+        self.assertLess(result["duration"], result["sequential_duration"] - 0.05)
+        self.assertEqual(result["critical_path"], ["a", "c"])
+        self.assertAlmostEqual(result["critical_path_duration"], 0.3, delta=0.1)
+    
+    def test_skip_policy(self):
+        """Test that a failed step skips its dependents but not other steps."""
+        result = self.run_routine([
+            {"id": "bad", "task": "step", "params": {"name": "bad", "succeed": False}},
+            {"id": "after", "task": "step", "params": {"name": "after"}, "depends_on": ["bad"]},
+            {"id": "later", "task": "step", "params": {"name": "later"}, "depends_on": ["after"]},
+            {"id": "other", "task": "step", "params": {"name": "other"}}
+        ])
+        
+        statuses = {step["step"]: step["status"] for step in result["results"]}
+        self.assertFalse(result["success"])
+        self.assertEqual(statuses, {"bad": "failed", "after": "skipped", "later": "skipped", "other": "completed"})
+    
+    def test_abort_and_continue_policies(self):
+        """Test the abort and continue failure policies."""
+        result = self.run_routine([
+            {"id": "bad", "task": "step", "params": {"name": "bad", "succeed": False}, "on_failure": "continue"},
+            {"id": "after", "task": "step", "params": {"name": "after"}, "depends_on": ["bad"]}
+        ])
+        self.assertTrue(result["success"])
+        self.assertEqual(result["results"][1]["status"], "completed")
+        
+        self.task_automation.routines.pop("test")
+        result = self.run_routine([
+            {"id": "bad", "task": "missing_task", "on_failure": "abort"},
+            {"id": "next", "task": "step", "params": {"name": "next"}, "depends_on": ["bad"]},
+            {"id": "root", "task": "step", "params": {"name": "root"}}
+        ])
+        statuses = {step["step"]: step["status"] for step in result["results"]}
+        self.assertEqual(statuses, {"bad": "failed", "next": "cancelled", "root": "cancelled"})
+    
+    def test_invalid_routines(self):
+        """Test that unknown dependencies and cycles are rejected."""
+        self.assertFalse(self.task_automation.add_routine("cycle", "Cycle", [
+            {"id": "a", "task": "step", "depends_on": ["b"]},
+            {"id": "b", "task": "step", "depends_on": ["a"]}
+        ]))
+        with self.assertRaises(ValueError):
+            RoutineEngine.plan([{"id": "a", "task": "step", "depends_on": ["nope"]}])
+    
+    def test_background_routine(self):
+        """Test starting a routine without waiting for it."""
+        self.task_automation.add_routine("test", "Test routine", [{"task": "step", "params": {"name": "a"}}])
+        result = self.task_automation.execute_routine("test", wait=False)
+        
+        self.assertTrue(result["success"])
+        self.assertEqual(result["handle"].result(5)["results"][0]["status"], "completed")
+
+
+class TestScheduler(unittest.TestCase):
+    """Test cases for the job scheduler."""
+    
+    def setUp(self):
+        """Set up a scheduler on a fake clock that records fired jobs."""
+        self.clock = FakeClock()
+        self.fired = []
+        self.scheduler = Scheduler(lambda job: self.fired.append(job["id"]), clock=self.clock)
+    
+    def test_one_shot(self):
+        """Test that a one-shot job fires once, when due."""
+        job = self.scheduler.schedule("task", "remind", {"message": "hi"}, at=1010)
+        
+        self.clock.advance(9.9)
+        self.assertEqual(self.scheduler.run_pending(), [])
+        self.clock.advance(0.1)
+        self.assertEqual([fired["id"] for fired in self.scheduler.run_pending()], [job["id"]])
+        self.assertEqual(self.scheduler.run_pending(), [])
+        self.assertEqual(len(self.scheduler), 0)
+        self.assertEqual(self.scheduler.get_stats()["max_lateness"], 0.0)
+    
+    def test_interval_and_order(self):
+        """Test recurring jobs, missed runs and firing order."""
+        self.scheduler.schedule("task", "a", every=10, job_id="every10")
+        self.scheduler.schedule("task", "b", at=1005, job_id="once")
+        
+        self.clock.advance(10)
+        self.scheduler.run_pending()
+        self.assertEqual(self.fired, ["once", "every10"])
+        
+        # Three missed intervals fire once, then the job is back on its period
+        self.clock.advance(35)
+        self.scheduler.run_pending()
+        self.assertEqual(self.fired, ["once", "every10", "every10"])
+        self.assertEqual(self.scheduler.get_job("every10")["due"], 1055)
+    
+    def test_cron(self):
+        """Test cron expressions in local time."""
+        saturday_noon = datetime(2024, 6, 1, 12, 0).timestamp()
+        weekdays = CronSchedule("0 8 * * mon-fri")
+        self.assertEqual(weekdays.next_after(saturday_noon), datetime(2024, 6, 3, 8, 0).timestamp())
+        self.assertEqual(CronSchedule("*/15 * * * *").next_after(saturday_noon), datetime(2024, 6, 1, 12, 15).timestamp())
+        self.assertEqual(CronSchedule("0 0 1 * *").next_after(saturday_noon), datetime(2024, 7, 1).timestamp())
+        
+        for expression in ("0 8 * *", "61 * * * *", "0 0 31 2 *"):
+            with self.assertRaises(ValueError):
+                CronSchedule(expression).next_after(saturday_noon)
+        
+        self.clock.now = saturday_noon
+        job = self.scheduler.schedule("routine", "morning", cron="0 8 * * 1-5")
+        self.clock.now = job["due"]
+        self.scheduler.run_pending()
+        self.assertEqual(self.scheduler.get_job(job["id"])["due"], datetime(2024, 6, 4, 8, 0).timestamp())
+    
+    def test_cancel(self):
+        """Test that cancelled jobs never fire and their heap entries are reclaimed."""
+        ids = [self.scheduler.schedule("task", "t", at=1001 + i)["id"] for i in range(3000)]
+        for job_id in ids[:2500]:
+            self.assertTrue(self.scheduler.cancel(job_id))
+        self.assertFalse(self.scheduler.cancel(ids[0]))
+        self.assertLess(self.scheduler.get_stats()["heap_size"], 3000)
+        
+        self.clock.advance(5000)
+        self.scheduler.run_pending()
+        self.assertEqual(self.fired, ids[2500:])
+    
+    def test_persistence(self):
+        """Test that jobs survive a restart."""
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        path = os.path.join(temp_dir, "schedule.jsonl")
+        
+        scheduler = Scheduler(lambda job: None, path, {"min_compact": 5}, clock=self.clock)
+        scheduler.schedule("task", "t", every=60, job_id="recurring")
+        for i in range(10):
+            scheduler.schedule("task", "t", at=1100 + i, job_id=f"once_{i}")
+        scheduler.cancel("once_0")
+        self.clock.advance(60)
+        scheduler.run_pending()
+        scheduler.close()
+        
+        with open(path, "a") as f:
+            f.write('{"op": "remo')  # torn write
+        
+        restored = Scheduler(self.fired.append, path, clock=self.clock)
+        self.assertEqual([job["id"] for job in restored.jobs()], [f"once_{i}" for i in range(1, 10)] + ["recurring"])
+        self.assertEqual(restored.get_job("recurring")["runs"], 1)
+        self.assertEqual(restored.get_job("recurring")["due"], 1120)
+        restored.close()
+    
+    def test_timer_thread(self):
+        """Test that the timer thread fires jobs close to their due time."""
+        fired = threading.Event()
+        scheduler = Scheduler(lambda job: fired.set())
+        scheduler.start()
+        self.addCleanup(scheduler.stop)
+        
+        due = time.time() + 0.2
+        scheduler.schedule("task", "t", at=due)
+        self.assertTrue(fired.wait(2))
+        self.assertLess(scheduler.get_stats()["max_lateness"], 0.1)
+    
+    def test_task_automation_scheduling(self):
+        """Test scheduling tasks, routines and reminders through TaskAutomation."""
+        task_automation = TaskAutomation()
+        ran = threading.Event()
+        task_automation.add_task("ping", "Ping", ["value"], lambda value: ran.set() or {"success": True})
+        
+        self.assertFalse(task_automation.schedule_task("ping", {}, at=time.time())["success"])
+        self.assertFalse(task_automation.schedule_routine("missing", every=60)["success"])
+        self.assertFalse(task_automation.schedule_task("ping", {"value": 1}, cron="bad")["success"])
+        
+        result = task_automation.schedule_task("ping", {"value": 1}, at=time.time() + 3600)
+        self.assertTrue(result["success"])
+        task_automation.scheduler.run_pending(now=result["next_run"])
+        self.assertTrue(ran.wait(2))
+        time.sleep(0.05)
+        scheduled = task_automation.get_task_history()[-1]["task_id"]
+        self.assertEqual(task_automation.get_task_status(scheduled)["priority"], "background")
+        
+        reminder = task_automation._simulate_set_reminder("Wake up", "08:00")
+        self.assertTrue(reminder["success"])
+        self.assertEqual(datetime.fromtimestamp(reminder["due"]).strftime("%H:%M"), "08:00")
+        self.assertEqual(task_automation.get_scheduled_jobs()[0]["target"], "remind")
+        self.assertTrue(task_automation.cancel_scheduled(reminder["job_id"])["success"])
+        self.assertFalse(task_automation._simulate_set_reminder("Wake up", "soon")["success"])
+        task_automation.scheduler.stop()
+
+
+class TestIntentMatcher(unittest.TestCase):
+    """Test cases for the compiled intent matcher."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.sources = IntentMatcher(DEFAULT_SOURCE_INTENTS)
+        self.commands = IntentMatcher(DEFAULT_COMMAND_INTENTS)
+    
+    def test_priority_within_clause(self):
+        """Test that the highest-priority intent wins inside one clause."""
+        self.assertEqual(self.sources.classify("what's the weather like today"), ["weather"])
+        self.assertEqual(self.sources.classify("what time is it"), ["time"])
+        self.assertEqual(self.sources.classify("who is Albert Einstein"), [])
+    
+    def test_multi_intent(self):
+        """Test that each clause of a compound query contributes an intent."""
+        self.assertEqual(
+            self.sources.classify("what time is it and what's the weather in Tokyo"),
+            ["time", "weather"]
+        )
+        self.assertEqual(self.sources.classify("latest headlines, then the forecast"), ["news", "weather"])
+    
+    def test_word_boundaries(self):
+        """Test that keywords don't match inside longer words."""
+        self.assertIsNone(self.commands.first("open the settings"))
+        self.assertEqual(self.commands.first("set a reminder"), "task")
+        self.assertEqual(self.sources.classify("sometimes the daylight fades"), [])
+        self.assertEqual(self.sources.classify("an x-ray image"), [])
+    
+    def test_symbols(self):
+        """Test that arithmetic operators select the calculator."""
+        self.assertEqual(self.sources.classify("25 * 4"), ["calculator"])
+        self.assertEqual(self.sources.classify("10 - 3"), ["calculator"])
+        self.assertEqual(self.sources.classify("(2 + 3) * -4"), ["calculator"])
+        self.assertEqual(self.sources.classify("what is 20% of 50"), ["calculator"])
+    
+    def test_hyphenated_names(self):
+        """Test that a hyphen between a word and a number is not a subtraction."""
+        self.assertEqual(self.sources.classify("covid-19 news"), ["news"])
+        self.assertEqual(self.sources.classify("windows-11 update"), [])
+        self.assertEqual(self.sources.classify("the f-16 / f-35 program"), [])
+    
+    def test_multi_word_keywords(self):
+        """Test keywords spanning several words and extra whitespace."""
+        self.assertEqual(self.commands.first("please turn   off the lights"), "task")
+        self.assertEqual(self.commands.first("what should I do"), "info")
+    
+    def test_from_file(self):
+        """Test loading keyword tables from a JSON config file."""
+        path = "/tmp/jarvis_intents_test.json"
+        with open(path, "w") as f:
+            json.dump({
+                "sources": [{"intent": "news", "keywords": ["gossip"]}],
+                "separators": ["plus"]
+            }, f)
+        
+        matcher = IntentMatcher.from_file(path, "sources")
+        self.assertEqual(matcher.classify("any gossip"), ["news"])
+        self.assertEqual(matcher.classify("the news"), [])
+        
+        info_retrieval = InformationRetrieval(intent_config=path)
+        self.assertEqual(info_retrieval._determine_sources("gossip"), ["news"])
+        self.assertEqual(info_retrieval._determine_sources("weather"), ["web", "knowledge_base"])
+
+
+class TestKnowledgeBase(unittest.TestCase):
+    """Test cases for the BM25 knowledge base."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.directory = tempfile.mkdtemp()
+        self.index_path = os.path.join(self.directory, "kb.index")
+        self.docs_dir = os.path.join(self.directory, "docs")
+        os.makedirs(self.docs_dir)
+        
+        with open(os.path.join(self.docs_dir, "solar.md"), "w") as f:
+            f.write("# Solar Panels\nSolar panels convert sunlight into electricity using photovoltaic cells.")
+        with open(os.path.join(self.docs_dir, "batteries.json"), "w") as f:
+            json.dump([
+                {"id": "lithium", "title": "Lithium Batteries", "content": "Lithium batteries store electricity for later use."},
+                {"id": "lead", "title": "Lead Acid Batteries", "content": "Lead acid batteries are heavy but cheap."}
+            ], f)
+    
+    def tearDown(self):
+        """Remove temporary files."""
+        shutil.rmtree(self.directory)
+    
+    def test_ranking(self):
+        """Test that BM25 ranks the most relevant document first."""
+        kb = KnowledgeBase(self.docs_dir)
+        
+        results = kb.search("how do solar panels work")
+        self.assertEqual(results[0]["title"], "Solar Panels")
+        
+        results = kb.search("store electricity", top_k=2)
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0]["doc_id"], "lithium")
+        self.assertGreater(results[0]["score"], results[1]["score"])
+        
+        self.assertEqual(kb.search("quantum chromodynamics"), [])
+    
+    def test_incremental_add_remove(self):
+        """Test adding and removing documents without rebuilding."""
+        kb = KnowledgeBase()
+        kb.add_document("wind", "Wind Turbines", "Wind turbines turn moving air into electricity.")
+        self.assertEqual(kb.search("turbines")[0]["doc_id"], "wind")
+        
+        self.assertTrue(kb.remove_document("wind"))
+        self.assertEqual(kb.search("turbines"), [])
+        self.assertEqual(kb.postings, {})
+        self.assertEqual(kb.total_length, 0)
+        self.assertFalse(kb.remove_document("wind"))
+    
+    def test_persisted_index(self):
+        """Test that unchanged files are not re-indexed after a restart."""
+        kb = KnowledgeBase(self.docs_dir, self.index_path)
+        self.assertTrue(os.path.exists(self.index_path))
+        
+        reloaded = KnowledgeBase(index_path=self.index_path)
+        self.assertEqual(len(reloaded), 3)
+        self.assertEqual(reloaded.sync_directory(self.docs_dir), 0)
+        self.assertEqual(reloaded.search("lithium")[0]["doc_id"], "lithium")
+    
+    def test_directory_changes(self):
+        """Test that modified and deleted files update the index."""
+        kb = KnowledgeBase(self.docs_dir, self.index_path)
+        
+        with open(os.path.join(self.docs_dir, "solar.md"), "w") as f:
+            f.write("Solar Thermal\nSolar thermal collectors heat water directly.")
+        os.remove(os.path.join(self.docs_dir, "batteries.json"))
+        
+        self.assertEqual(kb.sync_directory(self.docs_dir), 1)
+        self.assertEqual(len(kb), 1)
+        self.assertEqual(kb.search("water")[0]["title"], "Solar Thermal")
+        self.assertEqual(kb.search("lithium"), [])
+    
+    @unittest.skipUnless(mapped_index.available(), "numpy is not installed")
+    def test_mapped_index(self):
+        """Test that the persisted index is memory-mapped and queried in place."""
+        KnowledgeBase(self.docs_dir, self.index_path)
+        self.assertTrue(mapped_index.is_mapped_index(self.index_path))
+        
+        kb = KnowledgeBase(index_path=self.index_path)
+        self.assertEqual(kb.documents, {})
+        self.assertFalse(kb._segment.posting_docs.flags.owndata)
+        
+        memory = KnowledgeBase()
+        for path, info in kb.files.items():
+            for doc_id in info["doc_ids"]:
+                number = kb._segment.find_document(doc_id)
+                document = kb._segment.document(number)
+                memory.add_document(doc_id, document["title"], document["content"], document["keywords"])
+        
+        for query in ["electricity", "lead acid batteries", "solar cells"]:
+            mapped_results = [(r["doc_id"], round(r["score"], 6)) for r in kb.search(query)]
+            memory_results = [(r["doc_id"], round(r["score"], 6)) for r in memory.search(query)]
+            self.assertEqual(mapped_results, memory_results)
+        kb.close()
+    
+    @unittest.skipUnless(mapped_index.available(), "numpy is not installed")
+    def test_mapped_index_delta(self):
+        """Test adds and removes on top of a mapped index, then compaction."""
+        kb = KnowledgeBase(self.docs_dir, self.index_path)
+        
+        self.assertTrue(kb.remove_document("lithium"))
+        self.assertFalse(kb.remove_document("lithium"))
+        kb.add_document("lead", "Lead Acid Batteries", "Car batteries are usually lead acid.")
+        kb.add_document("wind", "Wind Turbines", "Wind turbines generate electricity.")
+        
+        self.assertEqual(len(kb), 3)
+        self.assertEqual([r["doc_id"] for r in kb.search("lithium")], [])
+        self.assertEqual(kb.search("car")[0]["doc_id"], "lead")
+        self.assertEqual(len(kb.search("lead")), 1)
+        
+        # The live file is unmapped before it is replaced, as Windows requires
+        segment = kb._segment
+        replace = os.replace
+        mapped_at_replace = []
+        def checked_replace(source, destination):
+            mapped_at_replace.append(not segment._mmap.closed)
+            replace(source, destination)
+        with patch.object(mapped_index.os, "replace", checked_replace):
+            kb.save()
+        self.assertEqual(mapped_at_replace, [False])
+        self.assertIsNot(kb._segment, segment)
+
+        self.assertEqual(kb.documents, {})
+        self.assertEqual(len(kb), 3)
+        self.assertEqual(kb.search("turbines")[0]["doc_id"], "wind")
+        self.assertEqual(kb.search("car")[0]["doc_id"], "lead")
+        kb.close()
+    
+    def test_information_retrieval_source(self):
+        """Test the knowledge base source of the retrieval module."""
+        info_retrieval = InformationRetrieval(knowledge_base_dir=self.docs_dir)
+        
+        result = info_retrieval._search_knowledge_base("tell me about lead acid batteries")
+        self.assertTrue(result["found"])
+        self.assertEqual(result["title"], "Lead Acid Batteries")
+        self.assertEqual(result["confidence"], round(score_confidence(result["results"][0]["score"]), 3))
+        self.assertFalse(info_retrieval._search_knowledge_base("who is Albert Einstein")["found"])
+
+
+class TestCalculator(unittest.TestCase):
+    """Test cases for the safe arithmetic engine."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.calculator = Calculator()
+    
+    def assertResult(self, query, expected):
+        result = self.calculator.calculate(query)
+        self.assertTrue(result["success"], result)
+        self.assertAlmostEqual(result["result"], expected)
+    
+    def test_symbols(self):
+        """Test written arithmetic."""
+        self.assertResult("calculate 25 * 4 + 10", 110)
+        self.assertResult("(2 + 3) * 4", 20)
+        self.assertResult("1,000 / 8", 125)
+        self.assertResult("3 ^ 2", 9)
+    
+    def test_spoken_forms(self):
+        """Test spoken operators, powers, roots and percentages."""
+        self.assertResult("what is 5 plus 3 squared", 14)
+        self.assertResult("100 divided by 4 minus 5", 20)
+        self.assertResult("6 multiplied by 7", 42)
+        self.assertResult("2 to the power of 10", 1024)
+        self.assertResult("square root of 16 plus 1", 5)
+        self.assertResult("20 percent of 50", 10)
+        self.assertResult("10% of 200", 20)
+        self.assertResult("50% + 1", 1.5)
+    
+    def test_modulo(self):
+        """Test that a "%" between operands is a modulo rather than a percentage."""
+        self.assertResult("10 % 3", 1)
+        self.assertResult("17 % (2 + 3)", 2)
+        self.assertResult("17 mod 5", 2)
+    
+    def test_functions(self):
+        """Test whitelisted function calls and that unknown ones are refused."""
+        self.assertResult("sqrt(16)", 4)
+        self.assertResult("abs(-5)", 5)
+        self.assertResult("what is sqrt (9) plus abs(-1)", 4)
+        self.assertResult("what is (2 + 3) * 4", 20)
+        self.assertFalse(self.calculator.calculate("sqrt(-1)")["success"])
+        self.assertFalse(self.calculator.calculate("log(8)")["success"])
+    
+    def test_rejects_unsafe_input(self):
+        """Test that only whitelisted arithmetic is evaluated."""
+        result = self.calculator.calculate('__import__("os").system("echo hi")')
+        self.assertFalse(result["success"])
+        
+        compile_expression = self.calculator._compile_expression
+        with self.assertRaises(ValueError):
+            compile_expression("(1).__class__")
+        with self.assertRaises(ValueError):
+            compile_expression("[1, 2]")
+    
+    def test_limits(self):
+        """Test that huge computations are refused quickly."""
+        start = time.time()
+        for query in ["9**9**9", "2 ** 100000", "99999999 ** 1000", "(10**1000) * (10**1000)"]:
+            result = self.calculator.calculate(query)
+            self.assertFalse(result["success"], query)
+        self.assertLess(time.time() - start, 1)
+        
+        self.assertFalse(self.calculator.calculate("+".join(["1"] * 200))["success"])
+        self.assertFalse(self.calculator.calculate("10 / 0")["success"])
+    
+    def test_calculate_many(self):
+        """Test batch evaluation keeps input order and caches expressions."""
+        info_retrieval = InformationRetrieval()
+        results = info_retrieval.calculate_many(["1 plus 1", "hello", "2 times 3", "1 plus 1"])
+        
+        self.assertEqual([r.get("result") for r in results], [2, None, 6, 2])
+        self.assertGreaterEqual(info_retrieval.calculator._compile.cache_info().hits, 1)
+    
+    def test_source_routing(self):
+        """Test that spoken calculations reach the calculator source."""
+        info_retrieval = InformationRetrieval()
+        self.assertEqual(info_retrieval._determine_sources("what is 20 percent of 50"), ["calculator"])
+        result = info_retrieval.search("what is 20 percent of 50")
+        self.assertEqual(result["results"]["calculator"]["result"], 10)
+
+
+class TestHttpClient(unittest.TestCase):
+    """Test cases for the shared HTTP client."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.client = HttpClient({"backoff_base": 0.01, "read_timeout": 2})
+    
+    def tearDown(self):
+        """Close pooled connections."""
+        self.client.close()
+    
+    def test_keep_alive_reuses_connection(self):
+        """Test that sequential requests share a single pooled connection."""
+        with StubHttpServer() as server:
+            for i in range(5):
+                self.assertEqual(self.client.get_json(server.url + "/json", {"i": i})["query"], f"i={i}")
+            
+            self.assertEqual(server.requests, 5)
+            self.assertEqual(len(server.connections), 1)
+    
+    def test_retries_transient_errors(self):
+        """Test that retryable statuses are retried until success."""
+        with StubHttpServer(fail_count=2) as server:
+            data = self.client.get_json(server.url + "/flaky")
+            
+            self.assertEqual(data["path"], "/flaky")
+            self.assertEqual(server.requests, 3)
+            self.assertEqual(self.client.get_stats()["retries"], 2)
+    
+    def test_gives_up_after_max_retries(self):
+        """Test that the last error response is returned when retries run out."""
+        self.client.config["max_retries"] = 1
+        with StubHttpServer(fail_count=10) as server:
+            response = self.client.get(server.url + "/flaky")
+            
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(server.requests, 2)
+    
+    def test_per_host_concurrency_limit(self):
+        """Test that in-flight requests to one host are capped."""
+        self.client.config["max_per_host"] = 2
+        with StubHttpServer(delay=0.2) as server:
+            threads = [
+                threading.Thread(target=self.client.get, args=(server.url + "/slow",))
+                for _ in range(6)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            
+            self.assertEqual(server.requests, 6)
+            self.assertLessEqual(server.max_in_flight, 2)
+    
+    def test_timeout(self):
+        """Test that slow responses raise once the read timeout passes."""
+        self.client.config["max_retries"] = 0
+        with StubHttpServer(delay=1.0) as server:
+            with self.assertRaises(Exception):
+                self.client.get(server.url + "/slow", timeout=(1, 0.2))
+    
+    def test_information_retrieval_endpoint(self):
+        """Test that configured sources query their backend over HTTP."""
+        with StubHttpServer() as server:
+            info_retrieval = InformationRetrieval(endpoints={"news": server.url + "/json"})
+            try:
+                result = info_retrieval.search("robots", sources=["news"])
+            finally:
+                info_retrieval.close()
+            
+            self.assertEqual(result["results"]["news"]["path"], "/json")
+            self.assertIn("q=robots", result["results"]["news"]["query"])
+
+
 class TestMemorySystem(unittest.TestCase):
     """Test cases for the Memory System module."""
     
@@ -344,6 +2839,39 @@ class TestJarvisIntegration(unittest.TestCase):
         # Verify info retrieval was called
         self.mock_info_retrieval.search.assert_called_with("what is the weather")
     
+    def test_info_query_uses_ranked_answer(self):
+        """Test that information queries answer with the best ranked candidate."""
+        self.mock_info_retrieval.search.return_value = {
+            "query": "what is ai",
+            "results": {"web": {"results": []}, "knowledge_base": {"found": True}},
+            "ranked": [
+                {"source": "knowledge_base", "score": 0.8, "answer": "AI is the simulation of human intelligence."},
+                {"source": "web", "score": 0.4, "answer": "I found this on the web: ..."}
+            ]
+        }
+        
+        response = self.jarvis._handle_info_query("what is ai")
+        self.assertEqual(response, "AI is the simulation of human intelligence.")
+        
+        self.mock_info_retrieval.search.return_value = {"query": "x", "results": {}, "ranked": []}
+        self.assertIn("don't have a specific answer", self.jarvis._handle_info_query("x"))
+    
+    def test_task_command_reports_outcome(self):
+        """Test that task commands answer with the task's real outcome."""
+        handle = TaskHandle("turn_on_lights_1", "turn_on_lights")
+        self.mock_task_automation.execute_task.return_value = {"success": True, "task_id": "turn_on_lights_1", "handle": handle}
+        
+        handle.future.set_result({"success": False, "message": "hub offline"})
+        self.assertEqual(self.jarvis._handle_task_command("turn on lights"), "Sorry, that didn't work: hub offline")
+        
+        handle = TaskHandle("turn_on_lights_2", "turn_on_lights")
+        handle.future.set_result({"success": True})
+        self.mock_task_automation.execute_task.return_value = {"success": True, "handle": handle}
+        self.assertEqual(self.jarvis._handle_task_command("turn on lights"), "I've turned on the lights in the living room.")
+        
+        self.mock_task_automation.execute_task.return_value = {"success": False, "message": "Task queue is full"}
+        self.assertIn("Task queue is full", self.jarvis._handle_task_command("turn on lights"))
+    
     def test_visitor_detection(self):
         """Test visitor detection."""
         # Set up mock for find_visitor_by_face